@@ -0,0 +1,150 @@
+"""Event-loop latency during a burst of junction switches.
+
+A ticker coroutine sleeps TICK seconds in a loop and records how late each
+wake-up is, first while the loop is idle, then during a burst of switches
+spread over several junctions.  The burst is run twice: through aio (the
+loop should stay as responsive as when idle), and by calling point_junction()
+directly on the loop (the stall aio avoids).
+
+Switches run against real links in a temporary directory, or with --latency
+against memfs.MemoryBackend with that many milliseconds added to every
+filesystem call, which is how a slow network share looks to the loop.
+
+Run with: python benchmarks/aio_latency.py [--switches 1000] [--junctions 10] [--latency MS] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from win_quick_shuttle import aio, junctions, links
+from win_quick_shuttle.memfs import MemoryBackend
+
+
+TICK = 0.001
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0..1) of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def lag_summary(lags):
+    """p50/p99/max of a list of lags, in milliseconds."""
+    lags = sorted(lags)
+    return {
+        "ticks": len(lags),
+        "p50_ms": percentile(lags, 0.50) * 1000,
+        "p99_ms": percentile(lags, 0.99) * 1000,
+        "max_ms": (lags[-1] if lags else 0.0) * 1000,
+    }
+
+
+async def measure(work):
+    """Run the ticker while awaiting work(); return (lags, seconds work took)."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            begin = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - begin - TICK)
+
+    ticking = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.05)   # Let the ticker settle
+    lags.clear()
+    began = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - began
+    done.set()
+    await ticking
+    return lags, elapsed
+
+
+async def run_all(workdir, switches, junction_count, latency=0.0):
+    # Every switch goes to a target of its own, so none of them are merged
+    targets = [os.path.join(workdir, f"target{i}") for i in range(switches)]
+    for target in targets:
+        links.get_backend().makedirs(target)
+    junction_paths = [os.path.join(workdir, f"junction{i}") for i in range(junction_count)]
+    for junction_path in junction_paths:
+        junctions.point_junction(junction_path, targets[0])
+    plan = [(junction_paths[i % junction_count], targets[i]) for i in range(switches)]
+
+    async def idle():
+        await asyncio.sleep(0.25)
+
+    async def with_aio():
+        results = await asyncio.gather(*(aio.point(j, t) for j, t in plan))
+        failed = sum(not success for success, _ in results)
+        if failed:
+            raise RuntimeError(f"{failed} switches failed")
+
+    async def blocking():
+        for j, t in plan:
+            junctions.point_junction(j, t)
+            await asyncio.sleep(0)      # Yield between switches, as a careful caller would
+
+    results = {"switches": switches, "junctions": junction_count, "latency_ms": latency * 1000}
+    if latency:
+        backend = links.get_backend()
+        for operation in ("probe", "isdir", "exists", "create", "replace", "remove"):
+            backend.latency[operation] = latency
+    for name, work in (("idle", idle), ("aio", with_aio), ("blocking", blocking)):
+        lags, elapsed = await measure(work)
+        results[name] = lag_summary(lags)
+        if name != "idle":
+            results[name]["switches_per_sec"] = switches / elapsed
+    results["merged"] = aio.g["merged"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=1000, help="switches in the burst")
+    parser.add_argument("--junctions", type=int, default=10, help="junctions the burst is spread over")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="milliseconds added to every filesystem call (in-memory backend)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.latency:
+        old_backend = links.set_backend(MemoryBackend())
+        workdir = "/aio"
+    else:
+        old_backend = None
+        workdir = tempfile.mkdtemp(prefix="wqs-aio-")
+    try:
+        results = asyncio.run(run_all(workdir, args.switches, args.junctions, args.latency / 1000))
+    finally:
+        aio.shutdown()
+        if old_backend is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            links.set_backend(old_backend)
+
+    if args.json:
+        print(json.dumps(results))
+        return 0
+    where = f"{args.latency:g} ms per filesystem call" if args.latency else "real links"
+    print(f"{results['switches']} switches over {results['junctions']} junctions ({where}); "
+          f"loop lag past a {TICK * 1000:.0f} ms sleep:")
+    for name in ("idle", "aio", "blocking"):
+        row = results[name]
+        rate = f", {row['switches_per_sec']:.0f} switches/s" if "switches_per_sec" in row else ""
+        print(f"  {name:9} p50 {row['p50_ms']:.2f} ms, p99 {row['p99_ms']:.2f} ms, "
+              f"max {row['max_ms']:.2f} ms over {row['ticks']} ticks{rate}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Contention benchmark for the cross-process switch lock.
+
+Starts N switcher processes that all flip one junction between two targets
+with the remove-then-create sequence (atomic=False), the case that used to
+race and leave no link at all.  Meanwhile a reader thread in this process
+probes the junction as fast as it can, to show that reads never wait on a
+writer.  Reports switches/sec, failed switches, reader latency, and whether
+the junction survived.
+
+Run with: python benchmarks/contention.py [--switchers 8] [--switches 200] [--no-lock] [--json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from win_quick_shuttle import junctions
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0..1) of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def _point_unlocked(junction_path, target_path):
+    """point_junction without the switch lock, to show the race it prevents."""
+    state = junctions.probe(junction_path)
+    error = junctions.check_point_to(target_path, state)
+    if error:
+        return False, error
+    return junctions.switch_junction(junction_path, target_path, state, atomic=False)
+
+
+def switcher(junction, targets, switches, use_lock, start, failures):
+    """Flip junction between targets; count failed switches."""
+    start.wait()
+    failed = 0
+    for i in range(switches):
+        if use_lock:
+            success, _ = junctions.point_junction(junction, targets[i % 2], atomic=False)
+        else:
+            success, _ = _point_unlocked(junction, targets[i % 2])
+        failed += not success
+    with failures.get_lock():
+        failures.value += failed
+
+
+def run_contention(switchers, switches, use_lock):
+    """Run the benchmark and return a results dict."""
+    workdir = tempfile.mkdtemp(prefix="wqs-contention-")
+    targets = [os.path.join(workdir, "a"), os.path.join(workdir, "b")]
+    for target in targets:
+        os.mkdir(target)
+    junction = os.path.join(workdir, "junction")
+    junctions.point_junction(junction, targets[0])
+
+    start = multiprocessing.Event()
+    failures = multiprocessing.Value("i", 0)
+    procs = [multiprocessing.Process(target=switcher,
+                                     args=(junction, targets, switches, use_lock, start, failures))
+             for _ in range(switchers)]
+    for proc in procs:
+        proc.start()
+
+    reading = threading.Event()
+    reads = []
+
+    def reader():
+        while not reading.is_set():
+            begin = time.perf_counter()
+            junctions.probe(junction)
+            reads.append(time.perf_counter() - begin)
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    began = time.perf_counter()
+    start.set()
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - began
+    reading.set()
+    reader_thread.join()
+
+    final = junctions.probe(junction)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    reads.sort()
+    return {
+        "switchers": switchers,
+        "switches": switchers * switches,
+        "locked": use_lock,
+        "seconds": elapsed,
+        "switches_per_sec": switchers * switches / elapsed,
+        "failures": failures.value,
+        "final_state_ok": final.is_link and final.target in targets,
+        "reads": len(reads),
+        "read_p99_us": percentile(reads, 0.99) * 1e6,
+        "read_max_us": (reads[-1] if reads else 0.0) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switchers", type=int, default=8, help="concurrent switcher processes")
+    parser.add_argument("--switches", type=int, default=200, help="switches per process")
+    parser.add_argument("--no-lock", action="store_true", help="switch without the lock (shows the race)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_contention(args.switchers, args.switches, not args.no_lock)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{results['switches']} switches from {results['switchers']} processes "
+              f"in {results['seconds']:.2f}s ({'locked' if results['locked'] else 'unlocked'})")
+        print(f"  {results['switches_per_sec']:.0f} switches/s, {results['failures']} failed, "
+              f"final state {'ok' if results['final_state_ok'] else 'LOST'}")
+        print(f"  {results['reads']} lock-free reads, p99 {results['read_p99_us']:.1f} us, "
+              f"max {results['read_max_us']:.1f} us")
+    return 0 if results["final_state_ok"] and not results["failures"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
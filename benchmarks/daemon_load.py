@@ -0,0 +1,121 @@
+"""Load test for the shuttle daemon.
+
+Starts a daemon in-process, then hammers it with client threads that each
+flip their own junction (or one shared junction with --shared) between two
+targets.  Reports requests/sec and latency percentiles.  With --journal the
+switch journal is on, and the fsyncs it needed per switch show how well
+concurrent switches share group commits.
+
+Run with: python benchmarks/daemon_load.py [--clients 8] [--requests 500] [--shared] [--journal] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from win_quick_shuttle import daemon, wal
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0..1) of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_load(clients, requests, shared, journal=False):
+    """Run the load test and return a results dict."""
+    workdir = tempfile.mkdtemp(prefix="wqs-load-")
+    targets = [os.path.join(workdir, "a"), os.path.join(workdir, "b")]
+    for target in targets:
+        os.mkdir(target)
+    if journal:
+        wal.enable(os.path.join(workdir, wal.WAL_FILENAME))
+
+    if hasattr(socket, "AF_UNIX"):
+        address = os.path.join(workdir, "shuttle.sock")
+    else:
+        address = "127.0.0.1:0"
+    server = daemon.make_server(address)
+    if not hasattr(socket, "AF_UNIX"):
+        host, port = server.server_address
+        address = f"{host}:{port}"
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def client_loop(index):
+        junction = os.path.join(workdir, "shared" if shared else f"junction{index}")
+        mine = []
+        with daemon.Client(address, server.token) as client:
+            for i in range(requests):
+                start = time.perf_counter()
+                response = client.call("point", junction=junction, target=targets[i % 2])
+                mine.append(time.perf_counter() - start)
+                if not response["ok"]:
+                    failures.append(response["message"])
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    fsyncs = wal.g["journal"].fsyncs if journal else 0
+    wal.disable()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": clients * requests,
+        "shared_junction": shared,
+        "seconds": elapsed,
+        "requests_per_sec": clients * requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "failures": len(failures),
+        "fsyncs_per_switch": fsyncs / (clients * requests),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--shared", action="store_true", help="all clients switch one junction")
+    parser.add_argument("--journal", action="store_true", help="journal switches (see wal)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_load(args.clients, args.requests, args.shared, args.journal)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{results['requests']} requests from {results['clients']} clients "
+              f"in {results['seconds']:.2f}s")
+        print(f"  {results['requests_per_sec']:.0f} req/s, "
+              f"p50 {results['p50_ms']:.2f} ms, p99 {results['p99_ms']:.2f} ms, "
+              f"{results['failures']} failures")
+        if args.journal:
+            print(f"  {results['fsyncs_per_switch']:.2f} journal fsyncs per switch")
+    return 1 if results["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Index benchmark for duplicate detection.
+
+Fills a target folder with many small files spread over subfolders, then
+measures the first index, a reload of the saved index, and the cost of
+checking each new arrival.  The first arrivals of each size hash the files
+they collide with (once; the hashes are saved), so arrivals are timed in two
+rounds: cold, then warm.
+
+Run with: python benchmarks/dedupe_index.py [--files 200000] [--per-dir 200] [--arrivals 1000] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from win_quick_shuttle import dedupe
+
+
+def content(i):
+    """Distinct bytes for file i; sizes repeat every 1000 files, so some files need hashing."""
+    return (b"%d" % i).ljust(16 + i % 1000, b".")
+
+
+def run_index(files, per_dir, arrivals):
+    """Run the benchmark and return a results dict."""
+    workdir = tempfile.mkdtemp(prefix="wqs-dedupe-")
+    target = os.path.join(workdir, "target")
+    index = os.path.join(workdir, "index.jsonl")
+    for i in range(files):
+        folder = os.path.join(target, f"d{i // per_dir}")
+        if i % per_dir == 0:
+            os.makedirs(folder)
+        with open(os.path.join(folder, f"f{i}"), "wb") as f:
+            f.write(content(i))
+
+    began = time.perf_counter()
+    first = dedupe.Deduper(target, index)
+    first.load()
+    first.sync()
+    index_seconds = time.perf_counter() - began
+
+    began = time.perf_counter()
+    second = dedupe.Deduper(target, index)
+    second.load()
+    second.sync()
+    reload_seconds = time.perf_counter() - began
+
+    def arrive(first, count):
+        paths = []
+        for i in range(first, first + count):
+            path = os.path.join(target, f"new{i}.bin")
+            with open(path, "wb") as f:
+                f.write(content(files + i) if i % 2 else content(i))    # Every other one duplicates
+            paths.append(path)
+        began = time.perf_counter()
+        for path in paths:
+            second.add(path)
+        return (time.perf_counter() - began) / count
+
+    cold_seconds = arrive(0, arrivals)
+    warm_seconds = arrive(arrivals, arrivals)
+    stats = dict(second.stats)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "files": files,
+        "index_seconds": index_seconds,
+        "reload_seconds": reload_seconds,
+        "arrivals": arrivals,
+        "duplicates": stats["duplicates"],
+        "cold_arrival_us": cold_seconds * 1e6,
+        "warm_arrival_us": warm_seconds * 1e6,
+        "partial_hashes": stats["partial_hashes"],
+        "full_hashes": stats["full_hashes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000, help="files in the target")
+    parser.add_argument("--per-dir", type=int, default=200, help="files per subfolder")
+    parser.add_argument("--arrivals", type=int, default=1000, help="new files checked one at a time, per round")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_index(args.files, args.per_dir, args.arrivals)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{results['files']} files indexed in {results['index_seconds']:.2f}s, "
+              f"reloaded in {results['reload_seconds']:.2f}s")
+        print(f"  2 x {results['arrivals']} arrivals at {results['cold_arrival_us']:.0f} us each cold, "
+              f"{results['warm_arrival_us']:.0f} us warm; {results['duplicates']} duplicates ({results['partial_hashes']} partial and "
+              f"{results['full_hashes']} full hashes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Arrival ledger benchmark.
+
+Fills one target's ledger with arrivals spread over a simulated year of
+redirect sessions, then times time-range queries on a freshly opened ledger
+(as the `ledger` command does): narrow windows that return a handful of
+files, a day's worth, and counting the whole range.  Also reports the
+append rate and the bytes per record on disk.
+
+Run with: python benchmarks/ledger_query.py [--records 2000000] [--queries 1000] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from win_quick_shuttle import ledger
+
+
+YEAR = 365 * 24 * 3600
+START = 1_700_000_000
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed_queries(book, windows):
+    """Run between() over each (start, end); returns (latencies in ms, files returned)."""
+    latencies = []
+    returned = 0
+    for start, end in windows:
+        began = time.perf_counter()
+        returned += sum(1 for _ in book.between(start, end))
+        latencies.append((time.perf_counter() - began) * 1000)
+    return latencies, returned
+
+
+def run_ledger(records, queries, session_every=500):
+    """Run the benchmark and return a results dict."""
+    workdir = tempfile.mkdtemp(prefix="wqs-ledger-")
+    target = os.path.join(workdir, "target")
+    path = os.path.join(workdir, ledger.ledger_filename(target))
+    step = YEAR / records
+
+    book = ledger.Ledger(path, target)
+    began = time.perf_counter()
+    for i in range(records):
+        when = START + i * step
+        if i % session_every == 0:
+            book.open_session(r"C:\Users\You\Downloads\ACTIVE", when=when)
+        book.record(f"download-{i:08d}.bin", i % 100_000, when=when)
+    append_seconds = time.perf_counter() - began
+    book.close()
+    disk_bytes = os.path.getsize(f"{path}.bin") + os.path.getsize(f"{path}.names")
+
+    rng = random.Random(1)
+    narrow = [(t, t + 20 * step) for t in (START + rng.random() * YEAR for _ in range(queries))]
+    day = [(t, t + 24 * 3600) for t in (START + rng.random() * (YEAR - 24 * 3600) for _ in range(queries // 10 or 1))]
+
+    began = time.perf_counter()
+    fresh = ledger.Ledger(path, target)
+    total = len(fresh)
+    open_ms = (time.perf_counter() - began) * 1000
+    narrow_ms, narrow_returned = timed_queries(fresh, narrow)
+    day_ms, day_returned = timed_queries(fresh, day)
+    began = time.perf_counter()
+    fresh.count(START, START + YEAR)
+    count_ms = (time.perf_counter() - began) * 1000
+    sessions = len(fresh.sessions())
+    fresh.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "records": total,
+        "sessions": sessions,
+        "append_per_sec": records / append_seconds,
+        "bytes_per_record": disk_bytes / total,
+        "open_ms": open_ms,
+        "narrow_p50_ms": percentile(narrow_ms, 0.5),
+        "narrow_p99_ms": percentile(narrow_ms, 0.99),
+        "narrow_files_avg": narrow_returned / len(narrow),
+        "day_p50_ms": percentile(day_ms, 0.5),
+        "day_files_avg": day_returned / len(day),
+        "count_ms": count_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2_000_000, help="arrivals in the ledger")
+    parser.add_argument("--queries", type=int, default=1000, help="narrow queries to time")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_ledger(args.records, args.queries)
+    if args.json:
+        print(json.dumps(results))
+        return 0
+    print(f"{results['records']} records in {results['sessions']} sessions: "
+          f"{results['append_per_sec']:,.0f} appends/s, {results['bytes_per_record']:.1f} bytes/record")
+    print(f"  narrow window ({results['narrow_files_avg']:.0f} files): "
+          f"p50 {results['narrow_p50_ms']:.3f} ms, p99 {results['narrow_p99_ms']:.3f} ms")
+    print(f"  one day ({results['day_files_avg']:.0f} files): p50 {results['day_p50_ms']:.2f} ms; "
+          f"count over the year {results['count_ms']:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Benchmark: applying a many-link profile in parallel vs sequentially.
+
+Builds a profile of --links junctions in a temporary directory and applies
+it --rounds times with the thread pool and with workers=1, alternating
+between two sets of targets so every apply really switches every link.
+
+Run with: python benchmarks/profile_apply.py [--links 50] [--rounds 20] [--workers 8] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from win_quick_shuttle import profiles
+
+
+def build_profiles(workdir, links):
+    """Return two profiles over the same junctions with different targets."""
+    result = {"a": {}, "b": {}}
+    for i in range(links):
+        junction_path = os.path.join(workdir, f"junction{i}")
+        for name in result:
+            target_path = os.path.join(workdir, f"{name}{i}")
+            os.mkdir(target_path)
+            result[name][junction_path] = target_path
+    return result
+
+
+def time_applies(all_profiles, rounds, workers):
+    """Return seconds per apply, averaged over rounds."""
+    start = time.perf_counter()
+    for i in range(rounds):
+        success, _ = profiles.apply_profile(all_profiles, "ab"[i % 2], workers=workers)
+        if not success:
+            raise RuntimeError("apply failed during benchmark")
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=profiles.DEFAULT_WORKERS)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="wqs-profile-")
+    try:
+        all_profiles = build_profiles(workdir, args.links)
+        sequential = time_applies(all_profiles, args.rounds, 1)
+        parallel = time_applies(all_profiles, args.rounds, args.workers)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "links": args.links,
+        "workers": args.workers,
+        "sequential_ms": sequential * 1000,
+        "parallel_ms": parallel * 1000,
+        "speedup": sequential / parallel,
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{args.links}-link profile: sequential {results['sequential_ms']:.2f} ms, "
+              f"{args.workers} workers {results['parallel_ms']:.2f} ms "
+              f"({results['speedup']:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
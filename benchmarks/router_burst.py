@@ -0,0 +1,95 @@
+"""Burst benchmark for the arrival router.
+
+Points a junction at an arrivals folder, starts a Router with a handful of
+rules, then writes a burst of small files into the junction as fast as
+possible.  Reports how fast files were written and routed, how long the
+router took to drain the burst, and the largest arrival-to-move delay.
+
+Run with: python benchmarks/router_burst.py [--files 5000] [--size 1024] [--no-inotify] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from win_quick_shuttle import junctions, router
+
+
+EXTENSIONS = ("pdf", "stl", "jpg", "zip", "txt")
+
+
+def run_burst(files, size, use_inotify):
+    """Run the benchmark and return a results dict."""
+    workdir = tempfile.mkdtemp(prefix="wqs-router-")
+    arrivals = os.path.join(workdir, "arrivals")
+    os.mkdir(arrivals)
+    junction = os.path.join(workdir, "ACTIVE")
+    junctions.point_junction(junction, arrivals)
+    rules = [{"ext": ext, "to": os.path.join(workdir, ext)} for ext in EXTENSIONS[:-1]]
+    rules.append({"glob": "*", "to": os.path.join(workdir, "other")})
+
+    written = {}
+    delays = []
+    all_moved = threading.Event()
+
+    def on_move(result):
+        delays.append(time.perf_counter() - written[os.path.basename(result["file"])])
+        if len(delays) == files:
+            all_moved.set()
+
+    shuttle_router = router.Router(junction, router.compile_rules(rules), settle=0.2, interval=0.1,
+                                   on_move=on_move, use_inotify=use_inotify).start()
+    payload = b"x" * size
+    began = time.perf_counter()
+    for i in range(files):
+        name = f"file{i}.{EXTENSIONS[i % len(EXTENSIONS)]}"
+        written[name] = time.perf_counter()
+        with open(os.path.join(junction, name), "wb") as f:
+            f.write(payload)
+    write_seconds = time.perf_counter() - began
+    all_moved.wait(60)
+    drain_seconds = time.perf_counter() - began
+    shuttle_router.stop()
+    stats = dict(shuttle_router.stats)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "files": files,
+        "routed": stats["routed"],
+        "errors": stats["errors"],
+        "scans": stats["scans"],
+        "inotify": use_inotify,
+        "write_per_sec": files / write_seconds,
+        "routed_per_sec": stats["routed"] / drain_seconds,
+        "drain_seconds": drain_seconds,
+        "max_delay_ms": max(delays, default=0.0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000, help="files in the burst")
+    parser.add_argument("--size", type=int, default=1024, help="bytes per file")
+    parser.add_argument("--no-inotify", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_burst(args.files, args.size, not args.no_inotify)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{results['routed']}/{results['files']} files routed in {results['drain_seconds']:.2f}s "
+              f"({results['scans']} scans, {results['errors']} errors)")
+        print(f"  written at {results['write_per_sec']:.0f} files/s, "
+              f"routed at {results['routed_per_sec']:.0f} files/s, "
+              f"max arrival-to-move delay {results['max_delay_ms']:.0f} ms")
+    return 0 if results["routed"] == results["files"] and not results["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
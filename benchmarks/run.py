@@ -0,0 +1,296 @@
+"""Benchmark suite for win-quick-shuttle.
+
+Runs on any platform with the platform's link backend -- real POSIX symlinks
+on Linux -- in a temporary directory, and measures:
+
+    inspect.is_junction_us          cost of one is_junction() call
+    inspect.get_junction_target_us  cost of one get_junction_target() call
+    switch.point_to_us              one point_junction() round trip
+    switch.throughput_per_sec       sustained switches per second
+    switch.journaled_point_to_us    point_junction() round trip with the switch journal on
+    shuttle.point_us                Shuttle.point() to an already-validated target
+    shuttle.pointed_at_us           one `with Shuttle.pointed_at():` scope (switch and restore)
+    startup.import_cli_ms           importing win_quick_shuttle.cli (over bare python)
+    startup.cold_status_ms          `win-quick-shuttle status` in a fresh process
+    gui.entry_ms                    building the GUI with main.entry() (needs a display)
+    gui.entry_20_sessions_ms        building one window with 20 junction panels
+
+With --backend memory the inspection and switch benchmarks run against the
+in-memory backend (memfs.MemoryBackend) instead, measuring the switch logic
+without any filesystem cost; startup and GUI benchmarks are skipped.
+
+Results are printed as JSON (or written with --output).  --compare BASELINE
+flags every metric that got worse by more than --threshold (default 25%) and
+exits 1 if any did; --save-baseline writes the results as the new baseline.
+
+Run with: python benchmarks/run.py [--quick] [--backend memory] [--output FILE] [--compare FILE] [--save-baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from win_quick_shuttle import junctions, links, wal
+from win_quick_shuttle.memfs import MemoryBackend
+from win_quick_shuttle.shuttle import Shuttle
+
+
+DEFAULT_THRESHOLD = 0.25
+
+
+def metric(value, unit, better="lower"):
+    """Package one measurement."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def best_per_call(fn, calls, repeats):
+    """Return the best average seconds per call of fn over repeats rounds."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def best_wall_time(argv, repeats, cwd):
+    """Return the best wall-clock seconds of running argv."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=cwd, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# --- Benchmarks ---
+
+def bench_inspect(workdir, scale):
+    """Cost of inspecting an existing junction."""
+    target = os.path.join(workdir, "inspect-target")
+    junction = os.path.join(workdir, "inspect-junction")
+    links.get_backend().makedirs(target)
+    junctions.create_junction(junction, target)
+    calls = 2000 * scale
+    return {
+        "inspect.is_junction_us": metric(
+            best_per_call(lambda: junctions.is_junction(junction), calls, 5) * 1e6, "us"),
+        "inspect.get_junction_target_us": metric(
+            best_per_call(lambda: junctions.get_junction_target(junction), calls, 5) * 1e6, "us"),
+    }
+
+
+def bench_switch(workdir, scale):
+    """Point-to round trips and sustained throughput."""
+    targets = [os.path.join(workdir, "switch-a"), os.path.join(workdir, "switch-b")]
+    for target in targets:
+        links.get_backend().makedirs(target)
+    junction = os.path.join(workdir, "switch-junction")
+    junctions.point_junction(junction, targets[0])
+
+    state = {"i": 0}
+
+    def flip():
+        state["i"] += 1
+        success, message = junctions.point_junction(junction, targets[state["i"] % 2])
+        if not success:
+            raise RuntimeError(message)
+
+    round_trip = best_per_call(flip, 200 * scale, 5)
+
+    switches = 0
+    duration = 0.5 * scale
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        flip()
+        switches += 1
+    elapsed = time.perf_counter() - start
+
+    wal.enable(os.path.join(workdir, wal.WAL_FILENAME))
+    try:
+        journaled = best_per_call(flip, 200 * scale, 5)
+    finally:
+        wal.disable()
+
+    return {
+        "switch.point_to_us": metric(round_trip * 1e6, "us"),
+        "switch.throughput_per_sec": metric(switches / elapsed, "switches/s", "higher"),
+        "switch.journaled_point_to_us": metric(journaled * 1e6, "us"),
+    }
+
+
+def bench_shuttle(workdir, scale):
+    """Per-call overhead of the embeddable Shuttle API."""
+    targets = [os.path.join(workdir, "shuttle-a"), os.path.join(workdir, "shuttle-b")]
+    for target in targets:
+        links.get_backend().makedirs(target)
+    shuttle = Shuttle(os.path.join(workdir, "shuttle-junction"))
+    shuttle.point(targets[1])
+    shuttle.point(targets[0])
+
+    state = {"i": 0}
+
+    def flip():
+        state["i"] += 1
+        success, message = shuttle.point(targets[state["i"] % 2])
+        if not success:
+            raise RuntimeError(message)
+
+    def scope():
+        with shuttle.pointed_at(targets[1]):
+            pass
+
+    return {
+        "shuttle.point_us": metric(best_per_call(flip, 200 * scale, 5) * 1e6, "us"),
+        "shuttle.pointed_at_us": metric(best_per_call(scope, 100 * scale, 5) * 1e6, "us"),
+    }
+
+
+def bench_startup(workdir, scale):
+    """Import time of the CLI module and cold start of a headless command."""
+    repeats = 3 * scale
+    bare = best_wall_time([sys.executable, "-c", "pass"], repeats, workdir)
+    imported = best_wall_time([sys.executable, "-c", "import win_quick_shuttle.cli"],
+                              repeats, workdir)
+    status = best_wall_time([sys.executable, "-m", "win_quick_shuttle.cli", "status",
+                             "--junction", os.path.join(workdir, "startup-junction")],
+                            repeats, workdir)
+    return {
+        "startup.bare_python_ms": metric(bare * 1000, "ms"),
+        "startup.import_cli_ms": metric(max(imported - bare, 0.0) * 1000, "ms"),
+        "startup.cold_status_ms": metric(status * 1000, "ms"),
+    }
+
+
+def bench_gui(workdir, scale):
+    """Time to build the GUI, when a display is available."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return {}
+    root.withdraw()
+    from win_quick_shuttle import main
+
+    main.app["root"] = root
+    main.app["initial_junction_path"] = os.path.join(workdir, "gui-junction")
+    many = [os.path.join(workdir, f"gui-junction-{i}") for i in range(20)]
+    best = {"gui.entry_ms": None, "gui.entry_20_sessions_ms": None}
+    try:
+        for _ in range(5 * scale):
+            for name, junction_paths in (("gui.entry_ms", []), ("gui.entry_20_sessions_ms", many)):
+                main.app["junction_paths"] = junction_paths
+                start = time.perf_counter()
+                main.entry()
+                root.update_idletasks()
+                elapsed = time.perf_counter() - start
+                main.exit()
+                best[name] = elapsed if best[name] is None else min(best[name], elapsed)
+    finally:
+        main.app["junction_paths"] = []
+        root.destroy()
+    return {name: metric(seconds * 1000, "ms") for name, seconds in best.items()}
+
+
+BENCHMARKS = [bench_inspect, bench_switch, bench_shuttle, bench_startup, bench_gui]
+
+
+def run_suite(scale, backend_name="os"):
+    """Run every benchmark and return the results document."""
+    workdir = tempfile.mkdtemp(prefix="wqs-bench-")
+    benchmarks = BENCHMARKS
+    old = None
+    if backend_name == "memory":
+        fs = MemoryBackend()
+        fs.makedirs(workdir)
+        old = links.set_backend(fs)
+        benchmarks = [bench_inspect, bench_switch, bench_shuttle]
+    metrics = {}
+    try:
+        for bench in benchmarks:
+            metrics.update(bench(workdir, scale))
+    finally:
+        if backend_name == "memory":
+            links.set_backend(old)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": MemoryBackend.name if backend_name == "memory" else links.get_backend().name,
+            "time": time.time(),
+        },
+        "metrics": metrics,
+    }
+
+
+# --- Comparison ---
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, old, new, change) for metrics that regressed."""
+    regressions = []
+    for name, new in results["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if not old or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        if new["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append((name, old["value"], new["value"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations (smoke test)")
+    parser.add_argument("--backend", choices=["os", "memory"], default="os",
+                        help="filesystem for the inspect/switch benchmarks (default os)")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against BASELINE")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default 0.25)")
+    parser.add_argument("--save-baseline", metavar="FILE", help="also write results to FILE")
+    parser.add_argument("--from-results", metavar="FILE",
+                        help="compare a saved results file instead of running the suite")
+    args = parser.parse_args()
+
+    if args.from_results:
+        with open(args.from_results, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    else:
+        results = run_suite(1 if args.quick else 5, args.backend)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif not args.from_results:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
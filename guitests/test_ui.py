@@ -3,15 +3,30 @@
 Run with: python guitests/test_ui.py
 """
 
+import os
+import shutil
+import tempfile
+import threading
 from unittest.mock import patch
 from tkintertester import harness
-from win_quick_shuttle import main
+from win_quick_shuttle import links, main, worker
+
+
+TEST_JUNCTION = r"C:\test\junction"
+_real_probe = links.probe
+
+
+def probe_without_test_junction(path, read_target=True):
+    """links.probe, except that the test junction never exists (whatever this machine has there)."""
+    if os.path.normpath(path) == os.path.normpath(TEST_JUNCTION):
+        return links.Probe(path, links.KIND_MISSING)
+    return _real_probe(path, read_target)
 
 
 def app_entry():
     """Wire up the app for testing."""
     main.app["root"] = harness.g["root"]
-    main.app["initial_junction_path"] = r"C:\test\junction"
+    main.app["initial_junction_path"] = TEST_JUNCTION
     main.app["initial_target_path"] = None
     main.entry()
 
@@ -21,29 +36,41 @@ def app_exit():
     main.exit()
 
 
+def panel():
+    """The first (here, only) junction panel."""
+    return main.g["sessions"][0]
+
+
+def step_wait_until_idle():
+    """Wait for background work (probes, switches) to be delivered."""
+    if not worker.idle():
+        return ("wait", 20)
+    return ("next", None)
+
+
 # --- Tests ---
 
 def test_initial_state_shows_no_junction():
     """When junction path doesn't exist, show 'No junction present'."""
     def step_verify():
-        text = main.widgets["current_target_label"].cget("text")
+        text = panel().widgets["current_target_label"].cget("text")
         if "No junction present" in text:
             return ("success", None)
         return ("fail", f"Expected 'No junction present', got '{text}'")
 
-    return [step_verify]
+    return [step_wait_until_idle, step_verify]
 
 
 def test_create_folder_with_empty_path_shows_error():
     """Create folder with empty target path shows error."""
     def step_clear_and_click():
-        main.widgets["target_entry"].delete(0, "end")
-        main.widgets["create_folder_btn"].invoke()
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["create_folder_btn"].invoke()
         return ("next", None)
 
     def step_verify_error():
-        text = main.widgets["status_label"].cget("text")
-        color = main.widgets["status_label"].cget("fg")
+        text = panel().widgets["status_label"].cget("text")
+        color = panel().widgets["status_label"].cget("fg")
         if "Please enter" in text and color == "red":
             return ("success", None)
         return ("fail", f"Expected error message, got '{text}' with color '{color}'")
@@ -53,53 +80,62 @@ def test_create_folder_with_empty_path_shows_error():
 
 def test_create_folder_already_exists():
     """Create folder shows message when folder already exists."""
+    patcher = patch("os.path.exists", return_value=True)
+
     def step_set_path_and_click():
-        main.widgets["target_entry"].delete(0, "end")
-        main.widgets["target_entry"].insert(0, r"C:\existing\folder")
-        with patch("os.path.exists", return_value=True):
-            main.widgets["create_folder_btn"].invoke()
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["target_entry"].insert(0, r"C:\existing\folder")
+        patcher.start()
+        panel().widgets["create_folder_btn"].invoke()
         return ("next", None)
 
     def step_verify():
-        text = main.widgets["status_label"].cget("text")
+        patcher.stop()
+        text = panel().widgets["status_label"].cget("text")
         if "already exists" in text:
             return ("success", None)
         return ("fail", f"Expected 'already exists', got '{text}'")
 
-    return [step_set_path_and_click, step_verify]
+    return [step_set_path_and_click, step_wait_until_idle, step_verify]
 
 
 def test_create_folder_success():
     """Create folder creates directory successfully."""
+    exists_patcher = patch("os.path.exists", return_value=False)
+    makedirs_patcher = patch("os.makedirs")
+    mocks = {}
+
     def step_set_path_and_click():
-        main.widgets["target_entry"].delete(0, "end")
-        main.widgets["target_entry"].insert(0, r"C:\new\folder")
-        with patch("os.path.exists", return_value=False):
-            with patch("os.makedirs") as mock_makedirs:
-                main.widgets["create_folder_btn"].invoke()
-                if not mock_makedirs.called:
-                    return ("fail", "makedirs was not called")
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["target_entry"].insert(0, r"C:\new\folder")
+        exists_patcher.start()
+        mocks["makedirs"] = makedirs_patcher.start()
+        panel().widgets["create_folder_btn"].invoke()
         return ("next", None)
 
     def step_verify():
-        text = main.widgets["status_label"].cget("text")
-        color = main.widgets["status_label"].cget("fg")
+        exists_patcher.stop()
+        makedirs_patcher.stop()
+        if not mocks["makedirs"].called:
+            return ("fail", "makedirs was not called")
+        text = panel().widgets["status_label"].cget("text")
+        color = panel().widgets["status_label"].cget("fg")
         if "Created" in text and color == "green":
             return ("success", None)
         return ("fail", f"Expected success message, got '{text}'")
 
-    return [step_set_path_and_click, step_verify]
+    return [step_set_path_and_click, step_wait_until_idle, step_verify]
 
 
 def test_point_to_empty_target_shows_error():
     """Point to with empty target path shows error."""
     def step_clear_and_click():
-        main.widgets["target_entry"].delete(0, "end")
-        main.widgets["point_to_btn"].invoke()
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["point_to_btn"].invoke()
         return ("next", None)
 
     def step_verify():
-        text = main.widgets["status_label"].cget("text")
+        text = panel().widgets["status_label"].cget("text")
         if "Please enter" in text:
             return ("success", None)
         return ("fail", f"Expected error, got '{text}'")
@@ -109,41 +145,190 @@ def test_point_to_empty_target_shows_error():
 
 def test_point_to_nonexistent_target_shows_error():
     """Point to nonexistent target shows error."""
+    patcher = patch("os.path.exists", return_value=False)
+
     def step_set_and_click():
-        main.widgets["target_entry"].delete(0, "end")
-        main.widgets["target_entry"].insert(0, r"C:\nonexistent")
-        with patch("os.path.exists", return_value=False):
-            main.widgets["point_to_btn"].invoke()
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["target_entry"].insert(0, r"C:\nonexistent")
+        patcher.start()
+        panel().widgets["point_to_btn"].invoke()
         return ("next", None)
 
     def step_verify():
-        text = main.widgets["status_label"].cget("text")
+        patcher.stop()
+        text = panel().widgets["status_label"].cget("text")
         if "does not exist" in text:
             return ("success", None)
         return ("fail", f"Expected 'does not exist', got '{text}'")
 
-    return [step_set_and_click, step_verify]
+    return [step_set_and_click, step_wait_until_idle, step_verify]
 
 
 def test_unlink_nonexistent_junction_shows_error():
     """Unlink when no junction exists shows error."""
     def step_click():
-        with patch("os.path.exists", return_value=False):
-            main.widgets["unlink_btn"].invoke()
+        panel().widgets["unlink_btn"].invoke()
         return ("next", None)
 
     def step_verify():
-        text = main.widgets["status_label"].cget("text")
+        text = panel().widgets["status_label"].cget("text")
         if "No junction exists" in text:
             return ("success", None)
         return ("fail", f"Expected error, got '{text}'")
 
-    return [step_click, step_verify]
+    return [step_click, step_wait_until_idle, step_verify]
+
+
+def test_buttons_disabled_while_busy():
+    """Action buttons are disabled until the operation's result arrives."""
+    def step_click():
+        panel().widgets["unlink_btn"].invoke()
+        if panel().widgets["point_to_btn"].cget("state") != "disabled":
+            return ("fail", "Point To should be disabled while unlinking")
+        return ("next", None)
+
+    def step_verify():
+        if panel().widgets["point_to_btn"].cget("state") != "normal":
+            return ("fail", "Point To should be re-enabled afterwards")
+        return ("success", None)
+
+    return [step_click, step_wait_until_idle, step_verify]
+
+
+def test_failed_operation_reenables_buttons():
+    """An operation that raises re-enables the buttons and shows the error."""
+    def step_click():
+        with patch.object(main, "_work_unlink", side_effect=OSError("Access is denied")):
+            panel().widgets["unlink_btn"].invoke()
+        return ("next", None)
+
+    def step_verify():
+        if panel().widgets["point_to_btn"].cget("state") != "normal":
+            return ("fail", "Point To should be re-enabled after the failure")
+        text = panel().widgets["status_label"].cget("text")
+        if "Access is denied" not in text:
+            return ("fail", f"Expected the error in the status, got '{text}'")
+        return ("success", None)
+
+    return [step_click, step_wait_until_idle, step_verify]
+
+
+def test_stale_probe_result_is_dropped():
+    """A slow probe for an old junction path never overwrites a newer state."""
+    def step_refresh_twice():
+        panel()._refresh_state()
+        panel().widgets["junction_entry"].delete(0, "end")
+        panel()._refresh_state()
+        return ("next", None)
+
+    def step_verify():
+        text = panel().widgets["current_target_label"].cget("text")
+        if text == "Enter a junction path above":
+            return ("success", None)
+        return ("fail", f"Stale probe overwrote the label: '{text}'")
+
+    return [step_refresh_twice, step_wait_until_idle, step_verify]
+
+
+def test_palette_filters_history():
+    """The Recent palette filters the history as you type and fills the target."""
+    def step_open_and_type():
+        main.g["history"].record(r"C:\Projects\Alpha")
+        main.g["history"].record(r"C:\Photos\2024")
+        panel().widgets["target_history_btn"].invoke()
+        panel().widgets["palette_entry"].insert(0, "prjal")
+        panel()._search_palette()
+        return ("next", None)
+
+    def step_verify_and_choose():
+        items = panel().widgets["palette_list"].get(0, "end")
+        if items != (r"C:\Projects\Alpha",):
+            return ("fail", f"Expected only the Alpha project, got {items}")
+        panel().handle_when_palette_choice_made()
+        text = panel().widgets["target_entry"].get()
+        if text != r"C:\Projects\Alpha" or "palette" in panel().widgets:
+            return ("fail", f"Expected the choice in the target entry, got '{text}'")
+        return ("success", None)
+
+    return [step_open_and_type, step_verify_and_choose]
+
+
+def test_target_usage_is_measured():
+    """Typing a target folder shows its size and file count once the scan finishes."""
+    folder = tempfile.mkdtemp(prefix="wqs-usage-")
+    with open(os.path.join(folder, "a.bin"), "wb") as f:
+        f.write(b"x" * 1500)
+
+    def step_type_target():
+        panel().widgets["target_entry"].delete(0, "end")
+        panel().widgets["target_entry"].insert(0, folder)
+        return ("next", None)
+
+    def step_verify():
+        text = panel().widgets["target_usage_label"].cget("text")
+        if "1.5 KB in 1 files" not in text or "measuring" in text:
+            return ("wait", 50)
+        shutil.rmtree(folder, ignore_errors=True)
+        return ("success", None)
+
+    return [step_type_target, step_verify]
+
+
+def test_second_panel_is_independent():
+    """A second panel shows its own junction and shares the window's watch timer."""
+    def step_add_panel():
+        main.add_session(r"C:\test\other")
+        return ("next", None)
+
+    def step_verify():
+        first, second = main.g["sessions"]
+        if second.widgets["junction_entry"].get() != r"C:\test\other":
+            return ("fail", "Second panel should show its own junction")
+        if first.widgets["junction_entry"].get() != TEST_JUNCTION:
+            return ("fail", "First panel should keep its junction")
+        if main.app["watch_after_id"] is None:
+            return ("fail", "The shared watch timer should be running")
+        main.remove_session(second)
+        return ("success", None)
+
+    return [step_add_panel, step_wait_until_idle, step_verify]
+
+
+def test_session_removed_while_probe_in_flight():
+    """Removing a panel whose probe is still running drops the result without an error."""
+    release = threading.Event()
+    errors = []
+    real_probe = main.probe
+
+    def slow_probe(path, read_target=True):
+        release.wait(5)
+        return real_probe(path, read_target)
+
+    def record_error(exc_type, exc, tb):
+        errors.append(exc)
+
+    def step_add_and_remove():
+        harness.g["root"].report_callback_exception = record_error
+        with patch.object(main, "probe", side_effect=slow_probe):
+            second = main.add_session(r"C:\test\other")
+        main.remove_session(second)
+        release.set()
+        return ("next", None)
+
+    def step_verify():
+        del harness.g["root"].report_callback_exception
+        if errors:
+            return ("fail", f"Delivering to the removed panel raised {errors[0]!r}")
+        if len(main.g["sessions"]) != 1:
+            return ("fail", "The removed panel should be gone")
+        return ("success", None)
+
+    return [step_wait_until_idle, step_add_and_remove, step_wait_until_idle, step_verify]
 
 
 if __name__ == "__main__":
     # Patch filesystem checks during entry so UI initializes cleanly
-    with patch("win_quick_shuttle.main.is_junction", return_value=False):
+    with patch("win_quick_shuttle.links.probe", side_effect=probe_without_test_junction):
         with patch("os.path.exists", return_value=False):
             harness.add_test("Initial state shows no junction", test_initial_state_shows_no_junction())
             harness.add_test("Create folder: empty path shows error", test_create_folder_with_empty_path_shows_error())
@@ -152,6 +337,13 @@ if __name__ == "__main__":
             harness.add_test("Point to: empty target shows error", test_point_to_empty_target_shows_error())
             harness.add_test("Point to: nonexistent target", test_point_to_nonexistent_target_shows_error())
             harness.add_test("Unlink: no junction exists", test_unlink_nonexistent_junction_shows_error())
+            harness.add_test("Buttons disabled while busy", test_buttons_disabled_while_busy())
+            harness.add_test("Failed operation re-enables buttons", test_failed_operation_reenables_buttons())
+            harness.add_test("Stale probe result is dropped", test_stale_probe_result_is_dropped())
+            harness.add_test("Recent palette filters history", test_palette_filters_history())
+            harness.add_test("Target usage is measured", test_target_usage_is_measured())
+            harness.add_test("Second panel is independent", test_second_panel_is_independent())
+            harness.add_test("Panel removed while probing", test_session_removed_while_probe_in_flight())
 
             harness.run(app_entry, app_exit, timeout_ms=5000)
 
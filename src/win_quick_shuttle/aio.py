@@ -0,0 +1,243 @@
+"""asyncio front end for junction operations.
+
+    from win_quick_shuttle import aio
+
+    await aio.point(r"C:\\Downloads\\ACTIVE", r"D:\\jobs\\41")    # (success, message)
+    await aio.unlink(r"C:\\Downloads\\ACTIVE")
+    state = await aio.probe(r"C:\\Downloads\\ACTIVE")
+    async for state in aio.changes(r"C:\\Downloads\\ACTIVE"):
+        ...
+
+The blocking helpers in junctions run on a bounded thread pool (MAX_WORKERS
+threads, shared by every event loop) so the loop never waits on the disk.
+Each volume -- drive letter or UNC share; all of a POSIX filesystem counts
+as one -- has its own queue, drained by at most PER_VOLUME workers, so one
+slow network share cannot take every thread.  Switches of one junction are
+held back until the previous one finishes rather than parked in a worker,
+where they would only wait on its switch lock.
+
+Workers take jobs straight off the volume queues and hand results back in
+batches of at most DELIVER_BATCH per loop callback, so a burst of thousands
+of operations costs the loop a few microseconds each and never one long
+stall.
+
+Identical calls that overlap are merged: a second probe of a path, or a
+second point at the same target, while the first is still running awaits
+the first one's result instead of repeating it.  A switch is only merged
+into the last switch queued for its junction, so point X, point Y, point X
+still ends at X.  Cancelling one awaiter does
+not cancel the operation for the others.
+"""
+
+import asyncio
+import collections
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from win_quick_shuttle import junctions, watcher
+
+
+MAX_WORKERS = 16
+PER_VOLUME = 2
+DELIVER_BATCH = 64
+
+# Executor state (shared by every event loop)
+g = {
+    "executor": None,       # ThreadPoolExecutor, created on first use
+    "merged": 0,            # Calls answered by an operation already in flight
+}
+
+_lock = threading.Lock()                # Guards the queues below and every loop's "done"
+_queues = {}                            # volume -> deque of jobs ready to run
+_runners = {}                           # volume -> workers draining its queue
+_busy = {}                              # junction key -> deque of switches waiting for the running one
+_last = {}                              # junction key -> newest switch queued or running
+_loops = weakref.WeakKeyDictionary()    # event loop -> {"inflight", "done", "waking"}
+
+
+class _Job:
+    """One blocking call, and the futures waiting for its result."""
+
+    __slots__ = ("state", "key", "volume", "junction", "fn", "args", "waiters", "result", "error")
+
+    def __init__(self, state, key, volume, junction, fn, args, waiter):
+        self.state = state
+        self.key = key
+        self.volume = volume
+        self.junction = junction        # Key of the junction it switches, or None for reads
+        self.fn = fn
+        self.args = args
+        self.waiters = [waiter]
+        self.result = None
+        self.error = None
+
+
+def _executor():
+    if g["executor"] is None:
+        g["executor"] = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="wqs-aio")
+    return g["executor"]
+
+
+def shutdown():
+    """Stop the worker threads once queued operations finish (a later call starts new ones)."""
+    executor, g["executor"] = g["executor"], None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+# --- Queueing (event loop thread) ---
+
+def _submit(key, path, fn, args, switches=False):
+    """Queue fn(*args), or join an identical call already queued; return a future for its result.
+
+    switches: fn changes the junction at path, so it waits for any other
+    change to that junction to finish first.
+    """
+    loop = asyncio.get_running_loop()
+    state = _loops.get(loop)
+    if state is None:
+        state = _loops[loop] = {"inflight": {}, "done": collections.deque(), "waking": False, "loop": loop}
+    waiter = loop.create_future()
+    job = state["inflight"].get(key)
+    if job is not None:
+        with _lock:
+            mergeable = job.junction is None or _last.get(job.junction) is job
+        if mergeable:
+            g["merged"] += 1
+            job.waiters.append(waiter)
+            return waiter
+
+    path_key = _key(path)
+    job = state["inflight"][key] = _Job(state, key, os.path.splitdrive(path_key)[0],
+                                        path_key if switches else None, fn, args, waiter)
+    with _lock:
+        if job.junction is not None:
+            _last[job.junction] = job
+            if job.junction in _busy:
+                _busy[job.junction].append(job)
+                return waiter
+            _busy[job.junction] = collections.deque()
+        _queues.setdefault(job.volume, collections.deque()).append(job)
+        start = job.volume not in _runners
+        if start:
+            _runners[job.volume] = 1
+    if start:
+        # After this loop pass, so a burst is all queued before a worker competes for the GIL;
+        # further workers are started by the first, keeping thread start-up off the loop
+        loop.call_soon(_executor().submit, _drain, job.volume)
+    return waiter
+
+
+# --- Running (worker threads) ---
+
+def _drain(volume_name):
+    """Run the volume's queued jobs until its queue is empty."""
+    while True:
+        with _lock:
+            jobs = _queues[volume_name]
+            if not jobs:
+                _runners[volume_name] -= 1
+                if not _runners[volume_name]:
+                    del _runners[volume_name], _queues[volume_name]
+                return
+            job = jobs.popleft()
+            helper = bool(jobs) and _runners[volume_name] < PER_VOLUME
+            if helper:
+                _runners[volume_name] += 1
+        if helper:
+            _executor().submit(_drain, volume_name)
+        try:
+            job.result = job.fn(*job.args)
+        except Exception as e:
+            job.error = e
+        _finish(job)
+
+
+def _finish(job):
+    """Release the job's junction and hand the job back to its loop."""
+    state = job.state
+    with _lock:
+        if job.junction is not None:
+            waiting = _busy[job.junction]
+            if waiting:
+                _queues[job.volume].append(waiting.popleft())   # This worker picks it up next
+            else:
+                del _busy[job.junction]
+            if _last.get(job.junction) is job:
+                del _last[job.junction]
+        state["done"].append(job)
+        wake = not state["waking"]
+        state["waking"] = True
+    if wake:
+        try:
+            state["loop"].call_soon_threadsafe(_deliver, state)
+        except RuntimeError:
+            pass                        # The loop is closed; nobody is waiting
+
+
+# --- Delivering (event loop thread) ---
+
+def _deliver(state):
+    """Resolve up to DELIVER_BATCH finished jobs' futures, leaving the rest for the next pass."""
+    with _lock:
+        done = state["done"]
+        batch = [done.popleft() for _ in range(min(len(done), DELIVER_BATCH))]
+        if done:
+            state["loop"].call_soon(_deliver, state)
+        else:
+            state["waking"] = False
+    inflight = state["inflight"]
+    for job in batch:
+        if inflight.get(job.key) is job:
+            del inflight[job.key]
+        for waiter in job.waiters:
+            if waiter.done():
+                continue                # Cancelled by its awaiter
+            if job.error is not None:
+                waiter.set_exception(job.error)
+            else:
+                waiter.set_result(job.result)
+
+
+# --- Operations ---
+
+async def probe(path):
+    """Describe what is at path (see links.probe)."""
+    return await _submit(("probe", _key(path)), path, junctions.probe, (path,))
+
+
+async def point(junction_path, target_path, atomic=True):
+    """Point junction_path at target_path.  Returns (success, message)."""
+    key = ("point", _key(junction_path), _key(target_path), atomic)
+    return await _submit(key, junction_path, junctions.point_junction,
+                         (junction_path, target_path, atomic), switches=True)
+
+
+async def unlink(junction_path):
+    """Remove the junction at junction_path.  Returns (success, message)."""
+    return await _submit(("unlink", _key(junction_path)), junction_path,
+                         junctions.unlink_junction, (junction_path,), switches=True)
+
+
+async def changes(junction_path, **kwargs):
+    """Yield a Probe each time the junction is repointed, created or removed.
+
+    kwargs go to watcher.JunctionWatcher.  Watching stops when the iterator
+    is closed (leaving `async for`, or aclose()).
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    junction_watcher = watcher.JunctionWatcher(
+        junction_path, lambda state: loop.call_soon_threadsafe(queue.put_nowait, state), **kwargs)
+    await loop.run_in_executor(_executor(), junction_watcher.start)
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        junction_watcher.stop()
@@ -0,0 +1,165 @@
+"""Audit a directory tree for broken and tangled links.
+
+    for report in audit(root, stats=stats):
+        ...
+
+audit() walks root with os.scandir on a pool of threads and yields one dict
+per link (junction or directory symlink) it finds, as soon as it is found:
+
+    {"path": ..., "kind": "junction", "target": ..., "resolved": ...,
+     "chain": [...], "problems": ["dangling", "chain", ...]}
+
+resolved, chain and problems are those of resolver.Resolver.follow(): the
+final directory, the links passed through, and any of "dangling", "cycle",
+"chain" and "into-link".
+
+Classifying an entry costs at most one stat (links.entry_kind), plus one
+readlink per link.  Targets are followed by a snapshot Resolver, so chains
+that share a prefix are probed once per audit.  Links are
+reported, never descended into.  Memory stays bounded however big the tree
+is: directories waiting to be listed are taken depth-first, reports wait in
+a queue of REPORT_QUEUE items (workers pause while the consumer catches up),
+and the resolver's memo is capped.  Closing the generator early stops the
+workers.
+
+If stats is given, it is filled in as the walk goes:
+    {"dirs", "entries", "links", "problems", "errors", "seconds"}
+"""
+
+import os
+import queue
+import threading
+import time
+
+from win_quick_shuttle import links, resolver
+
+
+DEFAULT_WORKERS = 8
+REPORT_QUEUE = 1024
+
+_DONE = object()
+
+
+class _Walk:
+    """Worker threads listing directories and queueing link reports."""
+
+    def __init__(self, root, workers, stats):
+        self.stats = stats
+        self.reports = queue.Queue(REPORT_QUEUE)
+        self.stopping = threading.Event()
+        self._resolver = resolver.Resolver(snapshot=True)
+        self._cond = threading.Condition()
+        self._pending = [root]          # Directories to list, taken last-in first-out
+        self._outstanding = 1           # Directories pending or being listed
+        self._live = workers
+        self._threads = [threading.Thread(target=self._work, name=f"wqs-audit-{n}", daemon=True)
+                         for n in range(workers)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _put(self, item):
+        """Queue item for the consumer, giving up if the walk is stopped."""
+        while not self.stopping.is_set():
+            try:
+                self.reports.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _work(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._pending and self._outstanding and not self.stopping.is_set():
+                        self._cond.wait()
+                    if self.stopping.is_set() or not self._outstanding:
+                        self._cond.notify_all()
+                        return
+                    path = self._pending.pop()
+                try:
+                    self._list(path)
+                finally:
+                    with self._cond:
+                        self._outstanding -= 1
+                        if not self._outstanding:
+                            self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._live -= 1
+                last = not self._live
+            if last:
+                self._put(_DONE)
+
+    def _list(self, path):
+        """List one directory: queue its subdirectories and report its links."""
+        subdirs, found, entries = [], [], 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    entries += 1
+                    try:
+                        kind = links.entry_kind(entry)
+                    except OSError:
+                        continue
+                    if kind == links.KIND_DIR:
+                        subdirs.append(entry.path)
+                    elif kind in (links.KIND_LINK, links.KIND_JUNCTION):
+                        found.append((entry.path, kind))
+        except OSError:
+            self._count(errors=1)
+            return
+
+        if subdirs:
+            with self._cond:
+                self._pending.extend(reversed(subdirs))
+                self._outstanding += len(subdirs)
+                self._cond.notify(len(subdirs))
+        self._count(dirs=1, entries=entries, links=len(found))
+
+        for link_path, kind in found:
+            try:
+                target = os.readlink(link_path)
+            except OSError:
+                target = None
+            if target is None:
+                resolved, chain, problems = None, [], ["dangling"]
+            else:
+                resolved, chain, problems = self._resolver.follow(link_path, target)
+            if problems:
+                self._count(problems=1)
+            self._put({"path": link_path, "kind": kind, "target": target,
+                       "resolved": resolved, "chain": chain, "problems": problems})
+
+    def _count(self, **counts):
+        with self._cond:
+            for name, n in counts.items():
+                self.stats[name] += n
+
+
+def audit(root, workers=DEFAULT_WORKERS, stats=None):
+    """Yield a report for every link under root (see the module docstring)."""
+    if stats is None:
+        stats = {}
+    stats.update(dirs=0, entries=0, links=0, problems=0, errors=0, seconds=0.0)
+    start = time.perf_counter()
+    walk = _Walk(os.path.abspath(root), workers, stats).start()
+    try:
+        while True:
+            report = walk.reports.get()
+            stats["seconds"] = time.perf_counter() - start
+            if report is _DONE:
+                return
+            yield report
+    finally:
+        walk.stop()
+        stats["seconds"] = time.perf_counter() - start
@@ -1,21 +1,495 @@
 """CLI entry point for win-quick-shuttle using lionscliapp framework."""
 
-import tkinter as tk
+import json
+import os
+import sys
+import time
+
 import lionscliapp as cliapp
-from win_quick_shuttle import main
+from win_quick_shuttle import junctions, ledger, tracing, wal
+
+TRACE_FILENAME = "trace.jsonl"
+
+
+def _require_junction():
+    """Return the junction path from ctx, or exit with an error."""
+    junction_path = cliapp.ctx.get("junction", "")
+    if not junction_path:
+        _fail("No junction path: use --junction <path> or 'set junction <path>'")
+    return junction_path
+
+
+def _fail(message):
+    """Print an error and exit non-zero."""
+    print(f"Error: {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def _traced_command(fn):
+    """Wrap a command so --trace yes records its spans in the project dir."""
+    def command():
+        if cliapp.ctx.get("trace", "no") == "yes" and not tracing.g["enabled"]:
+            tracing.enable(str(cliapp.get_path(TRACE_FILENAME, "p")))
+        try:
+            return fn()
+        finally:
+            wal.disable()
+            tracing.disable()
+    command.__doc__ = fn.__doc__
+    return command
+
+
+def _open_journal():
+    """Journal switches and open ledger sessions in the project dir, settling any switch a crash interrupted."""
+    wal.enable(str(cliapp.get_path(wal.WAL_FILENAME, "p")))
+    ledger.enable(str(cliapp.get_path(".", "p")))
+    for message in junctions.recover_switches():
+        print(f"Recovered: {message}", file=sys.stderr)
 
 
 def cmd_run():
     """Launch the win-quick-shuttle GUI."""
-    main.app["initial_junction_path"] = cliapp.ctx.get("junction", "") or None
+    import tkinter as tk
+    from win_quick_shuttle import history, main, usage
+
+    junction_paths = [path for path in cliapp.ctx.get("junction", "").split(os.pathsep) if path]
+    main.app["initial_junction_path"] = junction_paths[0] if junction_paths else None
+    main.app["junction_paths"] = junction_paths if len(junction_paths) > 1 else []
     main.app["initial_target_path"] = cliapp.ctx.get("target", "") or None
+    main.app["history_path"] = str(cliapp.get_path(history.HISTORY_FILENAME, "p"))
+    main.app["crawl_roots"] = _crawl_roots()
+    main.app["crawl_index_path"] = _crawl_index_path()
+    main.app["migrate_journal_path"] = _migrate_journal_path()
+    main.app["usage_cache_path"] = str(cliapp.get_path(usage.CACHE_FILENAME, "p"))
 
+    _open_journal()
     main.app["root"] = tk.Tk()
     main.app["root"].withdraw()
     main.entry()
     main.app["root"].mainloop()
 
 
+def _crawl_roots():
+    """Return the configured project roots as a list."""
+    return [root for root in cliapp.ctx.get("roots", "").split(os.pathsep) if root]
+
+
+def _crawl_index_path():
+    """Return the path of the saved directory crawl in the project dir."""
+    from win_quick_shuttle import crawler
+    return str(cliapp.get_path(crawler.INDEX_FILENAME, "p"))
+
+
+def cmd_crawl():
+    """Index the project roots for target autocomplete now."""
+    from win_quick_shuttle import crawler
+
+    roots = _crawl_roots()
+    if not roots:
+        _fail("No project roots: use --roots <dir>" + os.pathsep + "<dir>... or 'set roots ...'")
+    start = time.perf_counter()
+    crawl = crawler.Crawler(roots, _crawl_index_path())
+    crawl.run()
+    elapsed = time.perf_counter() - start
+    stats = crawl.stats
+    print(f"{len(crawl.index)} directories indexed in {elapsed:.2f}s "
+          f"({stats['listed']} listed, {stats['reused']} unchanged, {stats['errors']} unreadable)")
+
+
+def cmd_point():
+    """Point the junction at the target, without starting the GUI."""
+    junction_path = _require_junction()
+    target_path = cliapp.ctx.get("target", "")
+    if not target_path:
+        _fail("No target path: use --target <path> or 'set target <path>'")
+
+    _open_journal()
+    if cliapp.ctx.get("migrate", "no") == "yes":
+        from win_quick_shuttle import migrate
+        success, message = migrate.point_and_migrate(
+            junction_path, target_path, _migrate_journal_path(),
+            verify=cliapp.ctx.get("verify", "no") == "yes", progress=_print_migrate_progress)
+    else:
+        success, message = junctions.point_junction(junction_path, target_path)
+    if not success:
+        _fail(message)
+    _record_target(target_path)
+    print(message)
+
+
+def _migrate_journal_path():
+    """Return the path of the cross-volume move journal in the project dir."""
+    from win_quick_shuttle import migrate
+    return str(cliapp.get_path(migrate.JOURNAL_FILENAME, "p"))
+
+
+def _print_migrate_progress(counts):
+    """Print one line of migrate progress."""
+    print(f"moved {counts['files_done']}/{counts['files_total']} files, "
+          f"{counts['bytes_done'] / 1e6:.1f}/{counts['bytes_total'] / 1e6:.1f} MB", flush=True)
+
+
+def cmd_migrate():
+    """Move everything in one folder into another."""
+    from win_quick_shuttle import migrate
+
+    source = cliapp.ctx.get("from", "")
+    if not source:
+        source = junctions.get_junction_target(_require_junction()) or ""
+        if not source:
+            _fail("No source folder: use --from <path>, or a junction that points somewhere")
+    dest = cliapp.ctx.get("to", "") or cliapp.ctx.get("target", "")
+    if not dest:
+        _fail("No destination folder: use --to <path>")
+
+    success, message = migrate.migrate(source, dest, _migrate_journal_path(),
+                                       verify=cliapp.ctx.get("verify", "no") == "yes",
+                                       progress=_print_migrate_progress)
+    if not success:
+        _fail(message)
+    print(message)
+
+
+def _record_target(target_path):
+    """Append target_path to the GUI's recent-targets history."""
+    from win_quick_shuttle import history
+    history.TargetHistory(str(cliapp.get_path(history.HISTORY_FILENAME, "p"))).record(target_path)
+
+
+def cmd_unlink():
+    """Remove the junction, without starting the GUI."""
+    junction_path = _require_junction()
+    _open_journal()
+    success, message = junctions.unlink_junction(junction_path)
+    if not success:
+        _fail(message)
+    print(message)
+
+
+def cmd_undo():
+    """Reverse the junction's last switch."""
+    junction_path = _require_junction()
+    _open_journal()
+    success, message = junctions.undo_switch(junction_path)
+    if not success:
+        _fail(message)
+    print(message)
+
+
+def _print_status(status, as_json):
+    """Print a junction_status() dict as text or one JSON line."""
+    if as_json:
+        print(json.dumps(status), flush=True)
+        return
+
+    print(f"junction: {status['junction']}")
+    print(f"kind:     {status['kind']}")
+    if status["is_junction"]:
+        print(f"target:   {status['target'] or '(unreadable)'}")
+        for hop in status["chain"]:
+            print(f"via:      {hop}")
+        if status["chain"] or status["problems"]:
+            print(f"resolves: {status['resolved'] or '(nowhere)'}")
+        if status["problems"]:
+            print(f"problems: {', '.join(status['problems'])}")
+    sys.stdout.flush()
+
+
+def cmd_status():
+    """Report where the junction points."""
+    status = junctions.junction_status(_require_junction())
+    _print_status(status, cliapp.ctx.get("format", "text") == "json")
+
+
+def cmd_watch():
+    """Stream junction changes until interrupted."""
+    from win_quick_shuttle import watcher
+
+    junction_path = _require_junction()
+    as_json = cliapp.ctx.get("format", "text") == "json"
+    changes = watcher.watch(junction_path)
+    _print_status(junctions.junction_status(junction_path), as_json)
+    try:
+        for state in changes:
+            _print_status(junctions.junction_status(junction_path, state), as_json)
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_route():
+    """Sort files arriving through the junction into folders by rule, until interrupted."""
+    from win_quick_shuttle import router
+
+    junction_path = _require_junction()
+    rules_path = cliapp.ctx.get("rules", "") or str(cliapp.get_path(router.ROUTES_FILENAME, "p"))
+    try:
+        matcher = router.load_rules(rules_path, watched=[junction_path])
+    except FileNotFoundError:
+        _fail(f"No rules file: {rules_path}")
+    except ValueError as e:
+        _fail(f"{rules_path}: {e}")
+
+    as_json = cliapp.ctx.get("format", "text") == "json"
+
+    def report(result):
+        if as_json:
+            print(json.dumps(result), flush=True)
+        elif result["ok"]:
+            print(f"[rule {result['rule']}] {result['file']} -> {result['to']}", flush=True)
+        else:
+            print(f"[FAIL] {result['file']}: {result['message']}", flush=True)
+
+    shuttle_router = router.Router(junction_path, matcher, on_move=report).start()
+    print(f"Routing {junction_path} by {len(matcher.rules)} rules from {rules_path}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shuttle_router.stop()
+
+
+def cmd_dedupe():
+    """Report (or hard-link) duplicate files in the junction's target, optionally following arrivals."""
+    from win_quick_shuttle import dedupe
+
+    junction_path = _require_junction()
+    target = junctions.resolve_junction(junction_path)[0]
+    if target is None:
+        _fail(f"Junction does not point anywhere: {junction_path}")
+
+    as_json = cliapp.ctx.get("format", "text") == "json"
+    link = cliapp.ctx.get("link", "no") == "yes"
+
+    def index_path_for(folder):
+        return str(cliapp.get_path(dedupe.index_filename(folder), "p"))
+
+    def report(result):
+        if as_json:
+            print(json.dumps(result), flush=True)
+        elif result["linked"]:
+            print(f"[linked] {result['file']} -> {result['duplicate_of']}", flush=True)
+        else:
+            print(f"[duplicate] {result['file']} == {result['duplicate_of']}", flush=True)
+
+    deduper = dedupe.Deduper(target, index_path_for(target), link)
+    deduper.load()
+    deduper.sync()
+    for result in deduper.duplicates():
+        report(result)
+    print(f"{deduper.stats['files']} files indexed in {target}, {deduper.stats['duplicates']} duplicates",
+          file=sys.stderr)
+    if cliapp.ctx.get("follow", "no") != "yes":
+        return
+
+    shuttle_router = dedupe.follow(junction_path, index_path_for, link, on_duplicate=report)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shuttle_router.stop()
+
+
+def _parse_time(key):
+    """Return ctx[key] (seconds since the epoch, or a local ISO date and time) as seconds, or None."""
+    from datetime import datetime
+
+    text = cliapp.ctx.get(key, "")
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        _fail(f"--{key}: expected seconds since the epoch or a date like 2024-05-01T09:30, not '{text}'")
+
+
+def cmd_ledger():
+    """List the files that arrived in a target, or record arrivals through the junction."""
+    from win_quick_shuttle import usage
+
+    directory = str(cliapp.get_path(".", "p"))
+    as_json = cliapp.ctx.get("format", "text") == "json"
+
+    def report(entry):
+        if as_json:
+            print(json.dumps(entry), flush=True)
+        else:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+            print(f"{stamp}  {usage.format_bytes(entry['size']):>12}  {entry['file']}", flush=True)
+
+    if cliapp.ctx.get("follow", "no") == "yes":
+        junction_path = _require_junction()
+        recorder = ledger.follow(junction_path, directory, on_arrival=report)
+        print(f"Recording arrivals through {junction_path}", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            recorder.stop()
+            ledger.disable()
+        return
+
+    target = cliapp.ctx.get("target", "") or junctions.resolve_junction(_require_junction())[0]
+    if not target:
+        _fail("No target: use --target <path>, or a junction that points somewhere")
+    since, until = _parse_time("since"), _parse_time("until")
+    target_ledger = ledger.Ledger(os.path.join(directory, ledger.ledger_filename(target)), target)
+    start = time.perf_counter()
+    arrivals = 0
+    for entry in target_ledger.between(since, until):
+        report({"time": entry["time"], "file": entry["file"], "size": entry["size"],
+                "session": entry["session"]})
+        arrivals += 1
+    elapsed = time.perf_counter() - start
+    target_ledger.close()
+    print(f"{arrivals} files arrived in {target} ({len(target_ledger)} records, {elapsed * 1000:.1f} ms)",
+          file=sys.stderr)
+
+
+def cmd_audit():
+    """Report dangling, cyclic, chained and nested links under a root."""
+    from win_quick_shuttle import audit
+
+    root = cliapp.ctx.get("root", "")
+    if not root:
+        _fail("No root: use --root <dir>")
+    if not os.path.isdir(root):
+        _fail(f"Not a directory: {root}")
+
+    as_json = cliapp.ctx.get("format", "text") == "json"
+    stats = {}
+    try:
+        for report in audit.audit(root, stats=stats):
+            if not report["problems"]:
+                continue
+            if as_json:
+                print(json.dumps(report), flush=True)
+            else:
+                print(f"[{', '.join(report['problems'])}] {report['path']} -> {report['target']}", flush=True)
+    except KeyboardInterrupt:
+        pass
+
+    rate = stats["entries"] / stats["seconds"] if stats["seconds"] else 0.0
+    if as_json:
+        print(json.dumps({"summary": dict(stats, entries_per_second=round(rate))}))
+    else:
+        print(f"{stats['entries']} entries in {stats['dirs']} directories, {stats['links']} links, "
+              f"{stats['problems']} with problems, {stats['errors']} unreadable "
+              f"({stats['seconds']:.2f}s, {rate:,.0f} entries/s)")
+
+
+def _profiles_path():
+    """Return the path of profiles.json in the project dir."""
+    from win_quick_shuttle import profiles
+    return cliapp.get_path(profiles.PROFILES_FILENAME, "p")
+
+
+def _require_profile_name():
+    """Return the profile name from ctx, or exit with an error."""
+    name = cliapp.ctx.get("profile", "")
+    if not name:
+        _fail("No profile: use --profile <name>")
+    return name
+
+
+def cmd_profile_save():
+    """Record junction -> target in a profile."""
+    from win_quick_shuttle import profiles
+
+    name = _require_profile_name()
+    junction_path = _require_junction()
+    target_path = cliapp.ctx.get("target", "")
+    if not target_path:
+        _fail("No target path: use --target <path>")
+
+    all_profiles = profiles.load_profiles(_profiles_path())
+    profiles.set_profile_link(all_profiles, name, junction_path, target_path)
+    profiles.save_profiles(_profiles_path(), all_profiles)
+    print(f"{name}: {junction_path} -> {target_path}")
+
+
+def cmd_profiles():
+    """List saved profiles and their links."""
+    from win_quick_shuttle import profiles
+
+    all_profiles = profiles.load_profiles(_profiles_path())
+    if cliapp.ctx.get("format", "text") == "json":
+        print(json.dumps(all_profiles))
+        return
+    for name in sorted(all_profiles):
+        print(name)
+        for junction_path, target_path in sorted(all_profiles[name].items()):
+            print(f"  {junction_path} -> {target_path}")
+
+
+def cmd_apply():
+    """Switch every junction in a profile."""
+    from win_quick_shuttle import profiles
+
+    name = _require_profile_name()
+    all_profiles = profiles.load_profiles(_profiles_path())
+    if name not in all_profiles:
+        _fail(f"No such profile: {name}")
+
+    rollback = cliapp.ctx.get("rollback", "no") == "yes"
+    _open_journal()
+    success, results = profiles.apply_profile(all_profiles, name, rollback=rollback)
+
+    if cliapp.ctx.get("format", "text") == "json":
+        print(json.dumps(results))
+    else:
+        for result in results:
+            mark = "ok  " if result["ok"] else "FAIL"
+            print(f"[{mark}] {result['junction']} -> {result['target']}: {result['message']}")
+            if result.get("rolled_back"):
+                print(f"       rolled back to {result['previous'] or '(no junction)'}")
+    if not success:
+        sys.exit(1)
+
+
+def cmd_stats():
+    """Summarize recorded spans per operation."""
+    path = cliapp.get_path(TRACE_FILENAME, "p")
+    try:
+        summary = tracing.stats(tracing.load_spans(path))
+    except FileNotFoundError:
+        _fail(f"No trace recorded yet ({path}); run commands with --trace yes")
+
+    if cliapp.ctx.get("format", "text") == "json":
+        print(json.dumps(summary))
+        return
+    print(f"{'operation':40} {'count':>7} {'fail':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op in sorted(summary):
+        row = summary[op]
+        print(f"{op:40} {row['count']:7d} {row['failures']:5d} "
+              f"{row['p50_ms']:9.3f} {row['p95_ms']:9.3f} {row['p99_ms']:9.3f}")
+
+
+def cmd_serve():
+    """Run the resident shuttle daemon."""
+    from win_quick_shuttle import daemon
+
+    project_dir = str(cliapp.get_path(".", "p"))
+    address = cliapp.ctx.get("address", "") or daemon.default_address(project_dir)
+    token_path = daemon.default_token_path(project_dir)
+    _open_journal()
+    print(f"Serving on {address} (token in {token_path})")
+    try:
+        daemon.serve(address, cliapp.ctx.get("junction", ""), cliapp.ctx.get("target", ""),
+                     token_path)
+    except KeyboardInterrupt:
+        pass
+
+
 def main_cli():
     """Entry point for win-quick-shuttle CLI."""
     cliapp.declare_app("win-quick-shuttle", "0.2.0")
@@ -27,9 +501,120 @@ def main_cli():
     cliapp.declare_key("target", "")
     cliapp.describe_key("target", "Default target path for the junction", "l")
 
-    cliapp.declare_cmd("run", cmd_run)
+    cliapp.declare_key("format", "text")
+    cliapp.describe_key("format", "Output format for status: text or json", "l")
+
+    cliapp.declare_key("address", "")
+    cliapp.describe_key("address", "Daemon address: a socket path or host:port (default: shuttle.sock in the project dir)", "l")
+
+    cliapp.declare_key("profile", "")
+    cliapp.describe_key("profile", "Profile name for apply and profile-save", "l")
+
+    cliapp.declare_key("rollback", "no")
+    cliapp.describe_key("rollback", "yes: if any link in apply fails, restore the ones that switched", "l")
+
+    cliapp.declare_key("roots", "")
+    cliapp.describe_key("roots", f"Project roots to crawl for target autocomplete, separated by '{os.pathsep}'", "l")
+
+    cliapp.declare_key("migrate", "no")
+    cliapp.describe_key("migrate", "yes: point also moves the files in the old target into the new one", "l")
+
+    cliapp.declare_key("verify", "no")
+    cliapp.describe_key("verify", "yes: check each file copied across volumes by migrate against its SHA-256", "l")
+
+    cliapp.declare_key("from", "")
+    cliapp.describe_key("from", "Folder to move files out of (migrate; default: the junction's current target)", "l")
+
+    cliapp.declare_key("to", "")
+    cliapp.describe_key("to", "Folder to move files into (migrate; default: --target)", "l")
+
+    cliapp.declare_key("root", "")
+    cliapp.describe_key("root", "Directory tree to audit for broken links", "l")
+
+    cliapp.declare_key("rules", "")
+    cliapp.describe_key("rules", "Routing rules file for route (default: routes.json in the project dir)", "l")
+
+    cliapp.declare_key("link", "no")
+    cliapp.describe_key("link", "yes: dedupe replaces each duplicate with a hard link to the oldest copy", "l")
+
+    cliapp.declare_key("follow", "no")
+    cliapp.describe_key("follow", "yes: dedupe and ledger keep running and handle each file as it arrives", "l")
+
+    cliapp.declare_key("since", "")
+    cliapp.describe_key("since", "Start of the ledger time range: seconds since the epoch or a local date like 2024-05-01T09:30", "l")
+
+    cliapp.declare_key("until", "")
+    cliapp.describe_key("until", "End of the ledger time range (not included), in the same forms as --since", "l")
+
+    cliapp.declare_key("trace", "no")
+    cliapp.describe_key("trace", "yes: record operation timings to trace.jsonl in the project dir (see stats)", "l")
+
+    cliapp.declare_cmd("run", _traced_command(cmd_run))
     cliapp.describe_cmd("run", "Launch the GUI", "s")
-    cliapp.describe_cmd("run", "Launch the win-quick-shuttle GUI to manage directory junctions.", "l")
+    cliapp.describe_cmd("run", "Launch the win-quick-shuttle GUI to manage directory junctions. Several junctions separated by the path separator (; on Windows) each get their own panel in one window.", "l")
+
+    cliapp.declare_cmd("point", _traced_command(cmd_point))
+    cliapp.describe_cmd("point", "Point the junction at the target", "s")
+    cliapp.describe_cmd("point", "Point the junction at --target (or the saved target) without starting the GUI. With --migrate yes, the files in the old target are moved into the new one.", "l")
+
+    cliapp.declare_cmd("unlink", _traced_command(cmd_unlink))
+    cliapp.describe_cmd("unlink", "Remove the junction", "s")
+    cliapp.describe_cmd("unlink", "Remove the junction without starting the GUI. The target folder is left untouched.", "l")
+
+    cliapp.declare_cmd("undo", _traced_command(cmd_undo))
+    cliapp.describe_cmd("undo", "Reverse the last switch", "s")
+    cliapp.describe_cmd("undo", "Point the junction back where it was before its last switch (or remove it, if the switch created it). Run again to keep stepping back through the switch journal.", "l")
+
+    cliapp.declare_cmd("status", _traced_command(cmd_status))
+    cliapp.describe_cmd("status", "Show where the junction points", "s")
+    cliapp.describe_cmd("status", "Show where the junction points. Use --format json for machine-readable output.", "l")
+
+    cliapp.declare_cmd("watch", _traced_command(cmd_watch))
+    cliapp.describe_cmd("watch", "Stream junction changes", "s")
+    cliapp.describe_cmd("watch", "Print the junction's state, then a new report every time it is repointed, created or removed. Use --format json for one JSON object per line.", "l")
+
+    cliapp.declare_cmd("route", _traced_command(cmd_route))
+    cliapp.describe_cmd("route", "Sort arriving files into folders by rule", "s")
+    cliapp.describe_cmd("route", "Watch the folder the junction points to and move each completed file to the destination of the first matching rule in --rules (by extension, name glob, size or download source). Runs until interrupted; use --format json for one JSON object per move.", "l")
+
+    cliapp.declare_cmd("dedupe", _traced_command(cmd_dedupe))
+    cliapp.describe_cmd("dedupe", "Find duplicate files in the junction's target", "s")
+    cliapp.describe_cmd("dedupe", "Index the folder the junction points to (by size, then partial and full content hash) and report files that duplicate another. The index is saved in the project dir, so later runs only re-read changed folders. With --link yes duplicates become hard links to the oldest copy; with --follow yes each arriving file is checked until interrupted.", "l")
+
+    cliapp.declare_cmd("ledger", _traced_command(cmd_ledger))
+    cliapp.describe_cmd("ledger", "List the files that arrived in a target", "s")
+    cliapp.describe_cmd("ledger", "Print the files that arrived in --target (default: where the junction points) between --since and --until, from the ledger kept in the project dir. Every switch opens a session in the new target's ledger; arrivals are recorded while the GUI runs, or by ledger --follow yes until interrupted. Use --format json for one JSON object per file.", "l")
+
+    cliapp.declare_cmd("serve", _traced_command(cmd_serve))
+    cliapp.describe_cmd("serve", "Run the resident shuttle daemon", "s")
+    cliapp.describe_cmd("serve", "Keep a process running that accepts newline-delimited JSON point/unlink/status requests on a local socket.", "l")
+
+    cliapp.declare_cmd("apply", _traced_command(cmd_apply))
+    cliapp.describe_cmd("apply", "Switch every junction in a profile", "s")
+    cliapp.describe_cmd("apply", "Point every junction in --profile at its target, in parallel. With --rollback yes, a partial failure restores the links that switched.", "l")
+
+    cliapp.declare_cmd("profile-save", _traced_command(cmd_profile_save))
+    cliapp.describe_cmd("profile-save", "Add a junction to a profile", "s")
+    cliapp.describe_cmd("profile-save", "Record --junction -> --target in --profile, creating the profile if needed.", "l")
+
+    cliapp.declare_cmd("profiles", _traced_command(cmd_profiles))
+    cliapp.describe_cmd("profiles", "List saved profiles", "s")
+
+    cliapp.declare_cmd("crawl", _traced_command(cmd_crawl))
+    cliapp.describe_cmd("crawl", "Index the project roots for autocomplete", "s")
+    cliapp.describe_cmd("crawl", "Walk --roots and save the directory index the GUI uses for target autocomplete. Only directories that changed since the last crawl are re-listed.", "l")
+
+    cliapp.declare_cmd("migrate", _traced_command(cmd_migrate))
+    cliapp.describe_cmd("migrate", "Move files between folders", "s")
+    cliapp.describe_cmd("migrate", "Move everything in --from (default: where the junction points) into --to. Across volumes files are copied in parallel chunks and an interrupted move resumes where it stopped. --verify yes checks each copy's SHA-256.", "l")
+
+    cliapp.declare_cmd("audit", _traced_command(cmd_audit))
+    cliapp.describe_cmd("audit", "Find broken and tangled links under a root", "s")
+    cliapp.describe_cmd("audit", "Walk --root in parallel and report junctions and symlinks that dangle, form cycles, point at other links, or point into linked folders, with entries/s throughput. Use --format json for one JSON object per problem and a final summary line.", "l")
+
+    cliapp.declare_cmd("stats", cmd_stats)
+    cliapp.describe_cmd("stats", "Show recorded operation timings", "s")
+    cliapp.describe_cmd("stats", "Print per-operation counts, failures and p50/p95/p99 latencies from spans recorded with --trace yes.", "l")
 
     cliapp.main()
 
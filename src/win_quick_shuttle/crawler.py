@@ -0,0 +1,205 @@
+"""Background directory crawler for target-path autocomplete.
+
+A Crawler walks the configured project roots with os.scandir on a small
+thread pool and keeps a PrefixIndex of every directory it finds.  The result
+is persisted to `.win-quick-shuttle/dirindex.json`:
+
+    {"version": 1,
+     "dirs": {"C:\\\\Projects": [mtime_ns, ["A", "B"]], ...}}
+
+On the next start the saved index is served immediately, and the crawl only
+re-lists directories whose mtime changed -- an unchanged directory costs one
+stat(), and its saved subdirectory names are reused.
+
+The crawler is deliberately gentle: all workers share a RateLimiter that caps
+directory operations per second, so a crawl never competes seriously with
+the downloads landing in the junction.  It does not follow links or
+junctions (no cycles, no crawling into the shuttle's own target) and skips
+hidden directories.
+
+PrefixIndex.complete() is a bisect over a sorted list and never takes a lock:
+a finished crawl swaps in a new list with one assignment, so the Tk thread
+can query it on every keystroke.
+"""
+
+import bisect
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+from win_quick_shuttle import links
+
+
+INDEX_FILENAME = "dirindex.json"
+INDEX_VERSION = 1
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 200.0        # Directory operations per second, all workers together
+DEFAULT_MAX_DEPTH = 8
+COMPLETION_LIMIT = 8
+
+
+class RateLimiter:
+    """Space out operations to at most rate per second across threads."""
+
+    def __init__(self, rate):
+        self.rate = rate            # None or 0: unlimited
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self, stopping=None):
+        """Wait for the next slot (returns early if stopping is set)."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + 1.0 / self.rate
+        if wait > 0:
+            if stopping is not None:
+                stopping.wait(wait)
+            else:
+                time.sleep(wait)
+
+
+class PrefixIndex:
+    """Directory paths, searchable by prefix without locks."""
+
+    def __init__(self, paths=()):
+        self.replace(paths)
+
+    def __len__(self):
+        return len(self._entries[0])
+
+    def replace(self, paths):
+        """Swap in a new set of paths."""
+        pairs = sorted((os.path.normcase(path), path) for path in paths)
+        self._entries = ([folded for folded, _ in pairs], [path for _, path in pairs])
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        """Return up to limit indexed paths starting with prefix."""
+        folded, paths = self._entries
+        key = os.path.normcase(prefix)
+        result = []
+        for i in range(bisect.bisect_left(folded, key), len(folded)):
+            if len(result) == limit or not folded[i].startswith(key):
+                break
+            result.append(paths[i])
+        return result
+
+
+# --- Persistence ---
+
+def load_index(path):
+    """Read a saved crawl; returns {dir: [mtime_ns, [subdir names]]}."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return data["dirs"]
+
+
+def save_index(path, dirs):
+    """Write a crawl to path, replacing the file atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "dirs": dirs}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+# --- Crawling ---
+
+def _is_plain_dir(entry):
+    """True for a visible real directory (not a link, junction or dot-directory)."""
+    return not entry.name.startswith(".") and links.entry_kind(entry) == links.KIND_DIR
+
+
+class Crawler:
+    """Crawl project roots in the background and keep a PrefixIndex of their directories."""
+
+    def __init__(self, roots, index_path=None, workers=DEFAULT_WORKERS,
+                 rate=DEFAULT_RATE, max_depth=DEFAULT_MAX_DEPTH):
+        self.roots = [os.path.normpath(os.path.abspath(root)) for root in roots]
+        self.index_path = index_path    # Saved crawl, or None to keep nothing
+        self.workers = workers
+        self.max_depth = max_depth
+        self.limiter = RateLimiter(rate)
+        self.index = PrefixIndex()
+        self.stats = {"listed": 0, "reused": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self.finished = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Serve the saved index now and crawl on a background thread."""
+        self._thread = threading.Thread(target=self.run, name="wqs-crawler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Abandon the crawl and wait for the thread to exit."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        """Load the saved index, crawl, then publish and save the result."""
+        try:
+            saved = load_index(self.index_path) if self.index_path else {}
+            self.index.replace(saved)
+            dirs = self.crawl(saved)
+            if dirs is not None:
+                self.index.replace(dirs)
+                if self.index_path:
+                    save_index(self.index_path, dirs)
+        finally:
+            self.finished.set()
+
+    def crawl(self, saved):
+        """Walk every root; returns {dir: [mtime_ns, names]}, or None if stopped."""
+        dirs = {}
+        with concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="wqs-crawl") as pool:
+            pending = {pool.submit(self._visit, root, saved.get(root)): (root, 0) for root in self.roots}
+            while pending:
+                if self._stopping.is_set():
+                    for future in pending:
+                        future.cancel()
+                    return None
+                finished, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    path, depth = pending.pop(future)
+                    try:
+                        entry = future.result()
+                    except OSError:
+                        self._count("errors")
+                        continue
+                    dirs[path] = entry
+                    if depth < self.max_depth:
+                        for name in entry[1]:
+                            child = os.path.join(path, name)
+                            pending[pool.submit(self._visit, child, saved.get(child))] = (child, depth + 1)
+        return dirs
+
+    def _visit(self, path, saved_entry):
+        """Return [mtime_ns, subdir names] for path, listing it only if it changed."""
+        self.limiter.acquire(self._stopping)
+        mtime = os.stat(path).st_mtime_ns
+        if saved_entry is not None and saved_entry[0] == mtime:
+            self._count("reused")
+            return saved_entry
+        self.limiter.acquire(self._stopping)
+        with os.scandir(path) as entries:
+            names = sorted(entry.name for entry in entries if _is_plain_dir(entry))
+        self._count("listed")
+        return [mtime, names]
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
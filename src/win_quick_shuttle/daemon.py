@@ -0,0 +1,250 @@
+"""Resident shuttle daemon and its client.
+
+`win-quick-shuttle serve` keeps one process alive so scripts can switch
+junctions without paying for interpreter startup and config loading on every
+call.  The protocol is newline-delimited JSON over a local Unix socket (or
+TCP on the loopback interface where Unix sockets are unavailable):
+
+    -> {"op": "point", "junction": "C:\\\\Downloads\\\\ACTIVE", "target": "D:\\\\proj"}
+    <- {"ok": true, "message": "Junction redirected successfully"}
+
+Ops are "point", "unlink", "status" and "ping".  "junction" and "target"
+fall back to the defaults the daemon was started with.  Every request must
+carry the daemon's "token": a random secret the daemon writes, readable by
+the user only, to the project directory when it starts (see read_token).
+The loopback TCP port is open to every local process and to web pages, so
+the token is what keeps them from repointing junctions; a line that is not
+a JSON object (an HTTP request, say) ends the connection.  Requests for
+different junctions run concurrently; requests that change the same
+junction are serialized by its switch lock (see locks), which also keeps
+them from racing the GUI and other processes.
+"""
+
+import errno
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+
+from win_quick_shuttle import junctions
+
+
+DEFAULT_TCP_ADDRESS = "127.0.0.1:47017"
+TOKEN_FILENAME = "shuttle.token"
+
+# Server state
+state = {
+    "defaults": {"junction": "", "target": ""},
+}
+
+
+# --- Addresses ---
+
+def parse_address(text):
+    """Turn "host:port" or a socket path into (family, address)."""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and host and not os.path.isabs(text):
+        return socket.AF_INET, (host, int(port))
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError(f"Unix sockets are not available here; use host:port, not {text!r}")
+    return socket.AF_UNIX, text
+
+
+def default_address(project_dir):
+    """Return the address a daemon rooted at project_dir listens on by default."""
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(project_dir, "shuttle.sock")
+    return DEFAULT_TCP_ADDRESS
+
+
+def default_token_path(project_dir):
+    """Return where a daemon rooted at project_dir writes its token."""
+    return os.path.join(project_dir, TOKEN_FILENAME)
+
+
+# --- Token ---
+
+def write_token(path, token):
+    """Write token to path, readable and writable by the current user only."""
+    if os.path.lexists(path):
+        os.unlink(path)  # O_CREAT keeps an existing file's mode
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+
+
+def read_token(path):
+    """Return the token a daemon wrote to path."""
+    with open(path, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+# --- Request handling ---
+
+def handle_request(request):
+    """Execute one decoded request and return the response dict."""
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True, "message": "pong"}
+
+    for field in ("junction", "target"):
+        value = request.get(field)
+        if value is not None and (not isinstance(value, str) or "\0" in value):
+            return {"ok": False, "message": f"Bad request: {field} must be a path string"}
+
+    junction_path = request.get("junction") or state["defaults"]["junction"]
+    if not junction_path:
+        return {"ok": False, "message": "No junction path given"}
+
+    if op == "status":
+        return {"ok": True, "message": "", "status": junctions.junction_status(junction_path)}
+
+    if op == "point":
+        target_path = request.get("target") or state["defaults"]["target"]
+        if not target_path:
+            return {"ok": False, "message": "No target path given"}
+        success, message = junctions.point_junction(junction_path, target_path)
+        return {"ok": success, "message": message}
+
+    if op == "unlink":
+        success, message = junctions.unlink_junction(junction_path)
+        return {"ok": success, "message": message}
+
+    return {"ok": False, "message": f"Unknown op: {op!r}"}
+
+
+def decode_line(line):
+    """Decode one request line; raise ValueError unless it is a JSON object."""
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    return request
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serve requests on one connection until the client hangs up."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = decode_line(line)
+            except ValueError as e:
+                self._reply({"ok": False, "message": f"Bad request: {e}"})
+                return  # Not a client of ours; drop the connection
+            token = request.pop("token", None)
+            if not isinstance(token, str) or \
+                    not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+                self._reply({"ok": False, "message": "Bad token"})
+                return
+            self._reply(handle_request(request))
+
+    def _reply(self, response):
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def _is_listening(addr):
+    """Return True if something accepts connections on Unix socket addr."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(addr)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def make_server(address, junction="", target="", token_path=None):
+    """Bind a daemon at address (see parse_address) with the given defaults.
+
+    The server gets a fresh random token (server.token), also written to
+    token_path if given.  An existing Unix socket is only replaced when
+    nothing answers on it; a live daemon there raises OSError.
+    """
+    state["defaults"]["junction"] = junction
+    state["defaults"]["target"] = target
+    family, addr = parse_address(address)
+    if family == socket.AF_INET:
+        server = _TCPServer(addr, _RequestHandler)
+    else:
+        if os.path.exists(addr):
+            if _is_listening(addr):
+                raise OSError(errno.EADDRINUSE, f"A daemon is already listening at {addr}")
+            os.unlink(addr)  # Stale socket from a previous run
+        server = _UnixServer(addr, _RequestHandler)
+    server.token = secrets.token_hex(32)
+    if token_path:
+        try:
+            write_token(token_path, server.token)
+        except OSError:
+            server.server_close()
+            raise
+    return server
+
+
+def serve(address, junction="", target="", token_path=None):
+    """Run a daemon at address until interrupted."""
+    server = make_server(address, junction, target, token_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        family, addr = parse_address(address)
+        if family != socket.AF_INET and os.path.exists(addr):
+            os.unlink(addr)
+        if token_path and os.path.exists(token_path):
+            os.unlink(token_path)
+
+
+# --- Client ---
+
+class Client:
+    """A persistent connection to a running daemon."""
+
+    def __init__(self, address, token, timeout=5.0):
+        self.token = token
+        family, addr = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(addr)
+        self.rfile = self.sock.makefile("rb")
+
+    def call(self, op, **fields):
+        """Send one request and wait for its response."""
+        request = dict(fields, op=op, token=self.token)
+        self.sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def request(address, token, op, **fields):
+    """Open a connection, send one request, and return the response."""
+    with Client(address, token) as client:
+        return client.call(op, **fields)
@@ -0,0 +1,458 @@
+"""Find files that arrive in the junction's target more than once.
+
+A Deduper keeps an index of every file under one target folder, persisted in
+the project dir as `dedupe-<hash of the target path>.jsonl`:
+
+    {"target": "C:\\\\Projects\\\\A", "version": 1}                       -- header
+    {"dir": "assets", "mtime": 1700000000000000000, "subdirs": ["img"]}
+    {"file": "assets\\\\logo.png", "size": 5120, "mtime": 17000..., "partial": "9f3a...", "full": null}
+    {"file": "assets\\\\old.png", "gone": true}
+
+Later lines replace earlier ones; the file is rewritten one line per entry
+once superseded lines pile up.
+
+Files are compared in three steps, each only when the one before finds a
+match: size (free, from the index), a partial hash of the first and last
+PARTIAL_BYTES, and a hash of the whole file.  Hashes are computed when first
+needed and kept, so a file with a size no other file has is never read at
+all, and an arrival costs one stat and one appended line.
+
+sync() brings the index up to date with the folder the way crawler does: a
+directory whose mtime has not changed costs one stat and its saved entries
+are reused, so a target with hundreds of thousands of files is walked once.
+Entries whose file was edited in place are caught when they are compared:
+a candidate is re-stat'ed before its hashes are trusted.
+
+add() indexes a single arrival and reports what it duplicates; follow()
+feeds it the files a Router sees arrive, which with inotify means one stat
+per arrival and no relisting of the target while it is idle.  With link
+mode the arrival is replaced by a hard link to the file it duplicates, so
+the bytes are stored once (and both names then share later edits).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from win_quick_shuttle import links, router
+
+
+INDEX_VERSION = 1
+PARTIAL_BYTES = 16 * 1024
+HASH_BLOCK = 1024 * 1024
+DEFAULT_WORKERS = 4
+LINK_SUFFIX = ".wqs-link"
+
+
+def index_filename(target):
+    """Return the file name of target's index in the project dir."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(target)).encode("utf-8")).hexdigest()[:16]
+    return f"dedupe-{key}.jsonl"
+
+
+# --- Hashing ---
+
+def partial_hash(path, size):
+    """Hash the first and last PARTIAL_BYTES of a file (all of it, if that is shorter)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if size <= 2 * PARTIAL_BYTES:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(PARTIAL_BYTES))
+            f.seek(size - PARTIAL_BYTES)
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """Hash a whole file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Entry:
+    """One indexed file."""
+
+    __slots__ = ("size", "mtime", "partial", "full")
+
+    def __init__(self, size, mtime, partial=None, full=None):
+        self.size = size
+        self.mtime = mtime
+        self.partial = partial
+        self.full = full
+
+    def record(self, rel):
+        return {"file": rel, "size": self.size, "mtime": self.mtime,
+                "partial": self.partial, "full": self.full}
+
+
+def _drop(table, key, rel):
+    """Remove rel from the set table[key], and the set once it is empty."""
+    rels = table.get(key)
+    if rels is not None:
+        rels.discard(rel)
+        if not rels:
+            del table[key]
+
+
+class Deduper:
+    """A persisted (size, partial hash, full hash) index of one target folder."""
+
+    def __init__(self, target, index_path=None, link=False, workers=DEFAULT_WORKERS):
+        self.target = os.path.abspath(target)
+        self.index_path = index_path    # JSON-lines store, or None for memory only
+        self.link = link                # True: replace duplicates with hard links
+        self.workers = workers
+        self.stats = {"files": 0, "listed": 0, "reused": 0, "partial_hashes": 0, "full_hashes": 0,
+                      "duplicates": 0, "linked": 0, "bytes_saved": 0}
+        self._files = {}                # relpath -> _Entry
+        self._by_size = {}              # size -> set of relpaths
+        self._by_dir = {}               # relative directory -> set of relpaths
+        self._by_partial = {}           # (size, partial hash) -> set of relpaths
+        self._unhashed = {}             # size -> set of relpaths with no partial hash yet
+        self._dirs = {}                 # relpath ("" for the target) -> [mtime_ns, [subdir names]]
+        self._lock = threading.RLock()
+        self._lines = 0
+        self._pending = []              # Records not yet written
+
+    # --- Storage ---
+
+    def load(self):
+        """Read the saved index."""
+        if not self.index_path:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                lines = iter(f)
+                try:
+                    header = json.loads(next(lines, "{}"))
+                except ValueError:
+                    return
+                if header.get("version") != INDEX_VERSION or header.get("target") != self.target:
+                    return
+                self._lines = 1
+                for line in lines:
+                    self._lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue        # Torn final line from an interrupted write
+                    if "dir" in record:
+                        self._dirs[record["dir"]] = [record["mtime"], record["subdirs"]]
+                    elif record.get("gone"):
+                        self._forget(record["file"])
+                    else:
+                        self._put(record["file"], _Entry(record["size"], record["mtime"],
+                                                         record["partial"], record["full"]))
+        except FileNotFoundError:
+            pass
+        self.stats["files"] = len(self._files)
+
+    def _write(self, record):
+        self._pending.append(json.dumps(record) + "\n")
+
+    def flush(self):
+        """Write out index changes; rewrite the store if it is mostly superseded lines."""
+        with self._lock:
+            if not self.index_path or not self._pending:
+                return
+            # Nothing loaded (no store, or one for another target): start it afresh
+            if not self._lines or self._lines + len(self._pending) > 2 * (len(self._files) + len(self._dirs)) + 100:
+                self.compact()
+                return
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(self._pending))
+            self._lines += len(self._pending)
+            self._pending = []
+
+    def compact(self):
+        """Rewrite the store as one line per entry."""
+        with self._lock:
+            if not self.index_path:
+                return
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"target": self.target, "version": INDEX_VERSION}) + "\n")
+                for rel, (mtime, subdirs) in self._dirs.items():
+                    f.write(json.dumps({"dir": rel, "mtime": mtime, "subdirs": subdirs}) + "\n")
+                for rel, entry in self._files.items():
+                    f.write(json.dumps(entry.record(rel)) + "\n")
+            os.replace(tmp_path, self.index_path)
+            self._lines = 1 + len(self._dirs) + len(self._files)
+            self._pending = []
+
+    # --- Index maintenance ---
+
+    def _put(self, rel, entry):
+        self._forget(rel)
+        self._files[rel] = entry
+        self._by_size.setdefault(entry.size, set()).add(rel)
+        self._by_dir.setdefault(os.path.dirname(rel), set()).add(rel)
+        if entry.partial is None:
+            self._unhashed.setdefault(entry.size, set()).add(rel)
+        else:
+            self._by_partial.setdefault((entry.size, entry.partial), set()).add(rel)
+
+    def _forget(self, rel):
+        entry = self._files.pop(rel, None)
+        if entry is not None:
+            _drop(self._by_size, entry.size, rel)
+            _drop(self._by_dir, os.path.dirname(rel), rel)
+            _drop(self._unhashed, entry.size, rel)
+            _drop(self._by_partial, (entry.size, entry.partial), rel)
+
+    def _remove(self, rel):
+        if rel in self._files:
+            self._forget(rel)
+            self._write({"file": rel, "gone": True})
+
+    def _update(self, rel, entry):
+        self._put(rel, entry)
+        self._write(entry.record(rel))
+
+    def _current(self, rel):
+        """Re-stat an indexed file; returns (entry, stat) with stale hashes dropped, or (None, None) if gone."""
+        try:
+            st = os.stat(os.path.join(self.target, rel))
+        except OSError:
+            self._remove(rel)
+            return None, None
+        entry = self._files[rel]
+        if (entry.size, entry.mtime) != (st.st_size, st.st_mtime_ns):
+            entry = _Entry(st.st_size, st.st_mtime_ns)
+            self._update(rel, entry)
+        return entry, st
+
+    # --- Walking ---
+
+    def sync(self):
+        """Bring the index up to date with the target folder, re-listing only changed directories."""
+        with self._lock:
+            seen_dirs = set()
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                path = os.path.join(self.target, rel_dir)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(rel_dir)
+                saved = self._dirs.get(rel_dir)
+                if saved is not None and saved[0] == mtime:
+                    self.stats["reused"] += 1
+                    subdirs = saved[1]
+                else:
+                    subdirs = self._list(rel_dir, path, mtime)
+                stack.extend(os.path.join(rel_dir, name) for name in subdirs)
+            for rel_dir in [d for d in self._dirs if d not in seen_dirs]:
+                del self._dirs[rel_dir]
+                for rel in list(self._by_dir.get(rel_dir, ())):
+                    self._remove(rel)
+            self.stats["files"] = len(self._files)
+            self.flush()
+
+    def _list(self, rel_dir, path, mtime):
+        """Index one directory's files; returns its subdirectory names."""
+        self.stats["listed"] += 1
+        subdirs = []
+        present = set()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return []
+        with entries:
+            for entry in entries:
+                try:
+                    kind = links.entry_kind(entry)
+                    if kind == links.KIND_DIR:
+                        if not entry.name.startswith("."):
+                            subdirs.append(entry.name)
+                        continue
+                    if kind != links.KIND_OTHER or not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                rel = os.path.join(rel_dir, entry.name)
+                present.add(rel)
+                old = self._files.get(rel)
+                if old is None or (old.size, old.mtime) != (st.st_size, st.st_mtime_ns):
+                    self._update(rel, _Entry(st.st_size, st.st_mtime_ns))
+        for rel in self._by_dir.get(rel_dir, set()) - present:
+            self._remove(rel)
+        subdirs.sort()
+        self._dirs[rel_dir] = [mtime, subdirs]
+        self._write({"dir": rel_dir, "mtime": mtime, "subdirs": subdirs})
+        return subdirs
+
+    # --- Comparing ---
+
+    def _partial(self, rel, entry):
+        if entry.partial is None:
+            entry.partial = partial_hash(os.path.join(self.target, rel), entry.size)
+            self.stats["partial_hashes"] += 1
+            if entry.size <= 2 * PARTIAL_BYTES:
+                entry.full = entry.partial      # The partial hash already covers the whole file
+            # duplicates() hashes on a pool: only single set operations here, and no deletes
+            self._unhashed.get(entry.size, set()).discard(rel)
+            self._by_partial.setdefault((entry.size, entry.partial), set()).add(rel)
+            self._write(entry.record(rel))
+        return entry.partial
+
+    def _full(self, rel, entry):
+        if entry.full is None:
+            entry.full = full_hash(os.path.join(self.target, rel))
+            self.stats["full_hashes"] += 1
+            self._write(entry.record(rel))
+        return entry.full
+
+    def _same_file(self, a, b):
+        """True if two stat results are one file (hard links of each other)."""
+        return a.st_ino == b.st_ino and a.st_dev == b.st_dev and a.st_ino != 0
+
+    def _original_of(self, rel, entry, st):
+        """Return (relpath, stat) of an indexed file with the same content as rel, or (None, None)."""
+        if len(self._by_size.get(entry.size, ())) < 2:
+            return None, None
+        partial = self._partial(rel, entry)
+        for other in list(self._unhashed.get(entry.size, ())):
+            other_entry = self._current(other)[0]
+            if other_entry is not None and other_entry.size == entry.size:
+                try:
+                    self._partial(other, other_entry)
+                except OSError:
+                    continue
+        for other in sorted(self._by_partial.get((entry.size, partial), set()) - {rel}):
+            other_entry, other_st = self._current(other)
+            if other_entry is None or other_entry.size != entry.size or self._same_file(st, other_st):
+                continue
+            if self._partial(other, other_entry) != partial:
+                continue
+            if self._full(other, other_entry) == self._full(rel, entry):
+                return other, other_st
+        return None, None
+
+    def add(self, path):
+        """Index a file that just arrived; returns a report if it duplicates an indexed file, else None."""
+        with self._lock:
+            try:
+                rel = os.path.relpath(os.path.abspath(path), self.target)
+                st = os.stat(path)
+            except (OSError, ValueError):
+                return None
+            if rel.startswith(os.pardir) or not st.st_size:
+                return None
+            entry = self._files.get(rel)
+            if entry is None or (entry.size, entry.mtime) != (st.st_size, st.st_mtime_ns):
+                entry = _Entry(st.st_size, st.st_mtime_ns)
+                self._update(rel, entry)
+                self.stats["files"] = len(self._files)
+            try:
+                original, original_st = self._original_of(rel, entry, st)
+                report = None
+                if original is not None:
+                    report = self._duplicate(rel, entry, original, original_st)
+            except OSError:
+                report = None
+            self.flush()
+            return report
+
+    def _duplicate(self, rel, entry, original, original_st):
+        """Count (and in link mode, link) rel as a copy of original; returns the report."""
+        self.stats["duplicates"] += 1
+        report = {"file": os.path.join(self.target, rel), "duplicate_of": os.path.join(self.target, original),
+                  "size": entry.size, "linked": False}
+        if self.link:
+            path = os.path.join(self.target, rel)
+            tmp_path = path + LINK_SUFFIX
+            try:
+                os.link(os.path.join(self.target, original), tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                report["message"] = e.strerror or str(e)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return report
+            linked = _Entry(original_st.st_size, original_st.st_mtime_ns, entry.partial, entry.full)
+            self._update(rel, linked)
+            self.stats["linked"] += 1
+            self.stats["bytes_saved"] += entry.size
+            report["linked"] = True
+        return report
+
+    def duplicates(self):
+        """Find every group of indexed files with the same content; returns reports for all but the oldest of each."""
+        with self._lock:
+            sizes = [(size, sorted(rels)) for size, rels in self._by_size.items() if size and len(rels) > 1]
+            current = {}
+            for _, rels in sizes:
+                for rel in rels:
+                    entry, st = self._current(rel)
+                    if entry is not None:
+                        current[rel] = (entry, st)
+
+            def hash_all(step, rels):
+                with ThreadPoolExecutor(self.workers, thread_name_prefix="wqs-dedupe") as pool:
+                    for rel, future in [(rel, pool.submit(step, rel, current[rel][0])) for rel in rels]:
+                        try:
+                            future.result()
+                        except OSError:
+                            del current[rel]
+
+            # Partial hashes where sizes collide, then full hashes where partial hashes do
+            hash_all(self._partial, [rel for _, rels in sizes for rel in rels if rel in current])
+            groups = {}
+            for rel, (entry, _) in current.items():
+                groups.setdefault((entry.size, entry.partial), []).append(rel)
+            hash_all(self._full, [rel for rels in groups.values() if len(rels) > 1 for rel in rels])
+
+            by_content = {}
+            for rel, (entry, _) in current.items():
+                if entry.full is not None:
+                    by_content.setdefault((entry.size, entry.full), []).append(rel)
+            reports = []
+            for rels in by_content.values():
+                if len(rels) < 2:
+                    continue
+                rels.sort(key=lambda r: (current[r][1].st_mtime_ns, r))
+                original = rels[0]
+                for rel in rels[1:]:
+                    if self._same_file(current[rel][1], current[original][1]):
+                        continue
+                    reports.append(self._duplicate(rel, current[rel][0], original, current[original][1]))
+            self.flush()
+            return reports
+
+
+def follow(junction_path, index_path_for=None, link=False, on_duplicate=None, **kwargs):
+    """Start a Router that indexes each arrival in the junction's target; returns it.
+
+    index_path_for maps a target folder to its index file (None: keep indexes
+    in memory).  on_duplicate is called with each report.  kwargs go to
+    router.Router.
+    """
+    dedupers = {}
+
+    def arrived(path, size):
+        target = os.path.dirname(path)
+        deduper = dedupers.get(target)
+        if deduper is None:
+            dedupers.clear()
+            path_for = index_path_for(target) if index_path_for else None
+            deduper = dedupers[target] = Deduper(target, path_for, link)
+            deduper.load()
+            deduper.sync()
+        report = deduper.add(path)
+        if report is not None and on_duplicate:
+            on_duplicate(report)
+
+    return router.Router(junction_path, router.compile_rules([]), on_arrival=arrived, **kwargs).start()
@@ -0,0 +1,304 @@
+"""Target history: a persisted frecency store with an incremental fuzzy index.
+
+Every target the junction is pointed at is recorded.  Entries are ranked by
+frecency -- a visit count that halves every HALF_LIFE seconds -- stored as a
+time-independent key, log2(score) + time / HALF_LIFE, so ranking never has to
+be recomputed as time passes and a visit only moves one entry.
+
+The store is an append-only JSON-lines file in the project dir:
+
+    {"path": "C:\\\\Projects\\\\A", "time": 1700000000.0}    -- one visit
+    {"path": "C:\\\\Projects\\\\A", "key": 2834.1}           -- compacted entry
+
+record() appends one line (without loading anything), and the file is
+rewritten as one line per entry once visits outnumber entries.  The index is
+built the first time it is searched (or when load() is called, e.g. on a
+worker thread) and is then updated in place:
+
+    postings   -- character * n -> ids of entries containing the character
+                  at least n times (n capped at MAX_REPEAT)
+    order      -- ids, best first
+
+Building postings is most of the cost of a load, so the index is saved next
+to the store (history.jsonl.index) along with how many bytes of the store it
+covers.  A later load restores it and reads only the lines appended since;
+the saved index is refreshed when the store is compacted or once a load had
+to read more than INDEX_TAIL lines past it.
+
+search() is fuzzy: the query's characters must appear in order.  Results
+come from walking entries best-first until `limit` match.  When the query's
+rarest character makes a posting set small, only that set is walked.
+
+While typing, each query extends the previous one, and a match for the
+longer query is always a match for the shorter one.  Searches are therefore
+kept per query for the current index: extending a query re-checks only the
+matches already found and resumes the walk where the shorter query stopped,
+and deleting a character returns to a search that is already done.
+search_step() does a bounded slice of that work, so a GUI can keep every
+keystroke under a millisecond and finish a sparse search in later slices.
+"""
+
+import bisect
+import collections
+import json
+import math
+import os
+import re
+import threading
+import time
+
+
+HISTORY_FILENAME = "history.jsonl"
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+INDEX_TAIL = 1000   # Lines read past the saved index before it is saved again
+HALF_LIFE = 7 * 24 * 3600.0
+SEARCH_LIMIT = 20
+MAX_REPEAT = 4
+SELECTIVE = 32      # Walk a posting set instead of the ranking if it is this many times smaller
+CHUNK = 128         # Entries checked between looks at the clock
+
+
+def _visit_key(key, now, half_life):
+    """Return the frecency key after one visit at time now (key None: first visit)."""
+    base = now / half_life
+    if key is None:
+        return base
+    return base + math.log2(2.0 ** (key - base) + 1.0)
+
+
+class _Search:
+    """A resumable walk over ranked ids for one query."""
+
+    __slots__ = ("query", "matches", "ranked", "pos", "found")
+
+    def __init__(self, query, ranked, pos=0, found=None):
+        self.query = query
+        # [^a]*a[^b]*b... never backtracks: each step takes the first occurrence
+        self.matches = re.compile("".join(f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in query)).match
+        self.ranked = ranked            # Ids, best first (shared; dropped when the index changes)
+        self.pos = pos                  # ranked[:pos] has been checked
+        self.found = found or []        # Matching ids from ranked[:pos], best first
+
+
+class TargetHistory:
+    """Frecency-ranked target paths with a fuzzy search index."""
+
+    def __init__(self, path=None, half_life=HALF_LIFE):
+        self.path = path                # JSON-lines store, or None for memory only
+        self.half_life = half_life
+        self.loaded = not path          # Set once the index is built; nothing to read without a file
+        self._lock = threading.RLock()
+        self._lines = 0                 # Lines in the store file
+        self._paths = []                # id -> path
+        self._folded = []               # id -> lowercased path
+        self._keys = []                 # id -> frecency key
+        self._ids = {}                  # path -> id
+        self._postings = collections.defaultdict(set)
+        self._order = []                # ids, best first
+        self._order_keys = []           # -key for each id in _order (ascending)
+        self._searches = {}             # query -> _Search, valid until the index changes
+
+    def __len__(self):
+        self.load()
+        return len(self._paths)
+
+    # --- Loading and storing ---
+
+    def load(self):
+        """Read the store and build the index, once."""
+        with self._lock:
+            if self.loaded:
+                return
+            offset = self._load_index()
+            read = 0
+            try:
+                with open(self.path, "rb") as f:
+                    inode = os.fstat(f.fileno()).st_ino
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # Torn final line from an interrupted write
+                        offset += len(line)
+                        self._lines += 1
+                        read += 1
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        i = self._entry(record["path"])
+                        if "key" in record:
+                            self._keys[i] = record["key"]
+                        else:
+                            self._keys[i] = _visit_key(self._keys[i], record["time"], self.half_life)
+            except FileNotFoundError:
+                inode = None
+            self._order = sorted(range(len(self._paths)), key=self._keys.__getitem__, reverse=True)
+            self._order_keys = [-self._keys[i] for i in self._order]
+            self.loaded = True
+            if inode is not None and read > INDEX_TAIL:
+                self._save_index(inode, offset)
+
+    def record(self, target_path, now=None):
+        """Record one visit to target_path."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            if self.loaded:
+                i = self._entry(target_path)
+                self._rerank(i, _visit_key(self._keys[i], now, self.half_life))
+            if self.path:
+                self._append({"path": target_path, "time": now})
+                if self.loaded and self._lines > 2 * len(self._paths) + 100:
+                    self.compact()
+
+    def compact(self):
+        """Rewrite the store as one line per entry."""
+        with self._lock:
+            self.load()
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for i in self._order:
+                    f.write(json.dumps({"path": self._paths[i], "key": self._keys[i]}) + "\n")
+                f.flush()
+                st = os.fstat(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._lines = len(self._paths)
+            self._save_index(st.st_ino, st.st_size)
+
+    def _load_index(self):
+        """Restore the saved index if it still matches the store; returns the store offset it covers."""
+        try:
+            with open(f"{self.path}{INDEX_SUFFIX}", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            st = os.stat(self.path)
+        except (OSError, ValueError):
+            return 0
+        # A compaction by another process replaces the store with a new file
+        if data.get("version") != INDEX_VERSION or data["inode"] != st.st_ino or data["offset"] > st.st_size:
+            return 0
+        self._paths = data["paths"]
+        self._folded = [path.lower() for path in self._paths]
+        self._keys = data["keys"]
+        self._ids = {path: i for i, path in enumerate(self._paths)}
+        self._postings = collections.defaultdict(set, ((k, set(ids)) for k, ids in data["postings"].items()))
+        self._lines = data["lines"]
+        return data["offset"]
+
+    def _save_index(self, inode, offset):
+        """Save the index as covering the first offset bytes of the store (file inode)."""
+        data = {"version": INDEX_VERSION, "inode": inode, "offset": offset, "lines": self._lines,
+                "paths": self._paths, "keys": self._keys,
+                "postings": {k: sorted(ids) for k, ids in self._postings.items()}}
+        tmp_path = f"{self.path}{INDEX_SUFFIX}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp_path, f"{self.path}{INDEX_SUFFIX}")
+        except OSError:
+            pass  # Only a cache: the next load rebuilds it
+
+    def _append(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self._lines += 1
+
+    # --- Index maintenance ---
+
+    def _entry(self, target_path):
+        """Return target_path's id, indexing it (unranked, key None) if new."""
+        i = self._ids.get(target_path)
+        if i is not None:
+            return i
+        i = len(self._paths)
+        self._ids[target_path] = i
+        self._paths.append(target_path)
+        folded = target_path.lower()
+        self._folded.append(folded)
+        self._keys.append(None)
+        for ch in set(folded):
+            for n in range(1, min(folded.count(ch), MAX_REPEAT) + 1):
+                self._postings[ch * n].add(i)
+        return i
+
+    def _rerank(self, i, key):
+        """Give entry i a new key and move it to its place in the ranking."""
+        if self._keys[i] is not None:
+            pos = bisect.bisect_left(self._order_keys, -self._keys[i])
+            while self._order[pos] != i:
+                pos += 1
+            del self._order[pos]
+            del self._order_keys[pos]
+        self._keys[i] = key
+        pos = bisect.bisect_right(self._order_keys, -key)
+        self._order.insert(pos, i)
+        self._order_keys.insert(pos, -key)
+        self._searches = {}
+
+    # --- Searching ---
+
+    def _selective(self, query):
+        """Ids for query's rarest character (and count), sorted best first, or None if not rare."""
+        smallest = min((self._postings.get(ch * min(query.count(ch), MAX_REPEAT), ())
+                        for ch in set(query)), key=len)
+        if len(smallest) * SELECTIVE >= len(self._order):
+            return None
+        return sorted(smallest, key=self._keys.__getitem__, reverse=True)
+
+    def _search_for(self, query):
+        """Return the search for query, deriving it from a shorter one if possible."""
+        search = self._searches.get(query)
+        if search is not None:
+            return search
+
+        base = None
+        for n in range(len(query) - 1, 0, -1):
+            base = self._searches.get(query[:n])
+            if base is not None:
+                break
+
+        ranked = self._selective(query)
+        if base is not None and (ranked is None or len(ranked) >= len(base.ranked) - base.pos):
+            search = _Search(query, base.ranked, base.pos)
+            search.found = [i for i in base.found if search.matches(self._folded[i])]
+        else:
+            search = _Search(query, self._order if ranked is None else ranked)
+        self._searches[query] = search
+        return search
+
+    def search_step(self, query, limit=SEARCH_LIMIT, budget=None):
+        """Advance the search for query by about budget seconds (None: to the end).
+
+        Returns (paths, done): the best matches found so far, and whether
+        they are final.
+        """
+        self.load()
+        with self._lock:
+            query = "".join(query.lower().split())
+            if not query:
+                return [self._paths[i] for i in self._order[:limit]], True
+
+            search = self._search_for(query)
+            ranked, found, folded, matches = search.ranked, search.found, self._folded, search.matches
+            deadline = None if budget is None else time.perf_counter() + budget
+            while len(found) < limit and search.pos < len(ranked):
+                end = min(search.pos + CHUNK, len(ranked))
+                for pos in range(search.pos, end):
+                    i = ranked[pos]
+                    if matches(folded[i]):
+                        found.append(i)
+                        if len(found) == limit:
+                            end = pos + 1
+                            break
+                search.pos = end
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+
+            done = len(found) >= limit or search.pos >= len(ranked)
+            return [self._paths[i] for i in found[:limit]], done
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Return up to limit paths fuzzily matching query, best first."""
+        return self.search_step(query, limit)[0]
@@ -0,0 +1,284 @@
+"""Junction operations with no GUI attached.
+
+Everything here is importable without tkinter, so headless commands and
+scripts can switch junctions at bare-interpreter speed.  The GUI in main.py
+is a thin layer over these helpers.
+
+Helpers that change the filesystem return (success, message); check_*
+functions return an error message, or None when the operation may proceed.
+point_junction() and unlink_junction() hold the junction's locks.SwitchLock
+from probe to switch; callers that compose the steps themselves take it too,
+and report a lock they cannot take (busy, or an unwritable lock folder) as
+a failed result like any other.
+switch_junction() and drop_junction() record each change in the write-ahead
+journal (see wal) when it is enabled, and open a session in the new target's
+arrival ledger (see ledger) when that is; recover_switches() settles
+switches a crash interrupted, and undo_switch() steps back through them.
+"""
+
+import os
+
+from win_quick_shuttle import ledger, links, locks, resolver, wal
+from win_quick_shuttle.tracing import traced
+
+# Shared by every caller, so repeated refreshes reuse each other's hops
+_resolver = resolver.Resolver()
+
+
+@traced("probe")
+def probe(path):
+    """Describe what is at path with one lstat (plus one readlink for links)."""
+    return links.probe(path)
+
+
+@traced("is_junction")
+def is_junction(path):
+    """Check if a path is a directory junction (or directory symlink)."""
+    return links.probe(path, read_target=False).is_link
+
+
+@traced("get_junction_target")
+def get_junction_target(path):
+    """Get the target of a directory junction."""
+    return links.probe(path).target
+
+
+@traced("resolve_junction")
+def resolve_junction(path):
+    """Follow the junction through every chained link.  Returns (resolved, chain, problems)."""
+    return _resolver.resolve(path)
+
+
+@traced("remove_junction")
+def remove_junction(junction_path):
+    """Remove a directory junction, leaving its target untouched."""
+    try:
+        links.get_backend().remove(junction_path)
+    except OSError as e:
+        return False, e.strerror or str(e)
+    return True, ""
+
+
+@traced("create_junction")
+def create_junction(junction_path, target_path):
+    """Create a directory junction pointing at target_path."""
+    try:
+        links.get_backend().create(junction_path, target_path)
+    except OSError as e:
+        return False, e.strerror or str(e)
+    return True, f"Junction created for {junction_path} <<===>> {target_path}"
+
+
+@traced("redirect_junction")
+def redirect_junction(junction_path, target_path):
+    """Atomically repoint an existing junction; the old one survives any failure."""
+    try:
+        links.get_backend().replace(junction_path, target_path)
+    except OSError as e:
+        return False, e.strerror or str(e)
+    return True, f"Junction redirected: {junction_path} <<===>> {target_path}"
+
+
+# --- Point To ---
+
+@traced("check_point_to")
+def check_point_to(target_path, state):
+    """Validate pointing the junction described by state at target_path."""
+    if "cycle" in _resolver.follow(state.path, target_path)[2]:
+        return "Target path leads back to the junction"
+    backend = links.get_backend()
+    if not backend.isdir(target_path):
+        if backend.exists(target_path):
+            return "Target path is not a directory"
+        return "Target path does not exist"
+    if state.exists and not state.is_link:
+        return "Junction path exists but is not a junction"
+    return None
+
+
+def same_target(a, b):
+    """True if two link targets (or None for no link) name the same place."""
+    if a is None or b is None:
+        return a is b
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+@traced("switch_junction")
+def switch_junction(junction_path, target_path, state, atomic=True, undoes=None):
+    """Point an already-validated junction at target_path, journaling the switch."""
+    old_target = state.target if state.is_link else None
+    switch_id = wal.begin(junction_path, old_target, target_path, undoes)
+    success, message = _switch(junction_path, target_path, state, atomic)
+    if success:
+        wal.end(switch_id, "done")
+        ledger.note_switch(junction_path, old_target, target_path)
+    elif same_target(probe(junction_path).target, old_target):
+        wal.end(switch_id, "failed")
+    # Otherwise the switch stopped halfway; it stays unfinished for recover_switches()
+    return success, message
+
+
+def _switch(junction_path, target_path, state, atomic):
+    if state.exists:
+        if atomic:
+            success, output = redirect_junction(junction_path, target_path)
+            if success:
+                return True, "Junction redirected successfully"
+            return False, f"Failed to redirect junction: {output}"
+        success, error = remove_junction(junction_path)
+        if not success:
+            return False, f"Failed to remove junction: {error}"
+
+    success, output = create_junction(junction_path, target_path)
+    if success:
+        return True, "Junction created successfully"
+    return False, f"Failed to create junction: {output}"
+
+
+@traced("point_junction")
+def point_junction(junction_path, target_path, atomic=True):
+    """Validate, then point junction_path at target_path, holding its switch lock."""
+    try:
+        with locks.SwitchLock(junction_path):
+            state = probe(junction_path)
+            error = check_point_to(target_path, state)
+            if error:
+                return False, error
+            return switch_junction(junction_path, target_path, state, atomic)
+    except OSError as e:
+        return False, str(e)
+
+
+# --- Unlink ---
+
+@traced("drop_junction")
+def drop_junction(junction_path, state, undoes=None):
+    """Remove an already-validated junction, journaling the change."""
+    switch_id = wal.begin(junction_path, state.target, None, undoes)
+    success, error = remove_junction(junction_path)
+    wal.end(switch_id, "done" if success else "failed")
+    if success:
+        ledger.note_switch(junction_path, state.target, None)
+        return True, "Junction removed"
+    return False, f"Failed to remove junction: {error}"
+
+
+@traced("check_unlink")
+def check_unlink(state):
+    """Validate removing the junction described by state."""
+    if not state.exists:
+        return "No junction exists at that path"
+    if not state.is_link:
+        return "Path exists but is not a junction"
+    return None
+
+
+@traced("unlink_junction")
+def unlink_junction(junction_path):
+    """Validate, then remove the junction at junction_path, holding its switch lock."""
+    try:
+        with locks.SwitchLock(junction_path):
+            state = probe(junction_path)
+            error = check_unlink(state)
+            if error:
+                return False, error
+            return drop_junction(junction_path, state)
+    except OSError as e:
+        return False, str(e)
+
+
+# --- Journal recovery and undo ---
+
+def _settle(switch):
+    """Decide how an interrupted switch ended, restoring the old link if it was lost.
+
+    Returns (outcome, message).
+    """
+    junction_path, old_target, new_target = switch["junction"], switch["old"], switch["new"]
+    state = probe(junction_path)
+    current = state.target if state.is_link else None
+    if state.exists and not state.is_link:
+        return "abandoned", f"{junction_path}: replaced by a non-junction; left alone"
+    if same_target(current, new_target):
+        return "completed", f"{junction_path}: switch to {new_target or '(no junction)'} had completed"
+    if same_target(current, old_target):
+        return "failed", f"{junction_path}: switch had not started; still {old_target or '(no junction)'}"
+    if current is None:
+        success, error = create_junction(junction_path, old_target)
+        if success:
+            return "rolled-back", f"{junction_path}: restored link to {old_target}"
+        return "abandoned", f"{junction_path}: could not restore link to {old_target}: {error}"
+    return "abandoned", f"{junction_path}: now points to {current}; left alone"
+
+
+@traced("recover_switches")
+def recover_switches():
+    """Settle every switch in the journal that never recorded an outcome.  Returns messages."""
+    journal = wal.g["journal"]
+    if journal is None:
+        return []
+    messages = []
+    for key, switch in wal.unfinished(journal.records()).items():
+        try:
+            with locks.SwitchLock(switch["junction"]):
+                # Re-read under the lock: a live process may have finished it meanwhile
+                if wal.unfinished(journal.records()).get(key, {}).get("id") != switch["id"]:
+                    continue
+                outcome, message = _settle(switch)
+                journal.end(switch["id"], outcome)
+                messages.append(message)
+        except TimeoutError:
+            continue                    # Still being switched; its holder will finish it
+        except OSError as e:
+            messages.append(f"{switch['junction']}: could not take its switch lock: {e}")
+    return messages
+
+
+@traced("undo_switch")
+def undo_switch(junction_path):
+    """Reverse the junction's last journaled switch that is not undone yet."""
+    journal = wal.g["journal"]
+    if journal is None:
+        return False, "Switch journal is not enabled"
+    try:
+        with locks.SwitchLock(junction_path):
+            stack = wal.undo_stack(journal.records(), junction_path)
+            if not stack:
+                return False, "Nothing to undo"
+            last = stack[-1]
+            state = probe(junction_path)
+            if not same_target(state.target if state.is_link else None, last["new"]):
+                return False, "Junction has changed since its last recorded switch"
+            if last["old"] is None:
+                success, message = drop_junction(junction_path, state, undoes=last["id"])
+            else:
+                error = check_point_to(last["old"], state)
+                if error:
+                    return False, error
+                success, message = switch_junction(junction_path, last["old"], state, undoes=last["id"])
+    except OSError as e:
+        return False, str(e)
+    if not success:
+        return False, message
+    return True, f"Undone: {junction_path} -> {last['old'] or '(no junction)'}"
+
+
+# --- Status ---
+
+def junction_status(junction_path, state=None):
+    """Return a JSON-ready dict describing the junction."""
+    if state is None:
+        state = probe(junction_path)
+    resolved, chain, problems = None, [], []
+    if state.is_link and state.target:
+        resolved, chain, problems = _resolver.follow(junction_path, state.target)
+    return {
+        "junction": junction_path,
+        "kind": state.kind,
+        "is_junction": state.is_link,
+        "target": state.target,
+        "mtime": state.mtime,
+        "resolved": resolved,       # Final directory after every chained link
+        "chain": chain,             # Links passed through on the way
+        "problems": problems,       # See resolver: dangling, cycle, chain, into-link
+    }
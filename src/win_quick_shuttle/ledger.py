@@ -0,0 +1,401 @@
+"""Ledger of the files that arrive in each target, per redirect session.
+
+Every switch opens a session in the new target's ledger (and closes the one
+in the old target's), so each file that lands there can be tied to the
+window during which the junction pointed at it.  A target's ledger lives in
+the project dir as two append-only files named after a hash of its path:
+
+    ledger-<hash>.bin    -- a HEADER, then fixed-size RECORDs, oldest first
+    ledger-<hash>.names  -- the target path, then every name a record points to
+
+    RECORD: time_ns (int64), size (int64), name offset (uint64), name length
+            (uint16), kind (uint8: ARRIVAL, OPEN or CLOSE), session (uint32)
+
+An ARRIVAL's name is the file's name and its session the record number of
+the OPEN it arrived under; OPEN and CLOSE records name the junction, and an
+OPEN's session is the record number of the OPEN before it, so sessions() is
+a walk back through the opens alone.  Times never go backwards within a
+ledger, so between() finds a time range by binary search over the
+memory-mapped records: a query costs a few dozen page touches however many
+million records there are, and memory stays bounded by what it returns.
+
+A name is written before the record that points to it, so a crash leaves at
+most a torn last record, which is cut off the next time the ledger is
+written.  Several processes may append to one ledger (writes are O_APPEND),
+but record times are only kept in order within each process.
+
+The switch hook is off until enable() is called (the CLI does so for
+commands that switch junctions, next to the journal); note_switch() is then
+a no-op.  follow() records arrivals through a junction.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+
+HEADER = struct.Struct("<8sHHQI")
+RECORD = struct.Struct("<qqQHBxI")
+MAGIC = b"WQSLEDGR"
+VERSION = 1
+HEADER_BYTES = 32
+NO_SESSION = 0xFFFFFFFF
+
+ARRIVAL = 1
+OPEN = 2
+CLOSE = 3
+
+_TIME = struct.Struct("<q")
+
+# Ledger state
+g = {
+    "directory": None,      # Project dir holding the ledgers, or None when the hook is off
+    "ledgers": {},          # ledger file name -> open Ledger
+}
+
+_lock = threading.Lock()
+
+
+def ledger_filename(target):
+    """Return the file name (without extension) of target's ledger in the project dir."""
+    key = hashlib.sha1(_key(target).encode("utf-8")).hexdigest()[:16]
+    return f"ledger-{key}"
+
+
+def _key(target):
+    return os.path.normcase(os.path.realpath(target))
+
+
+class Ledger:
+    """One target's ledger: appends records and answers time-range queries."""
+
+    def __init__(self, path, target):
+        self.path = path                # Without extension; .bin and .names are added
+        self.target = target
+        self._lock = threading.Lock()
+        self._fd = None                 # O_APPEND descriptors, opened on the first write
+        self._names_fd = None
+        self._size = None               # Size of the .bin file as of our last look
+        self._last_time = 0
+        self._session = None            # Record number of the open session's OPEN
+        self._last_open = NO_SESSION    # Record number of the newest OPEN
+        self._seen = None               # Names recorded in the open session, loaded on demand
+        self._map = None                # (records mmap, names mmap) for reading
+        self._mapped = (0, 0)
+
+    # --- Writing ---
+
+    def open_session(self, junction_path, when=None):
+        """Record that junction_path now points here; returns the session's record number."""
+        with self._lock:
+            self._sync_tail()
+            number = self._append(OPEN, when, -1, junction_path, self._last_open)
+            self._session = self._last_open = number
+            self._seen = set()
+            return number
+
+    def close_session(self, junction_path, when=None):
+        """Record that junction_path no longer points here."""
+        with self._lock:
+            self._sync_tail()
+            if self._session is None:
+                return
+            self._append(CLOSE, when, -1, junction_path, self._session)
+            self._session = None
+            self._seen = None
+
+    def record(self, path, size, when=None, junction_path=None):
+        """Record one arrival (once per session); returns False if it was already recorded.
+
+        Without an open session one is opened first, for junction_path.
+        """
+        name = os.path.basename(path)
+        with self._lock:
+            self._sync_tail()
+            if self._session is None:
+                self._session = self._last_open = self._append(OPEN, when, -1, junction_path or "",
+                                                               self._last_open)
+                self._seen = set()
+            if self._seen is None:
+                self._seen = {(entry["file"], entry["size"]) for entry in self._read_session(self._session)}
+            if (name, size) in self._seen:
+                return False
+            self._append(ARRIVAL, when, size, name, self._session)
+            self._seen.add((name, size))
+            return True
+
+    def session_opened(self):
+        """Return the time (seconds) the open session began, or None."""
+        with self._lock:
+            self._sync_tail()
+            if self._session is None:
+                return None
+            return self._unpack(self._session)["time"]
+
+    def close(self):
+        """Close the files."""
+        with self._lock:
+            for fd in (self._fd, self._names_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._fd = self._names_fd = None
+            self._unmap()
+
+    def _open(self):
+        """Open both files for appending, writing the header of a new ledger."""
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self._names_fd = os.open(f"{self.path}.names", flags, 0o644)
+        self._fd = os.open(f"{self.path}.bin", flags, 0o644)
+        if os.fstat(self._fd).st_size < HEADER_BYTES:
+            self._write_header()
+
+    def _write_header(self):
+        """Start the .bin file over with a header (it is empty, or holds a torn header)."""
+        os.truncate(f"{self.path}.bin", 0)
+        encoded = self.target.encode("utf-8")
+        offset = self._write_name(encoded)
+        os.write(self._fd, HEADER.pack(MAGIC, VERSION, RECORD.size, offset, len(encoded))
+                 .ljust(HEADER_BYTES, b"\0"))
+
+    def _sync_tail(self):
+        """Pick up records appended since our last write (by us or another process)."""
+        if self._fd is None:
+            self._open()
+        size = os.fstat(self._fd).st_size
+        if size == self._size:
+            return
+        if size < HEADER_BYTES:
+            self._write_header()
+            size = HEADER_BYTES
+        torn = (size - HEADER_BYTES) % RECORD.size
+        if torn:
+            os.truncate(f"{self.path}.bin", size - torn)
+            size -= torn
+        self._size = size
+        count = (size - HEADER_BYTES) // RECORD.size
+        if count == 0:
+            self._session, self._last_open, self._seen = None, NO_SESSION, None
+            return
+        with open(f"{self.path}.bin", "rb") as f:
+            f.seek(HEADER_BYTES + (count - 1) * RECORD.size)
+            when, _, _, _, kind, session = RECORD.unpack(f.read(RECORD.size))
+        self._last_time = max(self._last_time, when)
+        if kind == OPEN:
+            session = count - 1
+        if session != self._session:
+            self._seen = None
+        self._session = None if kind == CLOSE else session
+        self._last_open = session
+
+    def _write_name(self, encoded):
+        """Append a name; returns its offset."""
+        os.write(self._names_fd, encoded)
+        return os.lseek(self._names_fd, 0, os.SEEK_CUR) - len(encoded)
+
+    def _append(self, kind, when, size, name, session):
+        """Append one record (lock held); returns its record number."""
+        stamp = int(when * 1e9) if when is not None else time.time_ns()
+        stamp = self._last_time = max(stamp, self._last_time)
+        encoded = name.encode("utf-8")[:0xFFFF]
+        offset = self._write_name(encoded)
+        os.write(self._fd, RECORD.pack(stamp, size, offset, len(encoded), kind, session))
+        end = os.lseek(self._fd, 0, os.SEEK_CUR)
+        self._size = end
+        return (end - HEADER_BYTES) // RECORD.size - 1
+
+    # --- Reading ---
+
+    def __len__(self):
+        """Number of records (arrivals, opens and closes)."""
+        records, _ = self._view()
+        return (len(records) - HEADER_BYTES) // RECORD.size if records else 0
+
+    def between(self, start=None, end=None):
+        """Yield the arrivals from start up to (not including) end, in seconds; None is open-ended."""
+        records, names = self._view()
+        if not records:
+            return
+        first = self._bisect(records, start) if start is not None else 0
+        for number in range(first, self._bisect(records, end)):
+            entry = self._entry(records, names, number)
+            if entry["kind"] == ARRIVAL:
+                yield entry
+
+    def count(self, start=None, end=None):
+        """Return how many records fall between start and end (opens and closes included)."""
+        records, _ = self._view()
+        if not records:
+            return 0
+        return self._bisect(records, end) - (self._bisect(records, start) if start is not None else 0)
+
+    def sessions(self):
+        """Return the sessions, newest first, as {"session", "junction", "opened", "closed"} dicts.
+
+        closed is None for a session that is still open, or that ended without
+        a CLOSE (a crash, or a switch made with the hook off).
+        """
+        records, names = self._view()
+        if not records:
+            return []
+        end = (len(records) - HEADER_BYTES) // RECORD.size
+        last = self._entry(records, names, end - 1)
+        number = end - 1 if last["kind"] == OPEN else last["session"]
+        result = []
+        while number != NO_SESSION:
+            opening = self._entry(records, names, number)
+            # A session's CLOSE, if it has one, is its last record before the next OPEN
+            tail = self._entry(records, names, end - 1)
+            closed = tail["time"] if tail["kind"] == CLOSE and tail["session"] == number else None
+            result.append({"session": number, "junction": opening["file"],
+                           "opened": opening["time"], "closed": closed})
+            end = number
+            number = opening["session"]
+        return result
+
+    def session_arrivals(self, session):
+        """Yield the arrivals recorded under one session (its OPEN's record number)."""
+        yield from self._read_session(session)
+
+    def _read_session(self, session):
+        records, names = self._view()
+        if not records:
+            return
+        count = (len(records) - HEADER_BYTES) // RECORD.size
+        for number in range(session + 1, count):
+            entry = self._entry(records, names, number)
+            if entry["kind"] == OPEN:
+                return
+            if entry["kind"] == ARRIVAL and entry["session"] == session:
+                yield entry
+
+    def _view(self):
+        """Return (records mmap, names mmap), mapping again if the files grew; (None, None) if empty."""
+        try:
+            sizes = (os.path.getsize(f"{self.path}.bin"), os.path.getsize(f"{self.path}.names"))
+        except FileNotFoundError:
+            return None, None
+        whole = sizes[0] - (sizes[0] - HEADER_BYTES) % RECORD.size if sizes[0] >= HEADER_BYTES else 0
+        if whole <= HEADER_BYTES:
+            return None, None
+        if self._map is not None and self._mapped == (whole, sizes[1]):
+            return self._map
+        # The old maps are left to queries still reading them; they close once those finish
+        with open(f"{self.path}.bin", "rb") as f:
+            records = mmap.mmap(f.fileno(), whole, access=mmap.ACCESS_READ)
+        if records[:len(MAGIC)] != MAGIC:
+            records.close()
+            return None, None
+        with open(f"{self.path}.names", "rb") as f:
+            names = mmap.mmap(f.fileno(), sizes[1], access=mmap.ACCESS_READ)
+        self._map = (records, names)
+        self._mapped = (whole, sizes[1])
+        return self._map
+
+    def _unmap(self):
+        if self._map is not None:
+            for view in self._map:
+                view.close()
+            self._map = None
+            self._mapped = (0, 0)
+
+    def _bisect(self, records, when):
+        """Return the first record number whose time is at least when (seconds); None: the end."""
+        count = (len(records) - HEADER_BYTES) // RECORD.size
+        if when is None:
+            return count
+        stamp = int(when * 1e9)
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if _TIME.unpack_from(records, HEADER_BYTES + middle * RECORD.size)[0] < stamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _entry(self, records, names, number):
+        stamp, size, offset, length, kind, session = RECORD.unpack_from(
+            records, HEADER_BYTES + number * RECORD.size)
+        return {"time": stamp / 1e9, "file": bytes(names[offset:offset + length]).decode("utf-8", "replace"),
+                "size": size, "kind": kind, "session": session}
+
+    def _unpack(self, number):
+        records, names = self._view()
+        return self._entry(records, names, number)
+
+
+# --- Switch hook ---
+
+def enable(directory):
+    """Start recording switches in ledgers kept in directory."""
+    disable()
+    g["directory"] = directory
+
+
+def disable():
+    """Stop recording switches and close the ledgers."""
+    with _lock:
+        g["directory"] = None
+        ledgers, g["ledgers"] = g["ledgers"], {}
+    for ledger in ledgers.values():
+        ledger.close()
+
+
+def ledger_for(target, directory=None):
+    """Return the Ledger of target in directory (default: the enabled one), or None."""
+    directory = directory or g["directory"]
+    if directory is None:
+        return None
+    name = ledger_filename(target)
+    with _lock:
+        ledger = g["ledgers"].get(name)
+        if ledger is None:
+            ledger = g["ledgers"][name] = Ledger(os.path.join(directory, name), target)
+        return ledger
+
+
+def note_switch(junction_path, old_target, new_target):
+    """Close the session in old_target's ledger and open one in new_target's, if the hook is on."""
+    if g["directory"] is None:
+        return
+    try:
+        if old_target:
+            ledger_for(old_target).close_session(junction_path)
+        if new_target:
+            ledger_for(new_target).open_session(junction_path)
+    except OSError:
+        pass    # The switch itself went through; a ledger that cannot be written is not worth failing it
+
+
+def follow(junction_path, directory=None, on_arrival=None, **kwargs):
+    """Start a Router that records each file arriving through the junction; returns it.
+
+    Files already in a target before its session opened are not recorded.
+    on_arrival is called with each recorded entry.  kwargs go to router.Router.
+    """
+    from win_quick_shuttle import router
+    started = time.time()
+
+    def arrived(path, size):
+        target = os.path.dirname(path)
+        ledger = ledger_for(target, directory)
+        if ledger is None:
+            return
+        opened = ledger.session_opened()
+        if opened is None:
+            # No switch opened one (the hook was off): the session starts with the follow
+            ledger.open_session(junction_path, when=started)
+            opened = ledger.session_opened()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if max(st.st_mtime, st.st_ctime) < opened:
+            return
+        if ledger.record(path, size, junction_path=junction_path) and on_arrival:
+            on_arrival({"target": target, "file": os.path.basename(path), "size": size, "time": time.time()})
+
+    return router.Router(junction_path, router.compile_rules([]), on_arrival=arrived, **kwargs).start()
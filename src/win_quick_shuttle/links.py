@@ -0,0 +1,264 @@
+"""Link backends for win-quick-shuttle.
+
+A backend knows how to create, remove, read and probe the directory link that
+programs write through.  probe() answers "what is at this path?" with one
+lstat() plus, for links only, one readlink(), packed into a Probe record.  Everything happens in-process -- no shell, no
+`mklink`, no quoting problems.  Targets are reported as plain paths, without
+the extended-length prefix Windows puts on junction targets (clean_target).
+
+    JunctionBackend  -- NTFS directory junctions (Windows)
+    SymlinkBackend   -- POSIX directory symlinks (Linux, macOS)
+
+Redirecting an existing link goes through replace(), which builds the new
+link under a temporary sibling name and then renames it over the live path,
+so readers never observe a missing path (POSIX) or only for the instant
+between two renames (Windows, where a directory cannot be renamed over).
+
+Backends also answer the few plain directory questions the switch logic
+asks -- exists(), isdir(), makedirs() -- and name the lock file that
+serializes switches across processes (lock_path()), so that a stand-in such as
+memfs.MemoryBackend can replace the whole filesystem, not just the links.
+
+The backend for the running platform is selected on first use; tests and
+embedders may install their own with set_backend().
+"""
+
+import itertools
+import os
+import stat
+
+
+# Probe kinds
+KIND_MISSING = "missing"
+KIND_DIR = "dir"
+KIND_LINK = "link"
+KIND_JUNCTION = "junction"
+KIND_OTHER = "other"
+
+IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003
+
+# How Windows reports junction targets: \\?\D:\proj, \\?\UNC\server\share\proj
+EXTENDED_PREFIX = "\\\\?\\"
+EXTENDED_UNC_PREFIX = "\\\\?\\UNC\\"
+
+
+# Backend selection
+g = {
+    "backend": None,
+}
+
+_temp_counter = itertools.count()
+
+
+def temp_sibling(path, tag="new"):
+    """Return an unused-looking hidden sibling name for path."""
+    path = os.path.normpath(path)
+    parent, name = os.path.split(path)
+    return os.path.join(parent, f".{name}.wqs-{tag}-{os.getpid()}-{next(_temp_counter)}")
+
+
+def clean_target(target):
+    """Turn a link target as Windows reports it into the plain path it names.
+
+    readlink() on a junction returns the extended-length form (EXTENDED_PREFIX
+    or EXTENDED_UNC_PREFIX); everything else compares the plain form.
+    """
+    if target[:8].upper() == EXTENDED_UNC_PREFIX:
+        return "\\\\" + target[8:]
+    if target.startswith(EXTENDED_PREFIX):
+        return target[4:]
+    return target
+
+
+def _kind_from_stat(st):
+    """Classify an lstat() result into one of the KIND_* constants."""
+    if getattr(st, "st_reparse_tag", 0) == IO_REPARSE_TAG_MOUNT_POINT:
+        return KIND_JUNCTION
+    if stat.S_ISLNK(st.st_mode):
+        return KIND_LINK
+    if stat.S_ISDIR(st.st_mode):
+        return KIND_DIR
+    return KIND_OTHER
+
+
+def entry_kind(entry):
+    """Classify an os.scandir() entry with at most one (cached) stat.
+
+    POSIX answers from the directory listing alone; Windows needs the
+    reparse tag, which scandir's stat() has already fetched.
+    """
+    if entry.is_symlink():
+        return KIND_LINK
+    if not entry.is_dir(follow_symlinks=False):
+        return KIND_OTHER
+    if os.name == "nt":
+        return _kind_from_stat(entry.stat(follow_symlinks=False))
+    return KIND_DIR
+
+
+class Probe:
+    """What a single probe found at a path."""
+
+    __slots__ = ("path", "kind", "target", "mtime")
+
+    def __init__(self, path, kind, target=None, mtime=None):
+        self.path = path
+        self.kind = kind        # One of the KIND_* constants
+        self.target = target    # Link target, or None (not a link, or unreadable)
+        self.mtime = mtime      # lstat() st_mtime, or None when missing
+
+    @property
+    def exists(self):
+        return self.kind != KIND_MISSING
+
+    @property
+    def is_link(self):
+        return self.kind in (KIND_LINK, KIND_JUNCTION)
+
+    def __eq__(self, other):
+        if not isinstance(other, Probe):
+            return NotImplemented
+        return (self.path, self.kind, self.target, self.mtime) == \
+            (other.path, other.kind, other.target, other.mtime)
+
+    def __repr__(self):
+        return f"Probe({self.path!r}, {self.kind!r}, target={self.target!r}, mtime={self.mtime!r})"
+
+
+def _probe(path, read_target):
+    """One lstat(), plus one readlink() if the path is a link and read_target is set."""
+    try:
+        st = os.lstat(path)
+    except (OSError, ValueError):
+        return Probe(path, KIND_MISSING)
+    kind = _kind_from_stat(st)
+    target = None
+    if read_target and kind in (KIND_LINK, KIND_JUNCTION):
+        try:
+            target = clean_target(os.readlink(path))
+        except OSError:
+            target = None
+    return Probe(path, kind, target, st.st_mtime)
+
+
+class _OsBackend:
+    """Directory questions answered by the real filesystem."""
+
+    def exists(self, path):
+        """True if path exists (following links)."""
+        return os.path.exists(path)
+
+    def isdir(self, path):
+        """True if path is a directory (following links)."""
+        return os.path.isdir(path)
+
+    def makedirs(self, path):
+        """Create path and any missing parents; raises FileExistsError if it exists."""
+        os.makedirs(path)
+
+    def probe(self, path, read_target=True):
+        """Return a Probe describing path."""
+        return _probe(path, read_target)
+
+    def lock_path(self, link_path):
+        """Return the path of link_path's cross-process switch lock file."""
+        parent, name = os.path.split(os.path.normpath(os.path.abspath(link_path)))
+        return os.path.join(parent, f".{name}.wqs-lock")
+
+
+class JunctionBackend(_OsBackend):
+    """NTFS directory junctions, created with the same API CPython's own tests use."""
+
+    name = "junction"
+
+    def create(self, link_path, target_path):
+        """Create a junction at link_path pointing to target_path."""
+        import _winapi
+        _winapi.CreateJunction(os.path.abspath(target_path), link_path)
+
+    def remove(self, link_path):
+        """Remove the junction itself; the target is left untouched."""
+        os.rmdir(link_path)
+
+    def replace(self, link_path, target_path):
+        """Repoint the junction at link_path, keeping the old one if anything fails."""
+        staged = temp_sibling(link_path)
+        self.create(staged, target_path)
+        if not _probe(link_path, False).exists:
+            try:
+                os.rename(staged, link_path)
+            except OSError:
+                os.rmdir(staged)
+                raise
+            return
+        retired = temp_sibling(link_path, "old")
+        try:
+            os.rename(link_path, retired)
+        except OSError:
+            os.rmdir(staged)
+            raise
+        try:
+            os.rename(staged, link_path)
+        except OSError:
+            os.rename(retired, link_path)
+            os.rmdir(staged)
+            raise
+        os.rmdir(retired)
+
+    def read(self, link_path):
+        """Return the junction's target, without the extended-length prefix."""
+        return clean_target(os.readlink(link_path))
+
+
+class SymlinkBackend(_OsBackend):
+    """POSIX directory symlinks."""
+
+    name = "symlink"
+
+    def create(self, link_path, target_path):
+        """Create a symlink at link_path pointing to target_path."""
+        os.symlink(os.path.abspath(target_path), link_path, target_is_directory=True)
+
+    def remove(self, link_path):
+        """Remove the symlink itself; the target is left untouched."""
+        os.unlink(link_path)
+
+    def replace(self, link_path, target_path):
+        """Atomically repoint the symlink at link_path (symlink + os.replace)."""
+        staged = temp_sibling(link_path)
+        self.create(staged, target_path)
+        try:
+            os.replace(staged, link_path)
+        except OSError:
+            os.unlink(staged)
+            raise
+
+    def read(self, link_path):
+        """Return the symlink's target."""
+        return os.readlink(link_path)
+
+
+def probe(path, read_target=True):
+    """Probe path with the active backend."""
+    return get_backend().probe(path, read_target)
+
+
+def default_backend():
+    """Return a fresh backend suited to the running platform."""
+    if os.name == "nt":
+        return JunctionBackend()
+    return SymlinkBackend()
+
+
+def get_backend():
+    """Return the active backend, selecting one on first use."""
+    if g["backend"] is None:
+        g["backend"] = default_backend()
+    return g["backend"]
+
+
+def set_backend(backend):
+    """Install a backend (None restores automatic selection).  Returns the old one."""
+    old = g["backend"]
+    g["backend"] = backend
+    return old
@@ -0,0 +1,173 @@
+"""Per-junction switch locks that hold across processes.
+
+The GUI, scripts, the daemon and scheduled tasks may all switch the same
+junction at once.  Interleaved remove-then-create sequences can leave no
+link at all, so every change to a junction happens under a SwitchLock:
+
+    with SwitchLock(junction_path):
+        ...probe, validate, switch...
+
+A SwitchLock is two locks: a threading.Lock shared by every thread of this
+process (so threads queue without touching the disk), and an OS lock on a file
+next to the junction, `.<name>.wqs-lock` -- fcntl.flock() on POSIX,
+msvcrt.locking() on Windows.  The operating system releases that lock when
+its holder exits, however it exits, so a crashed holder never leaves the
+junction locked and there is no stale lock to detect or break.  The file
+itself stays; while the lock is held it names the holder,
+{"pid", "host", "time", "token"}, for the busy message.
+
+Only writers lock.  Probes and status reads never look at the lock file, so
+they never wait on a writer.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from win_quick_shuttle import links
+
+
+DEFAULT_TIMEOUT = 10.0
+POLL_SECONDS = 0.001
+MAX_POLL_SECONDS = 0.05
+# Windows locks byte ranges and refuses reads of locked bytes, so it locks one
+# byte far past the holder record, which stays readable
+LOCK_OFFSET = 1 << 30
+
+_local = {}                 # normcase(abspath) -> threading.Lock
+_local_guard = threading.Lock()
+
+
+def _local_lock(junction_path):
+    """Return this process's lock for junction_path."""
+    key = os.path.normcase(os.path.abspath(junction_path))
+    with _local_guard:
+        lock = _local.get(key)
+        if lock is None:
+            lock = _local[key] = threading.Lock()
+        return lock
+
+
+def _host():
+    """Return this machine's name, as recorded in lock files."""
+    import socket
+    return socket.gethostname()
+
+
+def _try_lock(fd):
+    """Take the OS lock on fd if it is free; True if it was taken."""
+    if os.name == "nt":
+        import msvcrt
+        os.lseek(fd, LOCK_OFFSET, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+    import fcntl
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock(fd):
+    """Release the OS lock _try_lock took on fd."""
+    if os.name == "nt":
+        import msvcrt
+        os.lseek(fd, LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def read_holder(lock_path):
+    """Return the holder a lock file names: None if it names none, {} if it is unreadable.
+
+    The record is only a description.  One left behind by a holder that
+    crashed does not hold the lock.
+    """
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        return {}
+    if not text:
+        return None             # Released, or never taken
+    try:
+        return json.loads(text)
+    except ValueError:
+        return {}               # Half-written by a holder that is still starting
+
+
+class SwitchLock:
+    """Serialize changes to one junction across threads and processes."""
+
+    def __init__(self, junction_path, timeout=None, cross_process=True):
+        self.junction_path = junction_path
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        # None: in-process only
+        self.lock_path = links.get_backend().lock_path(junction_path) if cross_process else None
+        self.token = uuid.uuid4().hex
+        self._local = _local_lock(junction_path)
+        self._fd = None             # Open lock file while the OS lock is held
+
+    def acquire(self):
+        """Take the lock, or raise TimeoutError naming the holder."""
+        deadline = time.monotonic() + self.timeout
+        if not self._local.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Junction is busy in this process: {self.junction_path}")
+        try:
+            if self.lock_path is not None:
+                self._acquire_file(deadline)
+        except BaseException:
+            self._local.release()
+            raise
+
+    def _acquire_file(self, deadline):
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        except FileNotFoundError:
+            return                      # No parent folder: nothing there to switch or race on
+        try:
+            delay = POLL_SECONDS
+            while not _try_lock(fd):
+                if time.monotonic() >= deadline:
+                    pid = (read_holder(self.lock_path) or {}).get("pid", "?")
+                    raise TimeoutError(f"Junction is busy: locked by process {pid} ({self.lock_path})")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_POLL_SECONDS)
+            record = json.dumps({"pid": os.getpid(), "host": _host(), "time": time.time(), "token": self.token})
+            os.ftruncate(fd, 0)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, record.encode("utf-8"))
+        except BaseException:
+            os.close(fd)                # Also drops the OS lock, if it was taken
+            raise
+        self._fd = fd
+
+    def release(self):
+        """Give the lock up."""
+        try:
+            if self._fd is not None:
+                fd, self._fd = self._fd, None
+                try:
+                    os.ftruncate(fd, 0)
+                    _unlock(fd)
+                finally:
+                    os.close(fd)
+        finally:
+            self._local.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
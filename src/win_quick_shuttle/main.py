@@ -1,15 +1,39 @@
-"""Main application module for win-quick-shuttle."""
+"""Main application module for win-quick-shuttle.
+
+Each junction is managed by a Session: one panel of widgets, that panel's
+state and its event handlers.  Any number of sessions can be stacked in the
+window under one Tk root.  They share one watch timer, one thread watching
+all their junctions, one background worker pool (each session's jobs still
+run in order), the target history, the autocomplete crawler and the
+disk-usage cache.
+"""
 
 import os
-import subprocess
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog
-import ctypes
+
+from win_quick_shuttle import crawler, history, ledger, links, locks, migrate, usage, watcher, worker
+from win_quick_shuttle.tracing import traced
+from win_quick_shuttle.junctions import (
+    probe,
+    check_point_to,
+    switch_junction,
+    check_unlink,
+    drop_junction,
+    resolve_junction,
+)
 
 
-# Glanceable state
+# Glanceable state shared by every session
 g = {
-    "last_junction_path": None,
+    "sessions": [],         # Open Sessions, in the order their panels are stacked
+    "history": None,        # TargetHistory of targets pointed at
+    "crawler": None,        # Crawler indexing the project roots for autocomplete
+    "usage_cache": None,    # UsageCache shared by the disk-usage scanners
+    "watchers": None,       # WatchGroup watching every session's junction from one thread
 }
 
 # Application state
@@ -18,54 +42,38 @@ app = {
     "toplevel": None,              # Main window
     "initial_junction_path": None, # Set before entry() if desired
     "initial_target_path": None,   # Set before entry() if desired
+    "junction_paths": [],          # One panel per path; empty: one panel for initial_junction_path
+    "atomic_switch": True,         # Swap links in one step instead of remove-then-create
+    "watch_after_id": None,        # Pending after() id of the watch timer
+    "history_path": None,          # Target history store; None keeps it in memory
+    "crawl_roots": [],             # Project roots offered as target autocomplete
+    "crawl_index_path": None,      # Saved crawl; None crawls from scratch every time
+    "migrate_journal_path": None,  # Journal of cross-volume moves; None keeps none
+    "usage_cache_path": None,      # Saved per-directory sizes; None measures from scratch every time
 }
 
-# Widget references
-widgets = {}
+# Buttons disabled while an operation is in flight
+ACTION_BUTTONS = ("create_folder_btn", "point_to_btn", "unlink_btn")
 
+# How often the Tk thread collects changes reported by the watchers
+WATCH_POLL_MS = 200
 
-# --- Junction helpers (pure functions) ---
+# Worker threads shared by all sessions
+WORKERS = 4
 
-def is_junction(path):
-    """Check if a path is a directory junction."""
-    if not os.path.exists(path):
-        return False
-    try:
-        attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
-        return attrs != -1 and (attrs & 0x400) != 0
-    except Exception:
-        return False
+# Work per palette keystroke; a sparse search finishes in later slices
+PALETTE_BUDGET = 0.0005
+PALETTE_CONTINUE_MS = 1
 
+# Label showing each disk-usage slot
+USAGE_LABELS = {"current": "current_usage_label", "target": "target_usage_label"}
 
-def get_junction_target(path):
-    """Get the target of a directory junction."""
-    try:
-        return os.readlink(path)
-    except OSError:
-        return None
-
-
-def remove_junction(junction_path):
-    """Remove a directory junction using rmdir."""
-    cmd = f'rmdir "{junction_path}"'
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.returncode == 0, result.stderr.strip()
-
-
-def create_junction(junction_path, target_path):
-    """Create a directory junction using mklink /J."""
-    cmd = f'mklink /J "{junction_path}" "{target_path}"'
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.returncode == 0, result.stdout.strip() or result.stderr.strip()
+# How long the Target Path must stay unchanged before its folder is measured
+USAGE_SETTLE_SECONDS = 0.5
 
 
 # --- Internal helpers ---
 
-def _get_junction_path():
-    """Get the current junction path from the entry field."""
-    return widgets["junction_entry"].get().strip()
-
-
 def _open_in_explorer(path):
     """Open a path in Windows Explorer."""
     if not path:
@@ -81,298 +89,794 @@ def _open_in_explorer(path):
     return False
 
 
-def _set_status(message, is_error=False):
-    """Update the status label."""
-    color = "red" if is_error else "green"
-    widgets["status_label"].config(text=message, fg=color)
-
-
-def _refresh_state():
-    """Update the current state display and sync target entry if junction changed."""
-    junction_path = _get_junction_path()
-    new_target = None
-
-    if not junction_path:
-        widgets["current_target_label"].config(text="Enter a junction path above")
-    elif not os.path.exists(junction_path):
-        widgets["current_target_label"].config(text="No junction present")
-    elif is_junction(junction_path):
-        target = get_junction_target(junction_path)
-        if target:
-            widgets["current_target_label"].config(text=target)
-            new_target = target
-        else:
-            widgets["current_target_label"].config(text="Junction exists but target unreadable")
-    else:
-        widgets["current_target_label"].config(text="Path exists but is not a junction")
-
-    if new_target and junction_path != g["last_junction_path"]:
-        widgets["target_entry"].delete(0, tk.END)
-        widgets["target_entry"].insert(0, new_target)
-
-    g["last_junction_path"] = junction_path
+def _describe_chain(target, resolved, chain, problems):
+    """Return 'target  →  hop  →  final' for the Currently Points To label."""
+    hops = [target] + [hop for hop in chain if hop != os.path.normpath(target)]
+    end = resolved or ("(link loop)" if "cycle" in problems else "(missing)")
+    if end != os.path.normpath(target):
+        hops.append(end)
+    return "  →  ".join(hops)
 
 
-# --- Event handlers ---
+def _focused_session():
+    """Return the session whose panel has the keyboard focus (else the first one)."""
+    focus = app["toplevel"].focus_get() if app["toplevel"] else None
+    for session in g["sessions"]:
+        if focus is not None and (str(focus) + ".").startswith(str(session.frame) + "."):
+            return session
+    return g["sessions"][0] if g["sessions"] else None
 
-def handle_when_user_clicks_select_junction():
-    """Open folder dialog to select junction path."""
-    current = _get_junction_path()
-    initial_dir = os.path.dirname(current) if current else None
 
-    path = filedialog.askdirectory(
-        title="Select Junction Location",
-        initialdir=initial_dir
-    )
-    if path:
-        widgets["junction_entry"].delete(0, tk.END)
-        widgets["junction_entry"].insert(0, path)
-        _refresh_state()
-
-
-def handle_when_user_clicks_explore_junction():
-    """Open Windows Explorer at the junction path."""
-    path = _get_junction_path()
-    if not path:
-        _set_status("No junction path specified", is_error=True)
-        return
-    if not _open_in_explorer(path):
-        _set_status("Path does not exist", is_error=True)
-
-
-def handle_when_user_clicks_select_target():
-    """Open folder dialog to select target path."""
-    current = widgets["target_entry"].get().strip()
-    initial_dir = current if current and os.path.isdir(current) else None
-
-    path = filedialog.askdirectory(
-        title="Select Target Folder",
-        initialdir=initial_dir
-    )
-    if path:
-        widgets["target_entry"].delete(0, tk.END)
-        widgets["target_entry"].insert(0, path)
-
-
-def handle_when_user_clicks_explore_target():
-    """Open Windows Explorer at the target path."""
-    path = widgets["target_entry"].get().strip()
-    if not path:
-        _set_status("No target path specified", is_error=True)
-        return
-    if not _open_in_explorer(path):
-        _set_status("Path does not exist", is_error=True)
-
-
-def handle_when_user_clicks_create_folder():
-    """Create the target folder if it doesn't exist."""
-    target_path = widgets["target_entry"].get().strip()
-
-    if not target_path:
-        _set_status("Please enter a target path", is_error=True)
-        return
-
-    if os.path.exists(target_path):
-        _set_status("Folder already exists", is_error=False)
-        return
+# --- Background work (runs on the worker thread; never touches widgets) ---
 
+@traced("_work_create_folder")
+def _work_create_folder(target_path):
+    """Create target_path unless it exists.  Returns (success, message)."""
+    backend = links.get_backend()
+    if backend.exists(target_path):
+        return True, "Folder already exists"
     try:
-        os.makedirs(target_path)
-        _set_status(f"Created: {target_path}", is_error=False)
+        backend.makedirs(target_path)
     except OSError as e:
-        _set_status(f"Failed to create folder: {e}", is_error=True)
-
-
-def handle_when_user_clicks_point_to():
-    """Point the junction to the target path."""
-    junction_path = _get_junction_path()
-    target_path = widgets["target_entry"].get().strip()
+        return False, f"Failed to create folder: {e}"
+    return True, f"Created: {target_path}"
 
-    if not junction_path:
-        _set_status("Please enter a junction path", is_error=True)
-        return
 
-    if not target_path:
-        _set_status("Please enter a target path", is_error=True)
-        return
+@traced("_work_point_to")
+def _work_point_to(junction_path, target_path, atomic, move_files=False, progress=None):
+    """Validate and switch the junction, optionally moving the old target's files along.
 
-    if not os.path.exists(target_path):
-        _set_status("Target path does not exist", is_error=True)
-        return
-
-    if not os.path.isdir(target_path):
-        _set_status("Target path is not a directory", is_error=True)
-        return
+    progress is called with migrate's progress dicts.  Returns (success, message, state).
+    """
+    try:
+        with locks.SwitchLock(junction_path):
+            state = probe(junction_path)
+            error = check_point_to(target_path, state)
+            if error:
+                return False, error, state
+            success, message = switch_junction(junction_path, target_path, state, atomic)
+    except OSError as e:
+        return False, str(e), probe(junction_path)
+    if success and g["history"] is not None:
+        g["history"].record(target_path)
+    if success and move_files and state.is_link and state.target:
+        success, moved = migrate.migrate(state.target, target_path, app["migrate_journal_path"],
+                                         progress=progress)
+        message = f"{message}; {moved}"
+    return success, message, probe(junction_path)
+
+
+@traced("_work_unlink")
+def _work_unlink(junction_path):
+    """Validate and remove the junction.  Returns (success, message, state)."""
+    try:
+        with locks.SwitchLock(junction_path):
+            state = probe(junction_path)
+            error = check_unlink(state)
+            if error:
+                return False, error, state
+            success, message = drop_junction(junction_path, state)
+    except OSError as e:
+        return False, str(e), probe(junction_path)
+    return success, message, probe(junction_path)
+
+
+# --- Sessions ---
+
+class Session:
+    """One junction's panel: its widgets, its state and its event handlers."""
+
+    def __init__(self, parent, junction_path=None, target_path=None):
+        self.parent = parent
+        self.initial_junction_path = junction_path
+        self.initial_target_path = target_path
+        self.frame = None
+        self.widgets = {}
+        self.g = {
+            "last_junction_path": None,
+            "generation": 0,        # Bumped on every refresh; stale probe results are dropped
+            "busy": False,          # A junction/folder operation is in flight
+            "watcher": None,        # Handle in g["watchers"] for the junction being shown
+            "recorder": None,       # Router recording arrivals in the ledger (when the ledger is on)
+            "migrate_progress": None,   # Latest progress dict of a running migrate (set by the worker)
+            "usage_scans": {},      # "current"/"target" -> Scanner measuring that section's folder
+            "typed_target": None,   # Target Path text as of the last tick
+            "typed_since": 0.0,     # When it last changed (monotonic)
+            "typed_checked": True,  # Its folder has been looked up since it settled
+            "palette_after_id": None,   # Pending after() id of an unfinished palette search
+        }
+        self.watch_events = queue.Queue()   # Probes pushed by the watcher thread
+        self.usage_events = queue.Queue()   # (slot, scanner, report) pushed by disk-usage scanners
+
+    def open(self, row):
+        """Build the panel at row of the parent and show the junction's state."""
+        self._build_ui(row)
+        self._refresh_state()
+        return self
+
+    def close(self):
+        """Stop the panel's background work and destroy its widgets."""
+        self._watch_junction(None)
+        for scanner in self.g["usage_scans"].values():
+            scanner.cancel()
+        self.g["usage_scans"].clear()
+        self._close_palette()
+        if self.frame is not None:
+            self.frame.destroy()
+            self.frame = None
+        self.widgets.clear()
+
+    def _submit(self, fn, args, on_done):
+        """Run fn on the shared worker, after this session's earlier jobs.
+
+        If fn raises, handle_when_job_fails gets the exception instead of on_done.
+        """
+        worker.submit(fn, args, on_done, lane=self, on_error=self.handle_when_job_fails)
+
+    # --- Internal helpers ---
+
+    def _get_junction_path(self):
+        """Get the current junction path from the entry field."""
+        return self.widgets["junction_entry"].get().strip()
+
+    def _search_palette(self):
+        """Show the palette's matches so far; schedule more work if the search is unfinished."""
+        if self.g["palette_after_id"]:
+            self.parent.after_cancel(self.g["palette_after_id"])
+            self.g["palette_after_id"] = None
+
+        listbox = self.widgets["palette_list"]
+        target_history = g["history"]
+        if not target_history.loaded:
+            listbox.delete(0, tk.END)
+            listbox.insert(tk.END, "Loading history...")
+            self.g["palette_after_id"] = self.parent.after(50, self.handle_when_palette_search_continues)
+            return
 
-    if os.path.exists(junction_path):
-        if is_junction(junction_path):
-            success, error = remove_junction(junction_path)
-            if not success:
-                _set_status(f"Failed to remove junction: {error}", is_error=True)
-                return
+        paths, done = target_history.search_step(self.widgets["palette_entry"].get(), budget=PALETTE_BUDGET)
+        listbox.delete(0, tk.END)
+        for path in paths:
+            listbox.insert(tk.END, path)
+        if paths:
+            listbox.selection_set(0)
+        if not done:
+            self.g["palette_after_id"] = self.parent.after(
+                PALETTE_CONTINUE_MS, self.handle_when_palette_search_continues)
+
+    def _move_palette_selection(self, delta):
+        """Move the palette selection up or down."""
+        listbox = self.widgets["palette_list"]
+        if listbox.size() == 0:
+            return "break"
+        selection = listbox.curselection()
+        index = (selection[0] if selection else -1) + delta
+        index = max(0, min(index, listbox.size() - 1))
+        listbox.selection_clear(0, tk.END)
+        listbox.selection_set(index)
+        listbox.see(index)
+        return "break"
+
+    def _close_palette(self):
+        """Close the palette if it is open."""
+        if self.g["palette_after_id"]:
+            self.parent.after_cancel(self.g["palette_after_id"])
+            self.g["palette_after_id"] = None
+        palette = self.widgets.pop("palette", None)
+        self.widgets.pop("palette_entry", None)
+        self.widgets.pop("palette_list", None)
+        if palette:
+            palette.destroy()
+
+    def _show_suggestions(self, suggestions):
+        """Show autocomplete suggestions under the target entry (hide when empty)."""
+        listbox = self.widgets["target_suggestions"]
+        listbox.delete(0, tk.END)
+        for path in suggestions:
+            listbox.insert(tk.END, path)
+        if suggestions:
+            listbox.config(height=len(suggestions))
+            listbox.grid()
+        else:
+            listbox.grid_remove()
+
+    def _accept_suggestion(self, path):
+        """Put path in the target entry and hide the suggestions."""
+        self.widgets["target_entry"].delete(0, tk.END)
+        self.widgets["target_entry"].insert(0, path)
+        self.widgets["target_entry"].icursor(tk.END)
+        self._show_suggestions([])
+
+    def _set_status(self, message, is_error=False):
+        """Update the status label."""
+        color = "red" if is_error else "green"
+        self.widgets["status_label"].config(text=message, fg=color)
+
+    def _begin_operation(self, message):
+        """Disable the action buttons and show progress."""
+        self.g["busy"] = True
+        for name in ACTION_BUTTONS:
+            self.widgets[name].config(state=tk.DISABLED)
+        self.widgets["status_label"].config(text=message, fg="gray")
+
+    def _end_operation(self):
+        """Re-enable the action buttons."""
+        self.g["busy"] = False
+        for name in ACTION_BUTTONS:
+            self.widgets[name].config(state=tk.NORMAL)
+
+    def _show_state(self, junction_path, state):
+        """Display a probe result and sync target entry if junction changed."""
+        new_target = None
+
+        if not state.exists:
+            self.widgets["current_target_label"].config(text="No junction present")
+        elif state.is_link:
+            if state.target:
+                self.widgets["current_target_label"].config(text=state.target)
+                new_target = state.target
+                generation = self.g["generation"]
+                self._submit(resolve_junction, (state.path,),
+                             lambda result: self.handle_when_resolution_finishes(generation, state.target, result))
+            else:
+                self.widgets["current_target_label"].config(text="Junction exists but target unreadable")
         else:
-            _set_status("Junction path exists but is not a junction", is_error=True)
+            self.widgets["current_target_label"].config(text="Path exists but is not a junction")
+        if not new_target:
+            self._measure_usage("current", None)
+
+        if new_target and junction_path != self.g["last_junction_path"]:
+            self.widgets["target_entry"].delete(0, tk.END)
+            self.widgets["target_entry"].insert(0, new_target)
+
+        self.g["last_junction_path"] = junction_path
+
+    @traced("_refresh_state")
+    def _refresh_state(self, state=None):
+        """Update the current state display and sync target entry if junction changed.
+
+        Pass the Probe already taken for this user action as state to show it
+        directly; otherwise the junction is probed on the worker.
+        """
+        self.g["generation"] += 1
+        junction_path = self._get_junction_path()
+        self._watch_junction(junction_path)
+
+        if not junction_path:
+            self.widgets["current_target_label"].config(text="Enter a junction path above")
+            self.g["last_junction_path"] = junction_path
             return
 
-    success, output = create_junction(junction_path, target_path)
-    if success:
-        _set_status("Junction created successfully", is_error=False)
-    else:
-        _set_status(f"Failed to create junction: {output}", is_error=True)
-
-    _refresh_state()
-
-
-def handle_when_user_clicks_unlink():
-    """Remove the junction without creating a new one."""
-    junction_path = _get_junction_path()
-
-    if not junction_path:
-        _set_status("Please enter a junction path", is_error=True)
-        return
-
-    if not os.path.exists(junction_path):
-        _set_status("No junction exists at that path", is_error=True)
-        return
-
-    if not is_junction(junction_path):
-        _set_status("Path exists but is not a junction", is_error=True)
-        return
-
-    success, error = remove_junction(junction_path)
-    if success:
-        _set_status("Junction removed", is_error=False)
-    else:
-        _set_status(f"Failed to remove junction: {error}", is_error=True)
-
-    _refresh_state()
-
-
-def handle_when_junction_entry_loses_focus(event):
-    """Refresh state when junction entry loses focus."""
-    _refresh_state()
-
-
-def handle_when_junction_entry_return_pressed(event):
-    """Refresh state when Return pressed in junction entry."""
-    _refresh_state()
-
-
-# --- UI construction ---
-
-def _build_ui():
-    """Construct all widgets in the toplevel window."""
-    toplevel = app["toplevel"]
-    toplevel.title("win-quick-shuttle")
-    toplevel.resizable(False, False)
-
-    # Section 0: Junction Path
-    frame_junction = tk.LabelFrame(toplevel, text="Junction Path", padx=10, pady=5)
-    frame_junction.grid(row=0, column=0, padx=10, pady=5, sticky="ew")
-
-    widgets["junction_entry"] = tk.Entry(frame_junction, width=55)
-    widgets["junction_entry"].grid(row=0, column=0, sticky="ew")
-    if app["initial_junction_path"]:
-        widgets["junction_entry"].insert(0, app["initial_junction_path"])
-    widgets["junction_entry"].bind("<FocusOut>", handle_when_junction_entry_loses_focus)
-    widgets["junction_entry"].bind("<Return>", handle_when_junction_entry_return_pressed)
-
-    widgets["junction_select_btn"] = tk.Button(
-        frame_junction, text="Select",
-        command=handle_when_user_clicks_select_junction
-    )
-    widgets["junction_select_btn"].grid(row=0, column=1, padx=(5, 0))
-
-    widgets["junction_explore_btn"] = tk.Button(
-        frame_junction, text="Explore",
-        command=handle_when_user_clicks_explore_junction
-    )
-    widgets["junction_explore_btn"].grid(row=0, column=2, padx=(2, 0))
-
-    # Section 1: Currently Points To
-    frame_current = tk.LabelFrame(toplevel, text="Currently Points To", padx=10, pady=5)
-    frame_current.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
-
-    widgets["current_target_label"] = tk.Label(frame_current, text="", anchor="w")
-    widgets["current_target_label"].grid(row=0, column=0, sticky="ew")
-    frame_current.columnconfigure(0, weight=1)
+        if state is not None and state.path == junction_path:
+            self._show_state(junction_path, state)
+            return
 
-    # Section 2: Target Path
-    frame_target = tk.LabelFrame(toplevel, text="Target Path", padx=10, pady=5)
-    frame_target.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+        generation = self.g["generation"]
+        self._submit(probe, (junction_path,),
+                     lambda result: self.handle_when_probe_finishes(generation, result))
 
-    widgets["target_entry"] = tk.Entry(frame_target, width=55)
-    widgets["target_entry"].grid(row=0, column=0, sticky="ew")
-    if app["initial_target_path"]:
-        widgets["target_entry"].insert(0, app["initial_target_path"])
+    def _watch_junction(self, junction_path):
+        """Point the watcher and arrival recorder at junction_path (or stop them when there is none)."""
+        current = self.g["watcher"]
+        if current and junction_path and current.path == os.path.normpath(junction_path):
+            return
+        if current:
+            g["watchers"].remove(current)
+            self.g["watcher"] = None
+        if self.g["recorder"]:
+            # Its thread may be mid-scan of a slow target: join it off the Tk thread
+            threading.Thread(target=self.g["recorder"].stop, name="wqs-recorder-stop", daemon=True).start()
+            self.g["recorder"] = None
+        while not self.watch_events.empty():
+            self.watch_events.get_nowait()
+        if junction_path:
+            self.g["watcher"] = g["watchers"].add(junction_path, self.watch_events.put)
+            if ledger.g["directory"] is not None:
+                self.g["recorder"] = ledger.follow(junction_path)
+
+    def _measure_usage(self, slot, path):
+        """Start measuring path for a disk-usage slot, replacing any scan of another folder."""
+        current = self.g["usage_scans"].get(slot)
+        if current and path and current.root == os.path.normpath(os.path.abspath(path)):
+            return
+        if current:
+            current.cancel()
+            self.g["usage_scans"].pop(slot)
+        if not path:
+            self.widgets[USAGE_LABELS[slot]].config(text="")
+            return
+        self.widgets[USAGE_LABELS[slot]].config(text="Measuring...")
+        scanner = usage.Scanner(path, g["usage_cache"])
+        scanner.on_progress = lambda report: self.usage_events.put((slot, scanner, report))
+        self.g["usage_scans"][slot] = scanner.start()
+
+    def _follow_typed_target(self):
+        """Measure the Target Path once it stops changing, if it names an existing folder.
+
+        Called every watch tick.  Every edit cancels the running scan, so a
+        half-typed path such as C:\\ is not walked while the user is still typing.
+        """
+        text = self.widgets["target_entry"].get().strip()
+        now = time.monotonic()
+        if text != self.g["typed_target"]:
+            self.g["typed_target"] = text
+            self.g["typed_since"] = now
+            self.g["typed_checked"] = False
+            self._measure_usage("target", None)
+            return
+        if self.g["typed_checked"] or now - self.g["typed_since"] < USAGE_SETTLE_SECONDS:
+            return
+        self.g["typed_checked"] = True
+        if text:
+            self._submit(os.path.isdir, (text,),
+                         lambda is_dir: self.handle_when_target_folder_checked(text, is_dir))
+
+    def _note_migrate_progress(self, counts):
+        """Keep the latest migrate progress for the watch timer to show (on the worker)."""
+        self.g["migrate_progress"] = counts
+
+    # --- Event handlers ---
+
+    @traced("handle_when_user_clicks_select_junction")
+    def handle_when_user_clicks_select_junction(self):
+        """Open folder dialog to select junction path."""
+        current = self._get_junction_path()
+        initial_dir = os.path.dirname(current) if current else None
+
+        path = filedialog.askdirectory(
+            title="Select Junction Location",
+            initialdir=initial_dir
+        )
+        if path:
+            self.widgets["junction_entry"].delete(0, tk.END)
+            self.widgets["junction_entry"].insert(0, path)
+            self._refresh_state()
+
+    @traced("handle_when_user_clicks_explore_junction")
+    def handle_when_user_clicks_explore_junction(self):
+        """Open Windows Explorer at the junction path."""
+        path = self._get_junction_path()
+        if not path:
+            self._set_status("No junction path specified", is_error=True)
+            return
+        if not _open_in_explorer(path):
+            self._set_status("Path does not exist", is_error=True)
+
+    @traced("handle_when_user_clicks_select_target")
+    def handle_when_user_clicks_select_target(self):
+        """Open folder dialog to select target path."""
+        current = self.widgets["target_entry"].get().strip()
+        initial_dir = current if current and os.path.isdir(current) else None
+
+        path = filedialog.askdirectory(
+            title="Select Target Folder",
+            initialdir=initial_dir
+        )
+        if path:
+            self.widgets["target_entry"].delete(0, tk.END)
+            self.widgets["target_entry"].insert(0, path)
+
+    @traced("handle_when_user_clicks_explore_target")
+    def handle_when_user_clicks_explore_target(self):
+        """Open Windows Explorer at the target path."""
+        path = self.widgets["target_entry"].get().strip()
+        if not path:
+            self._set_status("No target path specified", is_error=True)
+            return
+        if not _open_in_explorer(path):
+            self._set_status("Path does not exist", is_error=True)
+
+    @traced("handle_when_user_opens_history")
+    def handle_when_user_opens_history(self, event=None):
+        """Open the quick-switch palette over the target history."""
+        if self.widgets.get("palette"):
+            self.widgets["palette_entry"].focus_set()
+            return
+        palette = tk.Toplevel(self.parent)
+        palette.title("Recent Targets")
+        palette.transient(self.parent)
+        self.widgets["palette"] = palette
+
+        self.widgets["palette_entry"] = tk.Entry(palette, width=60)
+        self.widgets["palette_entry"].grid(row=0, column=0, padx=10, pady=(10, 5), sticky="ew")
+        self.widgets["palette_entry"].bind("<KeyRelease>", self.handle_when_palette_query_changes)
+        self.widgets["palette_entry"].bind("<Return>", self.handle_when_palette_choice_made)
+        self.widgets["palette_entry"].bind("<Down>", lambda event: self._move_palette_selection(1))
+        self.widgets["palette_entry"].bind("<Up>", lambda event: self._move_palette_selection(-1))
+        self.widgets["palette_entry"].bind("<Escape>", lambda event: self._close_palette())
+
+        self.widgets["palette_list"] = tk.Listbox(palette, width=60, height=12, activestyle="none")
+        self.widgets["palette_list"].grid(row=1, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.widgets["palette_list"].bind("<Double-Button-1>", self.handle_when_palette_choice_made)
+
+        palette.protocol("WM_DELETE_WINDOW", self._close_palette)
+        self.widgets["palette_entry"].focus_set()
+        self._search_palette()
+
+    @traced("handle_when_palette_query_changes")
+    def handle_when_palette_query_changes(self, event):
+        """Filter the palette as the user types."""
+        if event.keysym in ("Up", "Down", "Return", "Escape"):
+            return
+        self._search_palette()
+
+    @traced("handle_when_palette_search_continues")
+    def handle_when_palette_search_continues(self):
+        """Do the next slice of a search that did not finish within one keystroke."""
+        self.g["palette_after_id"] = None
+        if self.widgets.get("palette"):
+            self._search_palette()
+
+    @traced("handle_when_palette_choice_made")
+    def handle_when_palette_choice_made(self, event=None):
+        """Copy the chosen history entry into the target entry."""
+        listbox = self.widgets["palette_list"]
+        selection = listbox.curselection()
+        if not g["history"].loaded or listbox.size() == 0:
+            return
+        choice = listbox.get(selection[0] if selection else 0)
+        self._close_palette()
+        self.widgets["target_entry"].delete(0, tk.END)
+        self.widgets["target_entry"].insert(0, choice)
+
+    @traced("handle_when_target_entry_changes")
+    def handle_when_target_entry_changes(self, event):
+        """Offer directories from the crawled project roots that start with the typed text."""
+        if event.keysym in ("Tab", "Return", "Escape", "Up", "Down"):
+            return
+        text = self.widgets["target_entry"].get().strip()
+        if not text or g["crawler"] is None:
+            self._show_suggestions([])
+            return
+        suggestions = g["crawler"].index.complete(text)
+        if suggestions == [text]:
+            suggestions = []
+        self._show_suggestions(suggestions)
+
+    @traced("handle_when_target_entry_tab_pressed")
+    def handle_when_target_entry_tab_pressed(self, event):
+        """Complete the target to the first suggestion, if any are showing."""
+        listbox = self.widgets["target_suggestions"]
+        if listbox.size() == 0:
+            return None
+        self._accept_suggestion(listbox.get(0))
+        return "break"
+
+    @traced("handle_when_user_picks_suggestion")
+    def handle_when_user_picks_suggestion(self, event):
+        """Complete the target to the clicked suggestion."""
+        selection = self.widgets["target_suggestions"].curselection()
+        if selection:
+            self._accept_suggestion(self.widgets["target_suggestions"].get(selection[0]))
+
+    @traced("handle_when_user_clicks_create_folder")
+    def handle_when_user_clicks_create_folder(self):
+        """Create the target folder if it doesn't exist."""
+        target_path = self.widgets["target_entry"].get().strip()
+
+        if not target_path:
+            self._set_status("Please enter a target path", is_error=True)
+            return
 
-    widgets["target_select_btn"] = tk.Button(
-        frame_target, text="Select",
-        command=handle_when_user_clicks_select_target
-    )
-    widgets["target_select_btn"].grid(row=0, column=1, padx=(5, 0))
+        self._begin_operation(f"Creating folder: {target_path}")
+        self._submit(_work_create_folder, (target_path,), self.handle_when_create_folder_finishes)
 
-    widgets["target_explore_btn"] = tk.Button(
-        frame_target, text="Explore",
-        command=handle_when_user_clicks_explore_target
-    )
-    widgets["target_explore_btn"].grid(row=0, column=2, padx=(2, 0))
+    @traced("handle_when_user_clicks_point_to")
+    def handle_when_user_clicks_point_to(self):
+        """Point the junction to the target path."""
+        junction_path = self._get_junction_path()
+        target_path = self.widgets["target_entry"].get().strip()
 
-    # Section 3: Actions
-    frame_actions = tk.Frame(toplevel)
-    frame_actions.grid(row=3, column=0, padx=10, pady=5, sticky="w")
+        if not junction_path:
+            self._set_status("Please enter a junction path", is_error=True)
+            return
 
-    widgets["create_folder_btn"] = tk.Button(
-        frame_actions, text="Create Folder",
-        command=handle_when_user_clicks_create_folder
-    )
-    widgets["create_folder_btn"].grid(row=0, column=0, padx=(0, 5))
+        if not target_path:
+            self._set_status("Please enter a target path", is_error=True)
+            return
 
-    widgets["point_to_btn"] = tk.Button(
-        frame_actions, text="Point To",
-        command=handle_when_user_clicks_point_to
-    )
-    widgets["point_to_btn"].grid(row=0, column=1, padx=(0, 5))
+        self._begin_operation(f"Pointing junction to {target_path}")
+        move_files = self.widgets["move_files_var"].get()
+        self._submit(_work_point_to,
+                     (junction_path, target_path, app["atomic_switch"], move_files, self._note_migrate_progress),
+                     self.handle_when_junction_operation_finishes)
 
-    widgets["unlink_btn"] = tk.Button(
-        frame_actions, text="Unlink",
-        command=handle_when_user_clicks_unlink
-    )
-    widgets["unlink_btn"].grid(row=0, column=2)
+    @traced("handle_when_user_clicks_unlink")
+    def handle_when_user_clicks_unlink(self):
+        """Remove the junction without creating a new one."""
+        junction_path = self._get_junction_path()
 
-    # Section 4: Status
-    frame_status = tk.LabelFrame(toplevel, text="Status", padx=10, pady=5)
-    frame_status.grid(row=4, column=0, padx=10, pady=5, sticky="ew")
+        if not junction_path:
+            self._set_status("Please enter a junction path", is_error=True)
+            return
 
-    widgets["status_label"] = tk.Label(frame_status, text="", anchor="w", fg="gray")
-    widgets["status_label"].grid(row=0, column=0, sticky="ew")
-    frame_status.columnconfigure(0, weight=1)
-
-    # Section 5: Notes
-    frame_notes = tk.LabelFrame(toplevel, text="Notes", padx=10, pady=5)
-    frame_notes.grid(row=5, column=0, padx=10, pady=5, sticky="ew")
-
-    widgets["notes_text"] = tk.Text(frame_notes, height=4, width=55)
-    widgets["notes_text"].grid(row=0, column=0, sticky="ew")
-    frame_notes.columnconfigure(0, weight=1)
+        self._begin_operation("Removing junction")
+        self._submit(_work_unlink, (junction_path,), self.handle_when_junction_operation_finishes)
+
+    @traced("handle_when_create_folder_finishes")
+    def handle_when_create_folder_finishes(self, result):
+        """Report the outcome of Create Folder."""
+        if self.frame is None:
+            return  # Closed while the job ran
+        success, message = result
+        self._end_operation()
+        self._set_status(message, is_error=not success)
+
+    @traced("handle_when_junction_operation_finishes")
+    def handle_when_junction_operation_finishes(self, result):
+        """Report the outcome of Point To / Unlink and show the resulting state."""
+        if self.frame is None:
+            return  # Closed while the job ran
+        success, message, state = result
+        self.g["migrate_progress"] = None
+        self._end_operation()
+        self._set_status(message, is_error=not success)
+        self._refresh_state(state)
+
+    @traced("handle_when_job_fails")
+    def handle_when_job_fails(self, exc):
+        """Report a background job that raised, and give the buttons back."""
+        if self.frame is None:
+            return  # Closed while the job ran
+        if self.g["busy"]:
+            self.g["migrate_progress"] = None
+            self._end_operation()
+        self._set_status(f"Error: {exc}", is_error=True)
+
+    def poll(self):
+        """Show what the watcher and the disk-usage scanners reported since the last tick."""
+        state = None
+        while not self.watch_events.empty():
+            state = self.watch_events.get_nowait()
+
+        current = self.g["watcher"]
+        if state is not None and current and state.path == current.path and not self.g["busy"]:
+            self.g["generation"] += 1
+            self._show_state(self._get_junction_path(), state)
+
+        reports = {}
+        while not self.usage_events.empty():
+            slot, scanner, report = self.usage_events.get_nowait()
+            if self.g["usage_scans"].get(slot) is scanner:
+                reports[slot] = report
+        for slot, report in reports.items():
+            self.widgets[USAGE_LABELS[slot]].config(text=usage.describe(report))
+        self._follow_typed_target()
+
+        counts = self.g["migrate_progress"]
+        if counts and self.g["busy"]:
+            self.widgets["status_label"].config(
+                text=f"Moving files: {counts['files_done']}/{counts['files_total']} files, "
+                     f"{counts['bytes_done'] / 1e6:.1f}/{counts['bytes_total'] / 1e6:.1f} MB",
+                fg="gray")
+
+    @traced("handle_when_probe_finishes")
+    def handle_when_probe_finishes(self, generation, state):
+        """Show a background probe result, unless a newer refresh has started since."""
+        if self.frame is None:
+            return  # Closed while the job ran
+        if generation != self.g["generation"]:
+            return
+        self._show_state(state.path, state)
+
+    @traced("handle_when_resolution_finishes")
+    def handle_when_resolution_finishes(self, generation, target, result):
+        """Show the full chain behind the current target, unless a newer refresh has started."""
+        if self.frame is None:
+            return  # Closed while the job ran
+        if generation != self.g["generation"]:
+            return
+        resolved, chain, problems = result
+        self.widgets["current_target_label"].config(text=_describe_chain(target, resolved, chain, problems))
+        self._measure_usage("current", resolved)
+
+    @traced("handle_when_target_folder_checked")
+    def handle_when_target_folder_checked(self, text, is_dir):
+        """Measure a settled Target Path that turned out to be a folder, unless it changed since."""
+        if is_dir and self.frame is not None and text == self.g["typed_target"]:
+            self._measure_usage("target", text)
+
+    @traced("handle_when_junction_entry_loses_focus")
+    def handle_when_junction_entry_loses_focus(self, event):
+        """Refresh state when junction entry loses focus."""
+        self._refresh_state()
+
+    @traced("handle_when_junction_entry_return_pressed")
+    def handle_when_junction_entry_return_pressed(self, event):
+        """Refresh state when Return pressed in junction entry."""
+        self._refresh_state()
+
+    # --- UI construction ---
+
+    def _build_ui(self, row):
+        """Construct the panel's widgets in a frame at row of the parent."""
+        self.frame = frame = tk.Frame(self.parent)
+        frame.grid(row=row, column=0, sticky="ew")
+        widgets = self.widgets
+
+        # Section 0: Junction Path
+        frame_junction = tk.LabelFrame(frame, text="Junction Path", padx=10, pady=5)
+        frame_junction.grid(row=0, column=0, padx=10, pady=5, sticky="ew")
+
+        widgets["junction_entry"] = tk.Entry(frame_junction, width=55)
+        widgets["junction_entry"].grid(row=0, column=0, sticky="ew")
+        if self.initial_junction_path:
+            widgets["junction_entry"].insert(0, self.initial_junction_path)
+        widgets["junction_entry"].bind("<FocusOut>", self.handle_when_junction_entry_loses_focus)
+        widgets["junction_entry"].bind("<Return>", self.handle_when_junction_entry_return_pressed)
+
+        widgets["junction_select_btn"] = tk.Button(
+            frame_junction, text="Select",
+            command=self.handle_when_user_clicks_select_junction
+        )
+        widgets["junction_select_btn"].grid(row=0, column=1, padx=(5, 0))
+
+        widgets["junction_explore_btn"] = tk.Button(
+            frame_junction, text="Explore",
+            command=self.handle_when_user_clicks_explore_junction
+        )
+        widgets["junction_explore_btn"].grid(row=0, column=2, padx=(2, 0))
+
+        # Section 1: Currently Points To
+        frame_current = tk.LabelFrame(frame, text="Currently Points To", padx=10, pady=5)
+        frame_current.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
+
+        widgets["current_target_label"] = tk.Label(frame_current, text="", anchor="w")
+        widgets["current_target_label"].grid(row=0, column=0, sticky="ew")
+        widgets["current_usage_label"] = tk.Label(frame_current, text="", anchor="w", fg="gray")
+        widgets["current_usage_label"].grid(row=1, column=0, sticky="ew")
+        frame_current.columnconfigure(0, weight=1)
+
+        # Section 2: Target Path
+        frame_target = tk.LabelFrame(frame, text="Target Path", padx=10, pady=5)
+        frame_target.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+
+        widgets["target_entry"] = tk.Entry(frame_target, width=55)
+        widgets["target_entry"].grid(row=0, column=0, sticky="ew")
+        if self.initial_target_path:
+            widgets["target_entry"].insert(0, self.initial_target_path)
+
+        widgets["target_select_btn"] = tk.Button(
+            frame_target, text="Select",
+            command=self.handle_when_user_clicks_select_target
+        )
+        widgets["target_select_btn"].grid(row=0, column=1, padx=(5, 0))
+
+        widgets["target_explore_btn"] = tk.Button(
+            frame_target, text="Explore",
+            command=self.handle_when_user_clicks_explore_target
+        )
+        widgets["target_explore_btn"].grid(row=0, column=2, padx=(2, 0))
+
+        widgets["target_history_btn"] = tk.Button(
+            frame_target, text="Recent",
+            command=self.handle_when_user_opens_history
+        )
+        widgets["target_history_btn"].grid(row=0, column=3, padx=(2, 0))
+
+        widgets["target_entry"].bind("<KeyRelease>", self.handle_when_target_entry_changes)
+        widgets["target_entry"].bind("<Tab>", self.handle_when_target_entry_tab_pressed)
+        widgets["target_entry"].bind("<Escape>", lambda event: self._show_suggestions([]))
+        widgets["target_suggestions"] = tk.Listbox(frame_target, height=1, activestyle="none")
+        widgets["target_suggestions"].grid(row=1, column=0, columnspan=4, sticky="ew")
+        widgets["target_suggestions"].bind("<<ListboxSelect>>", self.handle_when_user_picks_suggestion)
+        widgets["target_suggestions"].grid_remove()
+        widgets["target_usage_label"] = tk.Label(frame_target, text="", anchor="w", fg="gray")
+        widgets["target_usage_label"].grid(row=2, column=0, columnspan=4, sticky="ew")
+
+        # Section 3: Actions
+        frame_actions = tk.Frame(frame)
+        frame_actions.grid(row=3, column=0, padx=10, pady=5, sticky="w")
+
+        widgets["create_folder_btn"] = tk.Button(
+            frame_actions, text="Create Folder",
+            command=self.handle_when_user_clicks_create_folder
+        )
+        widgets["create_folder_btn"].grid(row=0, column=0, padx=(0, 5))
+
+        widgets["point_to_btn"] = tk.Button(
+            frame_actions, text="Point To",
+            command=self.handle_when_user_clicks_point_to
+        )
+        widgets["point_to_btn"].grid(row=0, column=1, padx=(0, 5))
+
+        widgets["unlink_btn"] = tk.Button(
+            frame_actions, text="Unlink",
+            command=self.handle_when_user_clicks_unlink
+        )
+        widgets["unlink_btn"].grid(row=0, column=2)
+
+        widgets["move_files_var"] = tk.BooleanVar(value=False)
+        widgets["move_files_check"] = tk.Checkbutton(
+            frame_actions, text="Move files along",
+            variable=widgets["move_files_var"]
+        )
+        widgets["move_files_check"].grid(row=0, column=3, padx=(10, 0))
+
+        # Section 4: Status
+        frame_status = tk.LabelFrame(frame, text="Status", padx=10, pady=5)
+        frame_status.grid(row=4, column=0, padx=10, pady=5, sticky="ew")
+
+        widgets["status_label"] = tk.Label(frame_status, text="", anchor="w", fg="gray")
+        widgets["status_label"].grid(row=0, column=0, sticky="ew")
+        frame_status.columnconfigure(0, weight=1)
+
+        # Section 5: Notes
+        frame_notes = tk.LabelFrame(frame, text="Notes", padx=10, pady=5)
+        frame_notes.grid(row=5, column=0, padx=10, pady=5, sticky="ew")
+
+        widgets["notes_text"] = tk.Text(frame_notes, height=4, width=55)
+        widgets["notes_text"].grid(row=0, column=0, sticky="ew")
+        frame_notes.columnconfigure(0, weight=1)
+
+
+# --- Window-wide handlers ---
+
+def add_session(junction_path=None, target_path=None):
+    """Add a panel for another junction below the existing ones; returns its Session."""
+    session = Session(app["toplevel"], junction_path, target_path)
+    g["sessions"].append(session)
+    return session.open(row=len(g["sessions"]) - 1)
+
+
+def remove_session(session):
+    """Close a panel and drop it from the window."""
+    session.close()
+    g["sessions"].remove(session)
+
+
+@traced("handle_when_watch_timer_fires")
+def handle_when_watch_timer_fires():
+    """Let every session show what its watcher and scanners reported; one timer serves them all."""
+    for session in list(g["sessions"]):
+        session.poll()
+    app["watch_after_id"] = app["toplevel"].after(WATCH_POLL_MS, handle_when_watch_timer_fires)
+
+
+@traced("handle_when_user_presses_ctrl_p")
+def handle_when_user_presses_ctrl_p(event=None):
+    """Open the Recent palette of the panel being worked in."""
+    session = _focused_session()
+    if session is not None:
+        session.handle_when_user_opens_history()
 
 
 # --- Entry / Exit for tkintertester compatibility ---
 
 def entry():
     """Create the UI. Set app['root'] before calling."""
-    g["last_junction_path"] = None
     app["toplevel"] = tk.Toplevel(app["root"])
-    _build_ui()
-    _refresh_state()
+    app["toplevel"].title("win-quick-shuttle")
+    app["toplevel"].resizable(False, False)
+    g["history"] = history.TargetHistory(app["history_path"])
+    threading.Thread(target=g["history"].load, name="wqs-history", daemon=True).start()
+    if app["crawl_roots"]:
+        g["crawler"] = crawler.Crawler(app["crawl_roots"], app["crawl_index_path"]).start()
+    g["usage_cache"] = usage.UsageCache(app["usage_cache_path"])
+    g["watchers"] = watcher.WatchGroup().start()
+    worker.start(app["toplevel"], workers=WORKERS)
+    if app["junction_paths"]:
+        for junction_path in app["junction_paths"]:
+            add_session(junction_path)
+    else:
+        add_session(app["initial_junction_path"], app["initial_target_path"])
+    app["toplevel"].bind("<Control-p>", handle_when_user_presses_ctrl_p)
+    app["watch_after_id"] = app["toplevel"].after(WATCH_POLL_MS, handle_when_watch_timer_fires)
 
 
 def exit():
     """Tear down the UI."""
+    worker.stop()
+    for session in list(g["sessions"]):
+        remove_session(session)
+    if g["watchers"]:
+        g["watchers"].stop()
+        g["watchers"] = None
+    if g["crawler"]:
+        g["crawler"].stop()
+        g["crawler"] = None
     if app["toplevel"]:
+        if app["watch_after_id"]:
+            app["toplevel"].after_cancel(app["watch_after_id"])
+            app["watch_after_id"] = None
         app["toplevel"].destroy()
         app["toplevel"] = None
-    widgets.clear()
-    g["last_junction_path"] = None
-
-
@@ -0,0 +1,242 @@
+"""In-memory filesystem backend for tests, fuzzing and benchmarks.
+
+MemoryBackend stands in for everything the switch logic asks of the disk --
+probe(), create(), remove(), replace(), read(), exists(), isdir() and
+makedirs() -- with a dict of paths, so a million point/unlink operations run
+in seconds and nothing touches the real filesystem:
+
+    fs = MemoryBackend()
+    fs.makedirs("/work/a")
+    old = links.set_backend(fs)
+    ...
+    links.set_backend(old)
+
+Errors are raised as the same OSError subclasses the real calls raise.  Two
+kinds of trouble can be injected deterministically:
+
+    fs.fail("remove", path=None, error=None, times=1)
+        -- the next `times` calls of that operation (on path, if given) raise
+           error (default: OSError EIO)
+    fs.latency["replace"] = 0.2
+        -- every replace() sleeps 0.2 seconds first
+
+Paths are normalized with os.path.normpath; use absolute paths.
+
+MemoryBackend(link_kind=links.KIND_JUNCTION) mimics Windows junctions: links
+probe as KIND_JUNCTION and their targets are stored the way Windows reports
+them, with the extended-length prefix (see readlink()).  probe() and read()
+strip it with links.clean_target, as JunctionBackend does.
+"""
+
+import collections
+import errno
+import itertools
+import os
+import time
+
+from win_quick_shuttle import links
+
+
+MAX_LINK_HOPS = 40
+
+# Node kinds
+DIR = "dir"
+FILE = "file"
+LINK = "link"
+
+
+class MemoryBackend:
+    """A link backend whose filesystem lives in a dict."""
+
+    name = "memory"
+
+    def __init__(self, link_kind=links.KIND_LINK):
+        self.link_kind = link_kind      # KIND_LINK, or KIND_JUNCTION to mimic Windows
+        self.nodes = {}                 # normpath -> [kind, link target as reported or None, mtime]
+        self.latency = {}               # operation -> seconds to sleep before it runs
+        self.calls = collections.Counter()
+        self._faults = []               # [operation, path or None, error, times left]
+        self._clock = itertools.count(1)
+
+    # --- Fault injection ---
+
+    def fail(self, operation, path=None, error=None, times=1):
+        """Make the next `times` calls of operation (on path, if given) raise error."""
+        if error is None:
+            error = OSError(errno.EIO, os.strerror(errno.EIO))
+        if path is not None:
+            path = os.path.normpath(path)
+        self._faults.append([operation, path, error, times])
+
+    def clear_faults(self):
+        """Forget injected failures and latency."""
+        self._faults.clear()
+        self.latency.clear()
+
+    def _enter(self, operation, path):
+        """Count the call and apply any latency or failure injected for it."""
+        self.calls[operation] += 1
+        if self.latency:
+            delay = self.latency.get(operation)
+            if delay:
+                time.sleep(delay)
+        if self._faults:
+            for fault in self._faults:
+                if fault[0] == operation and fault[1] in (None, path):
+                    fault[3] -= 1
+                    if fault[3] <= 0:
+                        self._faults.remove(fault)
+                    raise fault[2]
+
+    # --- Lookup ---
+
+    def _node(self, path):
+        """Return the node at path without following a link in its last component."""
+        node = self.nodes.get(path)
+        if node is not None:
+            return node
+        parent, name = os.path.split(path)
+        if parent == path or not name:
+            return [DIR, None, 0]       # Filesystem root
+        real_parent = self._resolve(parent)
+        if real_parent is None or real_parent == parent:
+            return None
+        return self.nodes.get(os.path.join(real_parent, name))
+
+    def _resolve(self, path):
+        """Follow links until path names a non-link; None if it dangles or loops."""
+        for _ in range(MAX_LINK_HOPS):
+            node = self._node(path)
+            if node is None:
+                return None
+            if node[0] != LINK:
+                return path
+            path = os.path.normpath(os.path.join(os.path.dirname(path), links.clean_target(node[1])))
+        return None
+
+    def _place(self, path):
+        """Return path with its parent's links resolved; raise unless the parent is a directory."""
+        parent, name = os.path.split(path)
+        node = self.nodes.get(parent)
+        if node is not None and node[0] == DIR:
+            return path
+        real = self._resolve(parent)
+        if real is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        if self._node(real)[0] != DIR:
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        return os.path.join(real, name)
+
+    # --- Directory questions ---
+
+    def exists(self, path):
+        """True if path exists (following links)."""
+        path = os.path.normpath(path)
+        self._enter("exists", path)
+        return self._resolve(path) is not None
+
+    def isdir(self, path):
+        """True if path is a directory (following links)."""
+        path = os.path.normpath(path)
+        self._enter("isdir", path)
+        real = self._resolve(path)
+        return real is not None and self._node(real)[0] == DIR
+
+    def makedirs(self, path):
+        """Create path and any missing parents; raises FileExistsError if it exists."""
+        path = os.path.normpath(path)
+        self._enter("makedirs", path)
+        if self._node(path) is not None:
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+        missing = []
+        while self._node(path) is None:
+            missing.append(os.path.basename(path))
+            path = os.path.dirname(path)
+        for name in reversed(missing):
+            path = self._place(os.path.join(path, name))
+            self.nodes[path] = [DIR, None, next(self._clock)]
+
+    def add_file(self, path):
+        """Create an empty regular file at path (for setting up scenarios)."""
+        path = self._place(os.path.normpath(path))
+        if self._node(path) is not None:
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+        self.nodes[path] = [FILE, None, next(self._clock)]
+
+    # --- Links ---
+
+    def _reported(self, target_path):
+        """Return target_path as readlink() reports it for this backend's link kind."""
+        target_path = os.path.normpath(target_path)
+        if self.link_kind != links.KIND_JUNCTION:
+            return target_path
+        if target_path.startswith("\\\\"):
+            return links.EXTENDED_UNC_PREFIX + target_path[2:]
+        return links.EXTENDED_PREFIX + target_path
+
+    def create(self, link_path, target_path):
+        """Create a link at link_path pointing to target_path."""
+        link_path = os.path.normpath(link_path)
+        self._enter("create", link_path)
+        link_path = self._place(link_path)
+        if self._node(link_path) is not None:
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), link_path)
+        self.nodes[link_path] = [LINK, self._reported(target_path), next(self._clock)]
+
+    def remove(self, link_path):
+        """Remove the link itself; the target is left untouched."""
+        link_path = os.path.normpath(link_path)
+        self._enter("remove", link_path)
+        link_path = self._place(link_path)
+        node = self.nodes.get(link_path)
+        if node is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), link_path)
+        if node[0] == DIR:
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), link_path)
+        if node[0] != LINK:
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), link_path)
+        del self.nodes[link_path]
+
+    def replace(self, link_path, target_path):
+        """Atomically repoint (or create) the link at link_path."""
+        link_path = os.path.normpath(link_path)
+        self._enter("replace", link_path)
+        link_path = self._place(link_path)
+        node = self._node(link_path)
+        if node is not None and node[0] == DIR:
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), link_path)
+        self.nodes[link_path] = [LINK, self._reported(target_path), next(self._clock)]
+
+    def readlink(self, link_path):
+        """Return the link's target as the OS reports it (prefixed for junctions)."""
+        link_path = os.path.normpath(link_path)
+        node = self._node(link_path)
+        if node is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), link_path)
+        if node[0] != LINK:
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), link_path)
+        return node[1]
+
+    def read(self, link_path):
+        """Return the link's target."""
+        self._enter("read", os.path.normpath(link_path))
+        return links.clean_target(self.readlink(link_path))
+
+    def probe(self, path, read_target=True):
+        """Return a Probe describing path."""
+        path = os.path.normpath(path)
+        self._enter("probe", path)
+        node = self._node(path)
+        if node is None:
+            return links.Probe(path, links.KIND_MISSING)
+        kind = node[0]
+        if kind == LINK:
+            target = links.clean_target(node[1]) if read_target else None
+            return links.Probe(path, self.link_kind, target, node[2])
+        if kind == DIR:
+            return links.Probe(path, links.KIND_DIR, None, node[2])
+        return links.Probe(path, links.KIND_OTHER, None, node[2])
+
+    def lock_path(self, link_path):
+        """None: a memory filesystem lives in one process, so no lock file is needed."""
+        return None
@@ -0,0 +1,477 @@
+"""Move the contents of one target into another, usually right after a repoint.
+
+    migrate(source, dest)                      -- move everything in source into dest
+    point_and_migrate(junction, target)        -- repoint, then move what landed in
+                                                  the old target into the new one
+
+On the same volume every top-level item is moved with one rename, except
+that a folder dest already has is merged into item by item.  Across
+volumes files are copied in CHUNK_SIZE pieces on a thread pool -- with
+os.copy_file_range where the kernel allows it, os.sendfile next, plain
+reads and writes otherwise -- into a `.wqs-part` file that is renamed into
+place once complete (and, with verify, once its SHA-256 matches the source).
+Only then is the source file removed.
+
+Cross-volume moves keep a journal (JSON lines) of finished chunks and files;
+a chunk is journaled only once it is synced to its part file, and each file's
+source size and mtime are journaled when its copy starts.  If a move is
+interrupted, running it again with the same journal skips the work already
+done -- unless the source changed or the part file is missing or too short,
+in which case that file is copied again from the start.  Both ways follow one conflict rule and nothing is ever
+overwritten: folders present on both sides are merged, and any other item
+whose path already exists in dest is left in source and reported as a
+conflict (a file by its own path, a folder that cannot be merged as a whole).
+
+progress, if given, is called from worker threads with a dict:
+    {"files_done", "files_total", "bytes_done", "bytes_total"}
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from win_quick_shuttle import junctions, locks
+
+
+JOURNAL_FILENAME = "migrate.jsonl"
+CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BLOCK = 1024 * 1024
+DEFAULT_WORKERS = 4
+PART_SUFFIX = ".wqs-part"
+
+# copy_file_range errors that mean "not here", so the next method is tried
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+class _Progress:
+    """Thread-safe progress counters reported through a callback."""
+
+    def __init__(self, callback, files_total=0, bytes_total=0):
+        self.callback = callback
+        self.counts = {"files_done": 0, "files_total": files_total,
+                       "bytes_done": 0, "bytes_total": bytes_total}
+        self._lock = threading.Lock()
+
+    def add(self, files=0, nbytes=0):
+        with self._lock:
+            self.counts["files_done"] += files
+            self.counts["bytes_done"] += nbytes
+            snapshot = dict(self.counts)
+        if self.callback:
+            self.callback(snapshot)
+
+
+class _Journal:
+    """Finished chunks and files of one source -> dest move, kept in a JSON-lines file."""
+
+    def __init__(self, path, source, dest):
+        self.path = path                # None: keep nothing on disk
+        self.chunks = {}                # relpath -> offsets of chunks copied into its part file
+        self.sources = {}               # relpath -> (size, mtime_ns) of the source those chunks came from
+        self.files = set()              # relpath
+        self._lock = threading.Lock()
+        self._file = None
+        if path is None:
+            return
+        header = {"source": source, "dest": dest}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip().endswith("}")]
+        except (FileNotFoundError, ValueError):
+            lines = []
+        if lines and lines[0] == header:
+            for entry in lines[1:]:
+                if "size" in entry:
+                    # The file's copy (re)started: earlier chunks no longer count
+                    self.sources[entry["file"]] = (entry["size"], entry["mtime_ns"])
+                    self.chunks[entry["file"]] = set()
+                elif "offset" in entry:
+                    self.chunks.setdefault(entry["file"], set()).add(entry["offset"])
+                else:
+                    self.files.add(entry["file"])
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+            self._write(header)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def start_file(self, relpath, size, mtime_ns, part_size):
+        """Note a file about to be copied; returns the offsets its part file already holds.
+
+        Journaled chunks count only if the source still has the size and mtime
+        they were copied from and the part file (part_size bytes, None if it did
+        not exist) still reaches past them.  Otherwise they are forgotten and the
+        file is copied from the start.
+        """
+        with self._lock:
+            offsets = self.chunks.get(relpath, set())
+            copied_to = max((offset + min(CHUNK_SIZE, size - offset) for offset in offsets), default=0)
+            if self.sources.get(relpath) == (size, mtime_ns) and part_size is not None \
+                    and part_size >= copied_to:
+                return set(offsets)
+            self.chunks[relpath] = set()
+            self.sources[relpath] = (size, mtime_ns)
+            if self._file:
+                self._write({"file": relpath, "size": size, "mtime_ns": mtime_ns})
+            return set()
+
+    def chunk_done(self, relpath, offset):
+        """Record a chunk; its data must already be synced to the part file."""
+        with self._lock:
+            self.chunks.setdefault(relpath, set()).add(offset)
+            if self._file:
+                self._write({"file": relpath, "offset": offset})
+
+    def file_done(self, relpath):
+        with self._lock:
+            self.files.add(relpath)
+            if self._file:
+                self._write({"file": relpath})
+                os.fsync(self._file.fileno())
+
+    def close(self, finished):
+        """Close the journal; a finished move needs no journal."""
+        if self._file:
+            self._file.close()
+            self._file = None
+            if finished:
+                os.remove(self.path)
+
+
+# --- Copying ---
+
+def _copy_range(src_path, dst_path, offset, length):
+    """Copy length bytes at offset from src_path into the same place in dst_path."""
+    with open(src_path, "rb") as src, open(dst_path, "r+b") as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        end = offset + length
+
+        if hasattr(os, "copy_file_range"):
+            pos = offset
+            try:
+                while pos < end:
+                    n = os.copy_file_range(src_fd, dst_fd, end - pos, pos, pos)
+                    if n == 0:
+                        break
+                    pos += n
+                return
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS or pos != offset:
+                    raise
+
+        if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+            dst.seek(offset)
+            pos = offset
+            try:
+                while pos < end:
+                    n = os.sendfile(dst_fd, src_fd, pos, end - pos)
+                    if n == 0:
+                        break
+                    pos += n
+                return
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS or pos != offset:
+                    raise
+
+        src.seek(offset)
+        dst.seek(offset)
+        remaining = length
+        while remaining > 0:
+            block = src.read(min(COPY_BLOCK, remaining))
+            if not block:
+                break
+            dst.write(block)
+            remaining -= len(block)
+
+
+def copy_file(src_path, dst_path):
+    """Copy one file to dst_path through a .wqs-part file renamed into place once complete."""
+    part = dst_path + PART_SUFFIX
+    size = os.path.getsize(src_path)
+    try:
+        with open(part, "wb") as f:
+            f.truncate(size)
+        _copy_range(src_path, part, 0, size)
+        shutil.copystat(src_path, part)
+        os.replace(part, dst_path)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+def _fsync_path(path):
+    """Flush a file's data to disk."""
+    with open(path, "r+b") as f:
+        os.fsync(f.fileno())
+
+
+def _sha256(path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- Moving ---
+
+def same_volume(a, b):
+    """True if a and b are on the same volume, so a rename can move between them."""
+    return os.stat(a).st_dev == os.stat(b).st_dev
+
+
+def _same_path(a, b):
+    """True if a and b name the same path."""
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def _is_inside(path, parent):
+    """True if path is parent or lies beneath it."""
+    path = os.path.normcase(os.path.abspath(path))
+    parent = os.path.normcase(os.path.abspath(parent))
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def _summary(moved, nbytes, conflicts, errors):
+    """Build the (success, message) result of a move."""
+    message = f"Moved {moved} item{'s' if moved != 1 else ''}"
+    if nbytes is not None:
+        message += f" ({nbytes / 1e6:.1f} MB copied)"
+    if conflicts:
+        message += f"; {len(conflicts)} left in place (already in destination): {', '.join(conflicts[:3])}"
+    if errors:
+        message += f"; {len(errors)} failed: {errors[0]}"
+    return not errors, message
+
+
+def _is_plain_dir(path):
+    """True for a real directory (not a link to one)."""
+    return not os.path.islink(path) and os.path.isdir(path)
+
+
+def _move_same_volume(source, dest, progress):
+    """Rename each item of source into dest, merging into directories dest already has."""
+    moved, conflicts, errors = 0, [], []
+    merged = []
+    pending = [os.curdir]       # Directories (relative to source) whose items are still to move
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            names = sorted(os.listdir(os.path.join(source, rel_dir)))
+        except OSError as e:
+            errors.append(f"{rel_dir}: {e.strerror or e}")
+            continue
+        progress.counts["files_total"] += len(names)
+        for name in names:
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            src, dst = os.path.join(source, rel), os.path.join(dest, rel)
+            if os.path.lexists(dst):
+                if _is_plain_dir(src) and _is_plain_dir(dst):
+                    progress.counts["files_total"] -= 1
+                    merged.append(rel)
+                    pending.append(rel)
+                else:
+                    conflicts.append(rel)
+                continue
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                errors.append(f"{rel}: {e.strerror or e}")
+                continue
+            moved += 1
+            progress.add(files=1)
+    for rel in reversed(merged):
+        try:
+            os.rmdir(os.path.join(source, rel))
+        except OSError:
+            pass  # Still holds conflicts or failed items
+    return _summary(moved, None, sorted(conflicts), errors)
+
+
+def _plan(source, dest, journal):
+    """List (relpath, size, mtime_ns) of files to copy, plus conflicts and links to recreate.
+
+    Files copied already (only the source is left to remove) have size None.
+    """
+    files, links, conflicts = [], [], []
+    for dirpath, dirnames, filenames in os.walk(source):
+        rel_dir = os.path.relpath(dirpath, source)
+        blocked = set()
+        for name in list(dirnames) + filenames:
+            src = os.path.join(dirpath, name)
+            rel = os.path.normpath(os.path.join(rel_dir, name))
+            if name.endswith(PART_SUFFIX):
+                continue
+            is_link = os.path.islink(src)
+            dst = os.path.join(dest, rel)
+            if name in dirnames and not is_link:
+                if os.path.lexists(dst) and not _is_plain_dir(dst):
+                    conflicts.append(rel)    # Its files could not go inside; the folder stays whole
+                    blocked.add(name)
+                continue
+            if rel in journal.files:
+                files.append((rel, None, None))
+            elif os.path.lexists(dst):
+                conflicts.append(rel)
+            elif is_link:
+                links.append(rel)
+            else:
+                st = os.lstat(src)
+                files.append((rel, st.st_size, st.st_mtime_ns))
+        dirnames[:] = [d for d in dirnames if d not in blocked and not os.path.islink(os.path.join(dirpath, d))]
+    return files, links, conflicts
+
+
+def _move_across_volumes(source, dest, journal, workers, verify, progress):
+    """Copy files in parallel chunks, then remove the sources."""
+    files, links, conflicts = _plan(source, dest, journal)
+    progress.counts["files_total"] = len(files) + len(links)
+    progress.counts["bytes_total"] = sum(size for _, size, _ in files if size)
+    errors = []
+    moved = 0
+    nbytes = 0
+
+    for rel in links:
+        src, dst = os.path.join(source, rel), os.path.join(dest, rel)
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.symlink(os.readlink(src), dst, target_is_directory=os.path.isdir(src))
+            os.unlink(src)
+        except OSError as e:
+            errors.append(f"{rel}: {e.strerror or e}")
+            continue
+        moved += 1
+        progress.add(files=1)
+
+    def copy_chunk(rel, offset, length):
+        part = os.path.join(dest, rel) + PART_SUFFIX
+        _copy_range(os.path.join(source, rel), part, offset, length)
+        _fsync_path(part)
+        journal.chunk_done(rel, offset)
+        progress.add(nbytes=length)
+
+    def finish(rel):
+        src, dst = os.path.join(source, rel), os.path.join(dest, rel)
+        if rel not in journal.files:
+            part = dst + PART_SUFFIX
+            _fsync_path(part)
+            if verify and _sha256(src) != _sha256(part):
+                os.remove(part)
+                raise OSError(errno.EIO, "checksum mismatch after copy", rel)
+            shutil.copystat(src, part)
+            os.replace(part, dst)
+            journal.file_done(rel)
+        os.remove(src)
+        progress.add(files=1)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wqs-migrate") as pool:
+        copies = []
+        for rel, size, mtime_ns in files:
+            if size is None:
+                continue
+            part = os.path.join(dest, rel) + PART_SUFFIX
+            try:
+                part_size = os.path.getsize(part)
+            except OSError:
+                part_size = None
+            done = journal.start_file(rel, size, mtime_ns, part_size)
+            try:
+                os.makedirs(os.path.dirname(part), exist_ok=True)
+                with open(part, "ab") as f:
+                    if f.tell() != size:
+                        f.truncate(size)
+            except OSError as e:
+                errors.append(f"{rel}: {e.strerror or e}")
+                continue
+            chunks = []
+            for offset in range(0, size, CHUNK_SIZE):
+                length = min(CHUNK_SIZE, size - offset)
+                if offset in done:
+                    progress.add(nbytes=length)
+                else:
+                    chunks.append(pool.submit(copy_chunk, rel, offset, length))
+            copies.append((rel, size, chunks))
+
+        finishing = [(rel, pool.submit(finish, rel)) for rel, size, _ in files if size is None]
+        for rel, size, chunks in copies:
+            try:
+                for chunk in chunks:
+                    chunk.result()
+            except OSError as e:
+                errors.append(f"{rel}: {e.strerror or e}")
+                continue
+            finishing.append((rel, pool.submit(finish, rel)))
+            nbytes += size
+
+        for rel, future in finishing:
+            try:
+                future.result()
+            except OSError as e:
+                errors.append(f"{rel}: {e.strerror or e}")
+                continue
+            moved += 1
+
+    for dirpath, _, _ in sorted(os.walk(source), key=lambda entry: -len(entry[0])):
+        if dirpath != source:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass  # Still holds conflicts or failed files
+    success, message = _summary(moved, nbytes, conflicts, errors)
+    return success, message, not errors and not conflicts
+
+
+def migrate(source, dest, journal_path=None, workers=DEFAULT_WORKERS, verify=False, progress=None):
+    """Move everything in source into dest.  Returns (success, message)."""
+    if not os.path.isdir(source):
+        return False, "Source folder does not exist"
+    if not os.path.isdir(dest):
+        return False, "Destination folder does not exist"
+    if _is_inside(dest, source) or _is_inside(source, dest):
+        return False, "Source and destination overlap"
+
+    counter = _Progress(progress)
+    if same_volume(source, dest):
+        return _move_same_volume(source, dest, counter)
+
+    journal = _Journal(journal_path, os.path.abspath(source), os.path.abspath(dest))
+    finished = False
+    try:
+        success, message, finished = _move_across_volumes(source, dest, journal, workers, verify, counter)
+    finally:
+        journal.close(finished)
+    return success, message
+
+
+def point_and_migrate(junction_path, target_path, journal_path=None,
+                      workers=DEFAULT_WORKERS, verify=False, progress=None):
+    """Point the junction at target_path, then move the old target's contents there."""
+    try:
+        with locks.SwitchLock(junction_path):
+            before = junctions.probe(junction_path)
+            error = junctions.check_point_to(target_path, before)
+            if error:
+                return False, error
+            success, message = junctions.switch_junction(junction_path, target_path, before)
+    except OSError as e:
+        return False, str(e)
+    if not success:
+        return False, message
+    old_target = before.target if before.is_link else None
+    if not old_target or _same_path(old_target, target_path):
+        return True, message
+    moved, migrate_message = migrate(old_target, target_path, journal_path, workers, verify, progress)
+    return moved, f"{message}; {migrate_message}"
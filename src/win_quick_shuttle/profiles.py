@@ -0,0 +1,115 @@
+"""Named profiles: many junctions switched together.
+
+A profile maps junction paths to targets.  Profiles live in
+`.win-quick-shuttle/profiles.json`:
+
+    {
+      "projectA": {"C:\\\\Downloads\\\\ACTIVE": "C:\\\\Projects\\\\A\\\\downloads",
+                   "C:\\\\Renders": "D:\\\\A\\\\renders"}
+    }
+
+apply_profile() switches every link of a profile on a thread pool (junction
+operations are syscall-bound, so threads overlap the filesystem latency) and
+reports one result per link.  With rollback, a partial failure restores every
+link that did switch to what it was before.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from win_quick_shuttle import junctions, locks
+
+
+PROFILES_FILENAME = "profiles.json"
+DEFAULT_WORKERS = 8
+
+
+# --- Storage ---
+
+def load_profiles(path):
+    """Read all profiles from path; a missing file means no profiles."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_profiles(path, profiles):
+    """Write all profiles to path, replacing the file atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def set_profile_link(profiles, name, junction_path, target_path):
+    """Add or update one junction -> target mapping in profile name."""
+    profiles.setdefault(name, {})[junction_path] = target_path
+
+
+# --- Applying ---
+
+def _switch_one(junction_path, target_path):
+    """Point one link, remembering what it pointed to just before (probed under its switch lock)."""
+    before = None
+    try:
+        with locks.SwitchLock(junction_path):
+            before = junctions.probe(junction_path)
+            error = junctions.check_point_to(target_path, before)
+            if error:
+                success, message = False, error
+            else:
+                success, message = junctions.switch_junction(junction_path, target_path, before)
+    except OSError as e:
+        success, message = False, str(e)
+    return {
+        "junction": junction_path,
+        "target": target_path,
+        "ok": success,
+        "message": message,
+        "previous": before.target if before is not None and before.is_link else None,
+    }
+
+
+def _restore_one(result):
+    """Put a switched link back the way it was."""
+    if result["previous"]:
+        success, message = junctions.point_junction(result["junction"], result["previous"])
+    else:
+        success, message = junctions.unlink_junction(result["junction"])
+    result["rolled_back"] = success
+    if not success:
+        result["message"] = f"Rollback failed: {message}"
+
+
+def apply_links(link_map, workers=DEFAULT_WORKERS, rollback=False):
+    """Point every junction in link_map at its target; return per-link results.
+
+    workers=1 applies the links sequentially on the calling thread.
+    """
+    items = list(link_map.items())
+    if workers <= 1:
+        results = [_switch_one(j, t) for j, t in items]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda item: _switch_one(*item), items))
+
+    if rollback and not all(r["ok"] for r in results):
+        switched = [r for r in results if r["ok"]]
+        if workers <= 1:
+            for result in switched:
+                _restore_one(result)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_restore_one, switched))
+    return results
+
+
+def apply_profile(profiles, name, workers=DEFAULT_WORKERS, rollback=False):
+    """Apply the named profile; returns (success, results)."""
+    if name not in profiles:
+        return False, []
+    results = apply_links(profiles[name], workers, rollback)
+    return all(r["ok"] for r in results), results
@@ -0,0 +1,129 @@
+"""Follow links through every hop, with cycle detection and a validated memo.
+
+A junction may point at another junction, or into a folder reached through
+one.  Resolver.follow() walks such chains to the directory files actually
+land in, and reports what it met on the way:
+
+    dangling    -- the chain ends at a path that does not exist
+    cycle       -- the chain leads back to a link already followed
+    chain       -- a target is itself a link
+    into-link   -- a target lies inside a folder reached through a link
+
+Every probe is memoized.  A memoized link is revalidated with one lstat:
+if its kind and mtime are unchanged, its target is reused without another
+readlink.  Entries whose mtime was within RACY_SECONDS of the time they were
+cached are not trusted (a link replaced within the same timestamp tick would
+look unchanged), and the memo is dropped when the active backend changes.
+A snapshot resolver trusts its memo outright, for one pass over a tree
+that is not expected to change, such as an audit.
+"""
+
+import os
+import time
+
+from win_quick_shuttle import links
+
+
+MEMO_LIMIT = 100_000
+MAX_HOPS = 40
+RACY_SECONDS = 2.0
+
+
+class Resolver:
+    """Multi-hop link resolution over the active backend."""
+
+    def __init__(self, snapshot=False):
+        self.snapshot = snapshot        # True: never revalidate memoized probes
+        self._memo = {}                 # normcase(path) -> (Probe, trusted)
+        self._backend = None            # Backend the memo was filled from
+
+    def lookup(self, path):
+        """Return a Probe of path (with its target), from the memo when still valid."""
+        backend = links.get_backend()
+        if backend is not self._backend:
+            self._memo = {}
+            self._backend = backend
+        key = os.path.normcase(path)
+        cached = self._memo.get(key)
+        if cached is not None:
+            state, trusted = cached
+            if self.snapshot:
+                return state
+            if trusted:
+                fresh = backend.probe(path, read_target=False)
+                if fresh.kind == state.kind and fresh.mtime == state.mtime:
+                    return state
+                if not fresh.is_link:
+                    self._remember(key, fresh)
+                    return fresh
+
+        state = backend.probe(path)
+        self._remember(key, state)
+        return state
+
+    def _remember(self, key, state):
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo = {}
+        trusted = state.mtime is not None and state.mtime < time.time() - RACY_SECONDS
+        self._memo[key] = (state, trusted)
+
+    def _first_link(self, path):
+        """Return (prefix, probe) for the first missing or linked parent of path, or (None, None)."""
+        drive, rest = os.path.splitdrive(path)
+        prefix = drive + os.sep if rest.startswith(os.sep) else drive
+        parts = [part for part in rest.split(os.sep) if part]
+        for part in parts[:-1]:
+            prefix = os.path.join(prefix, part)
+            state = self.lookup(prefix)
+            if not state.exists or state.is_link:
+                return prefix, state
+        return None, None
+
+    def follow(self, link_path, target):
+        """Follow target as if link_path pointed at it.  Returns (resolved, chain, problems).
+
+        chain lists the links followed after link_path, in order; resolved
+        is the final path, or None for a dangling or cyclic chain.
+        """
+        seen = {os.path.normcase(os.path.normpath(link_path))}
+        chain, problems = [], []
+        path = os.path.normpath(os.path.join(os.path.dirname(link_path), target))
+        for _ in range(MAX_HOPS):
+            prefix, state = self._first_link(path)
+            if prefix is None:
+                prefix, state = path, self.lookup(path)
+                if state.is_link and "chain" not in problems:
+                    problems.append("chain")
+            elif state.is_link and "into-link" not in problems:
+                problems.append("into-link")
+
+            if not state.exists:
+                problems.append("dangling")
+                return None, chain, problems
+            if not state.is_link:
+                return path, chain, problems
+            if state.target is None:
+                problems.append("dangling")
+                return None, chain, problems
+            if os.path.normcase(prefix) in seen:
+                problems.append("cycle")
+                return None, chain, problems
+
+            seen.add(os.path.normcase(prefix))
+            chain.append(prefix)
+            rest = os.path.relpath(path, prefix) if path != prefix else ""
+            path = os.path.normpath(os.path.join(os.path.dirname(prefix), state.target, rest))
+        problems.append("cycle")
+        return None, chain, problems
+
+    def resolve(self, path):
+        """Follow the link at path to its end.  Returns (resolved, chain, problems).
+
+        A path that is not a link resolves to itself, or to None if missing.
+        """
+        state = self.lookup(path)
+        if not state.is_link:
+            return (path if state.exists else None), [], []
+        if state.target is None:
+            return None, [], ["dangling"]
+        return self.follow(path, state.target)
@@ -0,0 +1,488 @@
+"""Sort the files that land in the junction's target into folders chosen by rules.
+
+Rules live in `.win-quick-shuttle/routes.json`, an ordered list.  The first
+rule whose conditions all hold says where a file goes:
+
+    [
+      {"ext": "pdf", "to": "D:\\\\Docs"},
+      {"ext": ["stl", "3mf"], "to": "D:\\\\Printing"},
+      {"glob": "invoice-*", "min_size": 1024, "to": "D:\\\\Invoices"},
+      {"source": "*://*.github.com/*", "to": "D:\\\\Code"}
+    ]
+
+    ext       -- the file's last extension, one or a list (case-insensitive)
+    glob      -- pattern for the file name, one or a list (case-insensitive)
+    min_size, max_size -- bytes
+    source    -- pattern for the URL the file was downloaded from (the
+                 browser records it in the Zone.Identifier stream on Windows
+                 and the user.xdg.origin.url attribute elsewhere)
+
+A rule with no conditions matches everything; files no rule matches stay put,
+as do files whose rule points back at the folder being routed.
+
+compile_rules() builds a Matcher once: each extension maps straight to the
+rules that can match it, globs become one compiled regex per rule, and a
+file's download source is only read when a remaining candidate asks for it.
+
+A Router follows the junction -- every scan resolves it again, so a repoint
+is picked up -- and moves a file once it is complete: never while it has a
+partial-download suffix, and only after its size and mtime have held for
+`settle` seconds or (with inotify) its writer has closed it.  With inotify
+the router sleeps until something arrives, then stats just the names
+reported; the whole folder is only listed again after a repoint or when the
+kernel dropped events.  Without it, the folder is listed every `interval`
+seconds.  Complete files
+are moved in batches per destination: with one rename each on the same
+volume, and across volumes by a streaming copy (see migrate.copy_file) on a
+thread pool.  A name already taken in the destination gets " (2)", " (3)"...
+"""
+
+import fnmatch
+import json
+import os
+import re
+import select
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from win_quick_shuttle import junctions, migrate, watcher
+
+
+ROUTES_FILENAME = "routes.json"
+SETTLE = 1.0
+INTERVAL = 0.5
+DEBOUNCE = 0.05
+MAX_COALESCE = 0.5
+DEFAULT_WORKERS = 4
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".partial", ".download", ".tmp", migrate.PART_SUFFIX)
+ROUTE_MASK = watcher.IN_CLOSE_WRITE | watcher.IN_MOVED_TO
+WATCH_MASK = ROUTE_MASK | watcher.IN_CREATE
+
+_CONDITIONS = ("ext", "glob", "min_size", "max_size", "source")
+_UNREAD = object()
+
+
+# --- Rules ---
+
+def download_source(path):
+    """Return the URL a downloaded file came from, or None if it was not recorded."""
+    if os.name == "nt":
+        try:
+            with open(f"{path}:Zone.Identifier", "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if line.startswith("HostUrl="):
+                        return line[len("HostUrl="):].strip()
+        except OSError:
+            pass
+        return None
+    try:
+        return os.getxattr(path, "user.xdg.origin.url").decode("utf-8", "replace")
+    except (OSError, AttributeError):
+        return None
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _glob_regex(patterns):
+    """Compile case-insensitive glob patterns into one regex."""
+    return re.compile("|".join(fnmatch.translate(pattern.lower()) for pattern in patterns))
+
+
+class Rule:
+    """One compiled rule."""
+
+    __slots__ = ("number", "to", "exts", "names", "min_size", "max_size", "sources")
+
+    def __init__(self, number, spec):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Rule {number}: expected an object")
+        unknown = sorted(set(spec) - set(_CONDITIONS) - {"to"})
+        if unknown:
+            raise ValueError(f"Rule {number}: unknown key {unknown[0]!r}")
+        if not spec.get("to"):
+            raise ValueError(f"Rule {number}: no destination (\"to\")")
+        self.number = number
+        self.to = spec["to"]
+        self.exts = None
+        if "ext" in spec:
+            self.exts = frozenset(ext.lower().lstrip(".") for ext in _as_list(spec["ext"]))
+        self.names = _glob_regex(_as_list(spec["glob"])) if "glob" in spec else None
+        self.sources = _glob_regex(_as_list(spec["source"])) if "source" in spec else None
+        self.min_size = spec.get("min_size")
+        self.max_size = spec.get("max_size")
+        for key in ("min_size", "max_size"):
+            if spec.get(key) is not None and not isinstance(spec[key], int):
+                raise ValueError(f"Rule {number}: {key} must be a whole number of bytes")
+
+
+class Matcher:
+    """Ordered rules, indexed by extension."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._any_ext = tuple(rule for rule in rules if rule.exts is None)
+        self._by_ext = {}               # ext -> rules that can match it, in order
+        for ext in set().union(*(rule.exts for rule in rules if rule.exts is not None)):
+            self._by_ext[ext] = tuple(rule for rule in rules if rule.exts is None or ext in rule.exts)
+
+    def match(self, name, size, path=None):
+        """Return the first Rule matching a file, or None.  path is only read for source rules."""
+        lowered = name.lower()
+        candidates = self._by_ext.get(os.path.splitext(lowered)[1][1:], self._any_ext)
+        source = _UNREAD
+        for rule in candidates:
+            if rule.min_size is not None and size < rule.min_size:
+                continue
+            if rule.max_size is not None and size > rule.max_size:
+                continue
+            if rule.names is not None and not rule.names.match(lowered):
+                continue
+            if rule.sources is not None:
+                if source is _UNREAD:
+                    source = download_source(path) if path else None
+                if source is None or not rule.sources.match(source.lower()):
+                    continue
+            return rule
+        return None
+
+
+def _same_folder(a, b):
+    return os.path.normcase(os.path.realpath(a)) == os.path.normcase(os.path.realpath(b))
+
+
+def compile_rules(specs, watched=()):
+    """Compile a list of rule dicts into a Matcher; raises ValueError naming a bad rule.
+
+    watched: folders the rules sort files out of (the junction, which stands
+    for its target).  A rule sending files back into one is refused: it would
+    move the same file forever.
+    """
+    if not isinstance(specs, list):
+        raise ValueError("Rules must be a list")
+    rules = [Rule(number, spec) for number, spec in enumerate(specs, 1)]
+    for rule in rules:
+        if any(_same_folder(rule.to, folder) for folder in watched):
+            raise ValueError(f"Rule {rule.number}: destination is the folder being routed")
+    return Matcher(rules)
+
+
+def load_rules(path, watched=()):
+    """Read and compile the rules in path."""
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_rules(json.load(f), watched)
+
+
+# --- Moving ---
+
+def _free_name(folder, name):
+    """Return a path in folder for name that is not taken yet."""
+    path = os.path.join(folder, name)
+    stem, ext = os.path.splitext(name)
+    n = 1
+    while os.path.lexists(path):
+        n += 1
+        path = os.path.join(folder, f"{stem} ({n}){ext}")
+    return path
+
+
+def _rename_into(src, folder, name):
+    """Rename src into folder without replacing anything; returns the new path."""
+    while True:
+        dst = _free_name(folder, name)
+        try:
+            if os.name == "nt":
+                os.rename(src, dst)     # Refuses to replace an existing file
+            else:
+                os.link(src, dst)       # Likewise; a plain rename would replace one that just appeared
+                os.unlink(src)
+            return dst
+        except FileExistsError:
+            continue
+        except PermissionError:
+            if os.name == "nt":
+                raise
+            os.rename(src, dst)         # Filesystem without hard links
+            return dst
+
+
+def _copy_into(src, folder, name):
+    """Copy src into folder, then remove it; returns the new path."""
+    dst = _free_name(folder, name)
+    migrate.copy_file(src, dst)
+    os.remove(src)
+    return dst
+
+
+# --- Router ---
+
+class Router:
+    """Move complete files out of the junction's current target by rule."""
+
+    def __init__(self, junction_path, matcher, settle=SETTLE, interval=INTERVAL,
+                 workers=DEFAULT_WORKERS, on_move=None, use_inotify=True, on_arrival=None):
+        self.junction_path = junction_path
+        self.matcher = matcher
+        self.settle = settle
+        self.interval = interval
+        self.workers = workers
+        self.on_move = on_move          # Called with a result dict per routed file
+        self.on_arrival = on_arrival    # Called with (path, size) per complete file, before matching
+        self.use_inotify = use_inotify
+        self.target = None              # Folder being routed (the junction's resolved target)
+        self.stats = {"scans": 0, "listings": 0, "routed": 0, "bytes": 0, "unmatched": 0, "errors": 0}
+        self._pending = {}              # name -> ((size, mtime_ns), first seen with that signature)
+        self._unmatched = {}            # name -> signature no rule matched
+        self._pool = None
+        self._fd = None                 # inotify watch on the target
+        self._junction_fd = None        # inotify watch on the junction's folder, for repoints
+        self._junction_name = os.fsencode(os.path.basename(os.path.normpath(junction_path)))
+        self._stopping = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._thread = None
+        self._same_volume = {}          # destination -> bool, for the current target
+        self._into_target = {}          # destination -> whether it is the current target
+
+    # --- Scanning ---
+
+    def scan(self, closed=(), names=None):
+        """Scan the target and route every complete file; returns the result dicts.
+
+        closed: names the writer is known to have finished (inotify).
+        names: only look at these names (and files still settling) instead of
+        listing the whole folder; a repoint still lists the new target.
+        """
+        self.stats["scans"] += 1
+        resolved = junctions.resolve_junction(self.junction_path)[0]
+        if resolved is None:
+            return []
+        if resolved != self.target:
+            self._retarget(resolved)
+            names = None
+
+        now = time.monotonic()
+        due = []
+        if names is None:
+            self.stats["listings"] += 1
+            seen = set()
+            try:
+                entries = os.scandir(resolved)
+            except OSError:
+                return []
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.lower().endswith(PARTIAL_SUFFIXES):
+                        continue
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    seen.add(name)
+                    self._consider(name, st, now, closed, due)
+            for gone in [name for name in self._pending if name not in seen]:
+                del self._pending[gone]
+            for gone in [name for name in self._unmatched if name not in seen]:
+                del self._unmatched[gone]
+        else:
+            for name in set(names) | set(self._pending):
+                if name.lower().endswith(PARTIAL_SUFFIXES):
+                    continue
+                try:
+                    st = os.lstat(os.path.join(resolved, name))
+                except OSError:
+                    self._pending.pop(name, None)
+                    self._unmatched.pop(name, None)
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    self._consider(name, st, now, closed, due)
+        return self._route(resolved, due)
+
+    def _consider(self, name, st, now, closed, due):
+        """Add a file to due once it is complete, else note it as settling."""
+        signature = (st.st_size, st.st_mtime_ns)
+        if self._unmatched.get(name) == signature:
+            return
+        previous = self._pending.get(name)
+        since = previous[1] if previous and previous[0] == signature else now
+        if name in closed or now - since >= self.settle:
+            self._pending.pop(name, None)
+            due.append((name, st.st_size, signature))
+        elif previous is None or previous[0] != signature:
+            self._pending[name] = (signature, now)
+
+    def _retarget(self, resolved):
+        """Start over on a new target folder."""
+        self.target = resolved
+        self._pending.clear()
+        self._unmatched.clear()
+        self._same_volume.clear()
+        self._into_target.clear()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self.use_inotify and self._thread is not None:
+            self._fd = watcher._open_inotify(resolved, WATCH_MASK)
+
+    def _route(self, folder, due):
+        """Match due files to rules and move them, one batch per destination."""
+        batches = {}
+        for name, size, signature in due:
+            if self.on_arrival:
+                self.on_arrival(os.path.join(folder, name), size)
+            rule = self.matcher.match(name, size, os.path.join(folder, name))
+            if rule is not None and self._is_target(rule.to, folder):
+                rule = None             # Moving it "there" would find it again on the next scan
+            if rule is None:
+                self._unmatched[name] = signature
+                self.stats["unmatched"] += 1
+                continue
+            batches.setdefault(rule.to, []).append((name, size, rule))
+
+        results = []
+        for dest, batch in batches.items():
+            results.extend(self._move_batch(folder, dest, batch))
+        return results
+
+    def _is_target(self, dest, folder):
+        """True if dest is the folder being routed (cached until the next retarget)."""
+        same = self._into_target.get(dest)
+        if same is None:
+            same = self._into_target[dest] = _same_folder(dest, folder)
+        return same
+
+    def _move_batch(self, folder, dest, batch):
+        """Move one destination's files: renames inline, cross-volume copies on the pool."""
+        def move(item):
+            name, size, rule = item
+            try:
+                if same:
+                    dst = _rename_into(os.path.join(folder, name), dest, name)
+                else:
+                    dst = _copy_into(os.path.join(folder, name), dest, name)
+            except OSError as e:
+                return self._result(folder, name, rule, None, size, e)
+            return self._result(folder, name, rule, dst, size)
+
+        try:
+            os.makedirs(dest, exist_ok=True)
+            same = self._same_volume.get(dest)
+            if same is None:
+                same = self._same_volume[dest] = migrate.same_volume(folder, dest)
+        except OSError as e:
+            results = [self._result(folder, name, rule, None, size, e) for name, size, rule in batch]
+        else:
+            if same or len(batch) == 1:
+                results = [move(item) for item in batch]
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="wqs-router")
+                results = list(self._pool.map(move, batch))
+        for result in results:
+            self._count(result)
+        return results
+
+    def _result(self, folder, name, rule, dst, size, error=None):
+        return {"file": os.path.join(folder, name), "to": dst, "rule": rule.number, "size": size,
+                "ok": error is None, "message": "" if error is None else (error.strerror or str(error))}
+
+    def _count(self, result):
+        """Count and report one move (on the scanning thread)."""
+        if result["ok"]:
+            self.stats["routed"] += 1
+            self.stats["bytes"] += result["size"]
+        else:
+            self.stats["errors"] += 1
+        if self.on_move:
+            self.on_move(result)
+
+    # --- Running ---
+
+    def start(self):
+        """Route in a background thread until stop()."""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="wqs-router", daemon=True)
+        if self.use_inotify and os.name != "nt":
+            self._wake_r, self._wake_w = os.pipe()
+            self._junction_fd = watcher._open_inotify(
+                os.path.dirname(os.path.abspath(self.junction_path)), watcher.WATCH_MASK)
+        self.target = None              # So the first scan opens the watch
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop routing and wait for the thread to exit."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+        self._thread.join()
+        self._thread = None
+        for fd in (self._fd, self._junction_fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._junction_fd = self._wake_r = self._wake_w = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _run(self):
+        closed, names = set(), None
+        while not self._stopping.is_set():
+            self.scan(closed, names)
+            closed, names = self._wait()
+
+    def _next_scan(self):
+        """Seconds until a scan is due with nothing reported, or None to wait for inotify."""
+        timeout = None if self._junction_fd is not None else self.interval
+        if self._pending:
+            settled = min(since for _, since in self._pending.values()) + self.settle - time.monotonic()
+            timeout = max(0.0, settled) if timeout is None else min(timeout, max(0.0, settled))
+        return timeout
+
+    def _wait(self):
+        """Sleep until the next scan is due.
+
+        Returns (closed, names): the names inotify saw closed or moved in, and
+        the names to look at -- None to list the whole target.  Without inotify
+        every scan lists it.  With inotify the thread sleeps until an event, a
+        settling file is due, or (if the junction itself cannot be watched)
+        the next interval; events only cost a stat of the names they carry.
+        """
+        if self._fd is None or self._wake_r is None:
+            self._stopping.wait(self.interval)
+            return set(), None
+        closed = set()
+        names = set()
+        timeout = self._next_scan()
+        deadline = None
+        while True:
+            watched = [self._wake_r, self._fd] + ([self._junction_fd] if self._junction_fd is not None else [])
+            ready, _, _ = select.select(watched, [], [], timeout)
+            if self._wake_r in ready or not ready:
+                return closed, names
+            if self._junction_fd is not None and self._junction_fd in ready:
+                _, lost = watcher._read_inotify(self._junction_fd, self._junction_name)
+                if lost:
+                    os.close(self._junction_fd)
+                    self._junction_fd = None
+            if self._fd in ready:
+                for _wd, mask, name in watcher._read_events(self._fd):
+                    if mask & (watcher.IN_Q_OVERFLOW | watcher.IN_IGNORED):
+                        self.target = None      # Events were lost, or the folder went: list it again
+                    elif name:
+                        names.add(os.fsdecode(name))
+                        if mask & ROUTE_MASK:
+                            closed.add(os.fsdecode(name))
+            # Coalesce the rest of a burst into one scan
+            if deadline is None:
+                deadline = time.monotonic() + MAX_COALESCE
+            timeout = min(DEBOUNCE, max(0.0, deadline - time.monotonic()))
+            if not timeout:
+                return closed, names
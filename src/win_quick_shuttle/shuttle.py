@@ -0,0 +1,139 @@
+"""Embeddable API: one Shuttle object per junction.
+
+    from win_quick_shuttle.shuttle import Shuttle
+
+    shuttle = Shuttle(r"C:\\Users\\You\\Downloads\\ACTIVE")
+    shuttle.point(r"D:\\jobs\\41")               # (success, message)
+    with shuttle.pointed_at(r"D:\\jobs\\42"):
+        run_job()                                # back at D:\\jobs\\41 afterwards
+    shuttle.status()
+
+Each call probes the junction once and switches it through the same helpers
+the CLI and GUI use, so switches take the junction's switch lock and go to
+the switch journal when it is on.  A target is validated the first time a
+Shuttle points at it and trusted afterwards (forget() drops that cache), and
+pointing at the current target changes nothing, so a per-job redirect costs
+one probe plus the link syscalls.
+
+A Shuttle may be shared between threads.  Its calls are serialized, and a
+pointed_at() scope holds the Shuttle for its whole body, so scopes from
+different threads take turns rather than restoring over each other; nested
+scopes in one thread are fine.  exclusive=True skips the cross-process lock
+file, for a junction that no other process switches.
+"""
+
+import contextlib
+import threading
+
+from win_quick_shuttle import junctions, locks
+
+
+class SwitchError(OSError):
+    """A pointed_at() scope could not switch or restore the junction."""
+
+
+class Shuttle:
+    """A junction that can be pointed, unlinked and scoped from any thread."""
+
+    def __init__(self, junction_path, atomic=True, exclusive=False):
+        self.junction_path = junction_path
+        self.atomic = atomic
+        self.exclusive = exclusive
+        self.target = None              # Where this Shuttle last pointed the junction (None: unlinked/unknown)
+        self._lock = threading.RLock()
+        self._validated = set()         # Targets check_point_to() has passed
+
+    def _switch_lock(self):
+        return locks.SwitchLock(self.junction_path, cross_process=not self.exclusive)
+
+    # --- Switching ---
+
+    def point(self, target_path):
+        """Point the junction at target_path.  Returns (success, message)."""
+        with self._lock:
+            success, message, _ = self._point(target_path)
+            return success, message
+
+    def unlink(self):
+        """Remove the junction.  Returns (success, message)."""
+        with self._lock:
+            success, message, _ = self._unlink()
+            return success, message
+
+    def _point(self, target_path):
+        """Returns (success, message, probe taken before the switch)."""
+        try:
+            with self._switch_lock():
+                state = junctions.probe(self.junction_path)
+                if state.is_link and junctions.same_target(state.target, target_path):
+                    self.target = target_path
+                    return True, "Junction already points there", state
+                if target_path not in self._validated:
+                    error = junctions.check_point_to(target_path, state)
+                    if error:
+                        return False, error, state
+                    self._validated.add(target_path)
+                elif state.exists and not state.is_link:
+                    return False, "Junction path exists but is not a junction", state
+                success, message = junctions.switch_junction(self.junction_path, target_path, state, self.atomic)
+        except OSError as e:
+            return False, str(e), None
+        if success:
+            self.target = target_path
+        else:
+            self._validated.discard(target_path)
+        return success, message, state
+
+    def _unlink(self):
+        """Returns (success, message, probe taken before the removal)."""
+        try:
+            with self._switch_lock():
+                state = junctions.probe(self.junction_path)
+                error = junctions.check_unlink(state)
+                if error:
+                    return False, error, state
+                success, message = junctions.drop_junction(self.junction_path, state)
+        except OSError as e:
+            return False, str(e), None
+        if success:
+            self.target = None
+        return success, message, state
+
+    @contextlib.contextmanager
+    def pointed_at(self, target_path):
+        """Point at target_path for the body of a with block, then restore what was there.
+
+        Raises SwitchError if either switch fails.
+        """
+        with self._lock:
+            success, message, previous = self._point(target_path)
+            if not success:
+                raise SwitchError(message)
+            try:
+                yield self
+            finally:
+                self._restore(previous)
+
+    def _restore(self, previous):
+        """Put back the junction described by previous."""
+        if previous.is_link:
+            if previous.target is None:
+                raise SwitchError("Previous target was unreadable; cannot restore it")
+            success, message, _ = self._point(previous.target)
+        elif not previous.exists:
+            success, message, _ = self._unlink()
+        else:
+            return
+        if not success:
+            raise SwitchError(f"Could not restore the junction: {message}")
+
+    def forget(self):
+        """Drop the cache of validated targets."""
+        with self._lock:
+            self._validated.clear()
+
+    # --- Reading ---
+
+    def status(self):
+        """Return junction_status() for the junction (never waits on a switch)."""
+        return junctions.junction_status(self.junction_path)
@@ -0,0 +1,154 @@
+"""Opt-in operation tracing.
+
+Functions decorated with @traced("name") record a span -- name, start time,
+duration and outcome -- every time they run while tracing is enabled.  Spans
+go to an in-memory ring buffer and, optionally, to a JSON-lines file that
+`win-quick-shuttle stats` summarizes.
+
+When tracing is off, a traced call costs one dict lookup on top of the call
+itself.  Set WQS_TRACE=<file> in the environment to trace a whole process.
+
+Outcomes:
+    ok     -- returned normally (or returned (True, ...))
+    fail   -- returned (False, ...), the repo's convention for a failed operation
+    error  -- raised
+"""
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+
+RING_SIZE = 10000
+
+# Tracing state
+g = {
+    "enabled": False,
+    "file": None,       # Open JSON-lines file, or None for memory only
+    "path": None,
+}
+
+ring = collections.deque(maxlen=RING_SIZE)
+_file_lock = threading.Lock()
+
+
+# --- Control ---
+
+def enable(path=None):
+    """Start recording spans; also append them to path if given."""
+    disable()
+    if path:
+        g["file"] = open(path, "a", encoding="utf-8")
+        g["path"] = path
+    g["enabled"] = True
+
+
+def disable():
+    """Stop recording spans and close the trace file."""
+    g["enabled"] = False
+    with _file_lock:
+        if g["file"]:
+            g["file"].close()
+        g["file"] = None
+        g["path"] = None
+
+
+def clear():
+    """Forget the spans in the ring buffer."""
+    ring.clear()
+
+
+def spans():
+    """Return a list of the spans currently in the ring buffer."""
+    return list(ring)
+
+
+# --- Recording ---
+
+def _outcome(result):
+    """Classify a return value as ok or fail."""
+    if isinstance(result, tuple) and result and result[0] is False:
+        return "fail"
+    return "ok"
+
+
+def record(name, start, seconds, outcome):
+    """Record one span."""
+    span = {"op": name, "start": start, "ms": seconds * 1000.0, "outcome": outcome}
+    ring.append(span)
+    if g["file"] is not None:
+        line = json.dumps(span) + "\n"
+        with _file_lock:
+            if g["file"] is not None:
+                g["file"].write(line)
+                g["file"].flush()
+
+
+def traced(name):
+    """Decorator: record a span for every call while tracing is enabled."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not g["enabled"]:
+                return fn(*args, **kwargs)
+            start = time.time()
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(name, start, time.perf_counter() - t0, "error")
+                raise
+            record(name, start, time.perf_counter() - t0, _outcome(result))
+            return result
+        return wrapper
+    return decorate
+
+
+# --- Reporting ---
+
+def load_spans(path):
+    """Read spans back from a JSON-lines trace file."""
+    result = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                result.append(json.loads(line))
+    return result
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0..1) of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def stats(span_list):
+    """Summarize spans per operation: count, failures and p50/p95/p99 in ms."""
+    by_op = collections.defaultdict(list)
+    failures = collections.Counter()
+    for span in span_list:
+        by_op[span["op"]].append(span["ms"])
+        if span["outcome"] != "ok":
+            failures[span["op"]] += 1
+
+    summary = {}
+    for op, durations in by_op.items():
+        durations.sort()
+        summary[op] = {
+            "count": len(durations),
+            "failures": failures[op],
+            "p50_ms": percentile(durations, 0.50),
+            "p95_ms": percentile(durations, 0.95),
+            "p99_ms": percentile(durations, 0.99),
+        }
+    return summary
+
+
+if os.environ.get("WQS_TRACE"):
+    enable(os.environ["WQS_TRACE"])
@@ -0,0 +1,205 @@
+"""Background disk-usage scanner for the GUI's target folders.
+
+A Scanner adds up the size and file count of a folder tree on its own
+thread and reports running totals, plus the free space on the folder's
+volume, to a callback every PROGRESS_INTERVAL seconds, so a label can fill
+in while a large tree is still being measured.
+
+Each directory's own total (the files directly in it) is kept in a
+UsageCache, persisted to `.win-quick-shuttle/usage.json`:
+
+    {"version": 1,
+     "dirs": {"C:\\\\Projects\\\\A": [mtime_ns, bytes, files, ["sub", ...]], ...}}
+
+A directory whose mtime has not changed costs one stat() on the next scan;
+only changed directories are listed again.  A file rewritten in place
+without its directory changing keeps its old size until the directory next
+changes.  Like the crawler, the scanner does not follow links or junctions.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+from win_quick_shuttle import links
+
+
+CACHE_FILENAME = "usage.json"
+CACHE_VERSION = 1
+PROGRESS_INTERVAL = 0.1
+
+
+def format_bytes(size):
+    """Return size as '1.5 GB'."""
+    if size < 1000:
+        return f"{size} bytes"
+    for unit in ("KB", "MB", "GB", "TB"):
+        size /= 1000
+        if size < 1000 or unit == "TB":
+            return f"{size:.1f} {unit}"
+
+
+def describe(report):
+    """Return a one-line summary of a scan report for a label."""
+    if report.get("error"):
+        return report["error"]
+    text = f"{format_bytes(report['bytes'])} in {report['files']:,} files"
+    if report["free"] is not None:
+        text += f"  ·  {format_bytes(report['free'])} free"
+    if not report["done"]:
+        text += "  (measuring...)"
+    return text
+
+
+class UsageCache:
+    """Per-directory totals shared by scanners, optionally saved to a file."""
+
+    def __init__(self, path=None):
+        self.path = path        # Saved cache, or None to keep it in memory
+        self.dirs = {}          # dir -> [mtime_ns, bytes, files, [subdir names]]
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        """Read the saved cache once (on a scanner thread; it may be large)."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return
+            if data.get("version") == CACHE_VERSION:
+                self.dirs = data["dirs"]
+
+    def put(self, path, entry):
+        """Record one directory's totals."""
+        with self._lock:
+            self.dirs[path] = entry
+
+    def save(self, root, seen):
+        """Drop entries under root that a scan no longer found, then write the cache."""
+        with self._lock:
+            prefix = os.path.join(root, "")
+            for path in [p for p in self.dirs if (p == root or p.startswith(prefix)) and p not in seen]:
+                del self.dirs[path]
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "dirs": self.dirs}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+
+class Scanner:
+    """Measure one folder tree in the background, reporting as it goes."""
+
+    def __init__(self, root, cache, on_progress=None, progress_interval=PROGRESS_INTERVAL):
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.cache = cache
+        self.on_progress = on_progress      # Called (on the scanner thread) with report dicts
+        self.progress_interval = progress_interval
+        self.report = {"path": self.root, "bytes": 0, "files": 0, "dirs": 0, "free": None,
+                       "done": False, "error": None}
+        self.stats = {"listed": 0, "reused": 0, "errors": 0}
+        self.finished = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Scan on a background thread."""
+        self._thread = threading.Thread(target=self.run, name="wqs-usage", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the scan to stop soon, without waiting for it (safe on the Tk thread)."""
+        self._stopping.set()
+
+    def stop(self):
+        """Abandon the scan and wait for the thread to exit."""
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        """Scan the tree, reporting running totals, then the final one."""
+        try:
+            self.cache.load()
+            try:
+                if not os.path.isdir(self.root):
+                    raise NotADirectoryError(self.root)
+                self.report["free"] = shutil.disk_usage(self.root).free
+            except OSError:
+                self.report.update(done=True, error="No such folder")
+                self._emit()
+                return
+            self._emit()
+            seen = self.scan()
+            if seen is None:
+                return
+            self.report["done"] = True
+            self._emit()
+            self.cache.save(self.root, seen)
+        finally:
+            self.finished.set()
+
+    def scan(self):
+        """Walk the tree adding up totals; returns the directories seen, or None if cancelled."""
+        seen = set()
+        stack = [self.root]
+        last = time.monotonic()
+        while stack:
+            if self._stopping.is_set():
+                return None
+            path = stack.pop()
+            try:
+                entry = self._visit(path)
+            except OSError:
+                self.stats["errors"] += 1
+                continue
+            seen.add(path)
+            self.report["bytes"] += entry[1]
+            self.report["files"] += entry[2]
+            self.report["dirs"] += 1
+            stack.extend(os.path.join(path, name) for name in entry[3])
+            now = time.monotonic()
+            if now - last >= self.progress_interval:
+                last = now
+                self._emit()
+        return seen
+
+    def _visit(self, path):
+        """Return [mtime_ns, bytes, files, subdir names] for path, listing it only if it changed."""
+        mtime = os.stat(path).st_mtime_ns
+        saved = self.cache.dirs.get(path)
+        if saved is not None and saved[0] == mtime:
+            self.stats["reused"] += 1
+            return saved
+        size = files = 0
+        names = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if links.entry_kind(entry) == links.KIND_DIR:
+                        names.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except OSError:
+                    continue
+        self.stats["listed"] += 1
+        entry = [mtime, size, files, sorted(names)]
+        self.cache.put(path, entry)
+        return entry
+
+    def _emit(self):
+        if self.on_progress and not self._stopping.is_set():
+            self.on_progress(dict(self.report))
@@ -0,0 +1,223 @@
+"""Write-ahead journal of junction switches.
+
+Before a junction is changed, the intent -- junction, old target, new target
+-- is appended to `.win-quick-shuttle/switches.wal` and made durable; the
+outcome is appended once the switch is over.  One JSON object per line:
+
+    {"id": "5f0c...e1", "junction": "C:\\\\Downloads\\\\ACTIVE", "old": "D:\\\\a",
+     "new": "D:\\\\b", "time": 1700000000.0}                 -- intent
+    {"id": "5f0c...e1", "outcome": "done"}                    -- outcome
+
+Ids are random (uuid4), so they never repeat across runs the way a
+process id and counter would once PIDs are reused.
+
+old or new is None for a junction that did not exist before, or that is
+being removed.  "undoes" names the switch an undo reverses.  Outcomes:
+
+    done         -- the switch succeeded
+    failed       -- the switch failed and changed nothing
+    completed    -- found finished by recovery
+    rolled-back  -- found half-done by recovery and restored to old
+    abandoned    -- found changed by someone else; left alone
+
+Every junction's history lives in the one file so that concurrent switches
+-- the daemon's clients, a profile applied in parallel -- share fsyncs: an
+intent waits only until some thread's fsync covers it (group commit), and
+outcomes are written without an fsync at all, since recovery can tell from
+the junction itself how an unfinished switch ended.
+
+Lines are written with a single os.write on an O_APPEND descriptor, so
+several processes can share the file.  Once it grows past MAX_BYTES it is
+rotated to `switches.wal.1`; records() reads both generations.
+
+The journal is off until enable() is called (the CLI does so for commands
+that switch junctions); begin() and end() are then no-ops.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+
+WAL_FILENAME = "switches.wal"
+MAX_BYTES = 4 * 1024 * 1024
+COMPLETED = ("done", "completed")
+
+# Journal state
+g = {
+    "journal": None,        # Open Journal, or None when journaling is off
+}
+
+
+class Journal:
+    """An append-only switch journal with group-committed intents."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fsyncs = 0
+        self._cond = threading.Condition()
+        self._pending = []              # Encoded lines not yet written
+        self._queued = 0                # Lines ever queued
+        self._synced = 0                # Lines known to be on disk
+        self._syncing = False           # A thread is writing and fsyncing outside the lock
+        self._rotate_if_large()
+        self._fd = self._open()
+
+    def _open(self):
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+
+    def _rotate_if_large(self):
+        """Move a large journal aside (keeping one older generation)."""
+        try:
+            if os.path.getsize(self.path) > MAX_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+        except OSError:
+            pass                        # Missing, or held open elsewhere on Windows: try next time
+
+    def close(self):
+        """Write anything still queued, fsync, and close the file."""
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            self._write_pending()
+            os.fsync(self._fd)
+            os.close(self._fd)
+
+    # --- Appending ---
+
+    def begin(self, junction_path, old_target, new_target, undoes=None):
+        """Durably record the intent to switch; returns the switch id."""
+        switch_id = uuid.uuid4().hex
+        record = {"id": switch_id, "junction": junction_path, "old": old_target,
+                  "new": new_target, "time": time.time()}
+        if undoes is not None:
+            record["undoes"] = undoes
+        self._append(record, durable=True)
+        return switch_id
+
+    def end(self, switch_id, outcome):
+        """Record how a switch ended (written, but not fsynced)."""
+        self._append({"id": switch_id, "outcome": outcome}, durable=False)
+
+    def _append(self, record, durable):
+        with self._cond:
+            self._pending.append(json.dumps(record) + "\n")
+            self._queued += 1
+            mine = self._queued
+            if not durable:
+                if not self._syncing:
+                    self._write_pending()
+                return
+            while self._synced < mine:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                # Lead a group commit: everything queued so far goes out in one write and one fsync
+                self._syncing = True
+                lines, self._pending = self._pending, []
+                upto = self._queued
+                self._cond.release()
+                try:
+                    os.write(self._fd, "".join(lines).encode("utf-8"))
+                    os.fsync(self._fd)
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._cond.notify_all()
+                self.fsyncs += 1
+                self._synced = upto
+                # Outcomes queued while we were syncing go out now, not with the next intent
+                self._write_pending()
+
+    def _write_pending(self):
+        """Write queued lines without an fsync (lock held, no sync in flight)."""
+        if self._pending:
+            os.write(self._fd, "".join(self._pending).encode("utf-8"))
+            self._pending = []
+
+    # --- Reading ---
+
+    def records(self):
+        """Yield every readable record, oldest first."""
+        for path in (f"{self.path}.1", self.path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue    # Torn line from an interrupted or concurrent write
+            except FileNotFoundError:
+                continue
+
+
+# --- Control ---
+
+def enable(path):
+    """Start journaling switches to path."""
+    disable()
+    g["journal"] = Journal(path)
+    return g["journal"]
+
+
+def disable():
+    """Stop journaling and close the file."""
+    journal, g["journal"] = g["journal"], None
+    if journal is not None:
+        journal.close()
+
+
+def begin(junction_path, old_target, new_target, undoes=None):
+    """Record a switch intent if journaling is on; returns its id or None."""
+    journal = g["journal"]
+    if journal is None:
+        return None
+    return journal.begin(junction_path, old_target, new_target, undoes)
+
+
+def end(switch_id, outcome):
+    """Record a switch outcome if journaling is on."""
+    journal = g["journal"]
+    if journal is not None and switch_id is not None:
+        journal.end(switch_id, outcome)
+
+
+# --- Reading a junction's history ---
+
+def _key(junction_path):
+    return os.path.normcase(os.path.abspath(junction_path))
+
+
+def switches(records):
+    """Return {id: intent record with its "outcome" (None if unfinished)}, oldest first."""
+    result = {}
+    for record in records:
+        if "junction" in record:
+            result[record["id"]] = dict(record, outcome=None)
+        elif record.get("id") in result:
+            result[record["id"]]["outcome"] = record["outcome"]
+    return result
+
+
+def unfinished(records):
+    """Return {junction key: the last switch of that junction}, for junctions whose last switch never ended."""
+    last = {}
+    for switch in switches(records).values():
+        last[_key(switch["junction"])] = switch
+    return {key: switch for key, switch in last.items() if switch["outcome"] is None}
+
+
+def undo_stack(records, junction_path):
+    """Return junction_path's completed switches that are not undone, oldest first."""
+    key = _key(junction_path)
+    stack = []
+    for switch in switches(records).values():
+        if _key(switch["junction"]) != key or switch["outcome"] not in COMPLETED:
+            continue
+        if "undoes" in switch:
+            stack = [s for s in stack if s["id"] != switch["undoes"]]
+        else:
+            stack.append(switch)
+    return stack
@@ -0,0 +1,426 @@
+"""Watch a junction and report when it is repointed, created or removed.
+
+A JunctionWatcher runs on its own thread and calls on_change(probe) whenever
+the junction's (kind, target) differs from what it last reported.  A
+WatchGroup does the same for many junctions from a single thread.
+
+    inotify (Linux)   -- blocks on the junction's parent directory, so an
+                         idle watcher uses no CPU at all.
+    polling (others)  -- probes on an interval that starts at min_interval
+                         and backs off towards max_interval while nothing
+                         changes, snapping back after a change.
+
+Bursts are debounced and coalesced: events arriving within `debounce`
+seconds of each other produce one probe and at most one report (a burst that
+never pauses is still reported every MAX_COALESCE seconds).
+"""
+
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from win_quick_shuttle import links
+
+
+DEBOUNCE = 0.05
+MAX_COALESCE = 0.5
+MIN_INTERVAL = 0.25
+MAX_INTERVAL = 5.0
+BACKOFF = 1.5
+
+# inotify constants (linux/inotify.h)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _state_key(state):
+    """The part of a probe that counts as a change."""
+    return state.kind, state.target
+
+
+# --- inotify ---
+
+def _libc():
+    import ctypes
+    return ctypes.CDLL(None, use_errno=True)
+
+
+def _inotify_init():
+    """Return a new inotify fd with no watches yet, or None if unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        fd = _libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    return fd if fd >= 0 else None
+
+
+def _add_watch(fd, directory, mask=WATCH_MASK):
+    """Watch directory on fd; return the watch descriptor, or None if it cannot be watched."""
+    try:
+        wd = _libc().inotify_add_watch(fd, os.fsencode(directory), mask)
+    except (OSError, AttributeError):
+        return None
+    return wd if wd >= 0 else None
+
+
+def _remove_watch(fd, wd):
+    """Drop a watch from fd (its IN_IGNORED event still follows)."""
+    _libc().inotify_rm_watch(fd, wd)
+
+
+def _open_inotify(directory, mask=WATCH_MASK):
+    """Return an inotify fd watching directory, or None if unavailable."""
+    fd = _inotify_init()
+    if fd is not None and _add_watch(fd, directory, mask) is None:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _read_events(fd):
+    """Drain pending events; return a list of (wd, mask, name) with name as bytes."""
+    events = []
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            events.append((wd, mask, data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+
+
+def _read_inotify(fd, name):
+    """Drain pending events; return (touches_name, watch_lost)."""
+    touches = False
+    lost = False
+    for _wd, mask, event_name in _read_events(fd):
+        if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+            lost = True
+        elif event_name == name:
+            touches = True
+    return touches, lost
+
+
+class JunctionWatcher:
+    """Report changes to one junction from a background thread."""
+
+    def __init__(self, path, on_change, debounce=DEBOUNCE,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, use_inotify=True):
+        self.path = os.path.normpath(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.use_inotify = use_inotify
+        self.interval = min_interval
+        self.mode = None            # "inotify" or "poll" once running
+        self.last = None            # Last probe reported (or the initial one)
+        self._stopping = threading.Event()
+        self._wake_r = self._wake_w = None  # Pipe that interrupts select() in inotify mode
+        self._fd = None
+        self._thread = None
+
+    def start(self):
+        """Start watching, then take the initial probe so no change slips between."""
+        if self.use_inotify:
+            self._fd = _open_inotify(os.path.dirname(self.path) or ".")
+        if self._fd is not None:
+            self._wake_r, self._wake_w = os.pipe()
+        self.mode = "poll" if self._fd is None else "inotify"
+        self.last = links.probe(self.path)
+        self._thread = threading.Thread(target=self._run, name="wqs-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching and wait for the thread to exit."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+        self._thread.join()
+        self._thread = None
+        if self._wake_w is not None:
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+
+    def _check(self):
+        """Probe once; report and return True if the junction changed."""
+        state = links.probe(self.path)
+        if _state_key(state) == _state_key(self.last):
+            return False
+        self.last = state
+        self.on_change(state)
+        return True
+
+    def _wait(self, fd, timeout):
+        """Wait for inotify events; True if some arrived, False on timeout, None when stopping."""
+        ready, _, _ = select.select([self._wake_r, fd], [], [], timeout)
+        if self._wake_r in ready:
+            return None
+        return bool(ready)
+
+    def _run(self):
+        if self._fd is not None:
+            try:
+                if self._run_inotify(self._fd):
+                    return
+            finally:
+                os.close(self._fd)
+                self._fd = None
+            self.mode = "poll"
+            self._check()
+        self._run_polling()
+
+    def _run_inotify(self, fd):
+        """Block on inotify.  Returns True when stopped, False if the watch was lost."""
+        name = os.fsencode(os.path.basename(self.path))
+        while True:
+            if self._wait(fd, None) is None:
+                return True
+            touches, lost = _read_inotify(fd, name)
+            if lost:
+                return False
+            if not touches:
+                continue
+            # Coalesce the rest of the burst before probing
+            deadline = time.monotonic() + MAX_COALESCE
+            while time.monotonic() < deadline:
+                ready = self._wait(fd, self.debounce)
+                if ready is None:
+                    return True
+                if not ready:
+                    break
+                _, lost = _read_inotify(fd, name)
+                if lost:
+                    return False
+            self._check()
+
+    def _run_polling(self):
+        """Probe on an adaptive interval until stopped."""
+        self.interval = self.min_interval
+        while not self._stopping.wait(self.interval):
+            if self._check():
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * BACKOFF, self.max_interval)
+
+
+class _Watch:
+    """One junction watched by a WatchGroup; add() returns it, remove() takes it."""
+
+    def __init__(self, path, on_change):
+        self.path = os.path.normpath(path)
+        self.name = os.fsencode(os.path.basename(self.path))
+        self.on_change = on_change
+        self.last = None            # Last probe reported (or the initial one)
+        self.wd = None              # inotify watch on its directory; None while polled
+
+
+class WatchGroup:
+    """Report changes to any number of junctions from one background thread.
+
+    In inotify mode the thread blocks on a single inotify fd holding one watch
+    per parent directory, so idle junctions cost nothing however many there
+    are.  Junctions whose directory cannot be watched (and all of them in
+    poll mode) are probed together on JunctionWatcher's adaptive interval.
+    add() and remove() never wait for the thread.
+    """
+
+    def __init__(self, debounce=DEBOUNCE, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, use_inotify=True):
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.use_inotify = use_inotify
+        self.interval = min_interval
+        self.mode = None            # "inotify" or "poll" once running
+        self._watches = set()       # _Watch handles being watched
+        self._dirs = {}             # wd -> _Watch handles whose junction is in that directory
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._fd = None
+        self._thread = None
+
+    def start(self):
+        """Start the watching thread (with nothing to watch yet)."""
+        if self.use_inotify:
+            self._fd = _inotify_init()
+        if self._fd is not None:
+            self._wake_r, self._wake_w = os.pipe()
+        self.mode = "poll" if self._fd is None else "inotify"
+        self._thread = threading.Thread(target=self._run, name="wqs-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching everything and wait for the thread to exit."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake()
+        self._thread.join()
+        self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._fd = self._wake_r = self._wake_w = None
+        self._watches.clear()
+        self._dirs.clear()
+
+    def add(self, path, on_change):
+        """Start reporting path's changes to on_change(probe); returns a handle for remove()."""
+        watch = _Watch(path, on_change)
+        with self._lock:
+            if self._fd is not None:
+                watch.wd = _add_watch(self._fd, os.path.dirname(watch.path) or ".")
+            # Probe after the watch is in place, so no change slips between
+            watch.last = links.probe(watch.path)
+            if watch.wd is not None:
+                self._dirs.setdefault(watch.wd, set()).add(watch)
+            self._watches.add(watch)
+            self.interval = self.min_interval
+        self._wake()
+        return watch
+
+    def remove(self, watch):
+        """Stop reporting a handle's junction; its callback is not called again."""
+        with self._lock:
+            self._watches.discard(watch)
+            sharing = self._dirs.get(watch.wd)
+            if sharing is not None:
+                sharing.discard(watch)
+                if not sharing:
+                    del self._dirs[watch.wd]
+                    _remove_watch(self._fd, watch.wd)
+
+    def _wake(self):
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+
+    def _check(self, watch):
+        """Probe one junction; report and return True if it changed."""
+        state = links.probe(watch.path)
+        if _state_key(state) == _state_key(watch.last):
+            return False
+        watch.last = state
+        with self._lock:
+            current = watch in self._watches
+        if current:
+            watch.on_change(state)
+        return True
+
+    def _poll_once(self):
+        """Probe every junction without an inotify watch, adapting the interval."""
+        with self._lock:
+            polled = [watch for watch in self._watches if watch.wd is None]
+        changed = [self._check(watch) for watch in polled]
+        if any(changed):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * BACKOFF, self.max_interval)
+
+    def _wait(self, timeout):
+        """Wait for inotify events; True if some arrived, False otherwise, None when stopping."""
+        ready, _, _ = select.select([self._wake_r, self._fd], [], [], timeout)
+        if self._wake_r in ready:
+            os.read(self._wake_r, 4096)
+            if self._stopping.is_set():
+                return None
+        return self._fd in ready
+
+    def _read(self):
+        """Drain inotify events; return the handles whose junction they may have changed."""
+        touched = set()
+        with self._lock:
+            for wd, mask, name in _read_events(self._fd):
+                if mask & IN_Q_OVERFLOW:
+                    touched.update(self._watches)   # Events were lost: look at everything
+                    continue
+                sharing = self._dirs.get(wd)
+                if not sharing:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The directory went away or moved: poll its junctions from now on
+                    del self._dirs[wd]
+                    if not mask & IN_IGNORED:
+                        _remove_watch(self._fd, wd)
+                    for watch in sharing:
+                        watch.wd = None
+                    touched.update(sharing)
+                else:
+                    touched.update(watch for watch in sharing if watch.name == name)
+        return touched
+
+    def _run(self):
+        if self._fd is None:
+            while not self._stopping.wait(self.interval):
+                self._poll_once()
+            return
+        while True:
+            with self._lock:
+                polled = any(watch.wd is None for watch in self._watches)
+            ready = self._wait(self.interval if polled else None)
+            if ready is None:
+                return
+            if not ready:
+                if polled:
+                    self._poll_once()
+                continue
+            touched = self._read()
+            if not touched:
+                continue
+            # Coalesce the rest of the burst before probing
+            deadline = time.monotonic() + MAX_COALESCE
+            while time.monotonic() < deadline:
+                ready = self._wait(self.debounce)
+                if ready is None:
+                    return
+                if not ready:
+                    break
+                touched |= self._read()
+            for watch in touched:
+                self._check(watch)
+
+
+def watch(path, **kwargs):
+    """Start watching path now; return an iterator of Probes, one per change."""
+    changes = queue.Queue()
+    return _iter_changes(JunctionWatcher(path, changes.put, **kwargs).start(), changes)
+
+
+def _iter_changes(junction_watcher, changes):
+    """Yield reported changes until the iterator is closed."""
+    try:
+        while True:
+            yield changes.get()
+    finally:
+        junction_watcher.stop()
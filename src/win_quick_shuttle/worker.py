@@ -0,0 +1,138 @@
+"""Background worker for the GUI.
+
+Filesystem work (probes, junction switches, folder creation) can block for
+seconds on a slow network share or a spun-down drive.  submit() runs it on a
+worker thread; the result is handed back to the Tk thread, which polls a
+queue with after() -- only while jobs are outstanding, so an idle window
+costs nothing.  Tk widgets are only ever touched from the Tk thread.
+
+A single worker thread (the default) keeps operations in submission order:
+a refresh submitted after a switch always sees the switched state.  With
+more workers, jobs submitted with the same lane (one per GUI session) still
+run one at a time in that order, while different lanes run side by side.
+"""
+
+import collections
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+POLL_MS = 15
+
+# Worker state
+g = {
+    "executor": None,   # ThreadPoolExecutor while started
+    "widget": None,     # Any Tk widget; its after() drives polling
+    "pending": 0,       # Jobs submitted but not yet delivered
+    "polling": False,   # A poll is scheduled
+}
+
+_results = queue.Queue()
+
+# lane -> jobs waiting behind the lane's running job
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+def start(widget, workers=1):
+    """Start the worker, delivering results through widget.after()."""
+    g["widget"] = widget
+    g["executor"] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wqs-worker")
+    g["pending"] = 0
+    g["polling"] = False
+
+
+def stop():
+    """Stop the worker; results still in flight are dropped."""
+    if g["executor"]:
+        g["executor"].shutdown(wait=False, cancel_futures=True)
+    g["executor"] = None
+    g["widget"] = None
+    g["pending"] = 0
+    g["polling"] = False
+    with _lanes_lock:
+        _lanes.clear()
+    while not _results.empty():
+        _results.get_nowait()
+
+
+def idle():
+    """True when no submitted job is still waiting to be delivered."""
+    return g["pending"] == 0
+
+
+def submit(fn, args, on_done, lane=None, on_error=None):
+    """Run fn(*args) on the worker, then on_done(result) on the Tk thread.
+
+    Jobs with the same lane (any hashable) run one at a time, in submission
+    order.  If fn raises, on_error(exception) is called on the Tk thread
+    instead; without an on_error the exception is re-raised there, where
+    Tk's report_callback_exception sees it.
+    """
+    executor = g["executor"]
+    g["pending"] += 1
+    if lane is not None:
+        with _lanes_lock:
+            waiting = _lanes.get(lane)
+            if waiting is not None:
+                waiting.append((fn, args, on_done, on_error))
+                return
+            _lanes[lane] = collections.deque()
+    _run(executor, fn, args, on_done, on_error, lane)
+    _schedule_poll()
+
+
+def _run(executor, fn, args, on_done, on_error, lane):
+    future = executor.submit(fn, *args)
+    future.add_done_callback(lambda f: _finished(executor, on_done, on_error, f, lane))
+
+
+def _finished(executor, on_done, on_error, future, lane):
+    """Queue a result for the Tk thread and start the next job in its lane (on the worker)."""
+    _results.put((executor, on_done, on_error, future))
+    if lane is None or executor is not g["executor"]:
+        return
+    with _lanes_lock:
+        waiting = _lanes.get(lane)
+        if not waiting:
+            _lanes.pop(lane, None)
+            return
+        fn, args, next_done, next_error = waiting.popleft()
+    try:
+        _run(executor, fn, args, next_done, next_error, lane)
+    except RuntimeError:
+        pass  # Stopped; nobody is listening
+
+
+def _schedule_poll():
+    """Make sure a poll is scheduled on the Tk thread."""
+    if not g["polling"] and g["widget"] is not None:
+        g["polling"] = True
+        g["widget"].after(POLL_MS, _poll)
+
+
+def _poll():
+    """Deliver finished results; keep polling while anything is outstanding."""
+    g["polling"] = False
+    try:
+        while True:
+            try:
+                executor, on_done, on_error, future = _results.get_nowait()
+            except queue.Empty:
+                break
+            if executor is not g["executor"]:
+                continue  # Submitted before a stop()/start(); nobody is listening
+            g["pending"] -= 1
+            if future.cancelled():
+                continue
+            exc = future.exception()
+            if exc is not None:
+                if on_error is None:
+                    raise exc
+                on_error(exc)
+                continue
+            on_done(future.result())
+    finally:
+        if g["pending"]:
+            _schedule_poll()
@@ -0,0 +1,176 @@
+"""Tests for the asyncio front end."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from win_quick_shuttle import aio, junctions, links
+from win_quick_shuttle.memfs import MemoryBackend
+
+
+@pytest.fixture
+def fs():
+    """A MemoryBackend installed as the active backend, with /work/a and /work/b."""
+    backend = MemoryBackend()
+    backend.makedirs("/work/a")
+    backend.makedirs("/work/b")
+    old = links.set_backend(backend)
+    yield backend
+    links.set_backend(old)
+
+
+class TestOperations:
+    """point, unlink and probe."""
+
+    def test_point_probe_unlink(self, fs):
+        """The async calls return what the blocking helpers do."""
+        async def scenario():
+            assert await aio.point("/j", "/work/a") == (True, "Junction created successfully")
+            assert (await aio.probe("/j")).target == "/work/a"
+            assert await aio.point("/j", "/work/nope") == (False, "Target path does not exist")
+            assert await aio.unlink("/j") == (True, "Junction removed")
+            assert not (await aio.probe("/j")).exists
+
+        asyncio.run(scenario())
+
+    def test_runs_off_the_loop_thread(self, fs, monkeypatch):
+        """Blocking work runs on a worker thread, not the event loop's."""
+        threads = []
+        real_probe = junctions.probe
+        monkeypatch.setattr(junctions, "probe", lambda path: threads.append(threading.get_ident()) or real_probe(path))
+        asyncio.run(aio.probe("/j"))
+        assert threads and threading.get_ident() not in threads
+
+    def test_errors_propagate(self, fs):
+        """An exception in the blocking call is raised to the awaiter."""
+        fs.fail("probe")
+        with pytest.raises(OSError):
+            asyncio.run(aio.probe("/j"))
+
+
+class TestMerging:
+    """Overlapping identical calls."""
+
+    def test_concurrent_probes_merge(self, fs):
+        """Probes of one path awaited together hit the backend once."""
+        fs.latency["probe"] = 0.05
+
+        async def scenario():
+            return await asyncio.gather(*(aio.probe("/work/a") for _ in range(10)))
+
+        fs.calls.clear()
+        merged = aio.g["merged"]
+        results = asyncio.run(scenario())
+        assert fs.calls["probe"] == 1
+        assert aio.g["merged"] - merged == 9
+        assert all(result is results[0] for result in results)
+
+    def test_different_targets_do_not_merge(self, fs):
+        """Switches to different targets all run, one after another."""
+        async def scenario():
+            return await asyncio.gather(aio.point("/j", "/work/a"), aio.point("/j", "/work/b"))
+
+        assert [success for success, _ in asyncio.run(scenario())] == [True, True]
+        assert fs.calls["create"] + fs.calls["replace"] == 2
+
+    def test_switch_back_is_not_merged(self, fs):
+        """point X, point Y, point X leaves the junction at X, not at Y."""
+        fs.latency["replace"] = fs.latency["create"] = 0.02
+
+        async def scenario():
+            return await asyncio.gather(aio.point("/j", "/work/a"), aio.point("/j", "/work/b"),
+                                        aio.point("/j", "/work/a"))
+
+        assert [success for success, _ in asyncio.run(scenario())] == [True, True, True]
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_cancel_one_awaiter(self, fs):
+        """Cancelling one merged awaiter leaves the operation running for the rest."""
+        fs.latency["probe"] = 0.05
+
+        async def scenario():
+            first = asyncio.ensure_future(aio.probe("/work/a"))
+            second = asyncio.ensure_future(aio.probe("/work/a"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(scenario()).kind == links.KIND_DIR
+
+
+class TestLimits:
+    """Per-volume and per-junction concurrency."""
+
+    def test_per_volume_limit(self, fs, monkeypatch):
+        """No more than PER_VOLUME operations run at once on one volume."""
+        monkeypatch.setattr(aio, "PER_VOLUME", 3)
+        running = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def slow_probe(path):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.02)
+            with lock:
+                running["now"] -= 1
+
+        monkeypatch.setattr(junctions, "probe", slow_probe)
+
+        async def scenario():
+            await asyncio.gather(*(aio.probe(f"/work/{i}") for i in range(8)))
+
+        asyncio.run(scenario())
+        assert running["peak"] == 3
+
+    def test_one_switch_per_junction_in_the_pool(self, fs, monkeypatch):
+        """Switches of one junction never occupy two workers at once."""
+        running = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+        real_point = junctions.point_junction
+
+        def counted_point(*args):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            try:
+                time.sleep(0.005)
+                return real_point(*args)
+            finally:
+                with lock:
+                    running["now"] -= 1
+
+        monkeypatch.setattr(junctions, "point_junction", counted_point)
+
+        async def scenario():
+            return await asyncio.gather(*(aio.point("/j", f"/work/{'ab'[i % 2]}") for i in range(6)))
+
+        assert all(success for success, _ in asyncio.run(scenario()))
+        assert running["peak"] == 1
+
+
+class TestChanges:
+    """The async change iterator."""
+
+    def test_reports_switches(self, tmp_path):
+        """Each switch made while iterating is reported."""
+        for name in "ab":
+            (tmp_path / name).mkdir()
+        junction = str(tmp_path / "j")
+
+        async def scenario():
+            seen = []
+            stream = aio.changes(junction, debounce=0.01, min_interval=0.01, max_interval=0.05)
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.1)
+            await aio.point(junction, str(tmp_path / "a"))
+            seen.append(await asyncio.wait_for(first, 2))
+            await aio.point(junction, str(tmp_path / "b"))
+            seen.append(await asyncio.wait_for(stream.__anext__(), 2))
+            await stream.aclose()
+            return seen
+
+        seen = asyncio.run(scenario())
+        assert [state.target for state in seen] == [str(tmp_path / "a"), str(tmp_path / "b")]
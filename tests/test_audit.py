@@ -0,0 +1,119 @@
+"""Tests for the link audit scanner."""
+
+import os
+import threading
+
+import pytest
+
+from win_quick_shuttle import audit, links
+
+
+def reports_by_name(root, **kwargs):
+    """Run an audit and return its reports keyed by link name."""
+    return {os.path.basename(report["path"]): report for report in audit.audit(str(root), **kwargs)}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A tree with healthy, dangling, chained, cyclic and nested links."""
+    (tmp_path / "real" / "inner").mkdir(parents=True)
+    (tmp_path / "links" / "deep").mkdir(parents=True)
+    (tmp_path / "real" / "file.txt").write_text("x")
+    os.symlink(tmp_path / "real", tmp_path / "links" / "good")
+    os.symlink(tmp_path / "gone", tmp_path / "links" / "dangling")
+    os.symlink(tmp_path / "links" / "good", tmp_path / "links" / "deep" / "chained")
+    os.symlink(tmp_path / "links" / "good" / "inner", tmp_path / "links" / "nested")
+    os.symlink(tmp_path / "links" / "loop-b", tmp_path / "links" / "loop-a")
+    os.symlink(tmp_path / "links" / "loop-a", tmp_path / "links" / "loop-b")
+    os.symlink("../real", tmp_path / "links" / "relative")
+    return tmp_path
+
+
+class TestAudit:
+    """Problems found in a tree of links."""
+
+    def test_healthy_link(self, tree):
+        """A link to a real directory has no problems."""
+        report = reports_by_name(tree)["good"]
+        assert report["kind"] == links.KIND_LINK
+        assert report["resolved"] == str(tree / "real")
+        assert report["problems"] == []
+
+    def test_relative_target(self, tree):
+        """A relative target is resolved against the link's folder."""
+        report = reports_by_name(tree)["relative"]
+        assert report["target"] == "../real"
+        assert report["resolved"] == str(tree / "real")
+        assert report["problems"] == []
+
+    def test_dangling(self, tree):
+        """A link to a missing path is dangling."""
+        report = reports_by_name(tree)["dangling"]
+        assert report["problems"] == ["dangling"]
+        assert report["resolved"] is None
+
+    def test_chain(self, tree):
+        """A link to a link is a chain, and is followed to the end."""
+        report = reports_by_name(tree)["chained"]
+        assert report["problems"] == ["chain"]
+        assert report["chain"] == [str(tree / "links" / "good")]
+        assert report["resolved"] == str(tree / "real")
+
+    def test_into_link(self, tree):
+        """A target inside a linked folder points into a link."""
+        report = reports_by_name(tree)["nested"]
+        assert report["problems"] == ["into-link"]
+        assert report["resolved"] == str(tree / "real" / "inner")
+
+    def test_cycle(self, tree):
+        """Links that lead back to themselves are a cycle."""
+        report = reports_by_name(tree)["loop-a"]
+        assert "cycle" in report["problems"]
+        assert report["resolved"] is None
+
+    def test_links_not_descended(self, tree):
+        """Each link is reported once and never walked into."""
+        reports = list(audit.audit(str(tree)))
+        assert len(reports) == 7
+        assert not any("inner" in os.path.relpath(r["path"], tree) for r in reports)
+
+
+class TestWalk:
+    """The parallel walk itself."""
+
+    def test_stats(self, tree):
+        """stats counts directories, entries, links and problems."""
+        stats = {}
+        list(audit.audit(str(tree), stats=stats))
+        assert stats["dirs"] == 5        # root, real, real/inner, links, links/deep
+        assert stats["entries"] == 12
+        assert stats["links"] == 7
+        assert stats["problems"] == 5
+        assert stats["errors"] == 0
+        assert stats["seconds"] > 0
+
+    def test_wide_tree_single_worker(self, tmp_path):
+        """A tree with many directories is walked completely by one worker."""
+        for i in range(50):
+            (tmp_path / f"d{i}" / "sub").mkdir(parents=True)
+            os.symlink(tmp_path / "missing", tmp_path / f"d{i}" / "sub" / "link")
+        stats = {}
+        reports = list(audit.audit(str(tmp_path), workers=1, stats=stats))
+        assert len(reports) == 50
+        assert stats["dirs"] == 101
+
+    def test_closing_early_stops_workers(self, tmp_path, monkeypatch):
+        """Abandoning the generator stops the walk while reports are still queued."""
+        monkeypatch.setattr(audit, "REPORT_QUEUE", 2)
+        for i in range(20):
+            os.symlink(tmp_path / "missing", tmp_path / f"link{i}")
+        reports = audit.audit(str(tmp_path), workers=2)
+        next(reports)
+        reports.close()
+        assert not [t for t in threading.enumerate() if t.name.startswith("wqs-audit")]
+
+    def test_missing_root(self, tmp_path):
+        """A root that cannot be listed counts as an error."""
+        stats = {}
+        assert list(audit.audit(str(tmp_path / "nope"), stats=stats)) == []
+        assert stats["errors"] == 1
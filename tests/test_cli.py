@@ -0,0 +1,342 @@
+"""Tests for the headless CLI commands."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, ledger
+
+
+# Headless cold start may cost at most this much over a bare interpreter.
+STARTUP_BUDGET_SECONDS = 0.35
+
+
+def run_cli(cwd, *args):
+    """Run win-quick-shuttle in a fresh interpreter with cwd as its execroot."""
+    return subprocess.run(
+        [sys.executable, "-m", "win_quick_shuttle.cli", *args],
+        cwd=cwd, capture_output=True, text=True,
+    )
+
+
+def best_of(n, argv, cwd):
+    """Return the fastest wall-clock time of n runs of argv."""
+    best = None
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=cwd, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestHeadlessCommands:
+    """Tests for point, unlink and status."""
+
+    def test_point_status_unlink(self, tmp_path):
+        """point creates the junction, status reports it, unlink removes it."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        target = str(tmp_path / "target")
+
+        result = run_cli(tmp_path, "point", "--junction", junction, "--target", target)
+        assert result.returncode == 0, result.stderr
+        assert "created" in result.stdout
+
+        result = run_cli(tmp_path, "status", "--junction", junction, "--format", "json")
+        status = json.loads(result.stdout)
+        assert status["is_junction"] is True
+        assert status["target"].endswith(target)
+
+        result = run_cli(tmp_path, "unlink", "--junction", junction)
+        assert result.returncode == 0, result.stderr
+        assert not os.path.lexists(junction)
+
+    def test_status_json_shows_chain(self, tmp_path):
+        """status --format json follows a chained junction to the final folder."""
+        (tmp_path / "target").mkdir()
+        os.symlink(tmp_path / "target", tmp_path / "hop")
+        junction = str(tmp_path / "junction")
+        os.symlink(tmp_path / "hop", junction)
+        result = run_cli(tmp_path, "status", "--junction", junction, "--format", "json")
+        status = json.loads(result.stdout)
+        assert status["resolved"] == str(tmp_path / "target")
+        assert status["chain"] == [str(tmp_path / "hop")]
+
+    def test_point_records_history(self, tmp_path):
+        """point records the target in the recent-targets history."""
+        from win_quick_shuttle.history import HISTORY_FILENAME, TargetHistory
+
+        (tmp_path / "target").mkdir()
+        target = str(tmp_path / "target")
+        result = run_cli(tmp_path, "point", "--junction", str(tmp_path / "junction"), "--target", target)
+        assert result.returncode == 0, result.stderr
+        store = TargetHistory(str(tmp_path / ".win-quick-shuttle" / HISTORY_FILENAME))
+        assert store.search("") == [target]
+
+    def test_undo_steps_back(self, tmp_path):
+        """undo points the junction back where it was before the last point."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        junction = str(tmp_path / "junction")
+        for target in ("a", "b"):
+            run_cli(tmp_path, "point", "--junction", junction, "--target", str(tmp_path / target))
+        result = run_cli(tmp_path, "undo", "--junction", junction)
+        assert result.returncode == 0, result.stderr
+        assert os.readlink(junction) == str(tmp_path / "a")
+
+    def test_interrupted_switch_is_recovered(self, tmp_path):
+        """A switch that lost the link is rolled back by the next command."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / ".win-quick-shuttle").mkdir()
+        junction = str(tmp_path / "junction")
+        intent = {"id": "x-1", "junction": junction, "old": str(tmp_path / "a"),
+                  "new": str(tmp_path / "b"), "time": 0}
+        (tmp_path / ".win-quick-shuttle" / "switches.wal").write_text(json.dumps(intent) + "\n")
+        result = run_cli(tmp_path, "unlink", "--junction", junction)
+        assert "Recovered: " in result.stderr
+        assert result.returncode == 0, result.stderr
+        assert not os.path.lexists(junction)
+
+    def test_point_missing_target_fails(self, tmp_path):
+        """point exits non-zero when the target does not exist."""
+        result = run_cli(tmp_path, "point", "--junction", str(tmp_path / "j"),
+                         "--target", str(tmp_path / "nope"))
+        assert result.returncode == 1
+        assert "does not exist" in result.stderr
+
+    def test_status_text(self, tmp_path):
+        """status prints a readable report for a missing junction."""
+        result = run_cli(tmp_path, "status", "--junction", str(tmp_path / "j"))
+        assert result.returncode == 0
+        assert "missing" in result.stdout
+
+    def test_status_without_junction_fails(self, tmp_path):
+        """status exits non-zero when no junction is configured."""
+        result = run_cli(tmp_path, "status")
+        assert result.returncode == 1
+
+
+class TestWatchCommand:
+    """Tests for the watch stream."""
+
+    def test_watch_streams_changes(self, tmp_path):
+        """watch prints the current state, then one JSON line per change."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "win_quick_shuttle.cli", "watch",
+             "--junction", junction, "--format", "json"],
+            cwd=tmp_path, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            assert json.loads(proc.stdout.readline())["kind"] == "missing"
+            junctions.create_junction(junction, str(tmp_path / "target"))
+            assert json.loads(proc.stdout.readline())["target"].endswith(str(tmp_path / "target"))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+class TestRouteCommand:
+    """Tests for the arrival router."""
+
+    def test_route_moves_arrivals(self, tmp_path):
+        """route moves files arriving through the junction and prints one JSON line per move."""
+        (tmp_path / "arrivals").mkdir()
+        junction = str(tmp_path / "junction")
+        junctions.point_junction(junction, str(tmp_path / "arrivals"))
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps([{"ext": "pdf", "to": str(tmp_path / "docs")}]))
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "win_quick_shuttle.cli", "route", "--junction", junction,
+             "--rules", str(rules), "--format", "json"],
+            cwd=tmp_path, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            (tmp_path / "arrivals" / "a.pdf").write_bytes(b"pdf")
+            result = json.loads(proc.stdout.readline())
+            assert result["ok"] and result["to"] == str(tmp_path / "docs" / "a.pdf")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    def test_route_bad_rules_fail(self, tmp_path):
+        """route exits non-zero naming the bad rule."""
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps([{"ext": "pdf"}]))
+        result = run_cli(tmp_path, "route", "--junction", str(tmp_path / "j"), "--rules", str(rules))
+        assert result.returncode == 1
+        assert "Rule 1: no destination" in result.stderr
+
+
+class TestDedupeCommand:
+    """Tests for dedupe."""
+
+    def test_dedupe_reports_then_links(self, tmp_path):
+        """dedupe reports a duplicate in the target; --link yes replaces it with a hard link."""
+        (tmp_path / "target").mkdir()
+        (tmp_path / "target" / "a.bin").write_bytes(b"same" * 100)
+        (tmp_path / "target" / "b.bin").write_bytes(b"same" * 100)
+        os.utime(tmp_path / "target" / "a.bin", ns=(1, 1))
+        junction = str(tmp_path / "junction")
+        junctions.point_junction(junction, str(tmp_path / "target"))
+
+        result = run_cli(tmp_path, "dedupe", "--junction", junction, "--format", "json")
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout)
+        assert report["file"].endswith("b.bin") and report["linked"] is False
+
+        result = run_cli(tmp_path, "dedupe", "--junction", junction, "--link", "yes")
+        assert result.returncode == 0, result.stderr
+        assert "[linked]" in result.stdout
+        assert os.path.samefile(tmp_path / "target" / "a.bin", tmp_path / "target" / "b.bin")
+
+
+class TestLedgerCommand:
+    """Tests for ledger."""
+
+    def test_point_opens_session_and_ledger_lists_arrivals(self, tmp_path):
+        """point opens a session in the target's ledger; ledger lists the arrivals in a time range."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        result = run_cli(tmp_path, "point", "--junction", junction, "--target", str(tmp_path / "target"))
+        assert result.returncode == 0, result.stderr
+
+        project = str(tmp_path / ".win-quick-shuttle")
+        target = str(tmp_path / "target")
+        book = ledger.Ledger(os.path.join(project, ledger.ledger_filename(target)), target)
+        assert book.sessions()[0]["junction"] == junction
+        opened = book.sessions()[0]["opened"]
+        book.record("early.bin", 10, when=opened + 1)
+        book.record("late.bin", 20, when=opened + 100)
+        book.close()
+
+        result = run_cli(tmp_path, "ledger", "--junction", junction, "--format", "json",
+                         "--until", str(opened + 50))
+        assert result.returncode == 0, result.stderr
+        assert [json.loads(line)["file"] for line in result.stdout.splitlines()] == ["early.bin"]
+
+    def test_bad_time_fails(self, tmp_path):
+        """ledger exits non-zero for a time it cannot read."""
+        result = run_cli(tmp_path, "ledger", "--target", str(tmp_path), "--since", "yesterday")
+        assert result.returncode == 1
+        assert "--since" in result.stderr
+
+
+class TestProfileCommands:
+    """Tests for profile-save, profiles and apply."""
+
+    def test_save_then_apply(self, tmp_path):
+        """A saved profile can be applied by name."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        result = run_cli(tmp_path, "profile-save", "--profile", "work",
+                         "--junction", junction, "--target", str(tmp_path / "target"))
+        assert result.returncode == 0, result.stderr
+
+        result = run_cli(tmp_path, "apply", "--profile", "work", "--format", "json")
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout)[0]["ok"] is True
+        assert os.readlink(junction) == str(tmp_path / "target")
+
+    def test_apply_unknown_profile_fails(self, tmp_path):
+        """apply exits non-zero for an unknown profile."""
+        result = run_cli(tmp_path, "apply", "--profile", "nope")
+        assert result.returncode == 1
+
+
+class TestMigrateCommands:
+    """Tests for migrate and point --migrate."""
+
+    def test_point_migrate_moves_files(self, tmp_path):
+        """point --migrate yes moves the old target's files into the new target."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a" / "report.pdf").write_bytes(b"pdf")
+        junction = str(tmp_path / "junction")
+        junctions.point_junction(junction, str(tmp_path / "a"))
+
+        result = run_cli(tmp_path, "point", "--junction", junction,
+                         "--target", str(tmp_path / "b"), "--migrate", "yes")
+        assert result.returncode == 0, result.stderr
+        assert "Moved 1 item" in result.stdout
+        assert (tmp_path / "b" / "report.pdf").read_bytes() == b"pdf"
+        assert not (tmp_path / "a" / "report.pdf").exists()
+
+    def test_migrate_from_to(self, tmp_path):
+        """migrate --from --to moves files and streams progress."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a" / "x.txt").write_text("x")
+        result = run_cli(tmp_path, "migrate", "--from", str(tmp_path / "a"), "--to", str(tmp_path / "b"))
+        assert result.returncode == 0, result.stderr
+        assert "moved 1/1 files" in result.stdout
+        assert (tmp_path / "b" / "x.txt").exists()
+
+    def test_migrate_without_source_fails(self, tmp_path):
+        """migrate exits non-zero when there is no source folder."""
+        result = run_cli(tmp_path, "migrate", "--junction", str(tmp_path / "j"), "--to", str(tmp_path))
+        assert result.returncode == 1
+        assert "No source folder" in result.stderr
+
+
+class TestAuditCommand:
+    """Tests for audit."""
+
+    def test_audit_json(self, tmp_path):
+        """audit --format json prints one line per problem link and a summary."""
+        (tmp_path / "tree").mkdir()
+        os.symlink(tmp_path / "gone", tmp_path / "tree" / "dangling")
+        result = run_cli(tmp_path, "audit", "--root", str(tmp_path / "tree"), "--format", "json")
+        assert result.returncode == 0, result.stderr
+        lines = [json.loads(line) for line in result.stdout.splitlines()]
+        assert lines[0]["problems"] == ["dangling"]
+        assert lines[-1]["summary"]["links"] == 1
+        assert "entries_per_second" in lines[-1]["summary"]
+
+    def test_audit_without_root_fails(self, tmp_path):
+        """audit exits non-zero without --root."""
+        result = run_cli(tmp_path, "audit")
+        assert result.returncode == 1
+
+
+class TestCrawlCommand:
+    """Tests for crawl."""
+
+    def test_crawl_saves_index(self, tmp_path):
+        """crawl indexes --roots and saves the index in the project dir."""
+        (tmp_path / "projects" / "alpha").mkdir(parents=True)
+        result = run_cli(tmp_path, "crawl", "--roots", str(tmp_path / "projects"))
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.startswith("2 directories indexed")
+        assert (tmp_path / ".win-quick-shuttle" / "dirindex.json").exists()
+
+    def test_crawl_without_roots_fails(self, tmp_path):
+        """crawl exits non-zero when no roots are configured."""
+        result = run_cli(tmp_path, "crawl")
+        assert result.returncode == 1
+        assert "No project roots" in result.stderr
+
+
+class TestStartup:
+    """Headless commands must not pay for the GUI."""
+
+    def test_cli_import_skips_tkinter(self):
+        """Importing the CLI does not import tkinter or ctypes."""
+        code = ("import sys, win_quick_shuttle.cli; "
+                "print('tkinter' in sys.modules, 'ctypes' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.stdout.split() == ["False", "False"]
+
+    def test_headless_startup_budget(self, tmp_path):
+        """A headless status call stays within budget of a bare interpreter."""
+        bare = best_of(3, [sys.executable, "-c", "pass"], tmp_path)
+        headless = best_of(3, [sys.executable, "-m", "win_quick_shuttle.cli", "status",
+                               "--junction", str(tmp_path / "j")], tmp_path)
+        assert headless - bare < STARTUP_BUDGET_SECONDS, \
+            f"headless {headless:.3f}s vs bare {bare:.3f}s"
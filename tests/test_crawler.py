@@ -0,0 +1,155 @@
+"""Tests for the directory crawler and its prefix index."""
+
+import os
+import time
+
+import pytest
+
+from win_quick_shuttle import crawler, links
+from win_quick_shuttle.crawler import Crawler, PrefixIndex, RateLimiter
+
+
+def make_tree(root):
+    """Create a small project tree under root."""
+    for path in ["alpha/assets", "alpha/renders", "beta/src", "beta/.git/objects", "gamma"]:
+        (root / path).mkdir(parents=True)
+    (root / "alpha" / "notes.txt").write_text("not a directory")
+
+
+class TestPrefixIndex:
+    """Prefix completion."""
+
+    def test_complete(self):
+        """complete() returns indexed paths starting with the prefix, in order."""
+        index = PrefixIndex(["/p/alpha", "/p/alpha/assets", "/p/beta", "/p/alps"])
+        assert index.complete("/p/al") == ["/p/alpha", "/p/alpha/assets", "/p/alps"]
+        assert index.complete("/p/b") == ["/p/beta"]
+        assert index.complete("/q") == []
+
+    def test_limit(self):
+        """complete() stops at limit."""
+        index = PrefixIndex([f"/p/d{i:03d}" for i in range(100)])
+        assert len(index.complete("/p/d", limit=5)) == 5
+
+    def test_replace(self):
+        """replace() swaps in new contents."""
+        index = PrefixIndex(["/old"])
+        index.replace(["/new"])
+        assert index.complete("/") == ["/new"]
+        assert len(index) == 1
+
+
+class TestCrawl:
+    """Crawling project roots."""
+
+    def test_crawl_indexes_directories(self, tmp_path):
+        """Every visible directory is indexed; files and dot-directories are not."""
+        make_tree(tmp_path)
+        crawl = Crawler([str(tmp_path)], rate=None)
+        crawl.run()
+        assert crawl.index.complete(str(tmp_path / "alpha")) == [
+            str(tmp_path / "alpha"), str(tmp_path / "alpha" / "assets"), str(tmp_path / "alpha" / "renders")]
+        assert crawl.index.complete(str(tmp_path / "beta")) == [
+            str(tmp_path / "beta"), str(tmp_path / "beta" / "src")]
+        assert crawl.index.complete(str(tmp_path / "alpha" / "notes")) == []
+
+    def test_links_not_followed(self, tmp_path):
+        """A directory link is neither indexed nor crawled into."""
+        make_tree(tmp_path)
+        os.symlink(str(tmp_path), str(tmp_path / "alpha" / "loop"), target_is_directory=True)
+        crawl = Crawler([str(tmp_path)], rate=None)
+        crawl.run()
+        assert crawl.index.complete(str(tmp_path / "alpha" / "loop")) == []
+
+    def test_junctions_not_followed(self, tmp_path, monkeypatch):
+        """A junction is neither indexed nor crawled into, whatever DirEntry supports."""
+        make_tree(tmp_path)
+        entry_kind = links.entry_kind
+
+        def windows_entry_kind(entry):
+            # What a Windows scandir reports for a junction: a directory with a mount-point tag
+            if entry.name == "gamma":
+                return links.KIND_JUNCTION
+            return entry_kind(entry)
+
+        monkeypatch.setattr(links, "entry_kind", windows_entry_kind)
+        crawl = Crawler([str(tmp_path)], rate=None)
+        crawl.run()
+        assert crawl.index.complete(str(tmp_path / "gamma")) == []
+        assert crawl.index.complete(str(tmp_path / "beta")) == [
+            str(tmp_path / "beta"), str(tmp_path / "beta" / "src")]
+
+    def test_max_depth(self, tmp_path):
+        """Directories deeper than max_depth are not visited."""
+        (tmp_path / "a" / "b" / "c").mkdir(parents=True)
+        crawl = Crawler([str(tmp_path)], rate=None, max_depth=1)
+        crawl.run()
+        assert len(crawl.index) == 2     # root and a; a/b is depth 2
+
+    def test_restart_lists_only_changed(self, tmp_path):
+        """A second crawl reuses the saved index and re-lists only changed directories."""
+        make_tree(tmp_path / "root")
+        index_path = str(tmp_path / crawler.INDEX_FILENAME)
+
+        first = Crawler([str(tmp_path / "root")], index_path, rate=None)
+        first.run()
+        assert first.stats["listed"] == 7
+        assert first.stats["reused"] == 0
+
+        (tmp_path / "root" / "beta" / "docs").mkdir()
+        second = Crawler([str(tmp_path / "root")], index_path, rate=None)
+        second.run()
+        assert second.stats["listed"] == 2     # beta changed, and beta/docs is new
+        assert second.stats["reused"] == 6
+        assert str(tmp_path / "root" / "beta" / "docs") in second.index.complete(str(tmp_path / "root" / "beta"))
+
+    def test_saved_index_served_before_crawl(self, tmp_path):
+        """start() publishes the saved index before the crawl finishes."""
+        index_path = str(tmp_path / crawler.INDEX_FILENAME)
+        crawler.save_index(index_path, {"/saved/dir": [0, []]})
+        crawl = Crawler([str(tmp_path)], index_path, rate=5).start()
+        try:
+            deadline = time.monotonic() + 5
+            while not crawl.index.complete("/saved") and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert crawl.index.complete("/saved") == ["/saved/dir"]
+        finally:
+            crawl.stop()
+
+    def test_stop_abandons_crawl(self, tmp_path):
+        """stop() ends a slow crawl promptly without saving a partial index."""
+        make_tree(tmp_path / "root")
+        index_path = tmp_path / crawler.INDEX_FILENAME
+        crawl = Crawler([str(tmp_path / "root")], str(index_path), rate=1).start()
+        start = time.monotonic()
+        crawl.stop()
+        assert time.monotonic() - start < 2
+        assert crawl.finished.is_set()
+        assert not index_path.exists()
+
+    def test_unreadable_root(self, tmp_path):
+        """A missing root is counted as an error, not raised."""
+        crawl = Crawler([str(tmp_path / "missing")], rate=None)
+        crawl.run()
+        assert crawl.stats["errors"] == 1
+        assert len(crawl.index) == 0
+
+
+class TestRateLimiter:
+    """I/O throttling."""
+
+    def test_spaces_operations(self):
+        """Operations are spaced to the configured rate."""
+        limiter = RateLimiter(100)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_unlimited(self):
+        """A rate of None never waits."""
+        limiter = RateLimiter(None)
+        start = time.monotonic()
+        for _ in range(1000):
+            limiter.acquire()
+        assert time.monotonic() - start < 0.1
@@ -0,0 +1,206 @@
+"""Tests for the resident shuttle daemon."""
+
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+
+import pytest
+
+from win_quick_shuttle import daemon
+
+
+@pytest.fixture
+def tcp_daemon():
+    """A daemon on an ephemeral loopback port; yields (address, token)."""
+    server = daemon.make_server("127.0.0.1:0")
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"{host}:{port}", server.token
+    server.shutdown()
+    server.server_close()
+
+
+class TestAddresses:
+    """Tests for address parsing."""
+
+    def test_parse_tcp(self):
+        """host:port parses as a TCP address."""
+        assert daemon.parse_address("127.0.0.1:5000") == (socket.AF_INET, ("127.0.0.1", 5000))
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+    def test_parse_unix(self):
+        """Anything else parses as a Unix socket path."""
+        assert daemon.parse_address("/tmp/shuttle.sock") == (socket.AF_UNIX, "/tmp/shuttle.sock")
+
+
+class TestRequests:
+    """Tests for the request protocol."""
+
+    def test_ping(self, tcp_daemon):
+        """ping answers pong."""
+        assert daemon.request(*tcp_daemon, "ping") == {"ok": True, "message": "pong"}
+
+    def test_point_status_unlink(self, tcp_daemon, tmp_path):
+        """point, status and unlink work over one connection."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        with daemon.Client(*tcp_daemon) as client:
+            assert client.call("point", junction=junction, target=str(tmp_path / "target"))["ok"]
+            status = client.call("status", junction=junction)["status"]
+            assert status["target"].endswith(str(tmp_path / "target"))
+            assert client.call("unlink", junction=junction)["ok"]
+        assert not os.path.lexists(junction)
+
+    def test_failures_are_reported(self, tcp_daemon, tmp_path):
+        """Failed operations answer ok=false with a message."""
+        response = daemon.request(*tcp_daemon, "unlink", junction=str(tmp_path / "nope"))
+        assert response == {"ok": False, "message": "No junction exists at that path"}
+
+    def test_bad_requests(self):
+        """Malformed lines are rejected and unknown ops get an error response."""
+        with pytest.raises(ValueError):
+            daemon.decode_line(b"not json\n")
+        with pytest.raises(ValueError):
+            daemon.decode_line(b"[1, 2]\n")
+        assert "Unknown op" in daemon.handle_request({"op": "fly", "junction": "x"})["message"]
+
+    def test_bad_line_closes_connection(self, tcp_daemon, tmp_path):
+        """A line that is not JSON (e.g. a browser POST) ends the connection before its body is read."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        address, token = tcp_daemon
+        body = json.dumps({"op": "point", "junction": junction,
+                           "target": str(tmp_path / "target"), "token": token})
+        with socket.create_connection(daemon.parse_address(address)[1], timeout=5) as sock:
+            sock.sendall(b"POST / HTTP/1.1\r\nContent-Type: text/plain\r\n\r\n"
+                         + body.encode("utf-8") + b"\n")
+            rfile = sock.makefile("rb")
+            assert b"Bad request" in rfile.readline()
+            assert rfile.readline() == b""
+        assert not os.path.lexists(junction)
+
+    def test_token_is_required(self, tcp_daemon, tmp_path):
+        """Requests without the daemon's token are refused and the connection is closed."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "junction")
+        address, token = tcp_daemon
+        for wrong in ("", "0" * len(token), "\u00e9"):
+            with daemon.Client(address, wrong) as client:
+                response = client.call("point", junction=junction, target=str(tmp_path / "target"))
+                assert response == {"ok": False, "message": "Bad token"}
+                with pytest.raises(ConnectionError):
+                    client.call("ping")
+        with daemon.Client(address, None) as client:
+            assert client.call("ping")["message"] == "Bad token"
+        assert not os.path.lexists(junction)
+
+    def test_fields_must_be_path_strings(self):
+        """A junction or target that is not a usable path string is refused with an error response."""
+        for request in ({"op": "status", "junction": 5},
+                        {"op": "point", "junction": ["a"], "target": "b"},
+                        {"op": "point", "junction": "a", "target": {"x": 1}},
+                        {"op": "unlink", "junction": "a\0b"}):
+            response = daemon.handle_request(request)
+            assert response["ok"] is False and response["message"].startswith("Bad request")
+
+    def test_defaults_fill_missing_fields(self, tmp_path):
+        """Requests without junction/target use the daemon's defaults."""
+        (tmp_path / "target").mkdir()
+        daemon.state["defaults"].update(junction=str(tmp_path / "j"), target=str(tmp_path / "target"))
+        try:
+            assert daemon.handle_request({"op": "point"})["ok"]
+        finally:
+            daemon.state["defaults"].update(junction="", target="")
+
+    def test_same_junction_is_serialized(self, tcp_daemon, tmp_path):
+        """Concurrent switches of one junction all succeed and leave a valid link."""
+        targets = [str(tmp_path / name) for name in "abcd"]
+        for target in targets:
+            os.mkdir(target)
+        junction = str(tmp_path / "junction")
+        failures = []
+
+        def switcher(target):
+            with daemon.Client(*tcp_daemon) as client:
+                for _ in range(25):
+                    response = client.call("point", junction=junction, target=target)
+                    if not response["ok"]:
+                        failures.append(response)
+
+        threads = [threading.Thread(target=switcher, args=(t,)) for t in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert failures == []
+        assert os.readlink(junction) in targets
+
+
+class TestToken:
+    """Tests for the token file."""
+
+    def test_token_file_is_private(self, tmp_path):
+        """The token is written for the current user only and replaced on restart."""
+        path = str(tmp_path / daemon.TOKEN_FILENAME)
+        first = daemon.make_server("127.0.0.1:0", token_path=path)
+        first.server_close()
+        assert daemon.read_token(path) == first.token
+        if os.name == "posix":
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        second = daemon.make_server("127.0.0.1:0", token_path=path)
+        second.server_close()
+        assert daemon.read_token(path) == second.token != first.token
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+class TestUnixSocket:
+    """Tests for the Unix socket transport."""
+
+    def test_roundtrip(self):
+        """The default transport works end to end."""
+        address = os.path.join(tempfile.mkdtemp(), "shuttle.sock")
+        server = daemon.make_server(address)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            assert daemon.request(address, server.token, "ping")["ok"]
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(address)
+
+    def test_live_socket_is_not_replaced(self, tmp_path):
+        """A second daemon refuses to take over the socket of one that is still running."""
+        address = str(tmp_path / "shuttle.sock")
+        server = daemon.make_server(address)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(OSError):
+                daemon.make_server(address)
+            assert daemon.request(address, server.token, "ping")["ok"]
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(address)
+
+    def test_stale_socket_is_replaced(self, tmp_path):
+        """A socket left behind by a dead daemon is removed and rebound."""
+        address = str(tmp_path / "shuttle.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(address)
+        stale.close()
+        server = daemon.make_server(address)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            assert daemon.request(address, server.token, "ping")["ok"]
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(address)
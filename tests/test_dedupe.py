@@ -0,0 +1,254 @@
+"""Tests for the duplicate-file index."""
+
+import os
+import time
+
+import pytest
+
+from win_quick_shuttle import dedupe, junctions, links
+
+
+def write(path, data):
+    """Create a file holding data."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def make_deduper(target, index_path=None, **kwargs):
+    """A loaded, synced Deduper over target."""
+    deduper = dedupe.Deduper(str(target), index_path and str(index_path), **kwargs)
+    deduper.load()
+    deduper.sync()
+    return deduper
+
+
+BIG = 3 * dedupe.PARTIAL_BYTES
+
+
+class TestArrivals:
+    """Indexing one file at a time."""
+
+    def test_unique_size_is_not_read(self, tmp_path):
+        """A file whose size no other file has is indexed without hashing."""
+        write(str(tmp_path / "a.bin"), b"a" * 10)
+        deduper = make_deduper(tmp_path)
+        write(str(tmp_path / "b.bin"), b"b" * 20)
+        assert deduper.add(str(tmp_path / "b.bin")) is None
+        assert deduper.stats["partial_hashes"] == 0
+
+    def test_duplicate_is_reported(self, tmp_path):
+        """An arrival with the same content as an indexed file is reported."""
+        write(str(tmp_path / "sub" / "a.bin"), b"same" * 100)
+        deduper = make_deduper(tmp_path)
+        write(str(tmp_path / "b.bin"), b"same" * 100)
+        report = deduper.add(str(tmp_path / "b.bin"))
+        assert report["duplicate_of"] == str(tmp_path / "sub" / "a.bin")
+        assert report["size"] == 400 and report["linked"] is False
+
+    def test_same_size_different_content(self, tmp_path):
+        """Files of equal size but different content are not duplicates."""
+        write(str(tmp_path / "a.bin"), b"a" * 400)
+        deduper = make_deduper(tmp_path)
+        write(str(tmp_path / "b.bin"), b"b" * 400)
+        assert deduper.add(str(tmp_path / "b.bin")) is None
+
+    def test_full_hash_only_when_partial_matches(self, tmp_path):
+        """Large files that differ only in the middle need a full hash; others do not."""
+        head = b"h" * dedupe.PARTIAL_BYTES
+        tail = b"t" * dedupe.PARTIAL_BYTES
+        write(str(tmp_path / "a.bin"), head + b"1" * BIG + tail)
+        deduper = make_deduper(tmp_path)
+        write(str(tmp_path / "b.bin"), b"x" * (BIG + 2 * dedupe.PARTIAL_BYTES))
+        assert deduper.add(str(tmp_path / "b.bin")) is None
+        assert deduper.stats["full_hashes"] == 0
+        write(str(tmp_path / "c.bin"), head + b"2" * BIG + tail)
+        assert deduper.add(str(tmp_path / "c.bin")) is None
+        assert deduper.stats["full_hashes"] == 2
+
+    def test_stale_hash_is_not_trusted(self, tmp_path):
+        """A candidate edited since it was hashed is not matched by its old hash."""
+        write(str(tmp_path / "a.bin"), b"a" * 400)
+        deduper = make_deduper(tmp_path)
+        write(str(tmp_path / "b.bin"), b"b" * 400)
+        deduper.add(str(tmp_path / "b.bin"))
+        write(str(tmp_path / "a.bin"), b"c" * 400)
+        os.utime(str(tmp_path / "a.bin"), ns=(1, 1))
+        write(str(tmp_path / "c.bin"), b"a" * 400)
+        assert deduper.add(str(tmp_path / "c.bin")) is None
+        write(str(tmp_path / "d.bin"), b"c" * 400)
+        assert deduper.add(str(tmp_path / "d.bin"))["duplicate_of"] == str(tmp_path / "a.bin")
+
+    def test_link_mode(self, tmp_path):
+        """With link=True the arrival becomes a hard link to the original."""
+        write(str(tmp_path / "a.bin"), b"same" * 100)
+        deduper = make_deduper(tmp_path, link=True)
+        write(str(tmp_path / "b.bin"), b"same" * 100)
+        report = deduper.add(str(tmp_path / "b.bin"))
+        assert report["linked"] is True
+        assert os.path.samefile(str(tmp_path / "a.bin"), str(tmp_path / "b.bin"))
+        assert deduper.stats["bytes_saved"] == 400
+        assert deduper.add(str(tmp_path / "b.bin")) is None
+
+
+class TestExisting:
+    """Finding duplicates already in the folder."""
+
+    def test_groups(self, tmp_path):
+        """All but the oldest copy of each content are reported."""
+        for name, data, mtime in [("a", b"1" * 50, 3), ("b", b"1" * 50, 1), ("c", b"1" * 50, 2),
+                                  ("d", b"2" * 50, 1), ("e", b"3" * 60, 1)]:
+            write(str(tmp_path / name), data)
+            os.utime(str(tmp_path / name), ns=(mtime, mtime))
+        reports = make_deduper(tmp_path).duplicates()
+        assert sorted(os.path.basename(r["file"]) for r in reports) == ["a", "c"]
+        assert {os.path.basename(r["duplicate_of"]) for r in reports} == {"b"}
+
+    def test_hard_links_are_not_duplicates(self, tmp_path):
+        """Names of one file are not reported against each other."""
+        write(str(tmp_path / "a"), b"1" * 50)
+        os.link(str(tmp_path / "a"), str(tmp_path / "b"))
+        assert make_deduper(tmp_path).duplicates() == []
+
+    def test_links_and_junctions_are_not_descended(self, tmp_path, monkeypatch):
+        """Files reached through a symlink or a junction are not indexed."""
+        write(str(tmp_path / "a"), b"1" * 50)
+        write(str(tmp_path / "elsewhere" / "b"), b"2" * 50)
+        write(str(tmp_path / "mounted" / "b"), b"2" * 50)
+        os.symlink(str(tmp_path / "elsewhere"), str(tmp_path / "linked"), target_is_directory=True)
+        entry_kind = links.entry_kind
+
+        def windows_entry_kind(entry):
+            # What a Windows scandir reports for a junction: a directory with a mount-point tag
+            if entry.name == "mounted":
+                return links.KIND_JUNCTION
+            return entry_kind(entry)
+
+        monkeypatch.setattr(links, "entry_kind", windows_entry_kind)
+        deduper = make_deduper(tmp_path)
+        assert sorted(deduper._files) == ["a", os.path.join("elsewhere", "b")]
+        assert deduper.duplicates() == []
+
+    def test_empty_files_are_ignored(self, tmp_path):
+        """Empty files are never duplicates."""
+        write(str(tmp_path / "a"), b"")
+        write(str(tmp_path / "b"), b"")
+        deduper = make_deduper(tmp_path)
+        assert deduper.duplicates() == []
+        assert deduper.add(str(tmp_path / "b")) is None
+
+
+class TestPersistence:
+    """Saving and reusing the index."""
+
+    def test_reload_reuses_hashes_and_dirs(self, tmp_path):
+        """A second Deduper reads the saved index and re-lists nothing unchanged."""
+        target = tmp_path / "target"
+        write(str(target / "x" / "a.bin"), b"same" * 100)
+        write(str(target / "y" / "b.bin"), b"same" * 100)
+        index = tmp_path / "index.jsonl"
+        first = make_deduper(target, index)
+        assert len(first.duplicates()) == 1
+        assert first.stats["partial_hashes"] == 2
+
+        second = make_deduper(target, index)
+        assert second.stats["listed"] == 0
+        assert second.stats["reused"] == 3
+        assert len(second.duplicates()) == 1
+        assert second.stats["partial_hashes"] == 0
+
+    def test_changed_dirs_are_relisted(self, tmp_path):
+        """Only directories whose mtime changed are listed again; removals are dropped."""
+        target = tmp_path / "target"
+        write(str(target / "x" / "a.bin"), b"a")
+        write(str(target / "y" / "b.bin"), b"b")
+        index = tmp_path / "index.jsonl"
+        make_deduper(target, index)
+        os.remove(str(target / "y" / "b.bin"))
+        os.utime(str(target / "y"), ns=(time.time_ns() + 10**9,) * 2)
+        deduper = make_deduper(target, index)
+        assert deduper.stats["listed"] == 1
+        assert deduper.stats["files"] == 1
+
+    def test_other_target_index_is_ignored(self, tmp_path):
+        """An index saved for another folder is not loaded."""
+        write(str(tmp_path / "a" / "f"), b"1")
+        write(str(tmp_path / "b" / "g"), b"2")
+        index = tmp_path / "index.jsonl"
+        make_deduper(tmp_path / "a", index)
+        deduper = make_deduper(tmp_path / "b", index)
+        assert deduper.stats["reused"] == 0 and deduper.stats["files"] == 1
+        assert make_deduper(tmp_path / "b", index).stats["reused"] == 1
+
+    def test_torn_line_and_compaction(self, tmp_path):
+        """A torn final line is skipped, and a store full of superseded lines is rewritten."""
+        write(str(tmp_path / "t" / "a"), b"1")
+        index = tmp_path / "index.jsonl"
+        deduper = make_deduper(tmp_path / "t", index)
+        with open(index, "a") as f:
+            f.write('{"file": "b", "si')
+        deduper = make_deduper(tmp_path / "t", index)
+        assert deduper.stats["files"] == 1
+        for i in range(200):
+            write(str(tmp_path / "t" / "a"), b"1" * (i + 1))
+            deduper.add(str(tmp_path / "t" / "a"))
+        with open(index) as f:
+            assert len(f.readlines()) < 150
+
+    def test_index_filename_per_target(self, tmp_path):
+        """Each target gets its own index file name."""
+        assert dedupe.index_filename(str(tmp_path / "a")) != dedupe.index_filename(str(tmp_path / "b"))
+        assert dedupe.index_filename(str(tmp_path / "a")).endswith(".jsonl")
+
+
+class TestFollow:
+    """Checking files as they arrive through the junction."""
+
+    def test_arrival_through_junction(self, tmp_path):
+        """A duplicate written through the junction is reported."""
+        target = tmp_path / "target"
+        write(str(target / "old.bin"), b"same" * 100)
+        junction = str(tmp_path / "ACTIVE")
+        junctions.point_junction(junction, str(target))
+        reports = []
+        follower = dedupe.follow(junction, on_duplicate=reports.append, settle=0, interval=0.05)
+        try:
+            time.sleep(0.2)
+            write(os.path.join(junction, "new.bin"), b"same" * 100)
+            deadline = time.monotonic() + 5
+            while not reports and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            follower.stop()
+        assert [os.path.basename(r["file"]) for r in reports] == ["new.bin"]
+
+    def test_idle_follower_does_not_rescan(self, tmp_path, monkeypatch):
+        """An idle follower lists the target only at start; arrivals are found without listing it again."""
+        target = tmp_path / "target"
+        write(str(target / "old.bin"), b"same" * 100)
+        junction = str(tmp_path / "ACTIVE")
+        junctions.point_junction(junction, str(target))
+        listed = []
+        real_scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path=".": listed.append(os.path.normpath(path)) or real_scandir(path))
+        reports = []
+
+        def wait_for(count):
+            deadline = time.monotonic() + 5
+            while len(reports) < count and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+        follower = dedupe.follow(junction, on_duplicate=reports.append, settle=0, interval=0.02)
+        try:
+            time.sleep(0.3)
+            before = listed.count(str(target))      # The router's first listing and the index's sync
+            time.sleep(0.3)
+            assert listed.count(str(target)) == before
+            write(os.path.join(junction, "first.bin"), b"same" * 100)
+            wait_for(1)
+            write(os.path.join(junction, "second.bin"), b"same" * 100)
+            wait_for(2)
+        finally:
+            follower.stop()
+        assert [os.path.basename(r["file"]) for r in reports] == ["first.bin", "second.bin"]
+        assert listed.count(str(target)) == before
@@ -0,0 +1,195 @@
+"""Tests for the target history and its fuzzy index."""
+
+import json
+import random
+import time
+
+from win_quick_shuttle import history
+from win_quick_shuttle.history import TargetHistory
+
+
+DAY = 24 * 3600.0
+NOW = 1_700_000_000.0
+
+
+def brute_force(store, query, limit=history.SEARCH_LIMIT):
+    """Reference search: every entry, best first, checked in order."""
+    query = "".join(query.lower().split())
+    result = []
+    for path in store.search("", limit=len(store)):
+        rest = iter(path.lower())
+        if all(ch in rest for ch in query):
+            result.append(path)
+    return result[:limit]
+
+
+class TestFrecency:
+    """Ranking by frequency and recency."""
+
+    def test_frequent_beats_rare(self):
+        """A target visited often ranks above one visited once at the same time."""
+        store = TargetHistory()
+        store.record("C:\\rare", NOW)
+        for _ in range(3):
+            store.record("C:\\often", NOW)
+        assert store.search("") == ["C:\\often", "C:\\rare"]
+
+    def test_recent_beats_stale(self):
+        """Old visits decay: one visit today beats three visits a month ago."""
+        store = TargetHistory()
+        for _ in range(3):
+            store.record("C:\\stale", NOW - 30 * DAY)
+        store.record("C:\\fresh", NOW)
+        assert store.search("") == ["C:\\fresh", "C:\\stale"]
+
+    def test_revisit_moves_entry(self):
+        """Revisiting an entry moves it up without duplicating it."""
+        store = TargetHistory()
+        store.record("C:\\a", NOW)
+        store.record("C:\\b", NOW + 1)
+        store.record("C:\\a", NOW + 2)
+        assert store.search("") == ["C:\\a", "C:\\b"]
+        assert len(store) == 2
+
+
+class TestSearch:
+    """Fuzzy search through the index."""
+
+    def test_fuzzy_in_order(self):
+        """Query characters must appear in order, case-insensitively, spaces ignored."""
+        store = TargetHistory()
+        store.record("C:\\Projects\\Alpha", NOW)
+        store.record("C:\\Photos\\2024", NOW)
+        assert store.search("prjal") == ["C:\\Projects\\Alpha"]
+        assert store.search("PH 24") == ["C:\\Photos\\2024"]
+        assert store.search("ahplA") == []
+
+    def test_repeated_characters(self):
+        """A character typed twice must occur twice."""
+        store = TargetHistory()
+        store.record("D:\\x1", NOW)
+        store.record("D:\\x1\\x2", NOW)
+        assert store.search("xx") == ["D:\\x1\\x2"]
+
+    def test_matches_brute_force_while_typing(self):
+        """Incremental searches agree with a brute-force scan, keystroke by keystroke."""
+        rng = random.Random(7)
+        words = ["projects", "assets", "renders", "archive", "2024", "photos", "final", "backup"]
+        store = TargetHistory()
+        for i in range(3000):
+            parts = [rng.choice(words) + str(rng.randint(0, 40)) for _ in range(rng.randint(1, 4))]
+            store.record("C:\\" + "\\".join(parts), NOW + rng.random() * 30 * DAY)
+        for query in ["projects", "fin\\bak3", "2024 2024", "zzz", "aaaa", "o0o"]:
+            for n in range(1, len(query) + 1):
+                assert store.search(query[:n]) == brute_force(store, query[:n]), query[:n]
+            for n in range(len(query) - 1, 0, -1):
+                assert store.search(query[:n]) == brute_force(store, query[:n]), query[:n]
+
+    def test_record_invalidates_searches(self):
+        """A visit recorded mid-typing shows up in the next search."""
+        store = TargetHistory()
+        store.record("C:\\alpha", NOW)
+        assert store.search("al") == ["C:\\alpha"]
+        store.record("C:\\also", NOW + 1)
+        assert store.search("al") == ["C:\\also", "C:\\alpha"]
+
+    def test_search_step_budget(self):
+        """A zero budget returns partial results that later steps complete."""
+        store = TargetHistory()
+        for i in range(2000):
+            store.record(f"C:\\dir{i}", NOW + i)
+        store.record("C:\\0rid", NOW - DAY)
+        steps = 0
+        done = False
+        while not done:
+            paths, done = store.search_step("0rid", budget=0)
+            steps += 1
+        assert steps > 1
+        assert paths == ["C:\\0rid"]
+
+    def test_keystroke_cost(self):
+        """Typing against 50k entries stays far below a millisecond per step."""
+        rng = random.Random(1)
+        words = ["projects", "assets", "downloads", "renders", "client", "archive",
+                 "2024", "photos", "music", "build", "notes", "final", "backup"]
+        store = TargetHistory()
+        for i in range(50000):
+            parts = [rng.choice(words) + str(rng.randint(0, 99)) for _ in range(rng.randint(2, 5))]
+            store.record("C:\\" + "\\".join(parts), NOW + rng.random() * 30 * DAY)
+        timings = []
+        for query in ["projects", "rend final", "arch2024", "xq", "99\\99"]:
+            for n in range(1, len(query) + 1):
+                done = False
+                while not done:
+                    start = time.perf_counter()
+                    _, done = store.search_step(query[:n], budget=0.0005)
+                    timings.append(time.perf_counter() - start)
+        timings.sort()
+        assert timings[len(timings) // 2] < 0.001
+
+
+class TestStore:
+    """The JSON-lines store."""
+
+    def test_round_trip(self, tmp_path):
+        """Visits recorded to a file are ranked the same after reloading."""
+        path = str(tmp_path / "history.jsonl")
+        store = TargetHistory(path)
+        store.record("C:\\a", NOW)
+        store.record("C:\\b", NOW)
+        store.record("C:\\b", NOW)
+        assert TargetHistory(path).search("") == ["C:\\b", "C:\\a"]
+
+    def test_record_does_not_load(self, tmp_path):
+        """Recording into an unloaded history only appends a line."""
+        path = tmp_path / "history.jsonl"
+        store = TargetHistory(str(path))
+        store.record("C:\\a", NOW)
+        assert not store.loaded
+        assert json.loads(path.read_text()) == {"path": "C:\\a", "time": NOW}
+
+    def test_compaction(self, tmp_path):
+        """Many revisits are compacted to one line per entry, keeping the ranking."""
+        path = tmp_path / "history.jsonl"
+        store = TargetHistory(str(path))
+        store.load()
+        for i in range(300):
+            store.record("C:\\a" if i % 3 else "C:\\b", NOW + i)
+        assert len(path.read_text().splitlines()) < 300
+        assert TargetHistory(str(path)).search("") == store.search("")
+
+    def test_torn_line_is_skipped(self, tmp_path):
+        """A partly written last line is ignored."""
+        path = tmp_path / "history.jsonl"
+        path.write_text(json.dumps({"path": "C:\\a", "time": NOW}) + "\n{\"path\": \"C:\\\\b")
+        assert TargetHistory(str(path)).search("") == ["C:\\a"]
+
+    def test_saved_index_is_reused(self, tmp_path, monkeypatch):
+        """A load past INDEX_TAIL lines saves the index; the next load indexes only newer lines."""
+        monkeypatch.setattr(history, "INDEX_TAIL", 10)
+        path = str(tmp_path / "history.jsonl")
+        writer = TargetHistory(path)
+        for i in range(50):
+            writer.record(f"C:\\Projects\\p{i}", NOW + i)
+        TargetHistory(path).load()
+        assert (tmp_path / "history.jsonl.index").exists()
+        writer.record("C:\\Projects\\late", NOW + 100)
+
+        indexed = []
+        entry = TargetHistory._entry
+        monkeypatch.setattr(TargetHistory, "_entry", lambda self, p: indexed.append(p) or entry(self, p))
+        store = TargetHistory(path)
+        assert store.search("prjlate") == ["C:\\Projects\\late"]
+        assert indexed == ["C:\\Projects\\late"]
+        assert store.search("p4", limit=100) == brute_force(store, "p4", limit=100)
+
+    def test_replaced_store_ignores_saved_index(self, tmp_path, monkeypatch):
+        """An index saved for an older store file (e.g. before another process compacted it) is not used."""
+        monkeypatch.setattr(history, "INDEX_TAIL", 0)
+        path = tmp_path / "history.jsonl"
+        TargetHistory(str(path)).record("C:\\a", NOW)
+        TargetHistory(str(path)).load()
+        replacement = tmp_path / "other.jsonl"
+        replacement.write_text(json.dumps({"path": "C:\\b", "key": 1.0}) + "\n")
+        replacement.replace(path)
+        assert TargetHistory(str(path)).search("") == ["C:\\b"]
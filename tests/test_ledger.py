@@ -0,0 +1,168 @@
+"""Tests for the per-target arrival ledger."""
+
+import os
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, ledger
+
+
+@pytest.fixture
+def hook(tmp_path):
+    """Turn the switch hook on for the test, with ledgers in tmp_path/project."""
+    (tmp_path / "project").mkdir()
+    ledger.enable(str(tmp_path / "project"))
+    yield str(tmp_path / "project")
+    ledger.disable()
+
+
+def make_ledger(tmp_path, target="T"):
+    return ledger.Ledger(str(tmp_path / "ledger"), str(tmp_path / target))
+
+
+class TestRecords:
+    """Appending and reading fixed-size records."""
+
+    def test_record_size(self):
+        """Every record takes the same 32 bytes."""
+        assert ledger.RECORD.size == 32
+        assert ledger.HEADER.size <= ledger.HEADER_BYTES
+
+    def test_between(self, tmp_path):
+        """between() returns the arrivals in a half-open time range, oldest first."""
+        book = make_ledger(tmp_path)
+        book.open_session("J", when=100)
+        for second in range(101, 111):
+            book.record(f"f{second}.bin", second, when=second)
+        assert [e["file"] for e in book.between(103, 106)] == ["f103.bin", "f104.bin", "f105.bin"]
+        assert len(list(book.between())) == 10
+        assert list(book.between(200)) == []
+        assert book.count(None, 103) == 3     # the OPEN and two arrivals
+
+    def test_times_never_go_backwards(self, tmp_path):
+        """A record stamped earlier than the last one is kept in order, at the last time."""
+        book = make_ledger(tmp_path)
+        book.open_session("J", when=100)
+        book.record("late.bin", 1, when=50)
+        assert [e["time"] for e in book.between()] == [100]
+
+    def test_arrival_recorded_once_per_session(self, tmp_path):
+        """The same file reported twice in a session is recorded once, even after a restart."""
+        book = make_ledger(tmp_path)
+        book.open_session("J", when=100)
+        assert book.record("a.bin", 5, when=101) is True
+        assert book.record("a.bin", 5, when=102) is False
+        book.close()
+        again = make_ledger(tmp_path)
+        assert again.record("a.bin", 5, when=103) is False
+        again.open_session("J", when=104)
+        assert again.record("a.bin", 5, when=105) is True
+
+    def test_sessions(self, tmp_path):
+        """sessions() lists each redirect window, newest first, with its close time."""
+        book = make_ledger(tmp_path)
+        book.open_session("J1", when=100)
+        book.record("a.bin", 1, when=101)
+        book.close_session("J1", when=110)
+        first = book.open_session("J2", when=120)
+        book.record("b.bin", 1, when=121)
+        sessions = book.sessions()
+        assert [(s["junction"], s["opened"], s["closed"]) for s in sessions] == \
+            [("J2", 120, None), ("J1", 100, 110)]
+        assert [e["file"] for e in book.session_arrivals(first)] == ["b.bin"]
+
+    def test_torn_record_is_cut_off(self, tmp_path):
+        """A partly written last record is ignored by queries and dropped on the next write."""
+        book = make_ledger(tmp_path)
+        book.open_session("J", when=100)
+        book.record("a.bin", 1, when=101)
+        book.close()
+        with open(str(tmp_path / "ledger.bin"), "ab") as f:
+            f.write(b"\x01" * 10)
+        again = make_ledger(tmp_path)
+        assert [e["file"] for e in again.between()] == ["a.bin"]
+        again.record("b.bin", 2, when=102)
+        assert [e["file"] for e in again.between()] == ["a.bin", "b.bin"]
+        assert (os.path.getsize(str(tmp_path / "ledger.bin")) - ledger.HEADER_BYTES) % ledger.RECORD.size == 0
+
+    def test_missing_ledger_is_empty(self, tmp_path):
+        """A target with no ledger yet has no arrivals or sessions."""
+        book = make_ledger(tmp_path)
+        assert list(book.between()) == []
+        assert book.sessions() == [] and len(book) == 0
+
+
+class TestSwitchHook:
+    """Sessions opened and closed by switches."""
+
+    def test_switch_opens_and_closes_sessions(self, tmp_path, hook):
+        """Pointing a junction opens a session in the new target and closes the old one."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        junction = str(tmp_path / "ACTIVE")
+        junctions.point_junction(junction, str(tmp_path / "a"))
+        junctions.point_junction(junction, str(tmp_path / "b"))
+        old = ledger.ledger_for(str(tmp_path / "a")).sessions()
+        new = ledger.ledger_for(str(tmp_path / "b")).sessions()
+        assert old[0]["junction"] == junction and old[0]["closed"] is not None
+        assert new[0]["closed"] is None
+
+    def test_unlink_closes_session(self, tmp_path, hook):
+        """Removing the junction closes its target's session."""
+        (tmp_path / "a").mkdir()
+        junction = str(tmp_path / "ACTIVE")
+        junctions.point_junction(junction, str(tmp_path / "a"))
+        junctions.unlink_junction(junction)
+        assert ledger.ledger_for(str(tmp_path / "a")).sessions()[0]["closed"] is not None
+
+    def test_hook_off_writes_nothing(self, tmp_path):
+        """Without enable() switches leave no ledger behind."""
+        (tmp_path / "a").mkdir()
+        junctions.point_junction(str(tmp_path / "ACTIVE"), str(tmp_path / "a"))
+        assert not [name for name in os.listdir(tmp_path) if name.startswith("ledger-")]
+
+
+class TestFollow:
+    """Recording files as they arrive through the junction."""
+
+    def test_arrivals_are_recorded(self, tmp_path, hook):
+        """A file written through the junction is recorded; one already there is not."""
+        (tmp_path / "target").mkdir()
+        (tmp_path / "target" / "old.bin").write_bytes(b"x")
+        os.utime(tmp_path / "target" / "old.bin", ns=(1, 1))
+        junction = str(tmp_path / "ACTIVE")
+        junctions.point_junction(junction, str(tmp_path / "target"))
+        arrivals = []
+        follower = ledger.follow(junction, on_arrival=arrivals.append, settle=0, interval=0.05)
+        try:
+            time.sleep(0.2)
+            with open(os.path.join(junction, "new.bin"), "wb") as f:
+                f.write(b"x" * 7)
+            deadline = time.monotonic() + 5
+            while not arrivals and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            follower.stop()
+        assert [(a["file"], a["size"]) for a in arrivals] == [("new.bin", 7)]
+        recorded = ledger.ledger_for(str(tmp_path / "target")).between(time.time() - 60)
+        assert [e["file"] for e in recorded] == ["new.bin"]
+
+    def test_first_arrival_without_session_is_recorded(self, tmp_path, hook):
+        """With no session open yet, the first file to arrive opens one and is recorded in it."""
+        (tmp_path / "target").mkdir()
+        junction = str(tmp_path / "ACTIVE")
+        junctions.create_junction(junction, str(tmp_path / "target"))     # No hook: no session
+        arrivals = []
+        follower = ledger.follow(junction, on_arrival=arrivals.append, settle=0, interval=0.05)
+        try:
+            time.sleep(0.2)
+            (tmp_path / "target" / "first.bin").write_bytes(b"x" * 3)
+            deadline = time.monotonic() + 5
+            while not arrivals and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            follower.stop()
+        assert [a["file"] for a in arrivals] == ["first.bin"]
+        book = ledger.ledger_for(str(tmp_path / "target"))
+        assert [e["file"] for e in book.session_arrivals(book.sessions()[0]["session"])] == ["first.bin"]
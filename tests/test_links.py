@@ -0,0 +1,229 @@
+"""Tests for the link backends."""
+
+import os
+import stat
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from win_quick_shuttle import links
+
+
+@pytest.fixture
+def backend():
+    """The platform backend, installed fresh for the test."""
+    old = links.set_backend(links.default_backend())
+    yield links.get_backend()
+    links.set_backend(old)
+
+
+class TestProbe:
+    """Tests for probe() records."""
+
+    def test_probe_missing(self, backend, tmp_path):
+        """A nonexistent path probes as missing, with no mtime."""
+        result = backend.probe(str(tmp_path / "nope"))
+        assert result.kind == links.KIND_MISSING
+        assert result.exists is False
+        assert result.mtime is None
+
+    def test_probe_dir(self, backend, tmp_path):
+        """A plain directory probes as dir, with no target."""
+        result = backend.probe(str(tmp_path))
+        assert result.kind == links.KIND_DIR
+        assert result.target is None
+        assert result.mtime is not None
+
+    def test_probe_file(self, backend, tmp_path):
+        """A regular file probes as other."""
+        (tmp_path / "f.txt").write_text("x")
+        assert backend.probe(str(tmp_path / "f.txt")).kind == links.KIND_OTHER
+
+    def test_probe_link(self, backend, tmp_path):
+        """A link made by the backend probes as a link, with its target."""
+        (tmp_path / "target").mkdir()
+        backend.create(str(tmp_path / "link"), str(tmp_path / "target"))
+        result = backend.probe(str(tmp_path / "link"))
+        assert result.kind in (links.KIND_LINK, links.KIND_JUNCTION)
+        assert result.is_link
+        assert result.target.endswith(str(tmp_path / "target"))
+
+    def test_probe_dangling_link(self, backend, tmp_path):
+        """A link whose target vanished still probes as a link."""
+        (tmp_path / "target").mkdir()
+        backend.create(str(tmp_path / "link"), str(tmp_path / "target"))
+        (tmp_path / "target").rmdir()
+        assert backend.probe(str(tmp_path / "link")).is_link
+
+    def test_probe_single_lstat(self, backend, tmp_path):
+        """probe() costs one lstat, plus one readlink only when asked."""
+        (tmp_path / "target").mkdir()
+        backend.create(str(tmp_path / "link"), str(tmp_path / "target"))
+        with patch("os.lstat", wraps=os.lstat) as mock_lstat, \
+                patch("os.readlink", wraps=os.readlink) as mock_readlink:
+            backend.probe(str(tmp_path / "link"), read_target=False)
+            assert mock_lstat.call_count == 1
+            assert mock_readlink.call_count == 0
+            backend.probe(str(tmp_path / "link"))
+            assert mock_lstat.call_count == 2
+            assert mock_readlink.call_count == 1
+
+    def test_probe_uses_slots(self):
+        """Probe records carry no per-instance __dict__."""
+        assert not hasattr(links.Probe("x", links.KIND_MISSING), "__dict__")
+
+
+class TestEntryKind:
+    """Tests for classifying scandir() entries."""
+
+    def test_posix_entries(self, tmp_path):
+        """Directories, symlinks and files are told apart from the listing."""
+        (tmp_path / "d").mkdir()
+        (tmp_path / "f").write_text("x")
+        os.symlink(str(tmp_path / "d"), str(tmp_path / "l"), target_is_directory=True)
+        with os.scandir(tmp_path) as entries:
+            kinds = {entry.name: links.entry_kind(entry) for entry in entries}
+        assert kinds == {"d": links.KIND_DIR, "f": links.KIND_OTHER, "l": links.KIND_LINK}
+
+    def test_windows_junction(self):
+        """On Windows a directory entry carrying the mount-point reparse tag is a junction."""
+
+        class JunctionEntry:
+            name = "j"
+
+            def is_symlink(self):
+                return False        # Windows does not report junctions as symlinks
+
+            def is_dir(self, follow_symlinks=True):
+                return True
+
+            def stat(self, follow_symlinks=True):
+                return SimpleNamespace(st_mode=stat.S_IFDIR | 0o777,
+                                       st_reparse_tag=links.IO_REPARSE_TAG_MOUNT_POINT)
+
+        with patch.object(links.os, "name", "nt"):
+            assert links.entry_kind(JunctionEntry()) == links.KIND_JUNCTION
+
+
+class TestCleanTarget:
+    """Tests for stripping the prefix Windows reports on junction targets."""
+
+    def test_drive_path(self):
+        """A prefixed drive path loses its prefix."""
+        assert links.clean_target("\\\\?\\D:\\proj") == "D:\\proj"
+
+    def test_unc_path(self):
+        """A prefixed UNC path turns back into a plain UNC path."""
+        assert links.clean_target("\\\\?\\UNC\\server\\share\\proj") == "\\\\server\\share\\proj"
+
+    def test_plain_paths_unchanged(self):
+        """Targets without the prefix are returned as they are."""
+        for target in ("D:\\proj", "\\\\server\\share", "/srv/proj", "relative"):
+            assert links.clean_target(target) == target
+
+
+class TestBackendLifecycle:
+    """Tests for create/read/remove through the backend API."""
+
+    def test_create_read_remove(self, backend, tmp_path):
+        """Create a link, read it back, remove it; the target survives."""
+        target = tmp_path / "target"
+        target.mkdir()
+        (target / "a.txt").write_text("a")
+        link = str(tmp_path / "link")
+
+        backend.create(link, str(target))
+        assert backend.read(link).endswith(str(target))
+        assert open(os.path.join(link, "a.txt")).read() == "a"
+
+        backend.remove(link)
+        assert backend.probe(link).kind == links.KIND_MISSING
+        assert (target / "a.txt").exists()
+
+    def test_remove_missing_raises(self, backend, tmp_path):
+        """Removing a missing link raises OSError."""
+        with pytest.raises(OSError):
+            backend.remove(str(tmp_path / "nope"))
+
+
+class TestSelection:
+    """Tests for backend selection."""
+
+    def test_default_backend_matches_platform(self):
+        """Windows gets junctions, everything else gets symlinks."""
+        expected = links.JunctionBackend if os.name == "nt" else links.SymlinkBackend
+        assert isinstance(links.default_backend(), expected)
+
+    def test_set_backend_returns_previous(self):
+        """set_backend installs a backend and hands back the old one."""
+        sentinel = object()
+        old = links.set_backend(sentinel)
+        try:
+            assert links.get_backend() is sentinel
+        finally:
+            links.set_backend(old)
+
+
+class TestReplace:
+    """Tests for the atomic replace() path."""
+
+    def test_replace_repoints_link(self, backend, tmp_path):
+        """replace() moves an existing link to a new target and leaves no temp files."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        link = str(tmp_path / "link")
+        backend.create(link, str(tmp_path / "a"))
+
+        backend.replace(link, str(tmp_path / "b"))
+
+        assert backend.read(link).endswith(str(tmp_path / "b"))
+        assert sorted(os.listdir(tmp_path)) == ["a", "b", "link"]
+
+    def test_replace_creates_when_missing(self, backend, tmp_path):
+        """replace() on a missing path simply creates the link."""
+        (tmp_path / "a").mkdir()
+        backend.replace(str(tmp_path / "link"), str(tmp_path / "a"))
+        assert backend.read(str(tmp_path / "link")).endswith(str(tmp_path / "a"))
+
+    def test_replace_failure_keeps_old_link(self, backend, tmp_path):
+        """If the swap fails, the old link is still in place."""
+        (tmp_path / "a").mkdir()
+        link = str(tmp_path / "link")
+        backend.create(link, str(tmp_path / "a"))
+
+        with patch("os.replace", side_effect=OSError("boom")), \
+                patch("os.rename", side_effect=OSError("boom")):
+            with pytest.raises(OSError):
+                backend.replace(link, str(tmp_path / "b"))
+
+        assert backend.read(link).endswith(str(tmp_path / "a"))
+        assert sorted(os.listdir(tmp_path)) == ["a", "link"]
+
+    @pytest.mark.skipif(os.name == "nt", reason="junction swaps use two renames")
+    def test_readers_never_see_missing_path(self, backend, tmp_path):
+        """A reader polling the link during hundreds of swaps always finds a directory."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        link = str(tmp_path / "link")
+        backend.create(link, str(tmp_path / "a"))
+
+        stop = threading.Event()
+        misses = []
+
+        def reader():
+            while not stop.is_set():
+                if not os.path.isdir(link):
+                    misses.append(1)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        try:
+            for i in range(500):
+                backend.replace(link, str(tmp_path / ("a" if i % 2 else "b")))
+        finally:
+            stop.set()
+            thread.join()
+
+        assert misses == []
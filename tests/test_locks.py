@@ -0,0 +1,204 @@
+"""Tests for the cross-process switch lock."""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, links, locks
+
+
+@pytest.fixture
+def junction(tmp_path):
+    """A junction path with two target folders beside it."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    return str(tmp_path / "junction")
+
+
+def write_lock(path, **holder):
+    """Write a lock file as another holder would."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(holder, f)
+
+
+def dead_pid():
+    """Return the pid of a process that has already exited."""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def hold_in_child(junction):
+    """Start a process that takes junction's lock and keeps it until its stdin closes."""
+    code = (
+        "import sys\n"
+        "from win_quick_shuttle import locks\n"
+        "with locks.SwitchLock(sys.argv[1]):\n"
+        "    print('held', flush=True)\n"
+        "    sys.stdin.read()\n"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code, junction],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert proc.stdout.readline().strip() == "held"
+    return proc
+
+
+class TestSwitchLock:
+    """Taking, holding and releasing the lock."""
+
+    def test_lock_file_lifecycle(self, junction):
+        """The lock file names its holder while held and no one after release."""
+        lock = locks.SwitchLock(junction)
+        with lock:
+            holder = locks.read_holder(lock.lock_path)
+            assert holder["pid"] == os.getpid()
+            assert holder["token"] == lock.token
+        assert locks.read_holder(lock.lock_path) is None
+        assert os.path.basename(lock.lock_path) == ".junction.wqs-lock"
+        with locks.SwitchLock(junction, timeout=0.05):
+            pass
+
+    def test_threads_wait_for_each_other(self, junction):
+        """A second thread cannot take the lock until the first releases it."""
+        held = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with locks.SwitchLock(junction):
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait()
+        with pytest.raises(TimeoutError):
+            locks.SwitchLock(junction, timeout=0.05).acquire()
+        release.set()
+        thread.join()
+        with locks.SwitchLock(junction, timeout=1):
+            pass
+
+    def test_foreign_holder_times_out(self, junction):
+        """A live holder in another process makes the lock time out, naming it."""
+        proc = hold_in_child(junction)
+        try:
+            with pytest.raises(TimeoutError, match=f"process {proc.pid}"):
+                locks.SwitchLock(junction, timeout=0.05).acquire()
+        finally:
+            proc.communicate("")
+        with locks.SwitchLock(junction, timeout=1):
+            pass
+
+    def test_memory_backend_locks_in_process_only(self):
+        """With the memory backend there is no lock file."""
+        from win_quick_shuttle.memfs import MemoryBackend
+        old = links.set_backend(MemoryBackend())
+        try:
+            lock = locks.SwitchLock("/work/j")
+            with lock:
+                assert lock.lock_path is None
+        finally:
+            links.set_backend(old)
+
+
+class TestCrashedHolders:
+    """Locks whose holders are gone."""
+
+    def test_leftover_record_does_not_block(self, junction):
+        """A lock file naming an exited process, as a crash leaves it, is taken at once."""
+        lock_path = links.get_backend().lock_path(junction)
+        write_lock(lock_path, pid=dead_pid(), host=locks._host(), time=time.time(), token="old")
+        with locks.SwitchLock(junction, timeout=0.05) as lock:
+            assert locks.read_holder(lock_path)["token"] == lock.token
+
+    def test_killed_holder_releases_the_lock(self, junction):
+        """The OS drops the lock of a holder that is killed while holding it."""
+        proc = hold_in_child(junction)
+        proc.kill()
+        proc.communicate()
+        with locks.SwitchLock(junction, timeout=1) as lock:
+            assert locks.read_holder(lock.lock_path)["token"] == lock.token
+
+    def test_three_processes_take_turns(self, junction, tmp_path):
+        """Three processes contending for one lock, left behind by a crash, are never inside it together."""
+        lock_path = links.get_backend().lock_path(junction)
+        write_lock(lock_path, pid=dead_pid(), host=locks._host(), time=time.time(), token="old")
+        log_path = str(tmp_path / "log")
+        code = (
+            "import os, sys, time\n"
+            "from win_quick_shuttle import locks\n"
+            "junction, log_path = sys.argv[1:]\n"
+            "for _ in range(30):\n"
+            "    with locks.SwitchLock(junction):\n"
+            "        with open(log_path, 'a') as f:\n"
+            "            f.write(f'in {os.getpid()}\\n')\n"
+            "        time.sleep(0.001)\n"
+            "        with open(log_path, 'a') as f:\n"
+            "            f.write(f'out {os.getpid()}\\n')\n"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", code, junction, log_path]) for _ in range(3)]
+        assert [proc.wait() for proc in procs] == [0, 0, 0]
+        with open(log_path, encoding="utf-8") as f:
+            lines = f.read().split()
+        events = list(zip(lines[0::2], lines[1::2]))
+        assert len(events) == 3 * 30 * 2
+        for enter, leave in zip(events[0::2], events[1::2]):
+            assert enter[0] == "in" and leave == ("out", enter[1])
+
+
+class TestSwitching:
+    """Switches take the lock; reads do not."""
+
+    def test_point_waits_for_lock(self, junction, tmp_path, monkeypatch):
+        """point_junction reports a busy junction instead of racing its holder."""
+        monkeypatch.setattr(locks, "DEFAULT_TIMEOUT", 0.05)
+        proc = hold_in_child(junction)
+        try:
+            success, message = junctions.point_junction(junction, str(tmp_path / "a"))
+        finally:
+            proc.communicate("")
+        assert success is False
+        assert message.startswith("Junction is busy")
+
+    def test_unwritable_lock_is_reported(self, junction, tmp_path, monkeypatch):
+        """A lock file that cannot be created fails the switch with a message, not an exception."""
+        def refuse(self, deadline):
+            raise PermissionError(13, "Permission denied", self.lock_path)
+
+        junctions.point_junction(junction, str(tmp_path / "a"))
+        monkeypatch.setattr(locks.SwitchLock, "_acquire_file", refuse)
+        for success, message in (junctions.point_junction(junction, str(tmp_path / "b")),
+                                 junctions.unlink_junction(junction)):
+            assert success is False
+            assert "Permission denied" in message
+        assert junctions.probe(junction).target == str(tmp_path / "a")
+
+    def test_status_does_not_wait(self, junction, tmp_path):
+        """Status reads go ahead while a writer holds the lock."""
+        junctions.point_junction(junction, str(tmp_path / "a"))
+        with locks.SwitchLock(junction):
+            start = time.perf_counter()
+            status = junctions.junction_status(junction)
+            assert time.perf_counter() - start < 0.5
+        assert status["target"] == str(tmp_path / "a")
+
+    def test_concurrent_processes_never_lose_the_link(self, junction, tmp_path):
+        """Processes flipping one junction with remove-then-create all succeed."""
+        code = (
+            "import sys\n"
+            "from win_quick_shuttle import junctions\n"
+            "j, a, b = sys.argv[1:]\n"
+            "bad = sum(not junctions.point_junction(j, (a, b)[i % 2], atomic=False)[0] for i in range(40))\n"
+            "sys.exit(bad)\n"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", code, junction,
+                                   str(tmp_path / "a"), str(tmp_path / "b")])
+                 for _ in range(4)]
+        assert [proc.wait() for proc in procs] == [0, 0, 0, 0]
+        assert junctions.probe(junction).is_link
+        assert locks.read_holder(links.get_backend().lock_path(junction)) is None
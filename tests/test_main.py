@@ -2,13 +2,14 @@
 
 import os
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
-from win_quick_shuttle.main import (
+from win_quick_shuttle.junctions import (
     is_junction,
     get_junction_target,
     remove_junction,
     create_junction,
+    redirect_junction,
 )
 
 
@@ -19,71 +20,99 @@ class TestJunctionHelpers:
         """is_junction returns False for nonexistent paths."""
         assert is_junction(r"C:\nonexistent\path\that\does\not\exist") is False
 
-    @patch("win_quick_shuttle.main.ctypes")
-    def test_is_junction_with_reparse_point(self, mock_ctypes):
-        """is_junction returns True when path has reparse point attribute."""
-        mock_ctypes.windll.kernel32.GetFileAttributesW.return_value = 0x410  # DIR + REPARSE
-        with patch("os.path.exists", return_value=True):
-            assert is_junction(r"C:\some\junction") is True
+    def test_is_junction_with_link(self, tmp_path):
+        """is_junction returns True for a link created by create_junction."""
+        (tmp_path / "target").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
+        assert is_junction(str(tmp_path / "junction")) is True
 
-    @patch("win_quick_shuttle.main.ctypes")
-    def test_is_junction_without_reparse_point(self, mock_ctypes):
+    def test_is_junction_regular_directory(self, tmp_path):
         """is_junction returns False for regular directories."""
-        mock_ctypes.windll.kernel32.GetFileAttributesW.return_value = 0x10  # DIR only
-        with patch("os.path.exists", return_value=True):
-            assert is_junction(r"C:\some\directory") is False
+        assert is_junction(str(tmp_path)) is False
 
-    @patch("os.readlink")
-    def test_get_junction_target_success(self, mock_readlink):
+    def test_get_junction_target_success(self, tmp_path):
         """get_junction_target returns the target path."""
-        mock_readlink.return_value = r"C:\target\path"
-        assert get_junction_target(r"C:\junction") == r"C:\target\path"
+        (tmp_path / "target").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
+        assert get_junction_target(str(tmp_path / "junction")).endswith(str(tmp_path / "target"))
 
     @patch("os.readlink")
-    def test_get_junction_target_failure(self, mock_readlink):
-        """get_junction_target returns None on OSError."""
+    def test_get_junction_target_failure(self, mock_readlink, tmp_path):
+        """get_junction_target returns None when the link cannot be read."""
+        (tmp_path / "target").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
         mock_readlink.side_effect = OSError("Not a junction")
-        assert get_junction_target(r"C:\not\a\junction") is None
+        assert get_junction_target(str(tmp_path / "junction")) is None
+
+    def test_get_junction_target_not_a_link(self, tmp_path):
+        """get_junction_target returns None for a plain directory without calling readlink."""
+        with patch("os.readlink") as mock_readlink:
+            assert get_junction_target(str(tmp_path)) is None
+            mock_readlink.assert_not_called()
 
 
-class TestShellCommands:
-    """Tests for shell command functions."""
+class TestLinkCommands:
+    """Tests for the in-process create/remove helpers."""
 
     @patch("subprocess.run")
-    def test_remove_junction_success(self, mock_run):
-        """remove_junction returns True on success."""
-        mock_run.return_value = MagicMock(returncode=0, stderr="")
-        success, error = remove_junction(r"C:\junction")
+    def test_remove_junction_success(self, mock_run, tmp_path):
+        """remove_junction returns True on success without spawning a shell."""
+        (tmp_path / "target").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
+        success, error = remove_junction(str(tmp_path / "junction"))
         assert success is True
         assert error == ""
-        mock_run.assert_called_once()
-        assert "rmdir" in mock_run.call_args[0][0]
+        mock_run.assert_not_called()
 
-    @patch("subprocess.run")
-    def test_remove_junction_failure(self, mock_run):
+    def test_remove_junction_failure(self, tmp_path):
         """remove_junction returns False with error message on failure."""
-        mock_run.return_value = MagicMock(returncode=1, stderr="Access denied")
-        success, error = remove_junction(r"C:\junction")
+        success, error = remove_junction(str(tmp_path / "missing"))
         assert success is False
-        assert "Access denied" in error
+        assert error
 
     @patch("subprocess.run")
-    def test_create_junction_success(self, mock_run):
-        """create_junction returns True on success."""
-        mock_run.return_value = MagicMock(returncode=0, stdout="Junction created", stderr="")
-        success, output = create_junction(r"C:\junction", r"C:\target")
+    def test_create_junction_success(self, mock_run, tmp_path):
+        """create_junction returns True on success without spawning a shell."""
+        (tmp_path / "target").mkdir()
+        success, output = create_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
         assert success is True
         assert "Junction created" in output
-        mock_run.assert_called_once()
-        assert "mklink /J" in mock_run.call_args[0][0]
+        mock_run.assert_not_called()
 
-    @patch("subprocess.run")
-    def test_create_junction_failure(self, mock_run):
+    def test_create_junction_failure(self, tmp_path):
         """create_junction returns False with error on failure."""
-        mock_run.return_value = MagicMock(returncode=1, stdout="", stderr="Cannot create")
-        success, output = create_junction(r"C:\junction", r"C:\target")
+        (tmp_path / "junction").mkdir()
+        success, output = create_junction(str(tmp_path / "junction"), str(tmp_path))
         assert success is False
-        assert "Cannot create" in output
+        assert output
+
+    def test_redirect_junction_success(self, tmp_path):
+        """redirect_junction swaps an existing junction to a new target."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "a"))
+        success, output = redirect_junction(str(tmp_path / "junction"), str(tmp_path / "b"))
+        assert success, output
+        assert get_junction_target(str(tmp_path / "junction")).endswith(str(tmp_path / "b"))
+
+    def test_redirect_junction_failure(self, tmp_path):
+        """redirect_junction returns False when the target cannot be linked."""
+        (tmp_path / "a").mkdir()
+        create_junction(str(tmp_path / "junction"), str(tmp_path / "a"))
+        with patch("os.replace", side_effect=OSError("denied")), \
+                patch("os.rename", side_effect=OSError("denied")):
+            success, output = redirect_junction(str(tmp_path / "junction"), str(tmp_path))
+        assert success is False
+        assert "denied" in output
+        assert get_junction_target(str(tmp_path / "junction")).endswith(str(tmp_path / "a"))
+
+    def test_create_junction_path_with_quotes(self, tmp_path):
+        """Paths containing quotes work, since nothing goes through a shell."""
+        target = tmp_path / 'say "hi"'
+        target.mkdir()
+        success, output = create_junction(str(tmp_path / 'link "x"'), str(target))
+        assert success, output
+        assert get_junction_target(str(tmp_path / 'link "x"')) == str(target)
 
 
 class TestJunctionIntegration:
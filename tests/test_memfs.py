@@ -0,0 +1,191 @@
+"""Tests for the in-memory filesystem backend."""
+
+import errno
+import os
+import random
+
+import pytest
+
+from win_quick_shuttle import junctions, links, main
+from win_quick_shuttle.memfs import MemoryBackend
+
+
+@pytest.fixture
+def fs():
+    """A MemoryBackend installed as the active backend, with /work/a and /work/b."""
+    backend = MemoryBackend()
+    backend.makedirs("/work/a")
+    backend.makedirs("/work/b")
+    old = links.set_backend(backend)
+    yield backend
+    links.set_backend(old)
+
+
+class TestMemoryFilesystem:
+    """The backend behaves like the real calls it replaces."""
+
+    def test_probe_kinds(self, fs):
+        """probe() tells directories, links, files and missing paths apart."""
+        fs.create("/work/j", "/work/a")
+        fs.add_file("/work/f.txt")
+        assert fs.probe("/work/a").kind == links.KIND_DIR
+        assert fs.probe("/work/j").kind == links.KIND_LINK
+        assert fs.probe("/work/j").target == "/work/a"
+        assert fs.probe("/work/j", read_target=False).target is None
+        assert fs.probe("/work/f.txt").kind == links.KIND_OTHER
+        assert fs.probe("/work/nope").kind == links.KIND_MISSING
+
+    def test_link_kind_junction(self):
+        """link_kind lets the backend report links as Windows junctions."""
+        fs = MemoryBackend(link_kind=links.KIND_JUNCTION)
+        fs.makedirs("/t")
+        fs.create("/j", "/t")
+        assert fs.probe("/j").kind == links.KIND_JUNCTION
+        assert fs.probe("/j").is_link
+
+    def test_junction_targets_are_prefixed(self):
+        """Junction targets are stored prefixed, as Windows reports them, and read back plain."""
+        fs = MemoryBackend(link_kind=links.KIND_JUNCTION)
+        fs.makedirs("/t")
+        fs.create("/j", "/t")
+        assert fs.readlink("/j") == links.EXTENDED_PREFIX + os.path.normpath("/t")
+        assert fs.probe("/j").target == os.path.normpath("/t")
+        assert fs.read("/j") == os.path.normpath("/t")
+        assert fs.isdir("/j")
+
+    def test_isdir_follows_links(self, fs):
+        """isdir() and exists() follow links; a dangling link does not exist."""
+        fs.create("/work/j", "/work/a")
+        fs.create("/work/dangling", "/work/gone")
+        assert fs.isdir("/work/j")
+        assert not fs.exists("/work/dangling")
+        assert fs.probe("/work/dangling").is_link
+
+    def test_paths_through_links(self, fs):
+        """Paths beneath a link resolve through it."""
+        fs.create("/work/j", "/work/a")
+        fs.makedirs("/work/j/inner")
+        assert fs.isdir("/work/a/inner")
+        assert fs.probe("/work/j/inner").kind == links.KIND_DIR
+
+    def test_errors_match_os(self, fs):
+        """Failures raise the same OSError subclasses as the real calls."""
+        fs.create("/work/j", "/work/a")
+        with pytest.raises(FileExistsError):
+            fs.create("/work/j", "/work/b")
+        with pytest.raises(FileExistsError):
+            fs.makedirs("/work/a")
+        with pytest.raises(FileNotFoundError):
+            fs.create("/missing/j", "/work/a")
+        with pytest.raises(FileNotFoundError):
+            fs.remove("/work/nope")
+        with pytest.raises(IsADirectoryError):
+            fs.remove("/work/a")
+        with pytest.raises(IsADirectoryError):
+            fs.replace("/work/a", "/work/b")
+
+    def test_link_loop(self, fs):
+        """A link loop neither exists nor hangs."""
+        fs.create("/work/x", "/work/y")
+        fs.create("/work/y", "/work/x")
+        assert not fs.exists("/work/x")
+        assert not fs.isdir("/work/x")
+
+
+class TestFaultInjection:
+    """Injected failures and latency."""
+
+    def test_fail_next_call(self, fs):
+        """fail() raises on the next call only, then the operation works again."""
+        fs.create("/work/j", "/work/a")
+        fs.fail("remove")
+        with pytest.raises(OSError) as info:
+            fs.remove("/work/j")
+        assert info.value.errno == errno.EIO
+        fs.remove("/work/j")
+        assert not fs.probe("/work/j").exists
+
+    def test_fail_only_matching_path(self, fs):
+        """A fault tied to a path leaves other paths alone."""
+        fs.fail("create", path="/work/j2", times=2)
+        fs.create("/work/j1", "/work/a")
+        for _ in range(2):
+            with pytest.raises(OSError):
+                fs.create("/work/j2", "/work/a")
+        fs.create("/work/j2", "/work/a")
+
+    def test_latency(self, fs, monkeypatch):
+        """latency makes the operation sleep first."""
+        slept = []
+        monkeypatch.setattr("time.sleep", slept.append)
+        fs.latency["probe"] = 0.25
+        fs.probe("/work/a")
+        assert slept == [0.25]
+
+    def test_failed_remove_in_point_to(self, fs):
+        """A failed remove surfaces in the point-to work as the handler reports it."""
+        fs.create("/work/j", "/work/a")
+        fs.fail("remove")
+        success, message, state = main._work_point_to("/work/j", "/work/b", False)
+        assert success is False
+        assert message.startswith("Failed to remove junction:")
+        assert state.target == "/work/a"
+
+    def test_failed_replace_keeps_old_link(self, fs):
+        """A failed atomic redirect leaves the junction where it was."""
+        fs.create("/work/j", "/work/a")
+        fs.fail("replace")
+        success, message, state = main._work_point_to("/work/j", "/work/b", True)
+        assert success is False
+        assert message.startswith("Failed to redirect junction:")
+        assert state.target == "/work/a"
+
+    def test_failed_unlink(self, fs):
+        """A failed remove surfaces in the unlink work."""
+        fs.create("/work/j", "/work/a")
+        fs.fail("remove", error=PermissionError(errno.EACCES, "Access is denied"))
+        success, message, state = main._work_unlink("/work/j")
+        assert success is False
+        assert message == "Failed to remove junction: Access is denied"
+        assert state.is_link
+
+    def test_create_folder_failure(self, fs):
+        """A failed makedirs surfaces in the create-folder work."""
+        fs.fail("makedirs")
+        success, message = main._work_create_folder("/work/new")
+        assert success is False
+        assert message.startswith("Failed to create folder:")
+        assert main._work_create_folder("/work/new") == (True, "Created: /work/new")
+        assert main._work_create_folder("/work/new") == (True, "Folder already exists")
+
+
+class TestFuzz:
+    """Random point/unlink sequences checked against a simple model."""
+
+    @pytest.mark.parametrize("atomic", [True, False])
+    def test_point_unlink_sequences(self, fs, atomic):
+        """Every operation's outcome and the resulting link match the model."""
+        rng = random.Random(1234)
+        junction_paths = ["/work/j0", "/work/j1", "/work/a/j2"]
+        targets = ["/work/a", "/work/b", "/work/missing"]
+        fs.add_file("/work/file")
+        targets.append("/work/file")
+        model = {}
+
+        for step in range(20000):
+            junction = rng.choice(junction_paths)
+            if rng.random() < 0.6:
+                target = rng.choice(targets)
+                success, message = junctions.point_junction(junction, target, atomic)
+                expected = target in ("/work/a", "/work/b")
+                assert success is expected, (step, message)
+                if success:
+                    model[junction] = target
+            else:
+                success, message = junctions.unlink_junction(junction)
+                assert success is (junction in model), (step, message)
+                model.pop(junction, None)
+
+            state = fs.probe(junction)
+            assert state.target == model.get(junction), step
+            assert state.is_link is (junction in model), step
@@ -0,0 +1,261 @@
+"""Tests for moving target contents between folders."""
+
+import errno
+import json
+import os
+
+import pytest
+
+from win_quick_shuttle import junctions, migrate
+
+
+def make_source(root):
+    """Create a source folder with nested files of several sizes."""
+    (root / "sub" / "deeper").mkdir(parents=True)
+    (root / "a.txt").write_bytes(b"alpha")
+    (root / "empty.bin").write_bytes(b"")
+    (root / "sub" / "big.bin").write_bytes(os.urandom(3 * 1024 + 17))
+    (root / "sub" / "deeper" / "c.txt").write_bytes(b"charlie")
+    return {
+        "a.txt": b"alpha",
+        "empty.bin": b"",
+        os.path.join("sub", "big.bin"): (root / "sub" / "big.bin").read_bytes(),
+        os.path.join("sub", "deeper", "c.txt"): b"charlie",
+    }
+
+
+def read_tree(root):
+    """Return {relpath: bytes} for every file under root."""
+    result = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            result[os.path.relpath(path, root)] = open(path, "rb").read()
+    return result
+
+
+@pytest.fixture
+def across(monkeypatch):
+    """Treat every pair of folders as being on different volumes, with small chunks."""
+    monkeypatch.setattr(migrate, "same_volume", lambda a, b: False)
+    monkeypatch.setattr(migrate, "CHUNK_SIZE", 1024)
+
+
+class TestSameVolume:
+    """Moves within one volume."""
+
+    def test_renames_top_level_items(self, tmp_path):
+        """Every top-level item is renamed into the destination."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success, message
+        assert message == "Moved 3 items"
+        assert read_tree(tmp_path / "dst") == expected
+        assert os.listdir(tmp_path / "src") == []
+
+    def test_conflicts_left_in_place(self, tmp_path):
+        """An item already present in the destination is not overwritten."""
+        make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        (tmp_path / "dst" / "a.txt").write_bytes(b"keep me")
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success
+        assert "1 left in place" in message
+        assert (tmp_path / "dst" / "a.txt").read_bytes() == b"keep me"
+        assert (tmp_path / "src" / "a.txt").read_bytes() == b"alpha"
+
+    def test_overlap_refused(self, tmp_path):
+        """Moving a folder into its own subfolder is refused."""
+        make_source(tmp_path / "src")
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "src" / "sub"))
+        assert success is False
+        assert message == "Source and destination overlap"
+
+
+@pytest.fixture(params=["same", "across"])
+def volumes(request, monkeypatch):
+    """Run a test as a same-volume move and as a cross-volume copy."""
+    if request.param == "across":
+        monkeypatch.setattr(migrate, "same_volume", lambda a, b: False)
+        monkeypatch.setattr(migrate, "CHUNK_SIZE", 1024)
+    return request.param
+
+
+class TestConflicts:
+    """One conflict rule for renames and copies."""
+
+    def test_existing_folder_is_merged(self, tmp_path, volumes):
+        """A folder the destination already has is merged; only the clashing file stays behind."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst" / "sub" / "deeper").mkdir(parents=True)
+        (tmp_path / "dst" / "sub" / "deeper" / "c.txt").write_bytes(b"keep me")
+        (tmp_path / "dst" / "sub" / "own.txt").write_bytes(b"own")
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success, message
+        clash = os.path.join("sub", "deeper", "c.txt")
+        assert f"1 left in place (already in destination): {clash}" in message
+        expected.update({clash: b"keep me", os.path.join("sub", "own.txt"): b"own"})
+        assert read_tree(tmp_path / "dst") == expected
+        assert read_tree(tmp_path / "src") == {clash: b"charlie"}
+
+    def test_folder_blocked_by_file(self, tmp_path, volumes):
+        """A folder whose name is taken by a file in the destination stays whole in the source."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        (tmp_path / "dst" / "sub").write_bytes(b"a file")
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success, message
+        assert "1 left in place (already in destination): sub" in message
+        assert read_tree(tmp_path / "dst") == {"a.txt": b"alpha", "empty.bin": b"", "sub": b"a file"}
+        assert read_tree(tmp_path / "src") == {k: v for k, v in expected.items() if k.startswith("sub")}
+
+
+class TestAcrossVolumes:
+    """Chunked, parallel copies."""
+
+    def test_copies_and_removes_sources(self, tmp_path, across):
+        """Files are copied in chunks, then removed from the source with their folders."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        updates = []
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"),
+                                           progress=updates.append, verify=True)
+        assert success, message
+        assert read_tree(tmp_path / "dst") == expected
+        assert os.listdir(tmp_path / "src") == []
+        assert updates[-1]["files_done"] == updates[-1]["files_total"] == 4
+        assert updates[-1]["bytes_done"] == updates[-1]["bytes_total"] == sum(map(len, expected.values()))
+
+    @pytest.mark.parametrize("missing", [["copy_file_range"], ["copy_file_range", "sendfile"]])
+    def test_fallback_copies(self, tmp_path, across, monkeypatch, missing):
+        """Without copy_file_range (or sendfile) the copy still succeeds."""
+        for name in missing:
+            monkeypatch.delattr(os, name, raising=False)
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success, message
+        assert read_tree(tmp_path / "dst") == expected
+
+    def test_copy_file_range_exdev_falls_back(self, tmp_path, across, monkeypatch):
+        """copy_file_range refusing a cross-device copy falls back to the next method."""
+        def refuse(*args):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        monkeypatch.setattr(os, "copy_file_range", refuse, raising=False)
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"))
+        assert success, message
+        assert read_tree(tmp_path / "dst") == expected
+
+    def test_checksum_mismatch_keeps_source(self, tmp_path, across, monkeypatch):
+        """With verify, a corrupted copy is discarded and the source kept."""
+        make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        real_sha256 = migrate._sha256
+        monkeypatch.setattr(migrate, "_sha256",
+                            lambda path: "bad" if path.endswith(migrate.PART_SUFFIX) else real_sha256(path))
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), verify=True)
+        assert success is False
+        assert "checksum mismatch" in message
+        assert (tmp_path / "src" / "a.txt").exists()
+        assert not (tmp_path / "dst" / "a.txt").exists()
+
+    def test_resume_from_journal(self, tmp_path, across, monkeypatch):
+        """An interrupted move resumes from the journal, copying only what is left."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        journal = tmp_path / migrate.JOURNAL_FILENAME
+
+        real_copy = migrate._copy_range
+        copied = []
+
+        def flaky_copy(src, dst, offset, length):
+            if src.endswith("big.bin") and offset == 2048:
+                raise OSError(errno.EIO, "device went away")
+            copied.append((os.path.basename(src), offset))
+            real_copy(src, dst, offset, length)
+
+        monkeypatch.setattr(migrate, "_copy_range", flaky_copy)
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), str(journal))
+        assert success is False
+        assert journal.exists()
+        assert (tmp_path / "src" / "sub" / "big.bin").exists()
+
+        copied.clear()
+        monkeypatch.setattr(migrate, "_copy_range",
+                            lambda *args: (copied.append((os.path.basename(args[0]), args[2])), real_copy(*args)))
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), str(journal))
+        assert success, message
+        assert copied == [("big.bin", 2048)]
+        assert read_tree(tmp_path / "dst") == expected
+        assert not journal.exists()
+
+    @pytest.mark.parametrize("damage", ["part_deleted", "part_truncated", "source_changed"])
+    def test_resume_recopies_when_journal_is_stale(self, tmp_path, across, monkeypatch, damage):
+        """Journaled chunks are copied again if the part file lost them or the source changed."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        journal = tmp_path / migrate.JOURNAL_FILENAME
+        big = tmp_path / "src" / "sub" / "big.bin"
+        part = tmp_path / "dst" / "sub" / ("big.bin" + migrate.PART_SUFFIX)
+
+        real_copy = migrate._copy_range
+
+        def flaky_copy(src, dst, offset, length):
+            if src.endswith("big.bin") and offset == 3072:
+                raise OSError(errno.EIO, "device went away")
+            real_copy(src, dst, offset, length)
+
+        monkeypatch.setattr(migrate, "_copy_range", flaky_copy)
+        success, _ = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), str(journal))
+        assert success is False and part.exists()
+
+        if damage == "part_deleted":
+            part.unlink()
+        elif damage == "part_truncated":
+            with open(part, "r+b") as f:
+                f.truncate(1024)
+        else:
+            expected[os.path.join("sub", "big.bin")] = data = os.urandom(len(big.read_bytes()))
+            big.write_bytes(data)
+            os.utime(big, ns=(1, 1))
+        monkeypatch.setattr(migrate, "_copy_range", real_copy)
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), str(journal))
+        assert success, message
+        assert read_tree(tmp_path / "dst") == expected
+        assert not big.exists()
+
+    def test_journal_for_other_move_is_ignored(self, tmp_path, across):
+        """A journal left by a different move does not affect this one."""
+        expected = make_source(tmp_path / "src")
+        (tmp_path / "dst").mkdir()
+        journal = tmp_path / migrate.JOURNAL_FILENAME
+        journal.write_text(json.dumps({"source": "/elsewhere", "dest": "/other"}) + "\n"
+                           + json.dumps({"file": "a.txt"}) + "\n")
+        success, message = migrate.migrate(str(tmp_path / "src"), str(tmp_path / "dst"), str(journal))
+        assert success, message
+        assert read_tree(tmp_path / "dst") == expected
+
+
+class TestPointAndMigrate:
+    """Repointing with the contents following along."""
+
+    def test_moves_old_target_contents(self, tmp_path):
+        """Files in the old target end up in the new one after the repoint."""
+        expected = make_source(tmp_path / "a")
+        (tmp_path / "b").mkdir()
+        junction = str(tmp_path / "junction")
+        junctions.point_junction(junction, str(tmp_path / "a"))
+        success, message = migrate.point_and_migrate(junction, str(tmp_path / "b"))
+        assert success, message
+        assert junctions.get_junction_target(junction) == str(tmp_path / "b")
+        assert read_tree(tmp_path / "b") == expected
+
+    def test_no_old_target(self, tmp_path):
+        """With no previous junction there is nothing to move."""
+        (tmp_path / "b").mkdir()
+        success, message = migrate.point_and_migrate(str(tmp_path / "junction"), str(tmp_path / "b"))
+        assert success
+        assert message == "Junction created successfully"
@@ -0,0 +1,100 @@
+"""Tests for multi-junction profiles."""
+
+import os
+from unittest.mock import patch
+
+from win_quick_shuttle import junctions, locks, profiles
+
+
+def make_links(tmp_path, count):
+    """Return a {junction: target} map of count links with existing targets."""
+    link_map = {}
+    for i in range(count):
+        target = tmp_path / f"target{i}"
+        target.mkdir()
+        link_map[str(tmp_path / f"junction{i}")] = str(target)
+    return link_map
+
+
+class TestStorage:
+    """Tests for profiles.json storage."""
+
+    def test_missing_file_means_no_profiles(self, tmp_path):
+        """load_profiles returns {} when the file does not exist."""
+        assert profiles.load_profiles(str(tmp_path / "profiles.json")) == {}
+
+    def test_save_and_load(self, tmp_path):
+        """Profiles round-trip through the file."""
+        path = str(tmp_path / "profiles.json")
+        data = {}
+        profiles.set_profile_link(data, "a", "/j1", "/t1")
+        profiles.set_profile_link(data, "a", "/j2", "/t2")
+        profiles.save_profiles(path, data)
+        assert profiles.load_profiles(path) == {"a": {"/j1": "/t1", "/j2": "/t2"}}
+
+
+class TestApply:
+    """Tests for applying profiles."""
+
+    def test_apply_switches_all_links(self, tmp_path):
+        """Every junction in the profile ends up pointing at its target."""
+        link_map = make_links(tmp_path, 20)
+        success, results = profiles.apply_profile({"p": link_map}, "p")
+        assert success
+        assert [r["junction"] for r in results] == list(link_map)
+        for junction_path, target_path in link_map.items():
+            assert junctions.get_junction_target(junction_path).endswith(target_path)
+
+    def test_apply_sequential_matches_parallel(self, tmp_path):
+        """workers=1 gives the same results as the pool."""
+        link_map = make_links(tmp_path, 5)
+        results = profiles.apply_links(link_map, workers=1)
+        assert all(r["ok"] for r in results)
+
+    def test_unknown_profile(self):
+        """Applying an unknown profile fails with no results."""
+        assert profiles.apply_profile({}, "nope") == (False, [])
+
+    def test_partial_failure_without_rollback(self, tmp_path):
+        """Without rollback, the links that could switch stay switched."""
+        link_map = make_links(tmp_path, 3)
+        link_map[str(tmp_path / "bad")] = str(tmp_path / "missing-target")
+        success, results = profiles.apply_profile({"p": link_map}, "p")
+        assert not success
+        assert [r["ok"] for r in results] == [True, True, True, False]
+        assert os.path.lexists(tmp_path / "junction0")
+
+    def test_rollback_restores_previous_state(self, tmp_path):
+        """With rollback, switched links go back to their old target or vanish."""
+        old = tmp_path / "old"
+        old.mkdir()
+        link_map = make_links(tmp_path, 3)
+        junctions.create_junction(str(tmp_path / "junction0"), str(old))
+        link_map[str(tmp_path / "bad")] = str(tmp_path / "missing-target")
+
+        success, results = profiles.apply_profile({"p": link_map}, "p", rollback=True)
+
+        assert not success
+        assert all(r.get("rolled_back") for r in results if r["ok"])
+        assert junctions.get_junction_target(str(tmp_path / "junction0")).endswith(str(old))
+        assert not os.path.lexists(tmp_path / "junction1")
+        assert not os.path.lexists(tmp_path / "junction2")
+
+    def test_previous_target_probed_under_the_lock(self, tmp_path):
+        """The target recorded for rollback is read while the link's switch lock is held."""
+        link_map = make_links(tmp_path, 2)
+        old = tmp_path / "old"
+        old.mkdir()
+        for junction_path in link_map:
+            junctions.create_junction(junction_path, str(old))
+        held = []
+        real_probe = junctions.probe
+
+        def probe(path, *args, **kwargs):
+            held.append(locks._local_lock(path).locked())
+            return real_probe(path, *args, **kwargs)
+
+        with patch.object(junctions, "probe", probe):
+            success, results = profiles.apply_profile({"p": link_map}, "p")
+        assert success and held and all(held)
+        assert [r["previous"] for r in results] == [str(old), str(old)]
@@ -0,0 +1,146 @@
+"""Tests for multi-hop link resolution."""
+
+import os
+
+import pytest
+
+from win_quick_shuttle import junctions, links, resolver
+from win_quick_shuttle.memfs import MemoryBackend
+
+
+@pytest.fixture
+def fs():
+    """A MemoryBackend installed as the active backend, with /work/a and /work/b."""
+    backend = MemoryBackend()
+    backend.makedirs("/work/a/inner")
+    backend.makedirs("/work/b")
+    old = links.set_backend(backend)
+    yield backend
+    links.set_backend(old)
+
+
+class TestFollow:
+    """Chains, loops and dead ends."""
+
+    def test_plain_directory(self, fs):
+        """A path that is not a link resolves to itself."""
+        assert resolver.Resolver().resolve("/work/a") == ("/work/a", [], [])
+
+    def test_single_hop(self, fs):
+        """One link resolves to its target with no problems."""
+        fs.create("/j", "/work/a")
+        assert resolver.Resolver().resolve("/j") == ("/work/a", [], [])
+
+    def test_chain(self, fs):
+        """A link to a link is followed to the end."""
+        fs.create("/j2", "/work/a")
+        fs.create("/j1", "/j2")
+        assert resolver.Resolver().resolve("/j1") == ("/work/a", ["/j2"], ["chain"])
+
+    def test_into_link(self, fs):
+        """A target beneath a linked folder is followed through the link."""
+        fs.create("/j2", "/work/a")
+        fs.create("/j1", "/j2/inner")
+        assert resolver.Resolver().resolve("/j1") == ("/work/a/inner", ["/j2"], ["into-link"])
+
+    def test_dangling(self, fs):
+        """A chain ending at a missing path is dangling."""
+        fs.create("/j2", "/work/gone")
+        fs.create("/j1", "/j2")
+        assert resolver.Resolver().resolve("/j1") == (None, ["/j2"], ["chain", "dangling"])
+
+    def test_cycle(self, fs):
+        """A chain that comes back to a link it followed is a cycle."""
+        fs.create("/j1", "/j2")
+        fs.create("/j2", "/j1")
+        resolved, chain, problems = resolver.Resolver().resolve("/j1")
+        assert resolved is None
+        assert chain == ["/j2"]
+        assert problems == ["chain", "cycle"]
+
+    def test_follow_hypothetical_target(self, fs):
+        """follow() answers what would happen if a link pointed somewhere."""
+        fs.create("/j", "/work/a")
+        fs.create("/back", "/j")
+        assert "cycle" in resolver.Resolver().follow("/j", "/back")[2]
+        assert "cycle" in resolver.Resolver().follow("/j", "/j/inner")[2]
+        assert resolver.Resolver().follow("/j", "/work/b") == ("/work/b", [], [])
+
+
+class TestMemo:
+    """Memoized hops and their invalidation."""
+
+    def test_repeat_costs_one_lookup_per_hop(self, fs, monkeypatch):
+        """A second resolution revalidates each memoized path without reading links."""
+        fs.create("/j2", "/work/a")
+        fs.create("/j1", "/j2")
+        memo = resolver.Resolver()
+        memo.resolve("/j1")
+        probes = []
+        real_probe = fs.probe
+        monkeypatch.setattr(fs, "probe", lambda path, read_target=True:
+                            probes.append((path, read_target)) or real_probe(path, read_target))
+        assert memo.resolve("/j1") == ("/work/a", ["/j2"], ["chain"])
+        assert probes == [("/j1", False), ("/j2", False), ("/work", False), ("/work/a", False)]
+
+    def test_repointed_link_is_noticed(self, fs):
+        """A link replaced since it was memoized is read again."""
+        fs.create("/j", "/work/a")
+        memo = resolver.Resolver()
+        assert memo.resolve("/j")[0] == "/work/a"
+        fs.replace("/j", "/work/b")
+        assert memo.resolve("/j")[0] == "/work/b"
+
+    def test_racy_entries_are_reread(self, tmp_path):
+        """On a real filesystem a just-created link is not trusted by mtime alone."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        link = str(tmp_path / "j")
+        os.symlink(tmp_path / "a", link)
+        memo = resolver.Resolver()
+        assert memo.resolve(link)[0] == str(tmp_path / "a")
+        links.get_backend().replace(link, str(tmp_path / "b"))
+        assert memo.resolve(link)[0] == str(tmp_path / "b")
+
+    def test_snapshot_trusts_memo(self, fs):
+        """A snapshot resolver does not probe a memoized path again."""
+        fs.create("/j", "/work/a")
+        memo = resolver.Resolver(snapshot=True)
+        memo.resolve("/j")
+        fs.calls.clear()
+        memo.resolve("/j")
+        assert fs.calls["probe"] == 0
+
+    def test_backend_change_drops_memo(self, fs):
+        """Installing another backend forgets what the old one reported."""
+        fs.create("/j", "/work/a")
+        memo = resolver.Resolver(snapshot=True)
+        memo.resolve("/j")
+        other = MemoryBackend()
+        other.makedirs("/work/b")
+        other.create("/j", "/work/b")
+        links.set_backend(other)
+        assert memo.resolve("/j")[0] == "/work/b"
+
+
+class TestJunctions:
+    """Resolution in the junction helpers."""
+
+    def test_point_refuses_loop(self, fs):
+        """Pointing a junction at a link back to itself is refused."""
+        fs.create("/j", "/work/a")
+        fs.create("/back", "/j")
+        success, message = junctions.point_junction("/j", "/back")
+        assert success is False
+        assert message == "Target path leads back to the junction"
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_status_shows_chain(self, fs):
+        """junction_status reports the final directory and the hops to it."""
+        fs.create("/hop", "/work/a")
+        fs.create("/j", "/hop")
+        status = junctions.junction_status("/j")
+        assert status["target"] == "/hop"
+        assert status["resolved"] == "/work/a"
+        assert status["chain"] == ["/hop"]
+        assert status["problems"] == ["chain"]
@@ -0,0 +1,239 @@
+"""Tests for the arrival router."""
+
+import os
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, migrate, router
+
+
+def write(path, size=10):
+    """Create a file of size bytes."""
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A junction pointing at an arrivals folder, plus empty destination folders."""
+    arrivals = tmp_path / "arrivals"
+    arrivals.mkdir()
+    junction = str(tmp_path / "ACTIVE")
+    junctions.point_junction(junction, str(arrivals))
+    return {"root": tmp_path, "junction": junction, "arrivals": arrivals}
+
+
+def make_router(site, rules, **kwargs):
+    """A Router over site's junction that treats every file as complete at once."""
+    return router.Router(site["junction"], router.compile_rules(rules), settle=0, **kwargs)
+
+
+class TestRules:
+    """Compiling and matching rules."""
+
+    def test_first_match_wins(self):
+        """Rules are tried in order."""
+        matcher = router.compile_rules([
+            {"glob": "invoice-*", "to": "/inv"},
+            {"ext": ["pdf", ".PS"], "to": "/docs"},
+            {"to": "/rest"},
+        ])
+        assert matcher.match("invoice-7.pdf", 1).to == "/inv"
+        assert matcher.match("Paper.PDF", 1).to == "/docs"
+        assert matcher.match("paper.ps", 1).to == "/docs"
+        assert matcher.match("model.stl", 1).to == "/rest"
+
+    def test_sizes(self):
+        """min_size and max_size bound the file size inclusively."""
+        matcher = router.compile_rules([{"min_size": 100, "max_size": 200, "to": "/mid"}])
+        assert matcher.match("a", 100).to == "/mid"
+        assert matcher.match("a", 200).to == "/mid"
+        assert matcher.match("a", 99) is None
+        assert matcher.match("a", 201) is None
+
+    def test_no_match(self):
+        """A file no rule matches gets None."""
+        matcher = router.compile_rules([{"ext": "pdf", "to": "/docs"}])
+        assert matcher.match("notes.txt", 1) is None
+        assert matcher.match("noext", 1) is None
+
+    def test_source_read_only_when_needed(self, monkeypatch):
+        """The download source is read lazily, at most once per file."""
+        reads = []
+        monkeypatch.setattr(router, "download_source", lambda path: reads.append(path) or "https://github.com/x")
+        matcher = router.compile_rules([
+            {"ext": "pdf", "to": "/docs"},
+            {"source": "*gitlab*", "to": "/lab"},
+            {"source": "*github.com*", "to": "/hub"},
+        ])
+        assert matcher.match("a.pdf", 1, "/in/a.pdf").to == "/docs"
+        assert reads == []
+        assert matcher.match("a.zip", 1, "/in/a.zip").to == "/hub"
+        assert reads == ["/in/a.zip"]
+
+    @pytest.mark.parametrize("rules, message", [
+        ({"to": "/x"}, "must be a list"),
+        ([{"ext": "pdf"}], "Rule 1: no destination"),
+        ([{"to": "/x"}, {"extension": "pdf", "to": "/y"}], "Rule 2: unknown key 'extension'"),
+        ([{"min_size": "1MB", "to": "/x"}], "whole number"),
+    ])
+    def test_bad_rules(self, rules, message):
+        """Bad rules are refused with a message naming the rule."""
+        with pytest.raises(ValueError, match=message):
+            router.compile_rules(rules)
+
+    def test_rule_into_watched_folder_is_refused(self, site):
+        """A rule whose destination is the junction's own target is refused."""
+        with pytest.raises(ValueError, match="Rule 1: destination is the folder being routed"):
+            router.compile_rules([{"to": str(site["arrivals"])}], watched=[site["junction"]])
+
+
+class TestScan:
+    """Routing files that arrive in the target."""
+
+    def test_routes_by_rule(self, site):
+        """Matching files move; unmatched ones stay."""
+        write(site["arrivals"] / "a.pdf")
+        write(site["arrivals"] / "b.stl")
+        write(site["arrivals"] / "c.txt")
+        docs, printing = str(site["root"] / "docs"), str(site["root"] / "printing")
+        r = make_router(site, [{"ext": "pdf", "to": docs}, {"ext": "stl", "to": printing}])
+        results = r.scan()
+        assert sorted(os.path.basename(result["to"]) for result in results) == ["a.pdf", "b.stl"]
+        assert os.listdir(docs) == ["a.pdf"]
+        assert os.listdir(printing) == ["b.stl"]
+        assert os.listdir(site["arrivals"]) == ["c.txt"]
+        assert r.stats["routed"] == 2 and r.stats["unmatched"] == 1
+        assert r.scan() == [] and r.stats["unmatched"] == 1     # Not matched again until it changes
+
+    def test_partial_downloads_wait(self, site):
+        """Files with a partial-download suffix are left alone."""
+        write(site["arrivals"] / "big.iso.crdownload")
+        r = make_router(site, [{"to": str(site["root"] / "all")}])
+        assert r.scan() == []
+        os.rename(site["arrivals"] / "big.iso.crdownload", site["arrivals"] / "big.iso")
+        assert [os.path.basename(result["to"]) for result in r.scan()] == ["big.iso"]
+
+    def test_settle(self, site):
+        """A file moves only once it has stopped changing for settle seconds."""
+        write(site["arrivals"] / "a.pdf")
+        r = router.Router(site["junction"], router.compile_rules([{"to": str(site["root"] / "all")}]),
+                          settle=0.2)
+        assert r.scan() == []
+        write(site["arrivals"] / "a.pdf", 20)         # Still growing
+        time.sleep(0.25)
+        assert r.scan() == []
+        time.sleep(0.25)
+        assert len(r.scan()) == 1
+
+    def test_closed_files_skip_settle(self, site):
+        """A file its writer has closed moves at once."""
+        write(site["arrivals"] / "a.pdf")
+        r = router.Router(site["junction"], router.compile_rules([{"to": str(site["root"] / "all")}]),
+                          settle=60)
+        assert len(r.scan(closed={"a.pdf"})) == 1
+
+    def test_name_clash_gets_a_number(self, site):
+        """A name taken in the destination gets a numbered one; nothing is replaced."""
+        dest = site["root"] / "docs"
+        dest.mkdir()
+        write(dest / "a.pdf", 1)
+        write(site["arrivals"] / "a.pdf", 5)
+        [result] = make_router(site, [{"to": str(dest)}]).scan()
+        assert result["to"] == str(dest / "a (2).pdf")
+        assert os.path.getsize(dest / "a.pdf") == 1
+
+    def test_follows_repoint(self, site):
+        """After a repoint the new target is routed."""
+        other = site["root"] / "other"
+        other.mkdir()
+        write(other / "x.pdf")
+        r = make_router(site, [{"to": str(site["root"] / "all")}])
+        r.scan()
+        junctions.point_junction(site["junction"], str(other))
+        assert [os.path.basename(result["file"]) for result in r.scan()] == ["x.pdf"]
+        assert r.target == str(other)
+
+    def test_cross_volume_copies(self, site, monkeypatch):
+        """Across volumes each file is copied, then removed."""
+        monkeypatch.setattr(migrate, "same_volume", lambda a, b: False)
+        for i in range(5):
+            write(site["arrivals"] / f"{i}.bin", 1000 + i)
+        dest = site["root"] / "far"
+        results = make_router(site, [{"to": str(dest)}]).scan()
+        assert all(result["ok"] for result in results)
+        assert sorted(os.listdir(dest)) == [f"{i}.bin" for i in range(5)]
+        assert os.path.getsize(dest / "4.bin") == 1004
+        assert os.listdir(site["arrivals"]) == []
+
+    def test_burst(self, site):
+        """Thousands of small files are routed in one scan."""
+        for i in range(2000):
+            write(site["arrivals"] / f"{i}.{'pdf' if i % 2 else 'stl'}", 1)
+        r = make_router(site, [{"ext": "pdf", "to": str(site["root"] / "docs")},
+                               {"ext": "stl", "to": str(site["root"] / "printing")}])
+        assert len(r.scan()) == 2000
+        assert len(os.listdir(site["root"] / "docs")) == 1000
+        assert os.listdir(site["arrivals"]) == []
+
+    def test_rule_into_target_leaves_file(self, site):
+        """A file whose rule points back at the target it is in stays put, once."""
+        write(site["arrivals"] / "a.pdf")
+        r = make_router(site, [{"to": str(site["arrivals"])}])
+        assert r.scan() == [] and r.scan() == []
+        assert os.listdir(site["arrivals"]) == ["a.pdf"]
+        assert r.stats["unmatched"] == 1
+
+    def test_missing_junction(self, tmp_path):
+        """With no junction there is nothing to route."""
+        r = router.Router(str(tmp_path / "nope"), router.compile_rules([{"to": str(tmp_path)}]), settle=0)
+        assert r.scan() == []
+
+
+class TestBackground:
+    """Routing from the router's own thread."""
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_routes_new_files(self, site, use_inotify):
+        """Files written while the router runs are moved."""
+        moved = []
+        dest = site["root"] / "docs"
+        r = router.Router(site["junction"], router.compile_rules([{"ext": "pdf", "to": str(dest)}]),
+                          settle=0.1, interval=0.05, on_move=moved.append, use_inotify=use_inotify).start()
+        try:
+            for i in range(20):
+                write(site["arrivals"] / f"{i}.pdf")
+            deadline = time.monotonic() + 5
+            while len(moved) < 20 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            r.stop()
+        assert len(moved) == 20 and all(result["ok"] for result in moved)
+        assert len(os.listdir(dest)) == 20
+
+    def test_idle_router_does_not_relist(self, site):
+        """With inotify an idle router lists the target once, yet still sees arrivals and repoints."""
+        moved = []
+        dest = site["root"] / "docs"
+        r = router.Router(site["junction"], router.compile_rules([{"ext": "pdf", "to": str(dest)}]),
+                          settle=0.1, interval=0.02, on_move=moved.append).start()
+        try:
+            time.sleep(0.3)
+            assert r.stats["listings"] == 1
+            write(site["arrivals"] / "a.pdf")
+            deadline = time.monotonic() + 5
+            while not moved and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert r.stats["listings"] == 1
+
+            other = site["root"] / "other"
+            other.mkdir()
+            write(other / "b.pdf")
+            junctions.point_junction(site["junction"], str(other))
+            while len(moved) < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            r.stop()
+        assert [os.path.basename(result["file"]) for result in moved] == ["a.pdf", "b.pdf"]
+        assert r.stats["listings"] == 2
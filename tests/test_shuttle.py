@@ -0,0 +1,165 @@
+"""Tests for the embeddable Shuttle API."""
+
+import threading
+
+import pytest
+
+from win_quick_shuttle import links
+from win_quick_shuttle.memfs import MemoryBackend
+from win_quick_shuttle.shuttle import Shuttle, SwitchError
+
+
+@pytest.fixture
+def fs():
+    """A MemoryBackend installed as the active backend, with /work/a, /work/b and /work/c."""
+    backend = MemoryBackend()
+    for name in "abc":
+        backend.makedirs(f"/work/{name}")
+    old = links.set_backend(backend)
+    yield backend
+    links.set_backend(old)
+
+
+class TestPointAndUnlink:
+    """Plain switching."""
+
+    def test_point_unlink_status(self, fs):
+        """point creates and repoints, status reports, unlink removes."""
+        shuttle = Shuttle("/j")
+        assert shuttle.point("/work/a") == (True, "Junction created successfully")
+        assert shuttle.point("/work/b") == (True, "Junction redirected successfully")
+        assert shuttle.status()["target"] == "/work/b"
+        assert shuttle.target == "/work/b"
+        assert shuttle.unlink() == (True, "Junction removed")
+        assert shuttle.target is None
+        assert not fs.probe("/j").exists
+
+    def test_point_missing_target_fails(self, fs):
+        """An invalid target is refused."""
+        assert Shuttle("/j").point("/work/nope") == (False, "Target path does not exist")
+
+    def test_same_target_is_free(self, fs):
+        """Pointing at the current target probes once and changes nothing."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        fs.calls.clear()
+        assert shuttle.point("/work/a") == (True, "Junction already points there")
+        assert dict(fs.calls) == {"probe": 1}
+
+    def test_same_target_is_free_for_prefixed_junction(self):
+        """A junction whose target is reported with the extended-length prefix still matches."""
+        fs = MemoryBackend(link_kind=links.KIND_JUNCTION)
+        fs.makedirs("/work/a")
+        old = links.set_backend(fs)
+        try:
+            shuttle = Shuttle("/j")
+            shuttle.point("/work/a")
+            assert fs.readlink("/j").startswith(links.EXTENDED_PREFIX)
+            fs.calls.clear()
+            assert shuttle.point("/work/a") == (True, "Junction already points there")
+            assert dict(fs.calls) == {"probe": 1}
+        finally:
+            links.set_backend(old)
+
+    def test_validated_targets_are_cached(self, fs):
+        """A target seen before costs one probe plus the switch itself."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        shuttle.point("/work/b")
+        fs.calls.clear()
+        shuttle.point("/work/a")
+        assert dict(fs.calls) == {"probe": 1, "replace": 1}
+
+    def test_forget_revalidates(self, fs):
+        """After forget(), a target that has gone away is refused again."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        shuttle.point("/work/b")
+        fs.nodes.pop("/work/a")
+        shuttle.forget()
+        assert shuttle.point("/work/a") == (False, "Target path does not exist")
+
+
+class TestPointedAt:
+    """Scoped redirects."""
+
+    def test_restores_previous_target(self, fs):
+        """The junction goes back to its previous target when the block ends."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        with shuttle.pointed_at("/work/b"):
+            assert fs.probe("/j").target == "/work/b"
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_restores_on_error(self, fs):
+        """The previous target is restored even when the body raises."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        with pytest.raises(ValueError):
+            with shuttle.pointed_at("/work/b"):
+                raise ValueError
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_removes_junction_it_created(self, fs):
+        """A scope that created the junction removes it again."""
+        with Shuttle("/j").pointed_at("/work/a"):
+            assert fs.probe("/j").is_link
+        assert not fs.probe("/j").exists
+
+    def test_nested_scopes(self, fs):
+        """Nested scopes unwind in order."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        with shuttle.pointed_at("/work/b"):
+            with shuttle.pointed_at("/work/c"):
+                assert fs.probe("/j").target == "/work/c"
+            assert fs.probe("/j").target == "/work/b"
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_failed_switch_raises(self, fs):
+        """A scope whose switch fails raises SwitchError and runs no body."""
+        with pytest.raises(SwitchError, match="does not exist"):
+            with Shuttle("/j").pointed_at("/work/nope"):
+                pytest.fail("body ran")
+
+
+class TestThreads:
+    """Sharing one Shuttle between threads."""
+
+    def test_scopes_take_turns(self, fs):
+        """Each thread sees its own target for the whole of its scope."""
+        shuttle = Shuttle("/j")
+        shuttle.point("/work/a")
+        seen = []
+
+        def job(target):
+            for _ in range(50):
+                with shuttle.pointed_at(target):
+                    seen.append(fs.probe("/j").target == target)
+
+        threads = [threading.Thread(target=job, args=(t,)) for t in ("/work/b", "/work/c")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(seen) == 100 and all(seen)
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_real_links_from_threads(self, tmp_path):
+        """Concurrent point() calls on real links all succeed and leave a link."""
+        for name in "ab":
+            (tmp_path / name).mkdir()
+        shuttle = Shuttle(str(tmp_path / "j"))
+        results = []
+
+        def flip(i):
+            for n in range(20):
+                results.append(shuttle.point(str(tmp_path / "ab"[(i + n) % 2]))[0])
+
+        threads = [threading.Thread(target=flip, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(results)
+        assert links.probe(str(tmp_path / "j")).is_link
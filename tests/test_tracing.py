@@ -0,0 +1,95 @@
+"""Tests for opt-in operation tracing."""
+
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, tracing
+
+
+@pytest.fixture
+def tracing_on(tmp_path):
+    """Enable tracing into a file for the test; yields the file path."""
+    path = str(tmp_path / "trace.jsonl")
+    tracing.clear()
+    tracing.enable(path)
+    yield path
+    tracing.disable()
+    tracing.clear()
+
+
+class TestSpans:
+    """Tests for span recording."""
+
+    def test_disabled_records_nothing(self, tmp_path):
+        """With tracing off, traced calls leave no spans."""
+        tracing.clear()
+        junctions.probe(str(tmp_path))
+        assert tracing.spans() == []
+
+    def test_spans_go_to_ring_and_file(self, tracing_on, tmp_path):
+        """A traced helper records a span in memory and in the JSON-lines file."""
+        junctions.probe(str(tmp_path))
+        tracing.disable()
+        assert [s["op"] for s in tracing.spans()] == ["probe"]
+        assert [s["op"] for s in tracing.load_spans(tracing_on)] == ["probe"]
+
+    def test_outcomes(self, tracing_on, tmp_path):
+        """(False, ...) results are failures and exceptions are errors."""
+        junctions.remove_junction(str(tmp_path / "missing"))
+
+        @tracing.traced("explodes")
+        def explodes():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            explodes()
+        outcomes = {s["op"]: s["outcome"] for s in tracing.spans()}
+        assert outcomes == {"remove_junction": "fail", "explodes": "error"}
+
+    def test_point_to_breaks_down_into_steps(self, tracing_on, tmp_path):
+        """A point_junction call records its validation and switch steps."""
+        (tmp_path / "target").mkdir()
+        junctions.point_junction(str(tmp_path / "junction"), str(tmp_path / "target"))
+        ops = {s["op"] for s in tracing.spans()}
+        assert {"point_junction", "probe", "check_point_to", "switch_junction",
+                "create_junction"} <= ops
+
+    def test_ring_is_bounded(self, tracing_on):
+        """The ring buffer keeps only the newest RING_SIZE spans."""
+        for _ in range(tracing.RING_SIZE + 10):
+            tracing.record("x", 0.0, 0.0, "ok")
+        assert len(tracing.spans()) == tracing.RING_SIZE
+
+
+class TestStats:
+    """Tests for the per-operation summary."""
+
+    def test_stats_percentiles(self):
+        """stats reports count, failures and percentiles per op."""
+        span_list = [{"op": "a", "ms": float(ms), "outcome": "ok"} for ms in range(1, 101)]
+        span_list.append({"op": "b", "ms": 5.0, "outcome": "fail"})
+        summary = tracing.stats(span_list)
+        assert summary["a"]["count"] == 100
+        assert summary["a"]["p50_ms"] == 51.0
+        assert summary["a"]["p99_ms"] == 100.0
+        assert summary["b"] == {"count": 1, "failures": 1, "p50_ms": 5.0,
+                                "p95_ms": 5.0, "p99_ms": 5.0}
+
+
+def test_disabled_overhead_is_negligible():
+    """A traced call with tracing off costs well under a microsecond extra."""
+    def plain():
+        return None
+
+    wrapped = tracing.traced("plain")(plain)
+    calls = 200000
+
+    def per_call(fn):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        return (time.perf_counter() - start) / calls
+
+    overhead = min(per_call(wrapped) for _ in range(3)) - min(per_call(plain) for _ in range(3))
+    assert overhead < 1e-6
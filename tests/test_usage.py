@@ -0,0 +1,148 @@
+"""Tests for the background disk-usage scanner."""
+
+import os
+import time
+
+from win_quick_shuttle import links, usage
+
+
+def make_tree(root):
+    """Create a small tree: 3 files, 60 bytes, in 3 directories."""
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "top.bin").write_bytes(b"x" * 10)
+    (root / "a" / "mid.bin").write_bytes(b"x" * 20)
+    (root / "a" / "b" / "deep.bin").write_bytes(b"x" * 30)
+
+
+def measure(root, cache, **kwargs):
+    """Run a Scanner to completion on this thread; returns (scanner, reports)."""
+    reports = []
+    scanner = usage.Scanner(str(root), cache, reports.append, **kwargs)
+    scanner.run()
+    return scanner, reports
+
+
+class TestScanner:
+    """Measuring folder trees."""
+
+    def test_totals(self, tmp_path):
+        """The final report adds up every file in the tree and shows free space."""
+        make_tree(tmp_path)
+        scanner, reports = measure(tmp_path, usage.UsageCache())
+        final = reports[-1]
+        assert final["done"] is True
+        assert (final["bytes"], final["files"], final["dirs"]) == (60, 3, 3)
+        assert final["free"] > 0
+        assert scanner.stats["listed"] == 3
+
+    def test_partial_reports_stream(self, tmp_path):
+        """Running totals are reported before the scan finishes, and never go down."""
+        make_tree(tmp_path)
+        _, reports = measure(tmp_path, usage.UsageCache(), progress_interval=0)
+        assert reports[0]["done"] is False and reports[0]["free"] is not None
+        assert len(reports) > 2
+        totals = [report["bytes"] for report in reports]
+        assert totals == sorted(totals)
+
+    def test_missing_folder(self, tmp_path):
+        """A folder that does not exist gives one report with an error."""
+        _, reports = measure(tmp_path / "nope", usage.UsageCache())
+        assert len(reports) == 1
+        assert reports[0]["error"] and reports[0]["done"]
+
+    def test_links_are_not_followed(self, tmp_path):
+        """A link inside the tree is not measured."""
+        make_tree(tmp_path / "tree")
+        (tmp_path / "other").mkdir()
+        (tmp_path / "other" / "big.bin").write_bytes(b"x" * 1000)
+        os.symlink(str(tmp_path / "other"), str(tmp_path / "tree" / "link"))
+        _, reports = measure(tmp_path / "tree", usage.UsageCache())
+        assert reports[-1]["bytes"] == 60
+
+    def test_junctions_are_not_followed(self, tmp_path, monkeypatch):
+        """A junction inside the tree is not measured, whatever DirEntry supports."""
+        make_tree(tmp_path)
+        (tmp_path / "mounted").mkdir()
+        (tmp_path / "mounted" / "big.bin").write_bytes(b"x" * 1000)
+        entry_kind = links.entry_kind
+
+        def windows_entry_kind(entry):
+            # What a Windows scandir reports for a junction: a directory with a mount-point tag
+            if entry.name == "mounted":
+                return links.KIND_JUNCTION
+            return entry_kind(entry)
+
+        monkeypatch.setattr(links, "entry_kind", windows_entry_kind)
+        _, reports = measure(tmp_path, usage.UsageCache())
+        assert reports[-1]["bytes"] == 60
+
+    def test_cancel(self, tmp_path):
+        """A cancelled scan reports nothing more and does not save."""
+        make_tree(tmp_path / "tree")
+        cache = usage.UsageCache(str(tmp_path / "usage.json"))
+        reports = []
+        scanner = usage.Scanner(str(tmp_path / "tree"), cache, reports.append)
+        scanner.cancel()
+        scanner.start().finished.wait(5)
+        assert reports == []
+        assert not os.path.exists(tmp_path / "usage.json")
+
+    def test_background_thread(self, tmp_path):
+        """start() scans on a thread; stop() after it finishes is harmless."""
+        make_tree(tmp_path)
+        reports = []
+        scanner = usage.Scanner(str(tmp_path), usage.UsageCache(), reports.append).start()
+        assert scanner.finished.wait(5)
+        scanner.stop()
+        assert reports[-1]["bytes"] == 60
+
+
+class TestCache:
+    """Reusing per-directory totals."""
+
+    def test_unchanged_dirs_are_reused(self, tmp_path):
+        """A second scan with a saved cache lists only the directory that changed."""
+        make_tree(tmp_path / "tree")
+        cache_path = str(tmp_path / "usage.json")
+        measure(tmp_path / "tree", usage.UsageCache(cache_path))
+
+        (tmp_path / "tree" / "a" / "new.bin").write_bytes(b"x" * 5)
+        os.utime(tmp_path / "tree" / "a", ns=(time.time_ns() + 10**9,) * 2)
+        scanner, reports = measure(tmp_path / "tree", usage.UsageCache(cache_path))
+        assert scanner.stats == {"listed": 1, "reused": 2, "errors": 0}
+        assert (reports[-1]["bytes"], reports[-1]["files"]) == (65, 4)
+
+    def test_removed_dirs_are_pruned(self, tmp_path):
+        """Directories that disappeared are dropped from the cache when it is saved."""
+        make_tree(tmp_path / "tree")
+        cache = usage.UsageCache()
+        measure(tmp_path / "tree", cache)
+        os.remove(tmp_path / "tree" / "a" / "b" / "deep.bin")
+        os.rmdir(tmp_path / "tree" / "a" / "b")
+        measure(tmp_path / "tree", cache)
+        assert str(tmp_path / "tree" / "a" / "b") not in cache.dirs
+        assert str(tmp_path / "tree" / "a") in cache.dirs
+
+    def test_bad_cache_file_is_ignored(self, tmp_path):
+        """A corrupt cache file is treated as empty."""
+        make_tree(tmp_path / "tree")
+        (tmp_path / "usage.json").write_text("{not json")
+        _, reports = measure(tmp_path / "tree", usage.UsageCache(str(tmp_path / "usage.json")))
+        assert reports[-1]["bytes"] == 60
+
+
+class TestDescribe:
+    """Formatting reports for the GUI."""
+
+    def test_format_bytes(self):
+        """Sizes use decimal units with one decimal place."""
+        assert usage.format_bytes(999) == "999 bytes"
+        assert usage.format_bytes(1500) == "1.5 KB"
+        assert usage.format_bytes(2_500_000_000) == "2.5 GB"
+
+    def test_describe(self):
+        """A running scan says so; a finished one does not."""
+        report = {"bytes": 1500, "files": 1234, "free": 2_000_000, "done": False, "error": None}
+        assert usage.describe(report) == "1.5 KB in 1,234 files  ·  2.0 MB free  (measuring...)"
+        report["done"] = True
+        assert "measuring" not in usage.describe(report)
@@ -0,0 +1,224 @@
+"""Tests for the write-ahead switch journal."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, links, wal
+from win_quick_shuttle.memfs import MemoryBackend
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Journaling enabled into a file under tmp_path."""
+    yield wal.enable(str(tmp_path / wal.WAL_FILENAME))
+    wal.disable()
+
+
+@pytest.fixture(params=[links.KIND_LINK, links.KIND_JUNCTION])
+def fs(request):
+    """A MemoryBackend installed as the active backend, with /work/a, /work/b and /work/c.
+
+    Runs once with symlinks and once with junctions, whose targets Windows
+    reports with the extended-length prefix.
+    """
+    backend = MemoryBackend(link_kind=request.param)
+    for name in "abc":
+        backend.makedirs(f"/work/{name}")
+    old = links.set_backend(backend)
+    yield backend
+    links.set_backend(old)
+
+
+def read_lines(path):
+    """Return the journal file's records."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestJournal:
+    """Appending, group commit and reading back."""
+
+    def test_intent_then_outcome(self, journal):
+        """begin() writes the intent, end() the outcome, both under one id."""
+        switch_id = journal.begin("/j", "/a", "/b")
+        journal.end(switch_id, "done")
+        intent, outcome = read_lines(journal.path)
+        assert intent["junction"] == "/j" and intent["old"] == "/a" and intent["new"] == "/b"
+        assert outcome == {"id": switch_id, "outcome": "done"}
+
+    def test_outcomes_are_not_fsynced(self, journal):
+        """Only intents wait for an fsync."""
+        switch_id = journal.begin("/j", None, "/b")
+        journal.end(switch_id, "done")
+        assert journal.fsyncs == 1
+
+    def test_group_commit(self, journal, monkeypatch):
+        """Concurrent intents share fsyncs."""
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            time.sleep(0.02)
+            real_fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        threads = [threading.Thread(target=journal.begin, args=(f"/j{i}", None, "/t")) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(read_lines(journal.path)) == 16
+        assert journal.fsyncs < 16
+
+    def test_outcome_written_after_a_sync(self, journal, monkeypatch):
+        """An outcome queued while another thread syncs is written once that sync ends."""
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            time.sleep(0.1)
+            real_fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        leader = threading.Thread(target=journal.begin, args=("/j1", None, "/t"))
+        leader.start()
+        time.sleep(0.03)
+        journal.end("other", "done")
+        leader.join()
+        assert {"id": "other", "outcome": "done"} in read_lines(journal.path)
+
+    def test_ids_do_not_repeat_across_runs(self, tmp_path):
+        """A journal reopened by a later process (same pid, fresh counters) never reuses an id."""
+        path = str(tmp_path / wal.WAL_FILENAME)
+        ids = []
+        for _ in range(2):
+            run = wal.Journal(path)
+            ids.append(run.begin("/j", None, "/a"))
+            run.close()
+        assert ids[0] != ids[1]
+        assert len(wal.switches(wal.Journal(path).records())) == 2
+
+    def test_torn_line_is_skipped(self, journal):
+        """A half-written last line does not stop records() from reading the rest."""
+        journal.begin("/j", None, "/b")
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"id": "x", "junc')
+        assert [r["junction"] for r in journal.records()] == ["/j"]
+
+    def test_rotation_keeps_previous_generation(self, tmp_path, monkeypatch):
+        """A journal over MAX_BYTES is rotated, and records() still reads both files."""
+        path = str(tmp_path / wal.WAL_FILENAME)
+        first = wal.Journal(path)
+        first.begin("/j", None, "/a")
+        first.close()
+        monkeypatch.setattr(wal, "MAX_BYTES", 10)
+        second = wal.Journal(path)
+        second.begin("/j", "/a", "/b")
+        second.close()
+        assert os.path.exists(path + ".1")
+        assert [r["new"] for r in second.records()] == ["/a", "/b"]
+
+    def test_disabled_is_a_no_op(self):
+        """With journaling off, begin() and end() record nothing."""
+        assert wal.begin("/j", None, "/a") is None
+        wal.end(None, "done")
+
+
+class TestSwitching:
+    """Switches write to the journal."""
+
+    def test_point_and_unlink_are_journaled(self, fs, journal):
+        """point_junction and unlink_junction record done switches."""
+        junctions.point_junction("/j", "/work/a")
+        junctions.point_junction("/j", "/work/b")
+        junctions.unlink_junction("/j")
+        history = list(wal.switches(journal.records()).values())
+        assert [(s["old"], s["new"], s["outcome"]) for s in history] == [
+            (None, "/work/a", "done"), ("/work/a", "/work/b", "done"), ("/work/b", None, "done")]
+
+    def test_failure_that_changed_nothing(self, fs, journal):
+        """A switch that fails before touching the junction is recorded as failed."""
+        junctions.point_junction("/j", "/work/a")
+        fs.fail("replace")
+        assert junctions.point_junction("/j", "/work/b")[0] is False
+        assert list(wal.switches(journal.records()).values())[-1]["outcome"] == "failed"
+
+    def test_half_done_switch_stays_unfinished(self, fs, journal):
+        """A remove-then-create that lost its link is left for recovery."""
+        junctions.point_junction("/j", "/work/a")
+        fs.fail("create")
+        assert junctions.point_junction("/j", "/work/b", atomic=False)[0] is False
+        assert not fs.probe("/j").exists
+        assert list(wal.unfinished(journal.records())) == [os.path.normcase(os.path.abspath("/j"))]
+
+
+class TestRecovery:
+    """Settling switches a crash interrupted."""
+
+    def test_lost_link_is_restored(self, fs, journal):
+        """A crash between remove and create is rolled back to the old target."""
+        junctions.point_junction("/j", "/work/a")
+        journal.begin("/j", "/work/a", "/work/b")
+        fs.remove("/j")
+        messages = junctions.recover_switches()
+        assert messages == ["/j: restored link to /work/a"]
+        assert fs.probe("/j").target == "/work/a"
+        assert list(wal.switches(journal.records()).values())[-1]["outcome"] == "rolled-back"
+        assert junctions.recover_switches() == []
+
+    def test_finished_switch_is_completed(self, fs, journal):
+        """A crash after the switch but before its outcome was written is completed."""
+        journal.begin("/j", None, "/work/a")
+        fs.create("/j", "/work/a")
+        junctions.recover_switches()
+        assert list(wal.switches(journal.records()).values())[-1]["outcome"] == "completed"
+
+    def test_unstarted_switch_is_failed(self, fs, journal):
+        """A crash before the switch leaves the junction alone."""
+        junctions.point_junction("/j", "/work/a")
+        journal.begin("/j", "/work/a", "/work/b")
+        junctions.recover_switches()
+        assert fs.probe("/j").target == "/work/a"
+        assert list(wal.switches(journal.records()).values())[-1]["outcome"] == "failed"
+
+    def test_foreign_change_is_abandoned(self, fs, journal):
+        """A junction repointed by someone else since is left as it is."""
+        junctions.point_junction("/j", "/work/a")
+        journal.begin("/j", "/work/a", "/work/b")
+        fs.replace("/j", "/work/c")
+        junctions.recover_switches()
+        assert fs.probe("/j").target == "/work/c"
+        assert list(wal.switches(journal.records()).values())[-1]["outcome"] == "abandoned"
+
+
+class TestUndo:
+    """Stepping back through switches."""
+
+    def test_undo_steps_back(self, fs, journal):
+        """Each undo reverses the switch before the last one undone."""
+        for target in ("/work/a", "/work/b", "/work/c"):
+            junctions.point_junction("/j", target)
+        assert junctions.undo_switch("/j") == (True, "Undone: /j -> /work/b")
+        assert junctions.undo_switch("/j") == (True, "Undone: /j -> /work/a")
+        assert junctions.undo_switch("/j") == (True, "Undone: /j -> (no junction)")
+        assert not fs.probe("/j").exists
+        assert junctions.undo_switch("/j") == (False, "Nothing to undo")
+
+    def test_undo_after_unlink_recreates(self, fs, journal):
+        """Undoing an unlink puts the link back."""
+        junctions.point_junction("/j", "/work/a")
+        junctions.unlink_junction("/j")
+        assert junctions.undo_switch("/j")[0]
+        assert fs.probe("/j").target == "/work/a"
+
+    def test_undo_refuses_after_outside_change(self, fs, journal):
+        """A junction changed outside the journal is not undone."""
+        junctions.point_junction("/j", "/work/a")
+        fs.replace("/j", "/work/c")
+        assert junctions.undo_switch("/j") == (False, "Junction has changed since its last recorded switch")
+
+    def test_undo_without_journal(self, fs):
+        """undo needs the journal."""
+        assert junctions.undo_switch("/j")[0] is False
@@ -0,0 +1,185 @@
+"""Tests for the junction watcher."""
+
+import queue
+import sys
+import threading
+import time
+
+import pytest
+
+from win_quick_shuttle import junctions, watcher
+
+
+def make_targets(tmp_path, *names):
+    """Create target directories and return their paths."""
+    paths = []
+    for name in names:
+        (tmp_path / name).mkdir()
+        paths.append(str(tmp_path / name))
+    return paths
+
+
+def next_change(changes, timeout=2.0):
+    """Return the next reported probe, or fail."""
+    try:
+        return changes.get(timeout=timeout)
+    except queue.Empty:
+        raise AssertionError("no change reported")
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def mode(request):
+    """Run each test with inotify (where available) and with polling."""
+    if request.param == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux-only")
+    return request.param
+
+
+def start_watcher(path, changes, mode):
+    """Start a fast-polling watcher in the requested mode."""
+    return watcher.JunctionWatcher(path, changes.put, debounce=0.02, min_interval=0.02,
+                                   max_interval=0.2, use_inotify=(mode == "inotify")).start()
+
+
+class TestWatcher:
+    """Tests for change detection in both modes."""
+
+    def test_reports_repoint_and_removal(self, tmp_path, mode):
+        """Repointing and removing the junction are each reported once."""
+        a, b = make_targets(tmp_path, "a", "b")
+        junction = str(tmp_path / "junction")
+        junctions.create_junction(junction, a)
+        changes = queue.Queue()
+        w = start_watcher(junction, changes, mode)
+        try:
+            assert w.mode == mode
+            junctions.redirect_junction(junction, b)
+            assert next_change(changes).target == b
+            junctions.remove_junction(junction)
+            assert next_change(changes).kind == "missing"
+        finally:
+            w.stop()
+
+    def test_burst_is_coalesced(self, tmp_path, mode):
+        """A burst of switches yields few reports, the last matching the final state."""
+        a, b = make_targets(tmp_path, "a", "b")
+        junction = str(tmp_path / "junction")
+        junctions.create_junction(junction, a)
+        changes = queue.Queue()
+        w = start_watcher(junction, changes, mode)
+        try:
+            for i in range(100):
+                junctions.redirect_junction(junction, (a, b)[i % 2])
+            time.sleep(0.3)
+        finally:
+            w.stop()
+        reports = []
+        while not changes.empty():
+            reports.append(changes.get_nowait())
+        assert len(reports) < 20
+        assert reports and reports[-1].target == b
+
+    def test_no_reports_without_changes(self, tmp_path, mode):
+        """An untouched junction is never reported, even with unrelated activity nearby."""
+        a, = make_targets(tmp_path, "a")
+        junction = str(tmp_path / "junction")
+        junctions.create_junction(junction, a)
+        changes = queue.Queue()
+        w = start_watcher(junction, changes, mode)
+        try:
+            (tmp_path / "unrelated.txt").write_text("x")
+            time.sleep(0.2)
+        finally:
+            w.stop()
+        assert changes.empty()
+
+
+class TestPollingBackoff:
+    """Tests for the adaptive polling interval."""
+
+    def test_interval_backs_off_when_idle(self, tmp_path):
+        """The polling interval grows to max_interval while nothing changes."""
+        w = watcher.JunctionWatcher(str(tmp_path / "junction"), lambda state: None,
+                                    min_interval=0.01, max_interval=0.05, use_inotify=False)
+        w.start()
+        try:
+            time.sleep(0.4)
+            assert w.interval == 0.05
+        finally:
+            w.stop()
+
+
+class TestWatchGroup:
+    """Tests for watching many junctions from one thread."""
+
+    def start_group(self, mode):
+        """Start a fast-polling group in the requested mode."""
+        return watcher.WatchGroup(debounce=0.02, min_interval=0.02, max_interval=0.2,
+                                  use_inotify=(mode == "inotify")).start()
+
+    def test_each_junction_reports_to_its_own_callback(self, tmp_path, mode):
+        """Junctions in the same and in different folders are reported separately."""
+        a, b = make_targets(tmp_path, "a", "b")
+        (tmp_path / "other").mkdir()
+        paths = [str(tmp_path / "j1"), str(tmp_path / "j2"), str(tmp_path / "other" / "j3")]
+        group = self.start_group(mode)
+        try:
+            assert group.mode == mode
+            changes = {}
+            for path in paths:
+                junctions.create_junction(path, a)
+                changes[path] = queue.Queue()
+                group.add(path, changes[path].put)
+            junctions.redirect_junction(paths[1], b)
+            junctions.redirect_junction(paths[2], b)
+            assert next_change(changes[paths[1]]).target == b
+            assert next_change(changes[paths[2]]).target == b
+            time.sleep(0.1)
+            assert changes[paths[0]].empty()
+        finally:
+            group.stop()
+
+    def test_removed_junction_is_not_reported(self, tmp_path, mode):
+        """After remove() a junction's changes are not reported; its neighbour's still are."""
+        a, b = make_targets(tmp_path, "a", "b")
+        first, second = str(tmp_path / "j1"), str(tmp_path / "j2")
+        group = self.start_group(mode)
+        try:
+            junctions.create_junction(first, a)
+            junctions.create_junction(second, a)
+            gone, kept = queue.Queue(), queue.Queue()
+            group.remove(group.add(first, gone.put))
+            group.add(second, kept.put)
+            junctions.redirect_junction(first, b)
+            junctions.redirect_junction(second, b)
+            assert next_change(kept).target == b
+            time.sleep(0.1)
+            assert gone.empty()
+        finally:
+            group.stop()
+
+    def test_one_thread_for_many_junctions(self, tmp_path, mode):
+        """Watching twenty junctions starts one thread."""
+        a, = make_targets(tmp_path, "a")
+        before = threading.active_count()
+        group = self.start_group(mode)
+        try:
+            for i in range(20):
+                junctions.create_junction(str(tmp_path / f"j{i}"), a)
+                group.add(str(tmp_path / f"j{i}"), lambda state: None)
+            assert threading.active_count() == before + 1
+        finally:
+            group.stop()
+
+
+def test_watch_generator(tmp_path):
+    """watch() yields probes as the junction changes."""
+    a, = make_targets(tmp_path, "a")
+    junction = str(tmp_path / "junction")
+    stream = watcher.watch(junction, min_interval=0.02, debounce=0.02)
+    try:
+        junctions.create_junction(junction, a)
+        next_probe = next(stream)
+        assert next_probe.target == a
+    finally:
+        stream.close()
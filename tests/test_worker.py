@@ -0,0 +1,152 @@
+"""Tests for the GUI background worker."""
+
+import threading
+import time
+
+import pytest
+
+from win_quick_shuttle import worker
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: records after() callbacks for pump()."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, fn, *args):
+        self.scheduled.append((fn, args))
+
+
+def pump(widget, timeout=2.0):
+    """Run scheduled callbacks, like a Tk loop, until the worker is idle."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        while widget.scheduled:
+            fn, args = widget.scheduled.pop(0)
+            fn(*args)
+        if worker.idle():
+            return
+        time.sleep(0.001)
+    raise AssertionError("worker did not finish")
+
+
+@pytest.fixture
+def widget():
+    """A started worker driven by a FakeWidget."""
+    fake = FakeWidget()
+    worker.start(fake)
+    yield fake
+    worker.stop()
+
+
+class TestWorker:
+    """Tests for submit/poll/deliver."""
+
+    def test_result_delivered_on_polling_thread(self, widget):
+        """fn runs on the worker; on_done runs on the thread that pumps."""
+        seen = {}
+
+        def work():
+            seen["work_thread"] = threading.current_thread()
+            return 42
+
+        def done(result):
+            seen["done_thread"] = threading.current_thread()
+            seen["result"] = result
+
+        worker.submit(work, (), done)
+        pump(widget)
+        assert seen["result"] == 42
+        assert seen["work_thread"] is not threading.main_thread()
+        assert seen["done_thread"] is threading.main_thread()
+
+    def test_results_arrive_in_order(self, widget):
+        """With one worker, results are delivered in submission order."""
+        results = []
+        for i in range(20):
+            worker.submit(lambda n: n, (i,), results.append)
+        pump(widget)
+        assert results == list(range(20))
+
+    def test_exception_reraised_on_poll(self, widget):
+        """An exception from fn surfaces on the Tk thread."""
+        def fail():
+            raise ValueError("boom")
+
+        worker.submit(fail, (), lambda result: None)
+        with pytest.raises(ValueError):
+            pump(widget)
+
+    def test_exception_passed_to_on_error(self, widget):
+        """With on_error, an exception from fn goes to it instead of on_done, and later jobs still run."""
+        errors, results = [], []
+
+        def fail():
+            raise OSError("share went away")
+
+        worker.submit(fail, (), results.append, lane="s", on_error=errors.append)
+        worker.submit(lambda: "next", (), results.append, lane="s", on_error=errors.append)
+        pump(widget)
+        assert [str(e) for e in errors] == ["share went away"]
+        assert results == ["next"]
+
+    def test_no_polling_when_idle(self, widget):
+        """Nothing is scheduled on the Tk loop once all jobs are delivered."""
+        worker.submit(lambda: None, (), lambda result: None)
+        pump(widget)
+        assert widget.scheduled == []
+
+    def test_stop_drops_results(self, widget):
+        """Results of jobs submitted before stop() are never delivered."""
+        release = threading.Event()
+        delivered = []
+        worker.submit(release.wait, (), delivered.append)
+        worker.stop()
+        release.set()
+
+        fresh = FakeWidget()
+        worker.start(fresh)
+        worker.submit(lambda: "new", (), delivered.append)
+        pump(fresh)
+        assert delivered == ["new"]
+
+
+class TestLanes:
+    """Tests for per-lane ordering on a shared pool."""
+
+    @pytest.fixture
+    def pool(self):
+        """A started four-thread worker driven by a FakeWidget."""
+        fake = FakeWidget()
+        worker.start(fake, workers=4)
+        yield fake
+        worker.stop()
+
+    def test_lane_runs_in_order(self, pool):
+        """Jobs in one lane run one at a time, in submission order."""
+        running = []
+        order = []
+
+        def job(n):
+            running.append(n)
+            time.sleep(0.001)
+            overlap = len(running) > 1
+            running.remove(n)
+            return n, overlap
+
+        for i in range(20):
+            worker.submit(job, (i,), order.append, lane="a")
+        pump(pool)
+        assert [n for n, _ in order] == list(range(20))
+        assert not any(overlap for _, overlap in order)
+
+    def test_lanes_run_side_by_side(self, pool):
+        """A job blocked in one lane does not hold up another lane."""
+        release = threading.Event()
+        delivered = []
+        worker.submit(release.wait, (5,), lambda result: delivered.append("slow"), lane="a")
+        worker.submit(lambda: None, (), lambda result: delivered.append("a2"), lane="a")
+        worker.submit(lambda: None, (), lambda result: (delivered.append("b"), release.set()), lane="b")
+        pump(pool)
+        assert delivered == ["b", "slow", "a2"]